@@ -1,267 +1,425 @@
 #!/usr/bin/env python3
 """
-3D Model Analysis Script
-Analyzes GLB files to understand size differences and compression opportunities
-"""
+3D Model Analysis for Phoenix Trailers
+Reports where the bytes of a GLB go without loading it: the file is
+memory-mapped, only the JSON chunk and a few image header bytes are read,
+and the BIN chunk is accounted for from the bufferView table. Per file it
+gives a per-accessor, per-bufferView and per-image byte breakdown,
+vertex/face counts, and the savings glb_quantize / glb_textures would
+likely get. Directories are analyzed in parallel processes.
 
-import os
+    python analyze_3d_models.py                       # every upload, text summary
+    python analyze_3d_models.py models/ --json        # JSON report
+    python analyze_3d_models.py --uploads --csv report.csv
+"""
+import argparse
+import csv
 import json
+import mmap
+import os
 import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-def analyze_glb_structure(file_path):
-    """Analyze the internal structure of a GLB file"""
-    try:
-        with open(file_path, 'rb') as f:
-            # Read GLB header (12 bytes)
-            header = f.read(12)
-            magic, version, length = struct.unpack('<4sII', header)
-            
-            if magic != b'glTF':
-                return None
-            
-            print(f"📊 File: {os.path.basename(file_path)}")
-            print(f"   Size: {os.path.getsize(file_path) / (1024*1024):.1f} MB")
-            print(f"   GLB Version: {version}")
-            print(f"   Total Length: {length:,} bytes")
-            
-            # Read chunks
-            chunks = []
-            while f.tell() < length:
-                chunk_header = f.read(8)
-                if len(chunk_header) < 8:
-                    break
-                    
-                chunk_length, chunk_type = struct.unpack('<II', chunk_header)
-                chunk_data = f.read(chunk_length)
-                
-                chunk_info = {
-                    'type': chunk_type,
-                    'type_name': get_chunk_type_name(chunk_type),
-                    'length': chunk_length,
-                    'percentage': (chunk_length / length) * 100
-                }
-                chunks.append(chunk_info)
-                
-                print(f"   Chunk: {chunk_info['type_name']} ({chunk_info['type']:08x})")
-                print(f"     Size: {chunk_length:,} bytes ({chunk_info['percentage']:.1f}%)")
-                
-                # Analyze JSON chunk (scene data)
-                if chunk_type == 0x4E4F534A:  # JSON
-                    try:
-                        json_data = json.loads(chunk_data.decode('utf-8'))
-                        analyze_json_content(json_data)
-                    except:
-                        print(f"     ⚠️ Could not parse JSON content")
-                
-                # Analyze binary chunk (mesh/texture data)
-                elif chunk_type == 0x004E4942:  # BIN
-                    print(f"     📦 Binary data (vertices, indices, textures)")
-            
-            print()
-            return chunks
-            
-    except Exception as e:
-        print(f"❌ Error analyzing {file_path}: {e}")
+import glb_io
+import glb_quantize
+import glb_textures
+import upload_layout
+from glb_io import BIN_CHUNK, COMPONENT_DTYPES, FLOAT, JSON_CHUNK, TYPE_SIZES
+
+DEFAULT_UPLOADS_DIR = Path(__file__).parent / "uploads"
+
+COMPONENT_NAMES = {component: dtype.name for component, dtype in COMPONENT_DTYPES.items()}
+CHUNK_NAMES = {JSON_CHUNK: "JSON", BIN_CHUNK: "BIN"}
+
+# Bytes per element after glb_quantize (vertex elements padded to 4 bytes)
+QUANTIZED_ELEMENT_BYTES = {"positions": 8, "normals": 4, "tangents": 4, "texcoords": 4}
+UINT16_INDEX_LIMIT = 65535
+
+# Rough WebP size relative to the source encoding at the same resolution,
+# for estimates only (glb_textures measures the real thing)
+TEXTURE_MAX_SIZE = glb_textures.DEFAULT_MAX_SIZE
+WEBP_SIZE_RATIO = {"image/png": 0.3, "image/jpeg": 0.7, "image/webp": 1.0}
+
+CSV_FIELDS = ["file", "section", "index", "name", "usage", "detail", "count", "bytes", "estimated_bytes"]
+
+
+def attribute_usage(semantic: str) -> str:
+    if semantic == "POSITION":
+        return "positions"
+    if semantic == "NORMAL":
+        return "normals"
+    if semantic == "TANGENT":
+        return "tangents"
+    if semantic.startswith("TEXCOORD_"):
+        return "texcoords"
+    if semantic.startswith("COLOR_"):
+        return "colors"
+    if semantic.startswith(("JOINTS_", "WEIGHTS_")):
+        return "skin"
+    return "other"
+
+
+def accessor_usages(document: Dict[str, Any]) -> Dict[int, str]:
+    """What each accessor holds, from the places that reference it"""
+    usages: Dict[int, str] = {}
+    for mesh in document.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            for semantic, index in primitive.get("attributes", {}).items():
+                usages.setdefault(index, attribute_usage(semantic))
+            if "indices" in primitive:
+                usages.setdefault(primitive["indices"], "indices")
+            for target in primitive.get("targets", []):
+                for index in target.values():
+                    usages.setdefault(index, "morph")
+    for skin in document.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            usages.setdefault(skin["inverseBindMatrices"], "skin")
+    for animation in document.get("animations", []):
+        for sampler in animation.get("samplers", []):
+            for key in ("input", "output"):
+                if key in sampler:
+                    usages.setdefault(sampler[key], "animation")
+    return usages
+
+
+def image_size(data, offset: int, length: int) -> Optional[Tuple[int, int]]:
+    """(width, height) from a PNG, JPEG or WebP header, reading only the bytes needed"""
+    end = offset + length
+    if length >= 24 and data[offset:offset + 8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack_from(">II", data, offset + 16)
+    if length >= 30 and data[offset:offset + 4] == b"RIFF" and data[offset + 8:offset + 12] == b"WEBP":
+        kind = data[offset + 12:offset + 16]
+        if kind == b"VP8X":
+            width = int.from_bytes(data[offset + 24:offset + 27], "little") + 1
+            height = int.from_bytes(data[offset + 27:offset + 30], "little") + 1
+            return width, height
+        if kind == b"VP8L":
+            bits = int.from_bytes(data[offset + 21:offset + 25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if kind == b"VP8 ":
+            width, height = struct.unpack_from("<HH", data, offset + 26)
+            return width & 0x3FFF, height & 0x3FFF
         return None
+    if length >= 4 and data[offset:offset + 2] == b"\xff\xd8":
+        position = offset + 2
+        # Walk the segment headers up to the first start-of-frame marker
+        while position + 9 <= end:
+            if data[position] != 0xFF:
+                return None
+            marker = data[position + 1]
+            if marker == 0xFF:
+                position += 1
+                continue
+            segment_length = struct.unpack_from(">H", data, position + 2)[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack_from(">HH", data, position + 5)
+                return width, height
+            position += 2 + segment_length
+    return None
+
+
+def _texture_estimate(mime_type: Optional[str], size: Optional[Tuple[int, int]], current: int) -> int:
+    scale = 1.0
+    if size and max(size) > TEXTURE_MAX_SIZE:
+        scale = (TEXTURE_MAX_SIZE / max(size)) ** 2
+    return min(current, int(current * scale * WEBP_SIZE_RATIO.get(mime_type, 1.0)))
+
+
+def _quantization_opportunities(document: Dict[str, Any], accessor_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attribute and index savings glb_quantize would get, from accessor metadata alone"""
+    accessors = document.get("accessors", [])
+    users = glb_quantize.accessor_users(document)
+    opportunities = []
+    seen = set()
+    for mesh_index, mesh in enumerate(document.get("meshes", [])):
+        for primitive_index, primitive in enumerate(mesh.get("primitives", [])):
+            target = f"mesh {mesh.get('name', mesh_index)} / primitive {primitive_index}"
+            if glb_quantize.skip_reason(primitive, users):
+                continue
+            for semantic, index in primitive["attributes"].items():
+                usage = attribute_usage(semantic)
+                accessor = accessors[index]
+                if index in seen or usage not in QUANTIZED_ELEMENT_BYTES or accessor["componentType"] != FLOAT:
+                    continue
+                if usage == "texcoords" and not (accessor.get("min") and min(accessor["min"]) >= -1.0 and max(accessor.get("max", [2.0])) <= 1.0):
+                    continue  # UVs outside [-1, 1] (or unknown bounds) stay float
+                seen.add(index)
+                current = accessor_rows[index]["bytes"]
+                estimated = accessor["count"] * QUANTIZED_ELEMENT_BYTES[usage]
+                opportunities.append({
+                    "kind": "quantize",
+                    "target": target,
+                    "detail": f"{semantic} float -> {'16' if usage in ('positions', 'texcoords') else '8'}-bit",
+                    "bytes": current,
+                    "estimated_bytes": estimated,
+                })
+            indices = primitive.get("indices")
+            vertex_count = accessors[primitive["attributes"]["POSITION"]]["count"]
+            if indices is not None and indices not in seen and accessors[indices]["componentType"] == glb_io.UNSIGNED_INT and vertex_count <= UINT16_INDEX_LIMIT:
+                seen.add(indices)
+                current = accessor_rows[indices]["bytes"]
+                opportunities.append({"kind": "indices", "target": target, "detail": "uint32 -> uint16 indices", "bytes": current, "estimated_bytes": current // 2})
+            elif indices is None:
+                opportunities.append({
+                    "kind": "weld",
+                    "target": target,
+                    "detail": "unindexed triangles: welding shared vertices usually removes most of them",
+                    "bytes": 0,
+                    "estimated_bytes": 0,
+                })
+    return opportunities
+
+
+def analyze_glb_structure(file_path) -> Dict[str, Any]:
+    """
+    Structured report for one GLB. The file is memory-mapped; the BIN chunk
+    is never read except for the first bytes of each embedded image.
+    """
+    path = Path(file_path)
+    file_bytes = path.stat().st_size
+    if file_bytes == 0:
+        raise glb_io.GLBError("Empty file")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        chunks = glb_io.chunk_table(data)
+        json_chunk = next((chunk for chunk in chunks if chunk[0] == JSON_CHUNK), None)
+        if json_chunk is None:
+            raise glb_io.GLBError("GLB has no JSON chunk")
+        document = json.loads(data[json_chunk[1]:json_chunk[1] + json_chunk[2]].decode("utf-8"))
+        bin_chunk = next((chunk for chunk in chunks if chunk[0] == BIN_CHUNK), None)
+        bin_offset = bin_chunk[1] if bin_chunk else 0
+        bin_bytes = bin_chunk[2] if bin_chunk else 0
 
-def get_chunk_type_name(chunk_type):
-    """Get human-readable name for chunk type"""
-    chunk_names = {
-        0x4E4F534A: "JSON",
-        0x004E4942: "BIN"
+        views = document.get("bufferViews", [])
+        images = []
+        texture_users: Dict[int, List[int]] = {}
+        for texture_index, texture in enumerate(document.get("textures", [])):
+            sources = [texture.get("source")] + [extension.get("source") for extension in texture.get("extensions", {}).values() if isinstance(extension, dict)]
+            for source in sources:
+                if source is not None:
+                    texture_users.setdefault(source, []).append(texture_index)
+        roles = glb_textures.image_roles(document)
+        for index, image in enumerate(document.get("images", [])):
+            row = {
+                "index": index,
+                "name": image.get("name", ""),
+                "mime_type": image.get("mimeType"),
+                "uri": image.get("uri"),
+                "bytes": 0,
+                "width": None,
+                "height": None,
+                "role": roles.get(index, "color"),
+                "textures": texture_users.get(index, []),
+            }
+            view_index = image.get("bufferView")
+            if view_index is not None and view_index < len(views) and bin_chunk:
+                view = views[view_index]
+                row["bytes"] = view["byteLength"]
+                size = image_size(data, bin_offset + view.get("byteOffset", 0), min(view["byteLength"], bin_bytes))
+                if size:
+                    row["width"], row["height"] = size
+            images.append(row)
+
+    usages = accessor_usages(document)
+    accessor_rows = []
+    for index, accessor in enumerate(document.get("accessors", [])):
+        element_size = COMPONENT_DTYPES[accessor["componentType"]].itemsize * TYPE_SIZES[accessor["type"]]
+        accessor_rows.append({
+            "index": index,
+            "name": accessor.get("name", ""),
+            "usage": usages.get(index, "unused"),
+            "component_type": COMPONENT_NAMES.get(accessor["componentType"], str(accessor["componentType"])),
+            "type": accessor["type"],
+            "normalized": accessor.get("normalized", False),
+            "count": accessor["count"],
+            "buffer_view": accessor.get("bufferView"),
+            "sparse": "sparse" in accessor,
+            "bytes": accessor["count"] * element_size if "bufferView" in accessor else 0,
+        })
+
+    referenced = {index for _, _, index in glb_io.view_references(document)}
+    view_usage: Dict[int, str] = {}
+    for row in accessor_rows:
+        if row["buffer_view"] is not None:
+            view_usage.setdefault(row["buffer_view"], row["usage"])
+    for image in document.get("images", []):
+        if "bufferView" in image:
+            view_usage[image["bufferView"]] = "image"
+    view_rows = []
+    for index, view in enumerate(views):
+        usage = view_usage.get(index) or ("extension" if index in referenced else "unreferenced")
+        view_rows.append({
+            "index": index,
+            "byte_offset": view.get("byteOffset", 0),
+            "bytes": view["byteLength"],
+            "byte_stride": view.get("byteStride"),
+            "target": view.get("target"),
+            "usage": usage,
+        })
+
+    breakdown: Dict[str, int] = {"json": json_chunk[2]}
+    for row in view_rows:
+        breakdown[row["usage"]] = breakdown.get(row["usage"], 0) + row["bytes"]
+    breakdown["padding"] = max(0, bin_bytes - sum(row["bytes"] for row in view_rows))
+
+    vertices = faces = primitives = 0
+    accessors = document.get("accessors", [])
+    for mesh in document.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            primitives += 1
+            position = primitive.get("attributes", {}).get("POSITION")
+            if position is not None:
+                vertices += accessors[position]["count"]
+            count_accessor = primitive.get("indices", position)
+            if count_accessor is not None and primitive.get("mode", glb_quantize.TRIANGLES) == glb_quantize.TRIANGLES:
+                faces += accessors[count_accessor]["count"] // 3
+
+    opportunities = _quantization_opportunities(document, accessor_rows)
+    for image in images:
+        estimated = _texture_estimate(image["mime_type"], (image["width"], image["height"]) if image["width"] else None, image["bytes"])
+        if image["bytes"] and estimated < image["bytes"]:
+            size = f"{image['width']}x{image['height']} " if image["width"] else ""
+            opportunities.append({
+                "kind": "texture",
+                "target": f"image {image['index']}",
+                "detail": f"{size}{image['mime_type']} -> WebP, max {TEXTURE_MAX_SIZE}px",
+                "bytes": image["bytes"],
+                "estimated_bytes": estimated,
+            })
+    unreferenced = breakdown.get("unreferenced", 0) + breakdown["padding"]
+    if unreferenced > 3 * len(views):
+        opportunities.append({"kind": "repack", "target": "BIN chunk", "detail": "unreferenced bufferViews and padding", "bytes": unreferenced, "estimated_bytes": 3 * len(views)})
+
+    savings = sum(item["bytes"] - item["estimated_bytes"] for item in opportunities)
+    return {
+        "file": str(path),
+        "bytes": file_bytes,
+        "chunks": [{"type": CHUNK_NAMES.get(chunk_type, f"{chunk_type:08x}"), "offset": offset, "bytes": length} for chunk_type, offset, length in chunks],
+        "json_bytes": json_chunk[2],
+        "bin_bytes": bin_bytes,
+        "extensions_used": document.get("extensionsUsed", []),
+        "meshes": len(document.get("meshes", [])),
+        "primitives": primitives,
+        "vertices": vertices,
+        "faces": faces,
+        "materials": len(document.get("materials", [])),
+        "textures": len(document.get("textures", [])),
+        "images": images,
+        "breakdown": breakdown,
+        "accessors": accessor_rows,
+        "buffer_views": view_rows,
+        "opportunities": opportunities,
+        "estimated_bytes": file_bytes - savings,
+        "estimated_savings_pct": round(100 * savings / file_bytes, 1),
     }
-    return chunk_names.get(chunk_type, f"Unknown ({chunk_type:08x})")
 
-def analyze_json_content(json_data):
-    """Analyze the JSON content of a GLB file"""
+
+def _analyze_safely(path: str) -> Dict[str, Any]:
     try:
-        # Count meshes
-        mesh_count = len(json_data.get('meshes', []))
-        if mesh_count > 0:
-            total_vertices = 0
-            total_faces = 0
-            
-            for mesh in json_data['meshes']:
-                for primitive in mesh.get('primitives', []):
-                    if 'attributes' in primitive:
-                        # Count vertices (usually in POSITION attribute)
-                        if 'POSITION' in primitive['attributes']:
-                            accessor_idx = primitive['attributes']['POSITION']
-                            accessor = json_data['accessors'][accessor_idx]
-                            vertex_count = accessor.get('count', 0)
-                            total_vertices += vertex_count
-                    
-                    # Count faces (indices)
-                    if 'indices' in primitive:
-                        accessor_idx = primitive['indices']
-                        accessor = json_data['accessors'][accessor_idx]
-                        face_count = accessor.get('count', 0) // 3  # 3 indices per triangle
-                        total_faces += face_count
-            
-            print(f"     📐 Meshes: {mesh_count}")
-            print(f"     📍 Total Vertices: {total_vertices:,}")
-            print(f"     🔺 Total Faces: {total_faces:,}")
-        
-        # Count textures
-        texture_count = len(json_data.get('images', []))
-        if texture_count > 0:
-            print(f"     🖼️ Textures: {texture_count}")
-            
-            # Analyze texture sizes
-            for image in json_data.get('images', []):
-                if 'uri' in image:
-                    print(f"       📱 Texture: {image['uri']}")
-        
-        # Count materials
-        material_count = len(json_data.get('materials', []))
-        if material_count > 0:
-            print(f"     🎨 Materials: {material_count}")
-            
-    except Exception as e:
-        print(f"     ⚠️ Could not analyze JSON content: {e}")
-
-def analyze_file_sizes(directory):
-    """Analyze file sizes and find patterns"""
-    glb_files = list(Path(directory).glob("*.glb"))
-    
-    if not glb_files:
-        print("❌ No GLB files found")
-        return
-    
-    print("🔍 File Size Analysis")
-    print("=" * 50)
-    
-    # Group files by size ranges
-    size_groups = defaultdict(list)
-    
-    for glb_file in glb_files:
-        size_mb = os.path.getsize(glb_file) / (1024 * 1024)
-        
-        if size_mb < 5:
-            group = "Small (<5MB)"
-        elif size_mb < 15:
-            group = "Medium (5-15MB)"
-        elif size_mb < 30:
-            group = "Large (15-30MB)"
-        else:
-            group = "Very Large (>30MB)"
-        
-        size_groups[group].append((glb_file.name, size_mb))
-    
-    # Display grouping
-    for group, files in size_groups.items():
-        print(f"\n📁 {group}:")
-        for filename, size in sorted(files, key=lambda x: x[1]):
-            print(f"   {filename}: {size:.1f} MB")
-    
-    # Find outliers
-    sizes = [os.path.getsize(f) for f in glb_files]
-    avg_size = sum(sizes) / len(sizes)
-    
-    print(f"\n📊 Size Statistics:")
-    print(f"   Average: {avg_size / (1024*1024):.1f} MB")
-    print(f"   Smallest: {min(sizes) / (1024*1024):.1f} MB")
-    print(f"   Largest: {max(sizes) / (1024*1024):.1f} MB")
-    print(f"   Range: {(max(sizes) - min(sizes)) / (1024*1024):.1f} MB")
-    
-    # Identify potential outliers
-    outliers = []
-    for glb_file in glb_files:
-        size = os.path.getsize(glb_file)
-        if size > avg_size * 2:  # More than 2x average
-            outliers.append((glb_file.name, size / (1024*1024)))
-    
-    if outliers:
-        print(f"\n⚠️ Potential Outliers (2x+ average size):")
-        for filename, size in outliers:
-            print(f"   {filename}: {size:.1f} MB")
-
-def suggest_compression_strategy(directory):
-    """Suggest compression strategy based on analysis"""
-    print(f"\n🎯 Compression Strategy Recommendations")
-    print("=" * 50)
-    
-    glb_files = list(Path(directory).glob("*.glb"))
-    if not glb_files:
-        return
-    
-    # Analyze each file
-    file_analysis = []
-    
-    for glb_file in glb_files:
-        size_mb = os.path.getsize(glb_file) / (1024 * 1024)
-        
-        # Determine compression approach based on size
-        if size_mb > 30:
-            approach = "AGGRESSIVE - High polygon reduction + texture compression"
-            target_size = size_mb * 0.3  # 70% reduction
-        elif size_mb > 15:
-            approach = "MODERATE - Polygon reduction + texture optimization"
-            target_size = size_mb * 0.5  # 50% reduction
-        elif size_mb > 5:
-            approach = "LIGHT - Texture compression + minor optimization"
-            target_size = size_mb * 0.7  # 30% reduction
-        else:
-            approach = "MINIMAL - Basic optimization only"
-            target_size = size_mb * 0.9  # 10% reduction
-        
-        file_analysis.append({
-            'name': glb_file.name,
-            'current_size': size_mb,
-            'target_size': target_size,
-            'approach': approach
-        })
-    
-    # Display recommendations
-    for analysis in file_analysis:
-        print(f"\n📁 {analysis['name']}:")
-        print(f"   Current: {analysis['current_size']:.1f} MB")
-        print(f"   Target: {analysis['target_size']:.1f} MB")
-        print(f"   Strategy: {analysis['approach']}")
-    
-    # Overall strategy
-    total_current = sum(a['current_size'] for a in file_analysis)
-    total_target = sum(a['target_size'] for a in file_analysis)
-    total_savings = ((total_current - total_target) / total_current) * 100
-    
-    print(f"\n🎯 Overall Strategy:")
-    print(f"   Total Current: {total_current:.1f} MB")
-    print(f"   Total Target: {total_target:.1f} MB")
-    print(f"   Expected Savings: {total_savings:.1f}%")
-    print(f"   Priority: Focus on files >15MB first")
-
-def main():
-    """Main function"""
-    print("🔍 3D Model Analysis Tool")
-    print("=" * 50)
-    
-    # Get current directory
-    current_dir = Path(__file__).parent
-    uploads_dir = current_dir / "uploads"
-    
-    if not uploads_dir.exists():
-        print(f"❌ Uploads directory not found: {uploads_dir}")
-        return
-    
-    print(f"📁 Analyzing directory: {uploads_dir}")
-    
-    # Step 1: Analyze file sizes and group them
-    analyze_file_sizes(uploads_dir)
-    
-    # Step 2: Analyze individual file structures
-    print(f"\n🔬 Detailed File Analysis")
-    print("=" * 50)
-    
-    glb_files = list(uploads_dir.glob("*.glb"))
-    for glb_file in glb_files:
-        analyze_glb_structure(glb_file)
-    
-    # Step 3: Suggest compression strategy
-    suggest_compression_strategy(uploads_dir)
-    
-    print(f"\n✨ Analysis complete! Use this information to optimize your compression strategy.")
+        return analyze_glb_structure(path)
+    except (OSError, ValueError, KeyError, IndexError, struct.error) as e:
+        return {"file": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def analyze_paths(paths: Iterable[Path], jobs: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Reports for many GLBs, in parallel processes; failures come back as {"file", "error"}"""
+    paths = [str(path) for path in paths]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths) or 1))
+    if jobs == 1:
+        return [_analyze_safely(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_analyze_safely, paths, chunksize=4))
+
+
+def find_models(targets: List[str], uploads: bool = False) -> List[Path]:
+    """GLB files named directly or found (recursively) in directories; --uploads walks the shards"""
+    found: List[Path] = []
+    if uploads or not targets:
+        found += [path for name, path in upload_layout.iter_uploads(DEFAULT_UPLOADS_DIR) if name.lower().endswith(".glb")]
+    for target in targets:
+        path = Path(target)
+        found += sorted(path.rglob("*.glb")) if path.is_dir() else [path]
+    return found
+
+
+def csv_rows(reports: List[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    """One row per file, accessor, bufferView, image and opportunity"""
+    for report in reports:
+        file = report["file"]
+        if "error" in report:
+            yield {"file": file, "section": "error", "detail": report["error"]}
+            continue
+        yield {
+            "file": file,
+            "section": "file",
+            "detail": f"{report['meshes']} meshes, {report['vertices']} vertices, {report['faces']} faces",
+            "count": report["faces"],
+            "bytes": report["bytes"],
+            "estimated_bytes": report["estimated_bytes"],
+        }
+        for row in report["accessors"]:
+            detail = f"{row['type']} {row['component_type']}" + (" normalized" if row["normalized"] else "")
+            yield {"file": file, "section": "accessor", "index": row["index"], "name": row["name"], "usage": row["usage"], "detail": detail, "count": row["count"], "bytes": row["bytes"]}
+        for row in report["buffer_views"]:
+            yield {"file": file, "section": "bufferView", "index": row["index"], "usage": row["usage"], "bytes": row["bytes"]}
+        for row in report["images"]:
+            size = f"{row['width']}x{row['height']}" if row["width"] else ""
+            yield {"file": file, "section": "image", "index": row["index"], "name": row["name"], "usage": row["role"], "detail": f"{row['mime_type']} {size}".strip(), "bytes": row["bytes"]}
+        for row in report["opportunities"]:
+            yield {"file": file, "section": "opportunity", "name": row["target"], "usage": row["kind"], "detail": row["detail"], "bytes": row["bytes"], "estimated_bytes": row["estimated_bytes"]}
+
+
+def write_csv(reports: List[Dict[str, Any]], out) -> None:
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    writer.writerows(csv_rows(reports))
+
+
+def print_summary(reports: List[Dict[str, Any]]) -> None:
+    for report in sorted(reports, key=lambda report: report.get("bytes", 0), reverse=True):
+        name = os.path.basename(report["file"])
+        if "error" in report:
+            print(f"❌ {name}: {report['error']}")
+            continue
+        breakdown = ", ".join(f"{usage} {size / 1024:.0f} KB" for usage, size in sorted(report["breakdown"].items(), key=lambda item: -item[1]) if size)
+        print(f"📊 {name}: {report['bytes'] / (1024 * 1024):.1f} MB, {report['vertices']:,} vertices, {report['faces']:,} faces")
+        print(f"   {breakdown}")
+        for item in report["opportunities"]:
+            if item["bytes"] > item["estimated_bytes"]:
+                print(f"   💡 {item['target']}: {item['detail']} (-{(item['bytes'] - item['estimated_bytes']) / 1024:.0f} KB)")
+        print(f"   🎯 estimated {report['estimated_bytes'] / (1024 * 1024):.1f} MB ({report['estimated_savings_pct']}% saved)")
+    analyzed = [report for report in reports if "error" not in report]
+    if analyzed:
+        total = sum(report["bytes"] for report in analyzed)
+        estimated = sum(report["estimated_bytes"] for report in analyzed)
+        print(f"\n✨ {len(analyzed)} models, {total / (1024 * 1024):.1f} MB -> ~{estimated / (1024 * 1024):.1f} MB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze where the bytes of GLB models go")
+    parser.add_argument("paths", nargs="*", help="GLB files or directories (default: every upload)")
+    parser.add_argument("--uploads", action="store_true", help="Include every .glb upload")
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    output.add_argument("--csv", metavar="PATH", help="Write a CSV breakdown ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    reports = analyze_paths(find_models(args.paths, args.uploads), args.jobs)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    elif args.csv == "-":
+        write_csv(reports, sys.stdout)
+    elif args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            write_csv(reports, f)
+        print(f"✅ Wrote {args.csv}")
+    else:
+        print_summary(reports)
+    return 1 if any("error" in report for report in reports) else 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Asset Size Budgets for Phoenix Trailers
+Checks uploads and pipeline outputs against the per-class limits in
+asset_budgets.json (bytes, faces, image/texture resolution, video bitrate)
+and lists the worst offenders, so page-weight regressions fail CI or a
+pipeline build instead of reaching the site.
+
+A file belongs to the first class whose kind matches and one of whose
+fnmatch patterns matches its path under uploads/ ('*' also crosses '/').
+Metrics come from analyze_3d_models (GLB), the Pillow header (images) and
+ffprobe (videos; without it only bytes are checked).
+
+    python asset_budgets.py                    # every file under uploads/
+    python asset_budgets.py optimized/ --top 5
+    python asset_budgets.py --json
+"""
+import argparse
+import fnmatch
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_BUDGETS_FILE = BACKEND_DIR / "asset_budgets.json"
+DEFAULT_UPLOADS_DIR = BACKEND_DIR / "uploads"
+
+KIND_EXTENSIONS = {
+    "image": {".jpg", ".jpeg", ".png", ".webp", ".avif", ".gif"},
+    "model": {".glb"},
+    "video": {".mp4", ".webm", ".mov", ".m4v"},
+}
+# Budget key -> metric it limits
+LIMITS = {
+    "max_bytes": "bytes",
+    "max_dimension": "dimension",
+    "max_faces": "faces",
+    "max_texture_size": "texture_size",
+    "max_bitrate_kbps": "bitrate_kbps",
+}
+
+
+def asset_kind(name: str) -> Optional[str]:
+    suffix = Path(name).suffix.lower()
+    return next((kind for kind, extensions in KIND_EXTENSIONS.items() if suffix in extensions), None)
+
+
+def load_budgets(path: Optional[Path] = None) -> Dict[str, Any]:
+    """{"ignore": [...], "classes": {name: {"kind", "match", <limits>}}}, validated"""
+    with open(path or DEFAULT_BUDGETS_FILE, "r", encoding="utf-8") as f:
+        budgets = json.load(f)
+    for name, budget in budgets.get("classes", {}).items():
+        if budget.get("kind") not in KIND_EXTENSIONS:
+            raise ValueError(f"Budget class {name} has no valid kind")
+        unknown = set(budget) - set(LIMITS) - {"kind", "match"}
+        if unknown:
+            raise ValueError(f"Unknown keys in budget class {name}: {', '.join(sorted(unknown))}")
+    return budgets
+
+
+def classify(name: str, budgets: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """(class name, budget) for an uploads path, or None when it is ignored or unbudgeted"""
+    if any(fnmatch.fnmatchcase(name, pattern) for pattern in budgets.get("ignore", [])):
+        return None
+    kind = asset_kind(name)
+    for class_name, budget in budgets.get("classes", {}).items():
+        if budget["kind"] == kind and any(fnmatch.fnmatchcase(name, pattern) for pattern in budget.get("match", ["*"])):
+            return class_name, budget
+    return None
+
+
+# ---- Metrics ----
+def model_metrics(path: Path) -> Dict[str, Any]:
+    import analyze_3d_models
+
+    report = analyze_3d_models.analyze_glb_structure(path)
+    sizes = [max(image["width"], image["height"]) for image in report["images"] if image["width"]]
+    return {"faces": report["faces"], "texture_size": max(sizes, default=0), "estimated_bytes": report["estimated_bytes"]}
+
+
+def image_metrics(path: Path) -> Dict[str, Any]:
+    from PIL import Image
+
+    # Only the header is parsed; pixels are never decoded
+    with Image.open(path) as img:
+        return {"dimension": max(img.size), "width": img.width, "height": img.height}
+
+
+def video_metrics(path: Path) -> Dict[str, Any]:
+    import video_ladder
+
+    if shutil.which("ffprobe") is None:
+        return {"note": "ffprobe not found; only bytes checked"}
+    info = video_ladder.probe(path)
+    metrics = {key: info[key] for key in ("width", "height", "duration", "bitrate_kbps") if info.get(key) is not None}
+    if info.get("width"):
+        metrics["dimension"] = max(info["width"], info["height"])
+    return metrics
+
+
+METRICS = {"model": model_metrics, "image": image_metrics, "video": video_metrics}
+
+
+def check_file(path: Path, name: str, class_name: str, budget: Dict[str, Any]) -> Dict[str, Any]:
+    """Metrics and budget violations for one file; never raises"""
+    result: Dict[str, Any] = {"name": name, "class": class_name, "kind": budget["kind"], "violations": []}
+    try:
+        metrics = {"bytes": path.stat().st_size}
+        metrics.update(METRICS[budget["kind"]](path))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    result["metrics"] = metrics
+    for key, metric in LIMITS.items():
+        limit = budget.get(key)
+        value = metrics.get(metric)
+        if limit is not None and value is not None and value > limit:
+            result["violations"].append({"metric": metric, "value": value, "limit": limit, "over_pct": round(100 * (value / limit - 1), 1)})
+    return result
+
+
+def _check_task(task: Tuple[str, str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    return check_file(Path(task[0]), *task[1:])
+
+
+def collect(uploads_dir: Path, targets: Optional[Iterable[str]] = None) -> List[Tuple[Path, str]]:
+    """(path, uploads name) for every file under the targets (uploads-relative files or directories)"""
+    roots = [uploads_dir / target for target in targets] if targets else [uploads_dir]
+    files = []
+    for root in roots:
+        for path in ([root] if root.is_file() else sorted(root.rglob("*"))):
+            if path.is_file():
+                files.append((path, path.relative_to(uploads_dir).as_posix()))
+    return files
+
+
+def check_budgets(
+    uploads_dir: Path,
+    budgets: Dict[str, Any],
+    targets: Optional[Iterable[str]] = None,
+    jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Check every budgeted file in parallel; offenders are sorted by how far they overshoot"""
+    tasks = []
+    for path, name in collect(uploads_dir, targets):
+        matched = classify(name, budgets)
+        if matched:
+            tasks.append((str(path), name, matched[0], matched[1]))
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+    if workers == 1:
+        results = [_check_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_check_task, tasks, chunksize=8))
+
+    offenders = sorted(
+        (result for result in results if result["violations"]),
+        key=lambda result: max(violation["over_pct"] for violation in result["violations"]),
+        reverse=True,
+    )
+    classes: Dict[str, Dict[str, int]] = {}
+    for result in results:
+        summary = classes.setdefault(result["class"], {"files": 0, "bytes": 0, "over_budget": 0})
+        summary["files"] += 1
+        summary["bytes"] += result.get("metrics", {}).get("bytes", 0)
+        summary["over_budget"] += bool(result["violations"])
+    return {
+        "checked": len(results),
+        "over_budget": len(offenders),
+        "errors": [result for result in results if "error" in result],
+        "classes": classes,
+        "offenders": offenders,
+    }
+
+
+def format_violation(violation: Dict[str, Any]) -> str:
+    if violation["metric"] == "bytes":
+        return f"{violation['value'] / 1024:.0f} KB > {violation['limit'] / 1024:.0f} KB"
+    return f"{violation['metric']} {violation['value']:,} > {violation['limit']:,}"
+
+
+def print_report(report: Dict[str, Any], top: int) -> None:
+    for class_name, summary in sorted(report["classes"].items()):
+        print(f"📁 {class_name}: {summary['files']} files, {summary['bytes'] / (1024 * 1024):.1f} MB, {summary['over_budget']} over budget")
+    for error in report["errors"]:
+        print(f"⚠️ {error['name']}: {error['error']}")
+    if report["offenders"]:
+        print(f"\n❌ Top offenders ({min(top, len(report['offenders']))} of {report['over_budget']}):")
+        for result in report["offenders"][:top]:
+            print(f"   {result['name']} [{result['class']}]: {'; '.join(format_violation(v) for v in result['violations'])}")
+    else:
+        print(f"\n✅ All {report['checked']} files within budget")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check uploads and pipeline outputs against size budgets")
+    parser.add_argument("targets", nargs="*", help="Files or directories relative to the uploads directory (default: all)")
+    parser.add_argument("--uploads", default=str(DEFAULT_UPLOADS_DIR))
+    parser.add_argument("--budgets", default=str(DEFAULT_BUDGETS_FILE))
+    parser.add_argument("--top", type=int, default=10, help="Offenders to list")
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = check_budgets(Path(args.uploads), load_budgets(Path(args.budgets)), args.targets or None, args.jobs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+    return 1 if report["over_budget"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
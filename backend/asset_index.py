@@ -0,0 +1,304 @@
+"""
+Asset Index for Phoenix Trailers API
+Persistent inventory of everything under uploads/ (size, hash, type,
+dimensions / face counts, derived variants) kept in data/assets.json and
+refreshed incrementally by mtime instead of walking the disk per request
+"""
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import image_pipeline
+import image_variants
+import model_decoders
+import model_lod
+import upload_layout
+import video_ladder
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Directories under uploads/ that hold generated files attached to another asset
+SKIP_DIRS = {image_pipeline.DERIVED_DIRNAME, model_lod.LOD_DIRNAME, video_ladder.STREAM_DIRNAME}
+
+KIND_BY_PREFIX = (
+    ("image/", "image"),
+    ("video/", "video"),
+    ("model/", "model"),
+)
+
+SORT_FIELDS = {"name", "size", "created_at", "modified_at"}
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def asset_kind(mime_type: Optional[str]) -> str:
+    for prefix, kind in KIND_BY_PREFIX:
+        if mime_type and mime_type.startswith(prefix):
+            return kind
+    return "other"
+
+
+def glb_stats(path: Path) -> Optional[Dict[str, Any]]:
+    """Mesh/vertex/face counts and required decoders from the GLB JSON chunk (the BIN chunk is not read)"""
+    gltf = model_decoders.read_gltf_json(path)
+    if gltf is None:
+        return None
+
+    accessors = gltf.get("accessors", [])
+    vertices = faces = 0
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            position = primitive.get("attributes", {}).get("POSITION")
+            if position is not None and position < len(accessors):
+                vertices += accessors[position].get("count", 0)
+            indices = primitive.get("indices")
+            if indices is not None and indices < len(accessors):
+                faces += accessors[indices].get("count", 0) // 3
+            elif position is not None and position < len(accessors):
+                faces += accessors[position].get("count", 0) // 3
+    return {
+        "meshes": len(gltf.get("meshes", [])),
+        "vertices": vertices,
+        "faces": faces,
+        "textures": len(gltf.get("images", [])),
+        "decoders": model_decoders.required_decoders(gltf),
+    }
+
+
+class AssetIndex:
+    """
+    Records are keyed by the public uploads name (the POSIX path with any
+    shard prefix removed, see upload_layout). A refresh only
+    re-hashes files whose (mtime, size) changed and drops records for files
+    that disappeared, so rescanning an unchanged tree is just a stat walk.
+    """
+
+    def __init__(self, data_dir: Path, uploads_dir: Path):
+        self.index_file = data_dir / "assets.json"
+        self.uploads_dir = uploads_dir
+        self.assets: Dict[str, Dict[str, Any]] = {}
+        self.last_refresh: Optional[str] = None
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._load_index()
+
+    # ---- Maintenance ----
+    def add(self, path: Path) -> Dict[str, Any]:
+        """Index (or re-index) one file under uploads/"""
+        record = self._build_record(path)
+        with self._lock:
+            self.assets[record["name"]] = record
+            self._save_index()
+        return dict(record)
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            removed = self.assets.pop(name, None) is not None
+            if removed:
+                self._save_index()
+        return removed
+
+    def update_variants(self, name: str) -> None:
+        """Reload the derivative list for an asset from its pipeline manifest"""
+        with self._lock:
+            record = self.assets.get(name)
+            if record is None:
+                return
+            record.update(self._variant_fields(name))
+            self._save_index()
+
+    def refresh(self) -> Dict[str, int]:
+        """Incremental rescan by (mtime, size); safe to call from any thread"""
+        with self._refresh_lock:
+            seen = set()
+            added = updated = 0
+            for path in self._walk():
+                name = upload_layout.logical_name(path.relative_to(self.uploads_dir).as_posix())
+                seen.add(name)
+                try:
+                    stat_result = path.stat()
+                except FileNotFoundError:
+                    continue
+                with self._lock:
+                    record = self.assets.get(name)
+                if record and record["mtime_ns"] == stat_result.st_mtime_ns and record["size"] == stat_result.st_size:
+                    manifest_mtime = self._manifest_mtime(name)
+                    if manifest_mtime != record.get("variants_mtime_ns"):
+                        self.update_variants(name)
+                    continue
+                try:
+                    new_record = self._build_record(path, stat_result)
+                except Exception as e:
+                    logger.error(f"Could not index {path}: {e}")
+                    continue
+                with self._lock:
+                    if record:
+                        new_record["created_at"] = record["created_at"]
+                        updated += 1
+                    else:
+                        added += 1
+                    self.assets[name] = new_record
+
+            with self._lock:
+                # Records added while the walk was running are not in `seen`; keep them
+                removed = [
+                    name for name in self.assets
+                    if name not in seen and upload_layout.resolve(self.uploads_dir, name) is None
+                ]
+                for name in removed:
+                    del self.assets[name]
+                self.last_refresh = datetime.utcnow().isoformat()
+                self._save_index()
+
+        stats = {"added": added, "updated": updated, "removed": len(removed), "total": len(self.assets)}
+        logger.info(f"Asset index refreshed: {stats}")
+        return stats
+
+    # ---- Queries ----
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self.assets.get(name)
+            return dict(record) if record else None
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self.assets)
+
+    def query(
+        self,
+        kind: Optional[str] = None,
+        directory: Optional[str] = None,
+        q: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        min_size: Optional[int] = None,
+        sort: str = "created_at",
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Filter, sort and page the index; returns (total matches, page)"""
+        if sort not in SORT_FIELDS:
+            sort = "created_at"
+        needle = q.lower() if q else None
+        with self._lock:
+            matches = [
+                record for record in self.assets.values()
+                if (kind is None or record["kind"] == kind)
+                and (directory is None or record["directory"] == directory.strip("/"))
+                and (mime_type is None or record["mime_type"] == mime_type)
+                and (min_size is None or record["size"] >= min_size)
+                and (needle is None or needle in record["name"].lower())
+            ]
+            matches.sort(key=lambda record: (record[sort], record["name"]), reverse=descending)
+            return len(matches), [dict(record) for record in matches[offset:offset + limit]]
+
+    def get_summary(self) -> Dict[str, Any]:
+        with self._lock:
+            by_kind: Dict[str, Dict[str, int]] = {}
+            directories = set()
+            for record in self.assets.values():
+                bucket = by_kind.setdefault(record["kind"], {"count": 0, "bytes": 0})
+                bucket["count"] += 1
+                bucket["bytes"] += record["size"]
+                if record["directory"]:
+                    directories.add(record["directory"].split("/")[0])
+            return {
+                "total": len(self.assets),
+                "total_bytes": sum(record["size"] for record in self.assets.values()),
+                "by_kind": by_kind,
+                "directories": sorted(directories),
+                "last_refresh": self.last_refresh,
+            }
+
+    # ---- Internals ----
+    def _walk(self):
+        for root, dirs, files in os.walk(self.uploads_dir):
+            root_path = Path(root)
+            if root_path == self.uploads_dir:
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for filename in files:
+                if not filename.startswith(".") and not filename.endswith(".tmp"):
+                    yield root_path / filename
+
+    def _manifest_mtime(self, name: str) -> Optional[int]:
+        try:
+            return (image_pipeline.derived_dir(self.uploads_dir, name) / image_pipeline.MANIFEST_NAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _variant_fields(self, name: str) -> Dict[str, Any]:
+        manifest = image_pipeline.read_manifest(self.uploads_dir, name)
+        variants = [variant["path"] for variant in (manifest or {}).get("variants", [])]
+        return {
+            "variants": variants,
+            "variants_status": manifest.get("status") if manifest else None,
+            "best": (manifest or {}).get("best"),
+            "variants_mtime_ns": self._manifest_mtime(name),
+        }
+
+    def _build_record(self, path: Path, stat_result: Optional[os.stat_result] = None) -> Dict[str, Any]:
+        stat_result = stat_result or path.stat()
+        name = upload_layout.logical_name(path.relative_to(self.uploads_dir).as_posix())
+        mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        kind = asset_kind(mime_type)
+        modified_at = datetime.utcfromtimestamp(stat_result.st_mtime).isoformat()
+        record: Dict[str, Any] = {
+            "name": name,
+            "directory": str(Path(name).parent.as_posix()).strip("."),
+            "size": stat_result.st_size,
+            "sha256": file_sha256(path),
+            "mime_type": mime_type,
+            "kind": kind,
+            "mtime_ns": stat_result.st_mtime_ns,
+            "modified_at": modified_at,
+            "created_at": modified_at,
+            "width": None,
+            "height": None,
+            "model": None,
+        }
+        try:
+            if kind == "image" and image_variants.pillow_available() and path.suffix.lower() in image_variants.SOURCE_EXTENSIONS:
+                record["width"], record["height"] = image_variants.image_dimensions(path)
+            elif path.suffix.lower() == ".glb":
+                record["model"] = glb_stats(path)
+        except Exception as e:
+            logger.warning(f"Could not read dimensions of {path}: {e}")
+        record.update(self._variant_fields(name))
+        return record
+
+    def _load_index(self) -> None:
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.assets = data.get("assets", {})
+                self.last_refresh = data.get("last_refresh")
+        except Exception as e:
+            logger.error(f"Error loading {self.index_file}: {e}")
+            self.assets = {}
+
+    def _save_index(self) -> None:
+        """Atomic write; called with the lock held"""
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_file.with_name(f"{self.index_file.name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"last_refresh": self.last_refresh, "assets": self.assets}, f, indent=2, default=str)
+            os.replace(tmp_path, self.index_file)
+        except Exception as e:
+            logger.error(f"Error saving {self.index_file}: {e}")
@@ -0,0 +1,104 @@
+"""
+Asset Optimization Jobs for Phoenix Trailers API
+Job-queue handlers wrapping the optimization scripts. Each handler takes a
+JSON payload, runs in a worker process and returns a JSON-serializable result.
+"""
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".webm", ".m4v"}
+MODEL_EXTENSIONS = {".glb"}
+
+
+def tool_available(tool: str) -> bool:
+    return shutil.which(tool) is not None
+
+
+def model_compression_available() -> bool:
+    """gltf-transform on PATH, or trimesh / NumPy importable for the fallbacks"""
+    import model_compression
+
+    return bool(model_compression.available_methods())
+
+
+def publish_outputs(payload: Dict[str, Any], outputs: List[Path]) -> None:
+    """Copy job outputs to the configured upload storage (a no-op for local disk)"""
+    if not payload.get("uploads_dir"):
+        return
+    import storage
+
+    uploads_dir = Path(payload["uploads_dir"])
+    backend = storage.storage_from_env(uploads_dir)
+    for path in outputs:
+        backend.save_file(path, path.resolve().relative_to(uploads_dir.resolve()).as_posix())
+
+
+def optimize_video_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """WebM + faststart MP4 renditions of one video (ffmpeg)"""
+    import optimize_assets
+
+    source = Path(payload["source"])
+    output_dir = Path(payload["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if not tool_available("ffmpeg"):
+        raise RuntimeError("ffmpeg not found on PATH")
+
+    optimize_assets.optimize_video(source, output_dir)
+    outputs = [output_dir / f"{source.stem}.webm", output_dir / f"{source.stem}_optimized.mp4"]
+    missing = [str(path) for path in outputs if not path.exists()]
+    if missing:
+        raise RuntimeError(f"ffmpeg produced no output for {', '.join(missing)}")
+    publish_outputs(payload, outputs)
+    return {"source": str(source), "outputs": {path.name: path.stat().st_size for path in outputs}}
+
+
+def video_stream_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """HLS ladder, MP4 fallback and posters for one video, in a single ffmpeg run (see video_ladder.py)"""
+    import video_ladder
+
+    uploads_dir = Path(payload["uploads_dir"])
+    manifest = video_ladder.build_stream(str(uploads_dir), payload["name"])
+    publish_outputs(payload, [uploads_dir / name for name in video_ladder.manifest_files(uploads_dir, payload["name"])])
+    return {
+        "name": manifest["name"],
+        "renditions": {rendition["name"]: rendition["bytes"] for rendition in manifest["renditions"]},
+        "mp4_bytes": manifest["mp4_bytes"],
+        "seconds": manifest["seconds"],
+    }
+
+
+def compress_model_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Compress one GLB with the model's profile (gltf-transform, falling back to trimesh)"""
+    import model_compression
+
+    source = Path(payload["source"])
+    output_file = Path(payload["output_dir"]) / f"{source.stem}_compressed.glb"
+    settings = model_compression.resolve_settings(source.name, payload.get("quality"))
+    result = model_compression.compress_model(source, output_file, settings)
+    if not result["ok"]:
+        raise RuntimeError(f"Compression failed for {source.name}: {result['error']}")
+    publish_outputs(payload, [output_file])
+    return result
+
+
+def model_analysis_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Byte breakdown and savings estimate for one GLB (see analyze_3d_models.py); reads only metadata"""
+    import analyze_3d_models
+
+    report = analyze_3d_models.analyze_glb_structure(payload["source"])
+    # The per-accessor / per-bufferView tables stay out of the job record
+    return {key: value for key, value in report.items() if key not in ("accessors", "buffer_views", "chunks")}
+
+
+def model_lod_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Build one model's LOD chain (see model_lod.py)"""
+    import model_lod
+
+    uploads_dir = Path(payload["uploads_dir"])
+    manifest = model_lod.generate_lods(str(uploads_dir), payload["name"])
+    publish_outputs(payload, [uploads_dir / name for name in model_lod.manifest_files(uploads_dir, payload["name"])])
+    return {
+        "name": manifest["name"],
+        "levels": [{"level": level["level"], "bytes": level["bytes"], "faces": level["faces"]} for level in manifest["levels"]],
+    }
@@ -0,0 +1,188 @@
+"""
+Asset Manifest for Phoenix Trailers API
+One versioned JSON document mapping every upload (and the logical aliases in
+asset_aliases.json, e.g. "hero" or a pre-migration URL) to what the site
+should actually load: the best-format copy, responsive variants per format,
+dimensions, placeholder, model LODs and video streams, plus content hashes
+and where the self-hosted model decoders (Draco) live.
+
+The frontend resolves asset references through it, so pointing the site at
+an optimized or replacement file is a data change rather than an edit to
+App.js and a rebuild. The server caches the rendered document and serves it
+with an ETag (GET /api/asset-manifest.json); `phoenix-assets manifest`
+writes the same document to disk.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import quote
+
+import fast_json
+import image_pipeline
+import model_lod
+import video_ladder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALIASES_FILE = Path(__file__).parent / "asset_aliases.json"
+MANIFEST_FORMAT = 1
+# Rebuild at least this often so LOD and stream jobs (which do not invalidate) show up
+DEFAULT_MAX_AGE = 60.0
+
+
+def relative_url(name: str) -> str:
+    return f"/uploads/{quote(name)}"
+
+
+def load_aliases(path: Optional[Path] = None) -> Dict[str, str]:
+    """{logical name: uploads name}; a missing file means no aliases"""
+    try:
+        with open(path or DEFAULT_ALIASES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get("aliases", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_aliases(aliases: Dict[str, str], path: Optional[Path] = None) -> None:
+    """Atomic write"""
+    path = Path(path or DEFAULT_ALIASES_FILE)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"aliases": dict(sorted(aliases.items()))}, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def image_fields(uploads_dir: Path, name: str, url_for: Callable[[str], str]) -> Dict[str, Any]:
+    manifest = image_pipeline.read_manifest(uploads_dir, name)
+    if not manifest or manifest.get("status") != "ready":
+        return {}
+    variants: Dict[str, list] = {}
+    for variant in manifest["variants"]:
+        variants.setdefault(variant["format"], []).append(
+            {"width": variant["width"], "height": variant["height"], "bytes": variant["bytes"], "url": url_for(variant["path"])}
+        )
+    fields: Dict[str, Any] = {"placeholder": manifest.get("placeholder"), "variants": variants}
+    best = manifest.get("best")
+    # Only worth swapping in when it beats the original
+    if best and best["bytes"] < manifest.get("source_bytes", float("inf")):
+        fields["best"] = {"url": url_for(best["path"]), "format": best["format"], "type": best["type"], "bytes": best["bytes"]}
+    return fields
+
+
+def model_fields(uploads_dir: Path, name: str, url_for: Callable[[str], str]) -> Dict[str, Any]:
+    manifest = model_lod.read_manifest(uploads_dir, name)
+    if not manifest or manifest.get("status") != "ready":
+        return {}
+    return {
+        "lods": [
+            {"level": level["level"], "faces": level["faces"], "bytes": level["bytes"], "url": url_for(level["path"])}
+            for level in manifest["levels"]
+        ]
+    }
+
+
+def video_fields(uploads_dir: Path, name: str, url_for: Callable[[str], str]) -> Dict[str, Any]:
+    manifest = video_ladder.read_manifest(uploads_dir, name)
+    if not manifest or manifest.get("status") != "ready":
+        return {}
+    return {"stream": {key: url_for(manifest[key]) for key in ("hls", "mp4", "poster", "poster_thumb")}}
+
+
+KIND_FIELDS = {"image": image_fields, "model": model_fields, "video": video_fields}
+
+
+def asset_entry(record: Dict[str, Any], uploads_dir: Path, url_for: Callable[[str], str]) -> Dict[str, Any]:
+    """Manifest entry for one asset-index record"""
+    name = record["name"]
+    entry: Dict[str, Any] = {
+        "kind": record["kind"],
+        "type": record["mime_type"],
+        "bytes": record["size"],
+        "sha256": record["sha256"],
+        "url": url_for(name),
+    }
+    if record.get("width"):
+        entry["width"], entry["height"] = record["width"], record["height"]
+    if (record.get("model") or {}).get("decoders"):
+        entry["decoders"] = record["model"]["decoders"]
+    # Older Pythons have no MIME type for .glb, so those records say "other"
+    kind = "model" if name.lower().endswith(".glb") else record["kind"]
+    fields = KIND_FIELDS.get(kind)
+    if fields:
+        try:
+            entry.update(fields(uploads_dir, name, url_for))
+        except Exception as e:
+            logger.warning(f"Could not read generated files for {name}: {e}")
+    return entry
+
+
+def build_manifest(
+    records: Iterable[Dict[str, Any]],
+    uploads_dir: Path,
+    aliases: Optional[Dict[str, str]] = None,
+    url_for: Callable[[str], str] = relative_url,
+    decoders: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    The manifest for these asset-index records. "version" is a digest of the
+    content, so it only changes when something the frontend sees changes.
+    `decoders` are the self-hosted model decoders (model_decoders.load_decoders).
+    """
+    assets = {record["name"]: asset_entry(record, uploads_dir, url_for) for record in sorted(records, key=lambda r: r["name"])}
+    resolved_aliases = {}
+    for alias, name in sorted((aliases or {}).items()):
+        if name in assets:
+            resolved_aliases[alias] = name
+        else:
+            logger.warning(f"Asset alias {alias} points at missing upload {name}")
+    decoders = decoders or {}
+    digest = hashlib.sha256(json.dumps([assets, resolved_aliases, decoders], sort_keys=True).encode("utf-8")).hexdigest()
+    return {
+        "format": MANIFEST_FORMAT,
+        "version": digest[:16],
+        "aliases": resolved_aliases,
+        "decoders": decoders,
+        "assets": assets,
+    }
+
+
+def write_manifest(manifest: Dict[str, Any], path: Path) -> None:
+    """Atomic write"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class ManifestCache:
+    """
+    Rendered manifest (document, compact JSON body, ETag), rebuilt on first
+    use after invalidate() or once it is older than max_age seconds.
+    """
+
+    def __init__(self, build: Callable[[], Dict[str, Any]], max_age: float = DEFAULT_MAX_AGE):
+        self._build = build
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entry: Optional[Tuple[Dict[str, Any], bytes, str]] = None
+        self._built_at = 0.0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entry = None
+
+    def get(self) -> Tuple[Dict[str, Any], bytes, str]:
+        with self._lock:
+            if self._entry is None or time.monotonic() - self._built_at > self.max_age:
+                manifest = self._build()
+                body = fast_json.dumps(manifest)
+                self._entry = (manifest, body, f'"{manifest["version"]}"')
+                self._built_at = time.monotonic()
+            return self._entry
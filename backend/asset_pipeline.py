@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+phoenix-assets: Unified Asset Optimization Pipeline
+One entry point for the model / image / video optimization that used to be
+spread over the compress_*.py and optimize_*.py scripts. Work is described by
+named profiles, fanned out over a process pool, and recorded in a build cache
+keyed by input content hash + profile settings, so a re-run only processes
+new or changed inputs.
+
+    python asset_pipeline.py build --profile medium
+    python asset_pipeline.py build --profile ultra --kind model truckdeck3d.glb
+    python asset_pipeline.py build --budgets asset_budgets.json --manifest data/asset-manifest.json
+    python asset_pipeline.py manifest --base-url https://cdn.example.com
+    python asset_pipeline.py profiles
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import image_quality
+import model_compression
+import upload_layout
+from asset_index import file_sha256
+
+logger = logging.getLogger(__name__)
+
+PROG = "phoenix-assets"
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_UPLOADS_DIR = BACKEND_DIR / "uploads"
+DEFAULT_CACHE_FILE = BACKEND_DIR / "data" / "asset_build_cache.json"
+DEFAULT_MANIFEST_FILE = BACKEND_DIR / "data" / "asset-manifest.json"
+QUALITY_CACHE_NAME = "image_quality.json"
+
+MODEL_EXTENSIONS = {".glb"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v"}
+KINDS = ("model", "image", "video")
+
+# Output paths are relative to the uploads directory; {name} is the upload name
+# (extension included, so a.jpg and a.png do not collide), {stem} its stem and
+# {profile} the profile name, so switching profiles never overwrites another
+# profile's outputs. Image "quality" is the ceiling for the SSIM-targeted search in image_quality.py
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "medium": {
+        "description": "Balanced size/quality; what the site serves by default",
+        "model": {"output": "compressed_3d_models/{stem}_compressed.glb", "preset": "medium"},
+        "image": {"output": "optimized/{profile}/{name}.webp", "format": "webp", "quality": 80, "target_ssim": 0.985, "max_width": 1920},
+        "video": {"outputs": ["optimized/{profile}/{name}.webm", "optimized/{profile}/{name}.mp4"], "height": 720, "vp9_crf": 30, "h264_crf": 23},
+    },
+    "low": {
+        "description": "Smaller files for slow connections",
+        "model": {"output": "compressed_3d_models/{stem}_low.glb", "preset": "low"},
+        "image": {"output": "optimized/{profile}/{name}.webp", "format": "webp", "quality": 70, "target_ssim": 0.98, "max_width": 1280},
+        "video": {"outputs": ["optimized/{profile}/{name}.webm", "optimized/{profile}/{name}.mp4"], "height": 480, "vp9_crf": 34, "h264_crf": 28},
+    },
+    "ultra": {
+        "description": "Maximum compression (formerly compress_ultra_aggressive.py)",
+        "model": {"output": "ultra_compressed_models/ultra_{stem}.glb", "preset": "ultra"},
+        "image": {"output": "optimized/{profile}/{name}.webp", "format": "webp", "quality": 60, "target_ssim": 0.97, "max_width": 960},
+        "video": {"outputs": ["optimized/{profile}/{name}.webm", "optimized/{profile}/{name}.mp4"], "height": 360, "vp9_crf": 38, "h264_crf": 32},
+    },
+}
+
+
+def input_kind(path: Path) -> Optional[str]:
+    suffix = path.suffix.lower()
+    if suffix in MODEL_EXTENSIONS:
+        return "model"
+    if suffix in IMAGE_EXTENSIONS:
+        return "image"
+    if suffix in VIDEO_EXTENSIONS:
+        return "video"
+    return None
+
+
+def tool_version(tool: str, flag: str = "--version") -> Optional[str]:
+    """First line of `<tool> --version`, or None when the tool is not on PATH"""
+    executable = shutil.which(tool)
+    if executable is None:
+        return None
+    try:
+        result = subprocess.run([executable, flag], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return (result.stdout or result.stderr).strip().splitlines()[0] if result.returncode == 0 else None
+
+
+def settings_digest(kind: str, settings: Dict[str, Any], tools: Dict[str, Optional[str]]) -> str:
+    """Changes whenever the profile settings or the tool doing the work change"""
+    payload = json.dumps({"kind": kind, "settings": settings, "tools": tools}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+# ---- Task handlers (run in worker processes) ----
+def _partial_path(output: Path) -> Path:
+    return output.with_name(f"{output.stem}.{os.getpid()}.partial{output.suffix}")
+
+
+def _atomic_output(output: Path) -> Path:
+    """Temporary sibling to write to before renaming over `output`"""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    return _partial_path(output)
+
+
+def build_model(source: Path, outputs: List[Path], settings: Dict[str, Any]) -> Dict[str, Any]:
+    import model_compression
+
+    result = model_compression.compress_model(source, outputs[0], settings)
+    if not result["ok"]:
+        raise RuntimeError(result["error"])
+    return {"method": result["method"], "decoders": result["decoders"]}
+
+
+def build_image(source: Path, outputs: List[Path], settings: Dict[str, Any]) -> Dict[str, Any]:
+    from PIL import Image, ImageOps
+
+    import image_quality
+    import image_variants
+
+    output = outputs[0]
+    with Image.open(source) as opened:
+        img = ImageOps.exif_transpose(opened)
+        img.load()
+    if img.width > settings["max_width"]:
+        img = image_variants.resize_to_width(img, settings["max_width"])
+    known = settings.get("known_quality")
+    if known is not None:
+        encoded = {"data": image_variants.encode_image(img, settings["format"], known), "quality": known, "ssim": None}
+    elif settings.get("target_ssim"):
+        encoded = image_quality.search_quality(img, settings["format"], settings["target_ssim"], settings["quality"])
+    else:
+        encoded = {"data": image_variants.encode_image(img, settings["format"], settings["quality"]), "quality": settings["quality"], "ssim": None}
+    tmp_path = _atomic_output(output)
+    tmp_path.write_bytes(encoded["data"])
+    os.replace(tmp_path, output)
+    return {"method": "pillow", "quality": encoded["quality"], "ssim": encoded["ssim"]}
+
+
+def build_video(source: Path, outputs: List[Path], settings: Dict[str, Any]) -> str:
+    import optimize_assets
+
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found on PATH")
+    # optimize_video names its outputs after the source stem; render into a
+    # scratch directory and move them to the profile's paths
+    outputs[0].parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=outputs[0].parent, prefix=".partial-") as scratch:
+        optimize_assets.optimize_video(
+            source,
+            Path(scratch),
+            height=settings["height"],
+            vp9_crf=settings["vp9_crf"],
+            h264_crf=settings["h264_crf"],
+        )
+        rendered = [Path(scratch) / f"{source.stem}.webm", Path(scratch) / f"{source.stem}_optimized.mp4"]
+        missing = [output.name for path, output in zip(rendered, outputs) if not path.exists()]
+        if missing:
+            raise RuntimeError(f"ffmpeg produced no output for {', '.join(missing)}")
+        for path, output in zip(rendered, outputs):
+            output.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, output)
+    return "ffmpeg"
+
+
+BUILDERS = {"model": build_model, "image": build_image, "video": build_video}
+
+
+def run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute one task in a worker process; never raises"""
+    started = time.time()
+    source = Path(task["source"])
+    outputs = [Path(path) for path in task["outputs"]]
+    result = {"key": task["key"], "name": task["name"], "kind": task["kind"], "profile": task["profile"]}
+    settings = task["settings"]
+    if task.get("known_quality") is not None:
+        settings = {**settings, "known_quality": task["known_quality"]}
+    try:
+        built = BUILDERS[task["kind"]](source, outputs, settings)
+        # Builders return the method, or a dict with the method and build details
+        result.update(built if isinstance(built, dict) else {"method": built})
+        result["input_bytes"] = source.stat().st_size
+        result["outputs"] = {task["output_names"][i]: path.stat().st_size for i, path in enumerate(outputs)}
+        result["status"] = "built"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        for path in outputs:
+            _partial_path(path).unlink(missing_ok=True)
+    result["seconds"] = round(time.time() - started, 3)
+    return result
+
+
+# ---- Build cache ----
+class BuildCache:
+    """
+    JSON map of task key -> what was built from which input. Input hashes
+    are reused while the file's (mtime, size) is unchanged, so checking an
+    untouched tree costs one stat per file.
+    """
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hashes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def content_hash(self, path: Path) -> str:
+        stat_result = path.stat()
+        key = str(path.resolve())
+        known = self.hashes.get(key)
+        if known and known["mtime_ns"] == stat_result.st_mtime_ns and known["size"] == stat_result.st_size:
+            return known["sha256"]
+        digest = file_sha256(path)
+        with self._lock:
+            self.hashes[key] = {"mtime_ns": stat_result.st_mtime_ns, "size": stat_result.st_size, "sha256": digest}
+        return digest
+
+    def is_fresh(self, task: Dict[str, Any]) -> bool:
+        entry = self.entries.get(task["key"])
+        if not entry or entry["input_sha256"] != task["input_sha256"] or entry["settings_digest"] != task["settings_digest"]:
+            return False
+        for path, size in zip(task["outputs"], entry["outputs"].values()):
+            try:
+                if Path(path).stat().st_size != size:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+    def record(self, task: Dict[str, Any], result: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[task["key"]] = {
+                "input": task["name"],
+                "input_sha256": task["input_sha256"],
+                "profile": task["profile"],
+                "settings_digest": task["settings_digest"],
+                "outputs": result["outputs"],
+                "method": result["method"],
+                "decoders": result.get("decoders"),
+                "built_at": datetime.utcnow().isoformat(),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries = {}
+            self.hashes = {}
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.hashes = data.get("hashes", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading {self.cache_file}: {e}")
+
+    def save(self) -> None:
+        """Atomic write"""
+        with self._lock:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_name(f"{self.cache_file.name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self.entries, "hashes": self.hashes}, f, indent=2)
+            os.replace(tmp_path, self.cache_file)
+
+
+# ---- Planning / execution ----
+def output_names_for(profile_name: str, kind: str, name: str) -> List[str]:
+    """Upload-relative outputs the profile builds from `name`"""
+    settings = PROFILES[profile_name][kind]
+    patterns = settings["outputs"] if "outputs" in settings else [settings["output"]]
+    return [pattern.format(name=name, stem=Path(name).stem, profile=profile_name) for pattern in patterns]
+
+
+def plan_tasks(
+    uploads_dir: Path,
+    profile_name: str,
+    kinds: Iterable[str] = KINDS,
+    names: Optional[Iterable[str]] = None,
+    cache: Optional[BuildCache] = None,
+    quality_cache: Optional[image_quality.QualityCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    One task per (input, kind) for the profile; input hashes come from the
+    cache, and image tasks carry the quality an earlier search chose
+    """
+    profile = PROFILES[profile_name]
+    kinds = set(kinds)
+    wanted = set(names) if names else None
+    tools = {
+        "model": {"gltf-transform": tool_version(model_compression.find_gltf_transform() or "gltf-transform")},
+        "image": {},
+        "video": {"ffmpeg": tool_version("ffmpeg", "-version")},
+    }
+    model_profiles = model_compression.load_profiles()
+
+    tasks = []
+    for name, path in sorted(upload_layout.iter_uploads(uploads_dir)):
+        kind = input_kind(path)
+        if kind is None or kind not in kinds or (wanted is not None and name not in wanted):
+            continue
+        settings = profile[kind]
+        if kind == "model":
+            # Per-model targets and overrides from model_profiles.json
+            settings = {**model_compression.resolve_settings(name, settings["preset"], model_profiles), **settings}
+        output_names = output_names_for(profile_name, kind, name)
+        tasks.append({
+            "key": f"{kind}:{profile_name}:{name}",
+            "name": name,
+            "kind": kind,
+            "profile": profile_name,
+            "source": str(path),
+            "settings": settings,
+            "settings_digest": settings_digest(kind, settings, tools[kind]),
+            "input_sha256": cache.content_hash(path) if cache else file_sha256(path),
+            "output_names": output_names,
+            "outputs": [str(uploads_dir / output_name) for output_name in output_names],
+        })
+        if kind == "image" and settings.get("target_ssim"):
+            task = tasks[-1]
+            task["quality_key"] = image_quality.QualityCache.make_key(
+                task["input_sha256"], settings["format"], settings["max_width"], settings["target_ssim"], settings["quality"]
+            )
+            task["known_quality"] = quality_cache.get(task["quality_key"]) if quality_cache else None
+    return tasks
+
+
+def run_build(
+    uploads_dir: Path,
+    profile_name: str,
+    cache: BuildCache,
+    kinds: Iterable[str] = KINDS,
+    names: Optional[Iterable[str]] = None,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    dry_run: bool = False,
+    on_result=None,
+) -> Dict[str, Any]:
+    """Plan, skip what the cache says is fresh, build the rest in parallel"""
+    started = time.time()
+    # Chosen image qualities live next to the build cache and outlive it (`--force`, `clean`)
+    quality_cache = image_quality.QualityCache(cache.cache_file.with_name(QUALITY_CACHE_NAME))
+    tasks = plan_tasks(uploads_dir, profile_name, kinds, names, cache, quality_cache)
+    pending = [task for task in tasks if force or not cache.is_fresh(task)]
+    report: Dict[str, Any] = {
+        "profile": profile_name,
+        "planned": len(tasks),
+        "cached": len(tasks) - len(pending),
+        "built": 0,
+        "failed": 0,
+        "dry_run": dry_run,
+        "results": [],
+    }
+
+    if pending and not dry_run:
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(pending)))
+        # Largest inputs first so one big model does not start last and dominate the wall time
+        pending.sort(key=lambda task: Path(task["source"]).stat().st_size, reverse=True)
+        by_key = {task["key"]: task for task in pending}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_task, task) for task in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                report["results"].append(result)
+                if result["status"] == "built":
+                    report["built"] += 1
+                    cache.record(by_key[result["key"]], result)
+                    task = by_key[result["key"]]
+                    if task.get("quality_key") and result.get("ssim") is not None:
+                        quality_cache.set(task["quality_key"], result["quality"], result["ssim"])
+                else:
+                    report["failed"] += 1
+                if on_result:
+                    on_result(result)
+    elif dry_run:
+        report["results"] = [{"key": task["key"], "name": task["name"], "kind": task["kind"], "status": "pending"} for task in pending]
+
+    cache.save()
+    quality_cache.save()
+    report["seconds"] = round(time.time() - started, 3)
+    return report
+
+
+def emit_manifest(uploads_dir: Path, output: Path, aliases_file: Optional[Path] = None, base_url: str = "") -> Dict[str, Any]:
+    """Refresh the asset index for uploads_dir and write asset-manifest.json from it"""
+    from urllib.parse import quote
+
+    import asset_manifest
+    import model_decoders
+    from asset_index import AssetIndex
+
+    index = AssetIndex(output.parent, uploads_dir)
+    index.refresh()
+    _, records = index.query(limit=len(index.names()))
+    manifest = asset_manifest.build_manifest(
+        records,
+        uploads_dir,
+        asset_manifest.load_aliases(aliases_file),
+        url_for=lambda name: f"{base_url.rstrip('/')}/uploads/{quote(name)}",
+        decoders=model_decoders.load_decoders(url_for=lambda path: f"{base_url.rstrip('/')}/static/{path}"),
+    )
+    asset_manifest.write_manifest(manifest, output)
+    return manifest
+
+
+# ---- CLI ----
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog=PROG, description="Optimize uploaded models, images and videos")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    build = subcommands.add_parser("build", help="Optimize new or changed uploads")
+    build.add_argument("names", nargs="*", help="Only these uploads (public names); default: all")
+    build.add_argument("--profile", choices=sorted(PROFILES), default="medium")
+    build.add_argument("--kind", action="append", choices=KINDS, help="Limit to one kind (repeatable)")
+    build.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    build.add_argument("--force", action="store_true", help="Ignore the build cache")
+    build.add_argument("--dry-run", action="store_true", help="Only list what would be built")
+    build.add_argument("--json", action="store_true", help="Print the report as JSON")
+    build.add_argument("--uploads", default=str(DEFAULT_UPLOADS_DIR))
+    build.add_argument("--cache", default=str(DEFAULT_CACHE_FILE))
+    build.add_argument("--budgets", metavar="PATH", help="Fail when a built output exceeds its asset_budgets.json class")
+    build.add_argument("--manifest", metavar="PATH", help="Write asset-manifest.json here after the build")
+
+    manifest_parser = subcommands.add_parser("manifest", help="Write asset-manifest.json for the uploads")
+    manifest_parser.add_argument("--uploads", default=str(DEFAULT_UPLOADS_DIR))
+    manifest_parser.add_argument("--output", default=str(DEFAULT_MANIFEST_FILE), help="Also where the asset index is kept")
+    manifest_parser.add_argument("--aliases", default=None, help="Alias file (default: asset_aliases.json)")
+    manifest_parser.add_argument("--base-url", default="", help="Prefix for asset URLs (default: root-relative)")
+
+    subcommands.add_parser("profiles", help="Show the available profiles")
+
+    cache_parser = subcommands.add_parser("cache", help="Inspect or clear the build cache")
+    cache_parser.add_argument("--clear", action="store_true")
+    cache_parser.add_argument("--cache", default=str(DEFAULT_CACHE_FILE))
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == "profiles":
+        print(json.dumps(PROFILES, indent=2))
+        return 0
+
+    if args.command == "cache":
+        cache = BuildCache(Path(args.cache))
+        if args.clear:
+            cache.clear()
+            cache.save()
+        print(json.dumps({"entries": len(cache.entries), "hashed_files": len(cache.hashes)}, indent=2))
+        return 0
+
+    uploads_dir = Path(args.uploads)
+    if not uploads_dir.is_dir():
+        parser.error(f"{uploads_dir} is not a directory")
+
+    if args.command == "manifest":
+        manifest = emit_manifest(uploads_dir, Path(args.output), args.aliases and Path(args.aliases), args.base_url)
+        print(f"🗺️ {args.output}: {len(manifest['assets'])} assets, {len(manifest['aliases'])} aliases (version {manifest['version']})")
+        return 0
+
+    def print_result(result):
+        if args.json:
+            return
+        if result["status"] == "built":
+            sizes = ", ".join(f"{name} {size / 1024:.0f} KB" for name, size in result["outputs"].items())
+            quality = f", q={result['quality']}" if result.get("quality") is not None else ""
+            decoders = f", needs {'+'.join(result['decoders'])}" if result.get("decoders") else ""
+            print(f"✅ {result['name']} ({result['method']}{quality}{decoders}, {result['seconds']}s): {sizes}")
+        else:
+            print(f"❌ {result['name']}: {result['error']}")
+
+    report = run_build(
+        uploads_dir,
+        args.profile,
+        BuildCache(Path(args.cache)),
+        kinds=args.kind or KINDS,
+        names=args.names or None,
+        jobs=args.jobs,
+        force=args.force,
+        dry_run=args.dry_run,
+        on_result=print_result,
+    )
+    over_budget = 0
+    if args.budgets:
+        import asset_budgets
+
+        built = [name for result in report["results"] if result["status"] == "built" for name in result["outputs"]]
+        if built:
+            report["budgets"] = asset_budgets.check_budgets(uploads_dir, asset_budgets.load_budgets(Path(args.budgets)), built, args.jobs)
+            over_budget = report["budgets"]["over_budget"]
+    if args.manifest and not args.dry_run:
+        report["manifest_version"] = emit_manifest(uploads_dir, Path(args.manifest))["version"]
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(
+            f"🎯 {report['planned']} inputs: {report['built']} built, {report['cached']} up to date, "
+            f"{report['failed']} failed in {report['seconds']}s (profile {report['profile']})"
+        )
+        if report.get("budgets"):
+            asset_budgets.print_report(report["budgets"], top=10)
+    return 1 if report["failed"] or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
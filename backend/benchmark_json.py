@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+JSON Benchmark for Phoenix Trailers API
+Times data snapshots and product responses on synthetic catalogues, the old
+way and the current way:
+
+  save/load   json.dump(indent=2, default=str) + json.load  vs  fast_json (compact)
+  response    JSONResponse on the encoded list              vs  FastJSONResponse
+  products    Product model per item + JSONResponse          vs  cached ProductRecord JSON
+
+fast_json uses orjson when it is installed; run once with and once without it
+to see both backends.
+
+    python benchmark_json.py                 # 100, 1000 and 10000 products
+    python benchmark_json.py --sizes 50000 --repeat 3
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+import fast_json
+import product_store
+
+
+class Product(BaseModel):
+    """The fields of server.Product (importing server would load and write the real data files)"""
+
+    id: str
+    title: str
+    description: str
+    images: List[str] = []
+    created_at: datetime
+    updated_at: datetime
+
+
+WORDS = "flatbed drop deck ramp tri-axle beavertail utility trailer steel aluminum gooseneck winch tie-down".split()
+
+
+def make_catalogue(count: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """Products shaped like the real ones: a short title, a paragraph, a few shared upload paths"""
+    rng = random.Random(seed)
+    uploads = [f"/uploads/migrated/image_{index:04d}.jpg" for index in range(max(10, count // 4))]
+    start = datetime(2024, 1, 1)
+    products = {}
+    for _ in range(count):
+        product_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        created = start + timedelta(minutes=rng.randrange(500000))
+        products[product_id] = {
+            "id": product_id,
+            "title": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+            "description": " ".join(rng.choice(WORDS) for _ in range(40)),
+            "images": rng.sample(uploads, rng.randint(1, 5)),
+            "created_at": created,
+            "updated_at": created + timedelta(days=rng.randrange(90)),
+        }
+    return products
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Fastest of `repeat` runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def bench_snapshots(products: Dict[str, Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = Path(tmp) / "old.json", Path(tmp) / "new.json"
+
+        def old_save():
+            with open(old_path, "w", encoding="utf-8") as f:
+                json.dump(products, f, indent=2, default=str)
+
+        def new_save():
+            new_path.write_bytes(fast_json.dumps(products))
+
+        def old_load():
+            with open(old_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        def new_load():
+            return fast_json.loads(new_path.read_bytes())
+
+        return {
+            "save": (best_of(repeat, old_save), best_of(repeat, new_save)),
+            "load": (best_of(repeat, old_load), best_of(repeat, new_load)),
+            "bytes": (old_path.stat().st_size, new_path.stat().st_size),
+        }
+
+
+def bench_responses(products: Dict[str, Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    encoded = jsonable_encoder(list(products.values()))
+    records = product_store.load_records(products)
+
+    def old_products():
+        # What list_products did: validate each stored dict, encode, render
+        return JSONResponse(jsonable_encoder([Product(**doc) for doc in products.values()]))
+
+    def new_products():
+        return product_store.render_list(records.values())
+
+    new_products()  # records render their JSON once, on first use
+    return {
+        "response": (best_of(repeat, lambda: JSONResponse(encoded)), best_of(repeat, lambda: fast_json.FastJSONResponse(encoded))),
+        "products": (best_of(repeat, old_products), best_of(repeat, new_products)),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON persistence and response rendering")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Catalogue sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args(argv)
+
+    print(f"JSON backend: {fast_json.BACKEND}")
+    print(f"{'products':>9}  {'step':<9} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        products = make_catalogue(size)
+        results = {**bench_snapshots(products, args.repeat), **bench_responses(products, args.repeat)}
+        for step in ("save", "load", "response", "products"):
+            before, after = results[step]
+            print(f"{size:>9}  {step:<9} {before:>10.2f} {after:>10.2f} {before / after if after else float('inf'):>7.1f}x")
+        old_bytes, new_bytes = results["bytes"]
+        print(f"{size:>9}  {'on disk':<9} {old_bytes / 1024:>8.0f}KB {new_bytes / 1024:>8.0f}KB {old_bytes / new_bytes:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
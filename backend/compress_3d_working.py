@@ -5,252 +5,181 @@ Fixed version that handles GLB files correctly
 """
 
 import os
-import subprocess
 import sys
 from pathlib import Path
 
-def install_requirements():
-    """Install required packages"""
-    packages = ["trimesh", "pygltflib"]
-    
-    for package in packages:
+# Fraction of each mesh's faces kept per quality level
+QUALITY_RATIOS = {"low": 0.3, "medium": 0.5, "high": 1.0}
+
+# Every mesh keeps at least this many faces so small parts never vanish
+MIN_FACES = 12
+
+def simplify_geometry(geom, target_faces):
+    """Quadric decimation down to target_faces, or None if this trimesh can't"""
+    for method_name in ("simplify_quadric_decimation", "simplify_quadratic_decimation"):
+        method = getattr(geom, method_name, None)
+        if method is None:
+            continue
         try:
-            __import__(package)
-            print(f"✅ {package} already installed")
-        except ImportError:
-            print(f"📦 Installing {package}...")
-            subprocess.run([sys.executable, "-m", "pip", "install", package], check=True)
-            print(f"✅ {package} installed successfully")
+            # trimesh >= 4 takes keyword face_count, older versions a positional count
+            return method(face_count=target_faces)
+        except TypeError:
+            return method(target_faces)
+    return None
+
+def screen_importance(scene):
+    """
+    Relative on-screen size of each geometry: the mean projected area of its
+    world-space bounding box over all view directions ((ab + bc + ca) / 2
+    for extents a, b, c), summed over every node that instances it
+    """
+    import numpy as np
+
+    importance = {}
+    for node in scene.graph.nodes_geometry:
+        transform, geom_name = scene.graph[node]
+        geom = scene.geometry.get(geom_name)
+        if geom is None or not hasattr(geom, "bounds") or geom.bounds is None:
+            continue
+        corners = np.array([[x, y, z] for x in geom.bounds[:, 0] for y in geom.bounds[:, 1] for z in geom.bounds[:, 2]])
+        world = corners @ transform[:3, :3].T + transform[:3, 3]
+        a, b, c = world.max(axis=0) - world.min(axis=0)
+        importance[geom_name] = importance.get(geom_name, 0.0) + (a * b + b * c + c * a) / 2
+    return importance
+
+def allocate_face_budget(face_counts, importance, face_budget):
+    """
+    Split a scene-wide face budget across meshes in proportion to importance.
+    A mesh never gets more faces than it has; what it can't use is
+    redistributed over the rest. Returns {mesh name: target faces}.
+    """
+    targets = {}
+    remaining = {name: count for name, count in face_counts.items() if count > 0}
+    budget = max(0, face_budget)
+    while remaining:
+        weights = {name: max(importance.get(name, 0.0), 1e-12) for name in remaining}
+        total_weight = sum(weights.values())
+        shares = {name: budget * weight / total_weight for name, weight in weights.items()}
+        saturated = [name for name in remaining if shares[name] >= remaining[name]]
+        if not saturated:
+            for name in remaining:
+                targets[name] = min(remaining[name], max(MIN_FACES, int(shares[name])))
+            break
+        for name in saturated:
+            targets[name] = remaining.pop(name)
+            budget -= targets[name]
+    return targets
+
+def decimate_scene(scene, ratio=None, face_budget=None):
+    """
+    Decimate every mesh of a trimesh Scene in place, either by a fixed ratio
+    or to fit a scene-wide face_budget. Returns per-mesh before/after counts.
+    """
+    face_counts = {
+        name: len(geom.faces)
+        for name, geom in scene.geometry.items()
+        if hasattr(geom, "faces") and len(geom.faces) > 0
+    }
+    if face_budget is not None:
+        targets = allocate_face_budget(face_counts, screen_importance(scene), face_budget)
+    else:
+        targets = {name: min(count, max(MIN_FACES, int(count * (ratio or 1.0)))) for name, count in face_counts.items()}
+
+    report = []
+    for name, count in face_counts.items():
+        target = targets[name]
+        if target < count:
+            simplified = simplify_geometry(scene.geometry[name], target)
+            if simplified is not None and len(simplified.faces) > 0:
+                # Write back into the scene; rebinding a loop variable would leave the export unchanged
+                scene.geometry[name] = simplified
+        report.append({
+            "mesh": name,
+            "faces_before": count,
+            "target_faces": target,
+            "faces_after": len(scene.geometry[name].faces),
+        })
+    return report
+
+def compress_scene(input_path, output_path, quality="medium", face_budget=None):
+    """Load a GLB as a scene, decimate it, export it; returns the per-mesh report"""
+    import trimesh
+
+    scene = trimesh.load(input_path, force="scene")
+    report = decimate_scene(scene, ratio=QUALITY_RATIOS[quality], face_budget=face_budget)
+    scene.export(output_path, file_type="glb")
+    return report
 
-def compress_with_trimesh_fixed(input_path, output_path, quality="medium"):
-    """Compress using trimesh library with correct API"""
+def compress_with_trimesh_fixed(input_path, output_path, quality="medium", face_budget=None):
+    """Compress using trimesh; face_budget caps the total face count of the scene"""
     try:
-        import trimesh
-        
         print(f"🔧 Compressing {input_path} with trimesh...")
-        
-        # Load the mesh - trimesh can handle GLB files
-        mesh = trimesh.load(input_path)
-        
-        # Check if it's a scene (multiple meshes) or single mesh
-        if hasattr(mesh, 'geometry'):
-            # It's a scene with multiple meshes
-            print(f"📊 Scene detected with {len(mesh.geometry)} meshes")
-            
-            # Process each mesh in the scene
-            for name, geom in mesh.geometry.items():
-                if hasattr(geom, 'faces') and len(geom.faces) > 0:
-                    print(f"📐 Processing mesh '{name}' with {len(geom.faces)} faces")
-                    
-                    # Quality settings for polygon reduction
-                    if quality == "low":
-                        target_faces = int(len(geom.faces) * 0.3)
-                    elif quality == "medium":
-                        target_faces = int(len(geom.faces) * 0.5)
-                    else:  # high quality
-                        target_faces = len(geom.faces)
-                    
-                    if target_faces < len(geom.faces):
-                        # Use the correct method name for newer trimesh versions
-                        try:
-                            # Try the newer method first
-                            geom = geom.simplify_quadric_decimation(target_faces)
-                            print(f"✅ Reduced to {len(geom.faces)} faces")
-                        except AttributeError:
-                            try:
-                                # Try alternative method
-                                geom = geom.simplify_quadratic_decimation(target_faces)
-                                print(f"✅ Reduced to {len(geom.faces)} faces")
-                            except AttributeError:
-                                print(f"⚠️ Could not reduce polygon count for {name}")
-        else:
-            # Single mesh
-            print(f"📐 Single mesh with {len(mesh.faces)} faces")
-            
-            if quality != "high":
-                target_faces = int(len(mesh.faces) * (0.5 if quality == "medium" else 0.3))
-                
-                try:
-                    mesh = mesh.simplify_quadric_decimation(target_faces)
-                    print(f"✅ Reduced to {len(mesh.faces)} faces")
-                except AttributeError:
-                    try:
-                        mesh = mesh.simplify_quadratic_decimation(target_faces)
-                        print(f"✅ Reduced to {len(mesh.faces)} faces")
-                    except AttributeError:
-                        print(f"⚠️ Could not reduce polygon count")
-        
-        # Export with compression
-        mesh.export(output_path, file_type='glb')
-        
+        report = compress_scene(input_path, output_path, quality, face_budget)
+
+        print(f"📊 Scene with {len(report)} meshes")
+        for mesh in report:
+            print(f"📐 {mesh['mesh']}: {mesh['faces_before']} -> {mesh['faces_after']} faces")
+        before = sum(mesh["faces_before"] for mesh in report)
+        after = sum(mesh["faces_after"] for mesh in report)
+        print(f"✅ Total faces: {before} -> {after}" + (f" (budget {face_budget})" if face_budget is not None else ""))
+
         # Calculate savings
         original_size = os.path.getsize(input_path) / (1024 * 1024)
         compressed_size = os.path.getsize(output_path) / (1024 * 1024)
         savings = ((original_size - compressed_size) / original_size) * 100
-        
+
         print(f"✅ Compression successful!")
         print(f"📊 Original: {original_size:.1f} MB")
         print(f"📊 Compressed: {compressed_size:.1f} MB")
         print(f"💾 Savings: {savings:.1f}%")
-        
+
         return True
-        
+
     except Exception as e:
         print(f"❌ Trimesh compression failed: {e}")
         return False
 
 def compress_with_gltf_optimizer(input_path, output_path, quality="medium"):
-    """Compress using gltf-transform if available"""
+    """Compress using gltf-transform if it is on PATH"""
+    import model_compression
+
     try:
-        # Try to use gltf-transform if it's available
-        result = subprocess.run(["gltf-transform", "--version"], capture_output=True, text=True)
-        if result.returncode != 0:
-            print("❌ gltf-transform not found. Skipping this method.")
-            return False
-            
-        print(f"🔧 Compressing {input_path} with gltf-transform...")
-        
-        # Quality settings
-        quality_settings = {
-            "low": {"texture_max_size": 512, "draco_level": 7},
-            "medium": {"texture_max_size": 1024, "draco_level": 5},
-            "high": {"texture_max_size": 2048, "draco_level": 3}
-        }
-        
-        settings = quality_settings[quality]
-        
-        cmd = [
-            "gltf-transform", "optimize",
-            input_path,
-            output_path,
-            "--texture-max-size", str(settings["texture_max_size"]),
-            "--draco-compression",
-            "--draco-compression-level", str(settings["draco_level"])
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        
-        if os.path.exists(output_path):
-            # Calculate savings
-            original_size = os.path.getsize(input_path) / (1024 * 1024)
-            compressed_size = os.path.getsize(output_path) / (1024 * 1024)
-            savings = ((original_size - compressed_size) / original_size) * 100
-            
-            print(f"✅ gltf-transform compression successful!")
-            print(f"📊 Original: {original_size:.1f} MB")
-            print(f"📊 Compressed: {compressed_size:.1f} MB")
-            print(f"💾 Savings: {savings:.1f}%")
-            
-            return True
-        
-        return False
-        
+        model_compression.compress_with_gltf_transform(Path(input_path), Path(output_path), model_compression.PRESETS[quality])
+        return os.path.exists(output_path)
     except Exception as e:
         print(f"❌ gltf-transform compression failed: {e}")
         return False
 
-def batch_compress_working(input_dir, output_dir, quality="medium"):
-    """Compress all GLB files using working methods"""
-    
-    input_path = Path(input_dir)
-    output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
-    
-    # Find all GLB files
-    glb_files = list(input_path.glob("*.glb"))
-    
+def batch_compress_working(input_dir, output_dir, quality=None, jobs=1):
+    """Compress all GLB files in input_dir; returns the model_compression results"""
+    import model_compression
+
+    glb_files = sorted(Path(input_dir).glob("*.glb"))
     if not glb_files:
         print(f"❌ No GLB files found in {input_dir}")
-        return
-    
+        return []
+
     print(f"🔍 Found {len(glb_files)} GLB files to compress")
-    
-    successful = 0
-    total_original_size = 0
-    total_compressed_size = 0
-    
-    for glb_file in glb_files:
-        output_file = output_path / f"{glb_file.stem}_compressed.glb"
-        
-        print(f"\n📁 Processing: {glb_file.name}")
-        
-        # Try different compression methods in order of preference
-        compression_successful = False
-        
-        # Method 1: gltf-transform (best compression)
-        if not compression_successful:
-            compression_successful = compress_with_gltf_optimizer(str(glb_file), str(output_file), quality)
-        
-        # Method 2: trimesh (fallback)
-        if not compression_successful:
-            compression_successful = compress_with_trimesh_fixed(str(glb_file), str(output_file), quality)
-        
-        if compression_successful:
-            successful += 1
-            
-            # Calculate sizes
-            original_size = os.path.getsize(glb_file) / (1024 * 1024)
-            compressed_size = os.path.getsize(output_file) / (1024 * 1024)
-            
-            total_original_size += original_size
-            total_compressed_size += compressed_size
-        else:
-            print(f"❌ All compression methods failed for {glb_file.name}")
-    
-    # Summary
+    results = model_compression.batch_compress(glb_files, Path(output_dir), preset=quality, jobs=jobs)
+    summary = model_compression.summarize(results)
     print(f"\n🎯 Compression Summary:")
-    print(f"✅ Successful: {successful}/{len(glb_files)}")
-    
-    if successful > 0:
-        print(f"📊 Total Original: {total_original_size:.1f} MB")
-        print(f"📊 Total Compressed: {total_compressed_size:.1f} MB")
-        print(f"💾 Total Savings: {((total_original_size - total_compressed_size) / total_original_size) * 100:.1f}%")
+    print(f"✅ Successful: {summary['succeeded']}/{summary['total']}")
+    if summary["succeeded"]:
+        print(f"📊 Total Original: {summary['original_bytes'] / (1024 * 1024):.1f} MB")
+        print(f"📊 Total Compressed: {summary['compressed_bytes'] / (1024 * 1024):.1f} MB")
+        print(f"💾 Total Savings: {summary['savings_pct']:.1f}%")
     else:
         print("❌ No files were successfully compressed")
+    return results
 
 def main():
-    """Main function"""
-    print("🚀 Working 3D Model Compression Tool")
-    print("=" * 40)
-    
-    # Install requirements
-    install_requirements()
-    
-    # Get current directory
-    current_dir = Path(__file__).parent
-    uploads_dir = current_dir / "uploads"
-    
-    if not uploads_dir.exists():
-        print(f"❌ Uploads directory not found: {uploads_dir}")
-        return
-    
-    # Create compressed directory
-    compressed_dir = uploads_dir / "compressed_3d_models"
-    compressed_dir.mkdir(exist_ok=True)
-    
-    print(f"\n📁 Input directory: {uploads_dir}")
-    print(f"📁 Output directory: {compressed_dir}")
-    
-    # Ask for quality preference
-    print("\n🎚️ Choose compression quality:")
-    print("1. Low (max compression, lower quality)")
-    print("2. Medium (balanced compression/quality) - RECOMMENDED")
-    print("3. High (minimal compression, high quality)")
-    
-    while True:
-        choice = input("Enter choice (1-3): ").strip()
-        if choice in ["1", "2", "3"]:
-            quality_map = {"1": "low", "2": "medium", "3": "high"}
-            quality = quality_map[choice]
-            break
-        print("❌ Invalid choice. Please enter 1, 2, or 3.")
-    
-    print(f"\n🎯 Using {quality} quality compression")
-    
-    # Start compression
-    batch_compress_working(uploads_dir, compressed_dir, quality)
-    
-    print(f"\n✨ Compression complete! Check {compressed_dir} for results.")
+    """Non-interactive: `python compress_3d_working.py [low|medium|high]` (see model_compression.py for all options)"""
+    import model_compression
+
+    args = ["--all"]
+    if len(sys.argv) > 1:
+        args += ["--preset", sys.argv[1]]
+    sys.exit(model_compression.main(args + sys.argv[2:]))
 
 if __name__ == "__main__":
     main()
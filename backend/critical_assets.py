@@ -0,0 +1,113 @@
+"""
+Critical Asset Hints for Phoenix Trailers API
+The hero image, logo, first 3D model and Draco decoder are referenced from
+JS, so the browser only discovers them after the bundle runs. The API
+responses the landing page fetches first carry `Link: rel=preload` headers
+for them (and a 103 Early Hints response where the server supports it), so
+those downloads start while the page is still booting. Browsers only act on
+Link headers of documents, so the frontend also turns the header of its
+first API call into <link> elements (frontend/src/lib/preloadHints.js).
+
+The set comes from critical_assets.json: "routes" to decorate, origins to
+"preconnect" to, and "assets" given as an upload name / asset alias
+(resolved through the asset manifest, so missing uploads are skipped and
+swapped files are picked up), a "decoder" "file" from the self-hosted
+decoders in the manifest, or a literal "url".
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_FILE = Path(__file__).parent / "critical_assets.json"
+# Link attributes copied from a config entry, in header order
+LINK_ATTRIBUTES = ("as", "type", "crossorigin", "fetchpriority", "imagesrcset", "imagesizes")
+
+
+def load_config(path: Optional[Path] = None) -> Dict[str, Any]:
+    """The critical-asset config; a missing file disables the hints"""
+    try:
+        with open(path or DEFAULT_CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def link_value(url: str, rel: str = "preload", **attributes: Optional[str]) -> str:
+    """One Link header entry: <url>; rel=preload; as=image; ..."""
+    parts = [f"<{url}>", f"rel={rel}"]
+    for key in LINK_ATTRIBUTES:
+        value = attributes.get(key)
+        if value is None:
+            continue
+        parts.append(f'{key}="{value}"' if key in ("type", "imagesrcset", "imagesizes") else f"{key}={value}")
+    return "; ".join(parts)
+
+
+def resolve_links(config: Dict[str, Any], manifest: Dict[str, Any]) -> List[str]:
+    """Link header entries for the config, with uploads resolved through the asset manifest"""
+    # Preconnected origins serve CORS fetches (decoders, models), which use separate anonymous connections
+    links = [link_value(origin, rel="preconnect", crossorigin="anonymous") for origin in config.get("preconnect", [])]
+    for item in config.get("assets", []):
+        attributes = {key: item.get(key) for key in LINK_ATTRIBUTES}
+        if "url" in item:
+            links.append(link_value(item["url"], **attributes))
+            continue
+        if "decoder" in item:
+            decoder = manifest.get("decoders", {}).get(item["decoder"])
+            if decoder is None:
+                logger.warning(f"{item['decoder']} decoder is not vendored; no preload sent")
+                continue
+            links.append(link_value(decoder["path"] + item["file"], **attributes))
+            continue
+        name = manifest.get("aliases", {}).get(item["asset"], item["asset"])
+        entry = manifest.get("assets", {}).get(name)
+        if entry is None:
+            logger.warning(f"Critical asset {item['asset']} is not in the uploads index; no preload sent")
+            continue
+        # The page loads the URL it references, so that (not the best copy) is preloaded
+        attributes["type"] = attributes["type"] or entry.get("type")
+        links.append(link_value(entry["url"], **attributes))
+    return links
+
+
+class EarlyHintsMiddleware:
+    """
+    Adds the critical-asset Link header to GET responses on the configured
+    paths. When the ASGI server offers the early-hint extension, the links
+    also go out as a 103 response before the route runs; otherwise the Link
+    header alone lets CDNs that support it (e.g. Cloudflare) emit the 103.
+    """
+
+    def __init__(self, app: ASGIApp, paths: List[str], get_links: Callable[[], Awaitable[List[str]]]):
+        self.app = app
+        self.paths = set(paths)
+        self.get_links = get_links
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        try:
+            links = await self.get_links()
+        except Exception as e:
+            logger.error(f"Could not resolve critical assets: {e}")
+            links = []
+        if not links:
+            await self.app(scope, receive, send)
+            return
+
+        if "http.response.early_hint" in scope.get("extensions", {}):
+            await send({"type": "http.response.early_hint", "links": [link.encode("latin-1") for link in links]})
+
+        async def send_with_links(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("Link", ", ".join(links))
+            await send(message)
+
+        await self.app(scope, receive, send_with_links)
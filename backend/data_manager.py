@@ -1,14 +1,19 @@
 """
 Data Manager for Phoenix Trailers API
 Handles data persistence, backup, and recovery
+Snapshots are compact JSON written with fast_json (orjson when installed)
 """
-import json
+import os
 import shutil
 from pathlib import Path
 from datetime import datetime
 import logging
 from typing import Dict, Any, List, Optional
 
+import fast_json
+import product_store
+from product_store import ProductRecord
+
 logger = logging.getLogger(__name__)
 
 class DataManager:
@@ -24,14 +29,20 @@ class DataManager:
         
         # Data storage
         self.users_db: Dict[str, Any] = {}
-        self.products_db: Dict[str, Any] = {}
+        self.products_db: Dict[str, ProductRecord] = {}
         self.status_checks_db: List[Dict[str, Any]] = []
+        # File name -> why it fell back to the default on the last load
+        self.load_errors: Dict[str, str] = {}
+        # products.json entries that are not valid products, written back unchanged
+        self.unparsed_products: Dict[str, Any] = {}
         
     def load_data(self) -> None:
         """Load all data from JSON files"""
+        self.load_errors = {}
+        self.unparsed_products = {}
         try:
             self.users_db = self._load_json_file(self.users_file, {})
-            self.products_db = self._load_json_file(self.products_file, {})
+            self.products_db = product_store.load_records(self._load_json_file(self.products_file, {}), self.unparsed_products)
             self.status_checks_db = self._load_json_file(self.status_file, [])
             
             logger.info(f"Data loaded: {len(self.users_db)} users, {len(self.products_db)} products, {len(self.status_checks_db)} status checks")
@@ -44,7 +55,7 @@ class DataManager:
         """Save all data to JSON files"""
         try:
             self._save_json_file(self.users_file, self.users_db)
-            self._save_json_file(self.products_file, self.products_db)
+            self._save_json_file(self.products_file, {**self.unparsed_products, **product_store.to_docs(self.products_db)})
             self._save_json_file(self.status_file, self.status_checks_db)
             
             # Create backup after successful save
@@ -57,15 +68,17 @@ class DataManager:
         """Load data from a JSON file with error handling"""
         try:
             if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(file_path, 'rb') as f:
+                    data = fast_json.loads(f.read())
                     logger.info(f"Loaded data from {file_path}")
                     return data
             else:
                 logger.warning(f"File {file_path} does not exist, using default")
+                self.load_errors[file_path.name] = "missing"
                 return default_value
         except Exception as e:
             logger.error(f"Error loading {file_path}: {e}")
+            self.load_errors[file_path.name] = f"{type(e).__name__}: {e}"
             return default_value
     
     def _save_json_file(self, file_path: Path, data: Any) -> None:
@@ -74,8 +87,11 @@ class DataManager:
             # Ensure directory exists
             file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, default=str)
+            # Compact, through a temporary file so a crash never leaves a half-written snapshot
+            tmp_path = file_path.with_name(f"{file_path.name}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(fast_json.dumps(data))
+            os.replace(tmp_path, file_path)
             logger.info(f"Saved data to {file_path}")
         except Exception as e:
             logger.error(f"Error saving to {file_path}: {e}")
@@ -111,7 +127,8 @@ class DataManager:
                 if (latest_backup / "users.json").exists():
                     self.users_db = self._load_json_file(latest_backup / "users.json", {})
                 if (latest_backup / "products.json").exists():
-                    self.products_db = self._load_json_file(latest_backup / "products.json", {})
+                    self.unparsed_products = {}
+                    self.products_db = product_store.load_records(self._load_json_file(latest_backup / "products.json", {}), self.unparsed_products)
                 if (latest_backup / "status.json").exists():
                     self.status_checks_db = self._load_json_file(latest_backup / "status.json", [])
                 
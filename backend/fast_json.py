@@ -0,0 +1,46 @@
+"""
+JSON Encoding for Phoenix Trailers API
+One place for the JSON the API writes: data snapshots, product bodies and
+responses. Uses orjson when it is installed (several times faster than the
+stdlib on both dumps and loads, and it encodes datetimes natively) and the
+stdlib json module otherwise. Both produce compact UTF-8 output with the
+same shape, so files written by either load with either.
+"""
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON; types JSON has no form for are written with str()"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _default(value: Any) -> Any:
+    # Match orjson: datetimes in ISO form rather than str()'s space-separated one
+    isoformat = getattr(value, "isoformat", None)
+    return isoformat() if isoformat is not None else str(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() (orjson when available); the app's default response class"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,275 @@
+"""
+GLB Container I/O for Phoenix Trailers
+Reads and writes binary glTF (.glb) files for the pure-Python model passes:
+JSON + BIN chunk parsing, accessor decoding into NumPy arrays, and repacking
+of the binary chunk after bufferViews are replaced or dropped.
+
+Only self-contained GLBs are supported (one buffer, stored in the BIN chunk).
+"""
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+GLB_MAGIC = b"glTF"
+GLB_VERSION = 2
+JSON_CHUNK = 0x4E4F534A
+BIN_CHUNK = 0x004E4942
+
+BYTE, UNSIGNED_BYTE, SHORT, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5121, 5122, 5123, 5125, 5126
+COMPONENT_DTYPES = {
+    BYTE: np.dtype("<i1"),
+    UNSIGNED_BYTE: np.dtype("<u1"),
+    SHORT: np.dtype("<i2"),
+    UNSIGNED_SHORT: np.dtype("<u2"),
+    UNSIGNED_INT: np.dtype("<u4"),
+    FLOAT: np.dtype("<f4"),
+}
+DTYPE_COMPONENTS = {(dtype.kind, dtype.itemsize): component for component, dtype in COMPONENT_DTYPES.items()}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+# bufferViews are placed on 4-byte boundaries, as vertex attributes require
+VIEW_ALIGNMENT = 4
+
+
+class GLBError(ValueError):
+    pass
+
+
+class GLB:
+    """A parsed GLB: the glTF JSON document plus the BIN chunk"""
+
+    def __init__(self, document: Dict[str, Any], binary: bytes = b""):
+        self.document = document
+        self.binary = binary
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GLB":
+        document = None
+        binary = b""
+        for chunk_type, chunk in iter_chunks(data):
+            if chunk_type == JSON_CHUNK and document is None:
+                document = json.loads(bytes(chunk).decode("utf-8"))
+            elif chunk_type == BIN_CHUNK and not binary:
+                binary = bytes(chunk)
+        if document is None:
+            raise GLBError("GLB has no JSON chunk")
+        buffers = document.get("buffers", [])
+        if len(buffers) > 1 or any("uri" in buffer for buffer in buffers):
+            raise GLBError("Only self-contained GLBs (a single embedded buffer) are supported")
+        return cls(document, binary)
+
+    @classmethod
+    def load(cls, path: Path) -> "GLB":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def to_bytes(self) -> bytes:
+        json_bytes = json.dumps(self.document, separators=(",", ":")).encode("utf-8")
+        json_bytes += b" " * (-len(json_bytes) % 4)
+        binary = self.binary + b"\0" * (-len(self.binary) % 4)
+        length = 12 + 8 + len(json_bytes) + (8 + len(binary) if binary else 0)
+        parts = [struct.pack("<4sII", GLB_MAGIC, GLB_VERSION, length), struct.pack("<II", len(json_bytes), JSON_CHUNK), json_bytes]
+        if binary:
+            parts += [struct.pack("<II", len(binary), BIN_CHUNK), binary]
+        return b"".join(parts)
+
+    def save(self, path: Path) -> None:
+        """Atomic write"""
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    # ---- Reading ----
+    def view_bytes(self, index: int) -> memoryview:
+        view = self.document["bufferViews"][index]
+        if "_data" in view:
+            return memoryview(view["_data"])
+        start = view.get("byteOffset", 0)
+        return memoryview(self.binary)[start:start + view["byteLength"]]
+
+    def read_accessor(self, index: int) -> np.ndarray:
+        """
+        Accessor contents as a (count, components) array in the stored
+        component type (normalized integers are not converted); sparse
+        substitutions are applied
+        """
+        accessor = self.document["accessors"][index]
+        dtype = COMPONENT_DTYPES[accessor["componentType"]]
+        components = TYPE_SIZES[accessor["type"]]
+        count = accessor["count"]
+        if accessor["type"] in ("MAT2", "MAT3") and dtype.itemsize < 4:
+            raise GLBError("Column-padded matrix accessors are not supported")
+
+        if "bufferView" in accessor:
+            view = self.document["bufferViews"][accessor["bufferView"]]
+            data = self.view_bytes(accessor["bufferView"])
+            element_size = dtype.itemsize * components
+            stride = view.get("byteStride") or element_size
+            offset = accessor.get("byteOffset", 0)
+            if count and offset + stride * (count - 1) + element_size > len(data):
+                raise GLBError(f"Accessor {index} overruns its bufferView")
+            raw = np.frombuffer(data, dtype=np.uint8, count=max(0, stride * (count - 1) + element_size), offset=offset) if count else np.zeros(0, np.uint8)
+            if stride == element_size:
+                array = raw.view(dtype).reshape(count, components).copy()
+            else:
+                rows = np.lib.stride_tricks.as_strided(raw, shape=(count, element_size), strides=(stride, 1))
+                array = np.ascontiguousarray(rows).view(dtype).reshape(count, components)
+        else:
+            array = np.zeros((count, components), dtype=dtype)
+
+        sparse = accessor.get("sparse")
+        if sparse:
+            indices_info, values_info = sparse["indices"], sparse["values"]
+            index_dtype = COMPONENT_DTYPES[indices_info["componentType"]]
+            indices = np.frombuffer(
+                self.view_bytes(indices_info["bufferView"]), dtype=index_dtype, count=sparse["count"], offset=indices_info.get("byteOffset", 0)
+            )
+            values = np.frombuffer(
+                self.view_bytes(values_info["bufferView"]), dtype=dtype, count=sparse["count"] * components, offset=values_info.get("byteOffset", 0)
+            )
+            array[indices.astype(np.int64)] = values.reshape(-1, components)
+        return array
+
+    # ---- Writing ----
+    def add_view(self, data: bytes, target: Optional[int] = None, byte_stride: Optional[int] = None) -> int:
+        """Append a bufferView holding `data`; its bytes are laid out by pack()"""
+        view: Dict[str, Any] = {"buffer": 0, "byteLength": len(data), "_data": bytes(data)}
+        if target is not None:
+            view["target"] = target
+        if byte_stride is not None:
+            view["byteStride"] = byte_stride
+        views = self.document.setdefault("bufferViews", [])
+        views.append(view)
+        return len(views) - 1
+
+    def pack(self) -> Dict[str, int]:
+        """
+        Rebuild the BIN chunk from the bufferViews still referenced anywhere in
+        the document (including extensions), in their original order, each on a
+        VIEW_ALIGNMENT boundary; every "bufferView" reference is renumbered
+        """
+        views = self.document.get("bufferViews", [])
+        referenced = {index for _, _, index in view_references(self.document)}
+        remap: Dict[int, int] = {}
+        new_views = []
+        binary = bytearray()
+        for index, view in enumerate(views):
+            if index not in referenced:
+                continue
+            data = self.view_bytes(index)
+            binary += b"\0" * (-len(binary) % VIEW_ALIGNMENT)
+            new_view = {key: value for key, value in view.items() if key not in ("_data", "byteOffset")}
+            new_view["buffer"] = 0
+            new_view["byteLength"] = len(data)
+            if binary:
+                new_view["byteOffset"] = len(binary)
+            binary += data
+            remap[index] = len(new_views)
+            new_views.append(new_view)
+        for container, key, index in list(view_references(self.document)):
+            container[key] = remap[index]
+
+        self.document["bufferViews"] = new_views
+        if not new_views:
+            self.document.pop("bufferViews", None)
+        self.binary = bytes(binary)
+        if binary:
+            self.document["buffers"] = [{"byteLength": len(binary)}]
+        else:
+            self.document.pop("buffers", None)
+        return {"views": len(new_views), "dropped_views": len(views) - len(new_views), "bytes": len(binary)}
+
+
+def chunk_table(data) -> List[Tuple[int, int, int]]:
+    """(chunk type, byte offset, length) for every chunk of a GLB held in any buffer (bytes, mmap)"""
+    if len(data) < 12:
+        raise GLBError("File too short to be a GLB")
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    if magic != GLB_MAGIC:
+        raise GLBError("Not a GLB file")
+    if version != GLB_VERSION:
+        raise GLBError(f"Unsupported GLB version {version}")
+    chunks = []
+    offset = 12
+    end = min(length, len(data))
+    while offset + 8 <= end:
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        offset += 8
+        if offset + chunk_length > end:
+            raise GLBError("Truncated GLB chunk")
+        chunks.append((chunk_type, offset, chunk_length))
+        offset += chunk_length
+    return chunks
+
+
+def iter_chunks(data: bytes) -> Iterator[Tuple[int, memoryview]]:
+    """(chunk type, chunk bytes) for every chunk of a GLB"""
+    buffer = memoryview(data)
+    for chunk_type, offset, chunk_length in chunk_table(data):
+        yield chunk_type, buffer[offset:offset + chunk_length]
+
+
+def view_references(node: Any) -> Iterator[Tuple[Dict[str, Any], str, int]]:
+    """Every {"bufferView": <int>} in the document, except the bufferViews list itself"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            for key, value in current.items():
+                if key == "bufferView" and isinstance(value, int):
+                    yield current, key, value
+                elif key != "bufferViews" and isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(current, list):
+            stack.extend(item for item in current if isinstance(item, (dict, list)))
+
+
+def add_accessor(glb: GLB, array: np.ndarray, accessor_type: str, target: Optional[int] = None, normalized: bool = False, index: Optional[int] = None) -> int:
+    """
+    Store a (count, components) array as a new bufferView + accessor (or
+    overwrite accessor `index`, keeping its name). Vertex elements whose size
+    is not a multiple of 4 bytes are padded with a byteStride, as glTF requires.
+    """
+    array = np.ascontiguousarray(array)
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    count, components = array.shape
+    element_size = array.dtype.itemsize * components
+    byte_stride = None
+    if target == ARRAY_BUFFER and element_size % 4:
+        padded_components = components + (-element_size % 4) // array.dtype.itemsize
+        padded = np.zeros((count, padded_components), dtype=array.dtype)
+        padded[:, :components] = array
+        data = padded.tobytes()
+        byte_stride = padded_components * array.dtype.itemsize
+    else:
+        data = array.tobytes()
+
+    accessor: Dict[str, Any] = {
+        "bufferView": glb.add_view(data, target, byte_stride),
+        "componentType": DTYPE_COMPONENTS[(array.dtype.kind, array.dtype.itemsize)],
+        "count": count,
+        "type": accessor_type,
+    }
+    if normalized:
+        accessor["normalized"] = True
+    if count:
+        accessor["min"] = array.min(axis=0).tolist()
+        accessor["max"] = array.max(axis=0).tolist()
+    accessors = glb.document.setdefault("accessors", [])
+    if index is None:
+        accessors.append(accessor)
+        return len(accessors) - 1
+    if "name" in accessors[index]:
+        accessor["name"] = accessors[index]["name"]
+    accessors[index] = accessor
+    return index
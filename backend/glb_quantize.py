@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+GLB Quantization Pass for Phoenix Trailers
+NumPy-only geometry optimizer for servers without the Node toolchain:
+
+* POSITION -> normalized int16 (the mesh's bounds are restored by a
+  dequantization node), NORMAL/TANGENT -> normalized int8, TEXCOORD ->
+  normalized uint16/int16, using KHR_mesh_quantization
+* vertices identical after quantization are welded, degenerate triangles
+  dropped
+* triangles are reordered along a Morton curve and vertices renumbered in
+  first-use order, for vertex cache and fetch locality
+* indices are stored as uint16 whenever the vertex count allows
+
+    python glb_quantize.py uploads/truckdeck3d.glb out.glb --json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import glb_io
+from glb_io import ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, FLOAT, GLB
+
+EXTENSION = "KHR_mesh_quantization"
+TRIANGLES = 4
+
+POSITION_MAX = 32767
+MORTON_BITS = 10
+
+
+def _morton_codes(points: np.ndarray) -> np.ndarray:
+    """30-bit Morton (Z-order) code for each point, from its position in the points' bounds"""
+    low, high = points.min(axis=0), points.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    cells = ((points - low) / span * ((1 << MORTON_BITS) - 1)).astype(np.uint32)
+    codes = np.zeros(len(points), dtype=np.uint32)
+    for axis in range(3):
+        value = cells[:, axis]
+        spread = np.zeros_like(value)
+        for bit in range(MORTON_BITS):
+            spread |= ((value >> bit) & 1) << (3 * bit)
+        codes |= spread << axis
+    return codes
+
+
+def _quantize_unit(values: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Normalized signed / unsigned integers for values in [-1, 1] / [0, 1]"""
+    limit = np.iinfo(dtype).max
+    low = np.iinfo(dtype).min if np.iinfo(dtype).min < 0 else 0
+    return np.clip(np.round(values * limit), low, limit).astype(dtype)
+
+
+def _encode_attribute(name: str, array: np.ndarray, accessor: Dict[str, Any], normal_bits: int) -> Dict[str, Any]:
+    """Output representation of one float attribute (quantized where KHR_mesh_quantization allows)"""
+    encoded = {"array": array, "normalized": accessor.get("normalized", False), "quantized": False}
+    if accessor["componentType"] != FLOAT or len(array) == 0:
+        return encoded
+    if name in ("NORMAL", "TANGENT"):
+        encoded.update(array=_quantize_unit(array, np.dtype(np.int8 if normal_bits == 8 else np.int16)), normalized=True, quantized=True)
+    elif name.startswith("TEXCOORD_"):
+        if array.min() >= 0.0 and array.max() <= 1.0:
+            encoded.update(array=_quantize_unit(array, np.dtype(np.uint16)), normalized=True, quantized=True)
+        elif array.min() >= -1.0 and array.max() <= 1.0:
+            encoded.update(array=_quantize_unit(array, np.dtype(np.int16)), normalized=True, quantized=True)
+    return encoded
+
+
+def accessor_users(document: Dict[str, Any]) -> Dict[int, int]:
+    """How many places reference each accessor"""
+    users: Dict[int, int] = {}
+
+    def use(index):
+        if isinstance(index, int):
+            users[index] = users.get(index, 0) + 1
+
+    for mesh in document.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            for index in primitive.get("attributes", {}).values():
+                use(index)
+            use(primitive.get("indices"))
+            for target in primitive.get("targets", []):
+                for index in target.values():
+                    use(index)
+    for skin in document.get("skins", []):
+        use(skin.get("inverseBindMatrices"))
+    for animation in document.get("animations", []):
+        for sampler in animation.get("samplers", []):
+            use(sampler.get("input"))
+            use(sampler.get("output"))
+    return users
+
+
+def skip_reason(primitive: Dict[str, Any], users: Dict[int, int]) -> Optional[str]:
+    """Why this pass leaves a primitive alone, or None if it is eligible"""
+    if primitive.get("mode", TRIANGLES) != TRIANGLES:
+        return "not a triangle list"
+    if "POSITION" not in primitive.get("attributes", {}):
+        return "no POSITION"
+    if primitive.get("extensions"):
+        return f"extensions: {', '.join(sorted(primitive['extensions']))}"
+    if primitive.get("targets"):
+        return "morph targets"
+    accessors = list(primitive["attributes"].values()) + ([primitive["indices"]] if "indices" in primitive else [])
+    if any(users.get(index, 0) > 1 for index in accessors):
+        return "accessors shared with other primitives"
+    return None
+
+
+def _position_transforms(glb: GLB, eligible: Dict[int, List[int]], quantize_positions: bool) -> Dict[int, Dict[str, Any]]:
+    """
+    Per mesh: the offset/scale mapping its float positions onto int16, for
+    meshes whose every primitive is eligible and whose nodes carry nothing a
+    dequantization node could break (skins, instancing extensions)
+    """
+    document = glb.document
+    if not quantize_positions:
+        return {}
+    blocked = set()
+    for node in document.get("nodes", []):
+        if "mesh" in node and ("skin" in node or node.get("extensions")):
+            blocked.add(node["mesh"])
+
+    transforms = {}
+    for mesh_index, primitive_indices in eligible.items():
+        primitives = document["meshes"][mesh_index]["primitives"]
+        if mesh_index in blocked or len(primitive_indices) != len(primitives):
+            continue
+        accessors = [document["accessors"][primitive["attributes"]["POSITION"]] for primitive in primitives]
+        if any(accessor["componentType"] != FLOAT for accessor in accessors):
+            continue
+        positions = np.concatenate([glb.read_accessor(primitive["attributes"]["POSITION"]) for primitive in primitives])
+        if len(positions) == 0:
+            continue
+        low, high = positions.min(axis=0).astype(np.float64), positions.max(axis=0).astype(np.float64)
+        center = (low + high) / 2
+        # One uniform scale keeps normals valid under the dequantization node
+        half_extent = float(np.max(high - low)) / 2 or 1.0
+        transforms[mesh_index] = {"offset": center, "scale": half_extent / POSITION_MAX}
+    return transforms
+
+
+def _optimize_primitive(
+    glb: GLB,
+    primitive: Dict[str, Any],
+    transform: Optional[Dict[str, Any]],
+    normal_bits: int,
+    reorder: bool,
+) -> Dict[str, Any]:
+    document = glb.document
+    attributes = primitive["attributes"]
+    accessors = {name: document["accessors"][index] for name, index in attributes.items()}
+    raw = {name: glb.read_accessor(index) for name, index in attributes.items()}
+    vertex_count = len(raw["POSITION"])
+    if "indices" in primitive:
+        indices = glb.read_accessor(primitive["indices"]).reshape(-1).astype(np.int64)
+    else:
+        indices = np.arange(vertex_count, dtype=np.int64)
+    triangle_count = len(indices) // 3
+    indices = indices[:triangle_count * 3]
+
+    encoded = {}
+    for name, array in raw.items():
+        if name == "POSITION" and transform is not None:
+            quantized = np.clip(np.round((array - transform["offset"]) / transform["scale"]), -POSITION_MAX, POSITION_MAX).astype(np.int16)
+            encoded[name] = {"array": quantized, "normalized": False, "quantized": True}
+        else:
+            encoded[name] = _encode_attribute(name, array, accessors[name], normal_bits)
+
+    # Weld vertices whose encoded attributes are byte-identical
+    names = sorted(encoded)
+    rows = np.concatenate([np.ascontiguousarray(encoded[name]["array"]).view(np.uint8).reshape(vertex_count, -1) for name in names], axis=1)
+    keys = np.ascontiguousarray(rows).view(np.dtype((np.void, rows.shape[1]))).reshape(-1)
+    _, unique_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    triangles = unique_index[inverse.reshape(-1)][indices].reshape(-1, 3) if len(indices) else np.zeros((0, 3), np.int64)
+
+    # Triangles that collapsed when their vertices were welded
+    triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])]
+
+    if reorder and len(triangles):
+        positions = encoded["POSITION"]["array"].astype(np.float64)
+        triangles = triangles[np.argsort(_morton_codes(positions[triangles].mean(axis=1)), kind="stable")]
+
+    # Keep only referenced vertices, numbered in order of first use
+    flat = triangles.reshape(-1)
+    used, first_use = np.unique(flat, return_index=True)
+    order = used[np.argsort(first_use, kind="stable")]
+    remap = np.empty(vertex_count, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    new_indices = remap[flat]
+    index_dtype = np.uint16 if len(order) < 0xFFFF else np.uint32
+
+    for name in names:
+        entry = encoded[name]
+        glb_io.add_accessor(
+            glb,
+            entry["array"][order],
+            accessors[name]["type"],
+            target=ARRAY_BUFFER,
+            normalized=entry["normalized"],
+            index=attributes[name],
+        )
+    primitive["indices"] = glb_io.add_accessor(
+        glb,
+        new_indices.astype(index_dtype),
+        "SCALAR",
+        target=ELEMENT_ARRAY_BUFFER,
+        index=primitive.get("indices"),
+    )
+    return {
+        "vertices_before": vertex_count,
+        "vertices_after": int(len(order)),
+        "triangles_before": int(triangle_count),
+        "triangles_after": int(len(triangles)),
+        "index_type": np.dtype(index_dtype).name,
+        "quantized": sorted(name for name in names if encoded[name]["quantized"]),
+    }
+
+
+def _add_dequantization_nodes(document: Dict[str, Any], transforms: Dict[int, Dict[str, Any]]) -> None:
+    """
+    Move each quantized mesh onto a new child node carrying its offset and
+    scale, so the original node's transform, animations and children are
+    untouched
+    """
+    nodes = document.get("nodes", [])
+    for node in list(nodes):
+        mesh_index = node.get("mesh")
+        if mesh_index not in transforms:
+            continue
+        transform = transforms[mesh_index]
+        child = {
+            "mesh": node.pop("mesh"),
+            "translation": [float(value) for value in transform["offset"]],
+            "scale": [float(transform["scale"])] * 3,
+        }
+        if "name" in node:
+            child["name"] = f"{node['name']}_quantized"
+        nodes.append(child)
+        node.setdefault("children", []).append(len(nodes) - 1)
+
+
+def quantize(glb: GLB, normal_bits: int = 8, reorder: bool = True, quantize_positions: bool = True) -> Dict[str, Any]:
+    """Optimize every eligible triangle primitive of `glb` in place; returns a report"""
+    document = glb.document
+    users = accessor_users(document)
+    eligible: Dict[int, List[int]] = {}
+    skipped = []
+    for mesh_index, mesh in enumerate(document.get("meshes", [])):
+        for primitive_index, primitive in enumerate(mesh.get("primitives", [])):
+            reason = skip_reason(primitive, users)
+            if reason:
+                skipped.append({"mesh": mesh.get("name", mesh_index), "primitive": primitive_index, "reason": reason})
+            else:
+                eligible.setdefault(mesh_index, []).append(primitive_index)
+
+    transforms = _position_transforms(glb, eligible, quantize_positions)
+    primitives = []
+    for mesh_index, primitive_indices in eligible.items():
+        mesh = document["meshes"][mesh_index]
+        for primitive_index in primitive_indices:
+            stats = _optimize_primitive(glb, mesh["primitives"][primitive_index], transforms.get(mesh_index), normal_bits, reorder)
+            primitives.append({"mesh": mesh.get("name", mesh_index), "primitive": primitive_index, **stats})
+    _add_dequantization_nodes(document, transforms)
+
+    if any(primitive["quantized"] for primitive in primitives):
+        for key in ("extensionsUsed", "extensionsRequired"):
+            extensions = document.setdefault(key, [])
+            if EXTENSION not in extensions:
+                extensions.append(EXTENSION)
+    glb.pack()
+    return {"primitives": primitives, "skipped": skipped, "quantized_meshes": len(transforms)}
+
+
+def quantize_file(input_path: Path, output_path: Path, normal_bits: int = 8, reorder: bool = True) -> Dict[str, Any]:
+    """quantize() for a file; the report includes the sizes before and after"""
+    input_path, output_path = Path(input_path), Path(output_path)
+    glb = GLB.load(input_path)
+    report = quantize(glb, normal_bits=normal_bits, reorder=reorder)
+    glb.save(output_path)
+    original, optimized = input_path.stat().st_size, output_path.stat().st_size
+    report.update(
+        input=str(input_path),
+        output=str(output_path),
+        original_bytes=original,
+        optimized_bytes=optimized,
+        savings_pct=round(100 * (1 - optimized / original), 1) if original else 0.0,
+    )
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Quantize, weld and reorder GLB geometry (no Node toolchain needed)")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--normal-bits", type=int, choices=(8, 16), default=8)
+    parser.add_argument("--no-reorder", action="store_true", help="Keep the original triangle order")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = quantize_file(Path(args.input), Path(args.output), args.normal_bits, not args.no_reorder)
+    except (OSError, glb_io.GLBError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for primitive in report["primitives"]:
+            print(
+                f"📐 {primitive['mesh']}[{primitive['primitive']}]: {primitive['vertices_before']} -> {primitive['vertices_after']} vertices, "
+                f"{primitive['triangles_before']} -> {primitive['triangles_after']} triangles, {primitive['index_type']} indices"
+            )
+        for skipped in report["skipped"]:
+            print(f"⚠️ {skipped['mesh']}[{skipped['primitive']}] skipped: {skipped['reason']}")
+        print(f"✅ {report['original_bytes'] / 1024:.0f} KB -> {report['optimized_bytes'] / 1024:.0f} KB ({report['savings_pct']}% saved)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+GLB Texture Pass for Phoenix Trailers
+Downscales the images embedded in a GLB's bufferViews with Pillow (in
+parallel threads; Pillow releases the GIL while resizing and encoding) and
+re-encodes them as WebP via EXT_texture_webp, optionally keeping a
+JPEG/PNG fallback for viewers without WebP support. The BIN chunk is then
+repacked with aligned bufferViews.
+
+    python glb_textures.py uploads/<id>/<id>_textured_mesh.glb out.glb --max-size 1024
+"""
+import argparse
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import glb_io
+from glb_io import GLB
+
+try:
+    from PIL import Image
+except ImportError:  # required for this pass only
+    Image = None
+
+EXTENSION = "EXT_texture_webp"
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_QUALITY = 80
+# Normal maps show compression artefacts as lighting errors, so they get more bits
+NORMAL_MAP_QUALITY = 92
+
+MIME_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+FALLBACK_FORMATS = ("jpeg", "png")
+
+
+def image_roles(document: Dict[str, Any]) -> Dict[int, str]:
+    """"normal" for images used as a normalTexture, "color" for the rest"""
+    texture_sources = {index: texture.get("source") for index, texture in enumerate(document.get("textures", []))}
+    roles: Dict[int, str] = {}
+    for material in document.get("materials", []):
+        normal = material.get("normalTexture")
+        if normal and texture_sources.get(normal.get("index")) is not None:
+            roles[texture_sources[normal["index"]]] = "normal"
+    return roles
+
+
+def _fit(img, max_size: int):
+    """Downscale so neither side exceeds max_size, keeping the aspect ratio"""
+    if max(img.size) <= max_size:
+        return img
+    scale = max_size / max(img.size)
+    return img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.Resampling.LANCZOS)
+
+
+def _encode(img, fmt: str, quality: int) -> bytes:
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        img.save(buffer, "WEBP", quality=quality, method=4)
+    elif fmt == "jpeg":
+        img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _process_image(data: bytes, max_size: int, quality: int, fallback: Optional[str]) -> Dict[str, Any]:
+    """Runs in a worker thread: decode, downscale, encode WebP (+ fallback)"""
+    with Image.open(io.BytesIO(data)) as opened:
+        original_size = opened.size
+        img = _fit(opened, max_size)
+        img.load()
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    result = {"original_size": list(original_size), "size": list(img.size), "webp": _encode(img, "webp", quality)}
+    if fallback:
+        # JPEG cannot carry alpha; those textures fall back to PNG
+        fallback_format = "png" if has_alpha or fallback == "png" else "jpeg"
+        result["fallback_format"] = fallback_format
+        result["fallback"] = _encode(img, fallback_format, quality)
+    return result
+
+
+def transcode_textures(
+    glb: GLB,
+    max_size: int = DEFAULT_MAX_SIZE,
+    quality: int = DEFAULT_QUALITY,
+    fallback: Optional[str] = None,
+    jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Downscale and WebP-encode every embedded image of `glb` in place. With
+    a fallback the original image slot keeps a downscaled JPEG/PNG and the
+    WebP is added beside it; without one the texture requires
+    EXT_texture_webp. Images that would not get smaller are left alone.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required for the GLB texture pass")
+    if fallback is not None and fallback not in FALLBACK_FORMATS:
+        raise ValueError(f"fallback must be one of {', '.join(FALLBACK_FORMATS)}")
+    document = glb.document
+    images = document.get("images", [])
+    roles = image_roles(document)
+    embedded = [index for index, image in enumerate(images) if "bufferView" in image]
+
+    def work(index):
+        data = bytes(glb.view_bytes(images[index]["bufferView"]))
+        image_quality = max(quality, NORMAL_MAP_QUALITY) if roles.get(index) == "normal" else quality
+        try:
+            return index, data, _process_image(data, max_size, image_quality, fallback), None
+        except Exception as e:
+            return index, data, None, f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs or os.cpu_count() or 1, len(embedded) or 1))) as executor:
+        processed = list(executor.map(work, embedded))
+
+    report: Dict[str, Any] = {"images": [], "skipped": []}
+    webp_sources: Dict[int, int] = {}
+    for index, data, result, error in processed:
+        image = images[index]
+        if error:
+            report["skipped"].append({"image": index, "reason": error})
+            continue
+        new_bytes = len(result["webp"]) + len(result.get("fallback", b""))
+        resized = result["size"] != result["original_size"]
+        if not resized and (new_bytes >= len(data) or image.get("mimeType") == "image/webp"):
+            report["skipped"].append({"image": index, "reason": "already compact"})
+            continue
+
+        if fallback:
+            image["bufferView"] = glb.add_view(result["fallback"])
+            image["mimeType"] = MIME_TYPES[result["fallback_format"]]
+            webp_image = {"bufferView": glb.add_view(result["webp"]), "mimeType": MIME_TYPES["webp"]}
+            if "name" in image:
+                webp_image["name"] = f"{image['name']}_webp"
+            images.append(webp_image)
+            webp_sources[index] = len(images) - 1
+        else:
+            image["bufferView"] = glb.add_view(result["webp"])
+            image["mimeType"] = MIME_TYPES["webp"]
+            webp_sources[index] = index
+        report["images"].append({
+            "image": index,
+            "role": roles.get(index, "color"),
+            "original_size": result["original_size"],
+            "size": result["size"],
+            "original_bytes": len(data),
+            "webp_bytes": len(result["webp"]),
+            "fallback_bytes": len(result["fallback"]) if fallback else None,
+        })
+
+    for texture in document.get("textures", []):
+        source = texture.get("source")
+        if source not in webp_sources:
+            continue
+        texture.setdefault("extensions", {})[EXTENSION] = {"source": webp_sources[source]}
+        if not fallback:
+            del texture["source"]
+
+    if webp_sources:
+        keys = ["extensionsUsed"] if fallback else ["extensionsUsed", "extensionsRequired"]
+        for key in keys:
+            extensions = document.setdefault(key, [])
+            if EXTENSION not in extensions:
+                extensions.append(EXTENSION)
+    glb.pack()
+    return report
+
+
+def transcode_file(
+    input_path: Path,
+    output_path: Path,
+    max_size: int = DEFAULT_MAX_SIZE,
+    quality: int = DEFAULT_QUALITY,
+    fallback: Optional[str] = None,
+    jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """transcode_textures() for a file; the report includes the sizes before and after"""
+    input_path, output_path = Path(input_path), Path(output_path)
+    glb = GLB.load(input_path)
+    report = transcode_textures(glb, max_size, quality, fallback, jobs)
+    glb.save(output_path)
+    original, optimized = input_path.stat().st_size, output_path.stat().st_size
+    report.update(
+        input=str(input_path),
+        output=str(output_path),
+        original_bytes=original,
+        optimized_bytes=optimized,
+        savings_pct=round(100 * (1 - optimized / original), 1) if original else 0.0,
+    )
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Downscale and WebP-encode the textures embedded in a GLB")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE, help="Longest texture side in pixels")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY)
+    parser.add_argument("--fallback", choices=FALLBACK_FORMATS, default=None, help="Keep a JPEG/PNG copy for viewers without WebP")
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = transcode_file(Path(args.input), Path(args.output), args.max_size, args.quality, args.fallback, args.jobs)
+    except (OSError, RuntimeError, glb_io.GLBError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for image in report["images"]:
+            original_w, original_h = image["original_size"]
+            w, h = image["size"]
+            print(
+                f"🖼️ image {image['image']} ({image['role']}): {original_w}x{original_h} -> {w}x{h}, "
+                f"{image['original_bytes'] / 1024:.0f} KB -> {image['webp_bytes'] / 1024:.0f} KB WebP"
+            )
+        for skipped in report["skipped"]:
+            print(f"⚠️ image {skipped['image']} skipped: {skipped['reason']}")
+        print(f"✅ {report['original_bytes'] / 1024:.0f} KB -> {report['optimized_bytes'] / 1024:.0f} KB ({report['savings_pct']}% saved)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
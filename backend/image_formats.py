@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Alpha-Aware Format Selection for Phoenix Trailers
+Replaces the old convert_png_to_jpg.py, which flattened every PNG onto white
+(breaking transparent logos) and rewrote App.js. Each image's alpha channel
+and colour count are measured with NumPy, and the smallest format that keeps
+what matters is picked:
+
+    <= 256 colours (with or without alpha)   -> png8 (exact palette, tRNS alpha)
+    flat graphics (few colours)              -> webp-lossless
+    photographic with transparency           -> webp (lossy, alpha kept)
+    photographic, opaque                     -> jpeg
+
+The derivative pipeline renders the choice as derived/<shard>/<name>/best.<ext>
+and records it in the upload's manifest; GET /api/images/formats serves the
+decisions to the frontend. Originals are never modified.
+
+    python image_formats.py                      # decisions for uploads/
+    python image_formats.py logo.png --json
+"""
+import argparse
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import image_variants
+
+try:
+    from PIL import Image
+except ImportError:  # required for analysis only
+    Image = None
+
+DEFAULT_UPLOADS_DIR = Path(__file__).parent / "uploads"
+
+PALETTE_MAX_COLORS = 256
+# Fewer distinct colours than this (and than GRAPHIC_MAX_COLOR_RATIO of the
+# pixels) means logos, diagrams or screenshots, which compress best losslessly
+GRAPHIC_MAX_COLORS = 4096
+GRAPHIC_MAX_COLOR_RATIO = 0.05
+
+# choice -> (file extension, media type)
+FORMAT_CHOICES = {
+    "png8": (".png", "image/png"),
+    "png": (".png", "image/png"),
+    "webp-lossless": (".webp", "image/webp"),
+    "webp": (".webp", "image/webp"),
+    "jpeg": (".jpg", "image/jpeg"),
+}
+
+
+def _rgba_pixels(img) -> np.ndarray:
+    return np.asarray(img.convert("RGBA"), dtype=np.uint8)
+
+
+def analyze(img) -> Dict[str, Any]:
+    """Alpha usage and distinct-colour count of a Pillow image"""
+    rgba = _rgba_pixels(img)
+    alpha = rgba[..., 3]
+    pixels = alpha.size
+    opaque = int(np.count_nonzero(alpha == 255))
+    clear = int(np.count_nonzero(alpha == 0))
+    if opaque == pixels:
+        alpha_kind = "none"
+    elif opaque + clear == pixels:
+        alpha_kind = "binary"
+    else:
+        alpha_kind = "partial"
+    # One uint32 per RGBA pixel makes the colour count a single np.unique
+    colors = int(np.unique(rgba.reshape(-1, 4).view(np.uint32)).size)
+    return {
+        "width": img.width,
+        "height": img.height,
+        "alpha": alpha_kind,
+        "transparent_pct": round(100 * (pixels - opaque) / pixels, 2),
+        "colors": colors,
+        "graphic": colors <= min(GRAPHIC_MAX_COLORS, pixels * GRAPHIC_MAX_COLOR_RATIO),
+    }
+
+
+def choose_format(analysis: Dict[str, Any], available: Optional[List[str]] = None) -> Dict[str, str]:
+    """{"format", "reason"} for an analyze() result"""
+    webp = "webp" in (available if available is not None else image_variants.supported_formats())
+    has_alpha = analysis["alpha"] != "none"
+    if analysis["colors"] <= PALETTE_MAX_COLORS:
+        return {"format": "png8", "reason": f"{analysis['colors']} colours fit an exact palette"}
+    if analysis["graphic"]:
+        reason = f"flat graphic ({analysis['colors']} colours)"
+        return {"format": "webp-lossless", "reason": reason} if webp else {"format": "png", "reason": reason}
+    if has_alpha:
+        reason = f"photographic with {analysis['alpha']} transparency"
+        return {"format": "webp", "reason": reason} if webp else {"format": "png", "reason": reason}
+    return {"format": "jpeg", "reason": "photographic and opaque"}
+
+
+def encode_png8(img) -> bytes:
+    """Palette PNG built from the image's own colours, so nothing is quantized away"""
+    rgba = _rgba_pixels(img)
+    colors, indices = np.unique(rgba.reshape(-1, 4).view(np.uint32), return_inverse=True)
+    if colors.size > PALETTE_MAX_COLORS:
+        raise ValueError(f"{colors.size} colours do not fit a palette")
+    palette = colors.view(np.uint8).reshape(-1, 4)
+    paletted = Image.fromarray(indices.astype(np.uint8).reshape(rgba.shape[:2]), "P")
+    paletted.putpalette(palette[:, :3].tobytes())
+    save_kwargs: Dict[str, Any] = {"optimize": True}
+    if (palette[:, 3] < 255).any():
+        save_kwargs["transparency"] = palette[:, 3].tobytes()
+    buffer = io.BytesIO()
+    paletted.save(buffer, "PNG", **save_kwargs)
+    return buffer.getvalue()
+
+
+def encode(img, choice: str, quality: Optional[int] = None) -> bytes:
+    if choice == "png8":
+        return encode_png8(img)
+    if choice == "webp-lossless":
+        buffer = io.BytesIO()
+        img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB").save(
+            buffer, "WEBP", lossless=True, quality=100, method=4
+        )
+        return buffer.getvalue()
+    return image_variants.encode_image(img, choice, quality)
+
+
+def select_format(img, quality: Optional[int] = None) -> Dict[str, Any]:
+    """Analyze, choose and encode; the encoded bytes are under "data" """
+    analysis = analyze(img)
+    choice = choose_format(analysis)
+    extension, media_type = FORMAT_CHOICES[choice["format"]]
+    data = encode(img, choice["format"], quality)
+    return {**analysis, **choice, "extension": extension, "type": media_type, "bytes": len(data), "data": data}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pick the best delivery format for images by alpha and colour count")
+    parser.add_argument("paths", nargs="*", help="Images or directories (default: the uploads directory)")
+    parser.add_argument("--json", action="store_true", help="Print the decisions as JSON")
+    args = parser.parse_args(argv)
+
+    from PIL import ImageOps
+
+    roots = [Path(path) for path in args.paths] or [DEFAULT_UPLOADS_DIR]
+    files = [
+        path for root in roots for path in ([root] if root.is_file() else sorted(root.rglob("*")))
+        if path.is_file() and path.suffix.lower() in image_variants.SOURCE_EXTENSIONS
+    ]
+    decisions = []
+    for path in files:
+        try:
+            with Image.open(path) as opened:
+                img = ImageOps.exif_transpose(opened)
+                img.load()
+            decision = select_format(img)
+        except Exception as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            continue
+        decision.pop("data")
+        decision.update({"path": str(path), "source_bytes": path.stat().st_size})
+        decisions.append(decision)
+        if not args.json:
+            print(
+                f"🖼️ {path.name}: {decision['format']} ({decision['reason']}), "
+                f"{decision['source_bytes'] / 1024:.0f} KB -> {decision['bytes'] / 1024:.0f} KB"
+            )
+    if args.json:
+        print(json.dumps(decisions, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
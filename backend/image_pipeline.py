@@ -0,0 +1,237 @@
+"""
+Image Derivative Pipeline for Phoenix Trailers API
+Pre-renders responsive widths/formats and a blurred placeholder for every
+uploaded image (on the background job queue) so the first visitor never
+pays the resize cost
+"""
+import base64
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import image_formats
+import image_variants
+import upload_layout
+
+logger = logging.getLogger(__name__)
+
+# Derivatives live under uploads/derived/<shard>/<upload name>/ so they are served by the /uploads mount
+DERIVED_DIRNAME = upload_layout.SHARDED_DIRS[0]
+MANIFEST_NAME = "manifest.json"
+# Full-size copy in the format image_formats picked, e.g. best.webp
+BEST_STEM = "best"
+
+DERIVATIVE_WIDTHS = image_variants.VARIANT_WIDTHS
+DERIVATIVE_FORMATS = ("avif", "webp", "jpeg")
+
+# Low-quality image placeholder: tiny, blurred, inlined as a data URI
+LQIP_WIDTH = 24
+LQIP_BLUR_RADIUS = 1.5
+LQIP_QUALITY = 40
+
+# Optional SSIM target for derivative encodes (see image_quality.py); unset keeps fixed qualities
+TARGET_SSIM = float(os.environ["IMAGE_TARGET_SSIM"]) if os.environ.get("IMAGE_TARGET_SSIM") else None
+
+
+def derived_dir(uploads_dir: Path, name: str) -> Path:
+    return upload_layout.per_upload_dir(uploads_dir, DERIVED_DIRNAME, name)
+
+
+def derivative_filename(width: int, fmt: str) -> str:
+    return f"w{width}.{fmt}"
+
+
+def is_pipeline_image(name: str) -> bool:
+    return Path(name).suffix.lower() in image_variants.SOURCE_EXTENSIONS
+
+
+def read_manifest(uploads_dir: Path, name: str) -> Optional[Dict[str, Any]]:
+    manifest_path = derived_dir(uploads_dir, name) / MANIFEST_NAME
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_manifest(uploads_dir: Path, name: str, manifest: Dict[str, Any]) -> None:
+    """Write the manifest atomically so readers never see a partial file"""
+    target_dir = derived_dir(uploads_dir, name)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = target_dir / f"{MANIFEST_NAME}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(tmp_path, target_dir / MANIFEST_NAME)
+
+
+def make_lqip(img) -> str:
+    """Tiny blurred preview as a data URI (a few hundred bytes)"""
+    from PIL import ImageFilter
+
+    preview = image_variants.resize_to_width(img, LQIP_WIDTH)
+    preview = preview.convert("RGB").filter(ImageFilter.GaussianBlur(LQIP_BLUR_RADIUS))
+    fmt = "webp" if "webp" in image_variants.supported_formats() else "jpeg"
+    data = image_variants.encode_image(preview, fmt, LQIP_QUALITY)
+    media_type = image_variants.VARIANT_FORMATS[fmt][1]
+    return f"data:{media_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def generate_derivatives(
+    uploads_dir: str,
+    name: str,
+    widths: Iterable[int] = DERIVATIVE_WIDTHS,
+    formats: Iterable[str] = DERIVATIVE_FORMATS,
+) -> Dict[str, Any]:
+    """
+    Render every width/format pair for one upload and write its manifest.
+
+    Runs inside a worker process: the source is decoded once and each width
+    is resized from the full image, then encoded once per format.
+    """
+    from PIL import Image, ImageOps
+
+    uploads_path = Path(uploads_dir)
+    source = upload_layout.resolve(uploads_path, name)
+    if source is None:
+        raise FileNotFoundError(f"Upload not found: {name}")
+    target_dir = derived_dir(uploads_path, name)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target_prefix = target_dir.relative_to(uploads_path).as_posix()
+    available = set(image_variants.supported_formats())
+    quality_cache = content_hash = None
+    if TARGET_SSIM:
+        import image_quality
+        from asset_index import file_sha256
+
+        quality_cache = image_quality.QualityCache()
+        content_hash = file_sha256(source)
+
+    with Image.open(source) as opened:
+        img = ImageOps.exif_transpose(opened)
+        img.load()
+
+    # Delivery format chosen from the alpha channel and colour count
+    best = image_formats.select_format(img)
+    best_filename = f"{BEST_STEM}{best['extension']}"
+    tmp_path = target_dir / f"{best_filename}.tmp"
+    tmp_path.write_bytes(best.pop("data"))
+    os.replace(tmp_path, target_dir / best_filename)
+    best["path"] = f"{target_prefix}/{best_filename}"
+    if best["alpha"] != "none":
+        # JPEG would flatten the transparency; offer PNG as the fallback instead
+        formats = ["png" if fmt == "jpeg" else fmt for fmt in formats]
+
+    variants = []
+    for width in sorted({min(w, img.width) for w in widths}):
+        resized = image_variants.resize_to_width(img, width)
+        for fmt in formats:
+            if fmt not in available:
+                continue
+            quality = None
+            if quality_cache is not None:
+                encoded = image_quality.encode_to_target(resized, fmt, TARGET_SSIM, None, quality_cache, content_hash, resized.width)
+                data, quality = encoded["data"], encoded["quality"]
+            else:
+                data = image_variants.encode_image(resized, fmt)
+            filename = derivative_filename(width, fmt)
+            tmp_path = target_dir / f"{filename}.tmp"
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, target_dir / filename)
+            variants.append({
+                "width": resized.width,
+                "height": resized.height,
+                "format": fmt,
+                "type": image_variants.VARIANT_FORMATS[fmt][1],
+                "bytes": len(data),
+                "path": f"{target_prefix}/{filename}",
+            })
+            if quality is not None:
+                variants[-1]["quality"] = quality
+
+    manifest = {
+        "name": name,
+        "status": "ready",
+        "width": img.width,
+        "height": img.height,
+        "source_bytes": source.stat().st_size,
+        "placeholder": make_lqip(img),
+        "best": best,
+        "variants": variants,
+        "generated_at": datetime.utcnow().isoformat(),
+    }
+    write_manifest(uploads_path, name, manifest)
+    if quality_cache is not None:
+        quality_cache.save()
+    return manifest
+
+
+def find_derivative(uploads_dir: Path, name: str, width: int, fmt: str) -> Optional[Path]:
+    """Pre-rendered file for this width/format, if the pipeline produced one"""
+    path = derived_dir(uploads_dir, name) / derivative_filename(width, fmt)
+    return path if path.is_file() else None
+
+
+def run_derivatives_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job-queue handler: render derivatives and return a short summary"""
+    manifest = generate_derivatives(payload["uploads_dir"], payload["name"])
+    return {"name": manifest["name"], "variants": len(manifest["variants"])}
+
+
+class DerivativePipeline:
+    """Queues derivative renders on the background job queue"""
+
+    JOB_TYPE = "image_derivatives"
+
+    def __init__(self, uploads_dir: Path, job_queue, on_update: Optional[Callable[[str], None]] = None):
+        self.uploads_dir = uploads_dir
+        self.job_queue = job_queue
+        self.on_update = on_update  # called with the upload name when its manifest changes
+        job_queue.register(
+            self.JOB_TYPE,
+            run_derivatives_job,
+            resource="pillow",
+            max_attempts=2,
+            on_failure=self._on_failure,
+            on_success=self._on_success,
+        )
+
+    def submit(self, name: str, priority: int = 10) -> Dict[str, Any]:
+        """
+        Record a pending manifest and queue the render; returns immediately.
+        The manifest is written before the job exists: a worker can finish
+        a small image before enqueue returns, and a pending manifest written
+        after that would hide the ready one for good.
+        """
+        manifest = {
+            "name": name,
+            "status": "pending",
+            "variants": [],
+            "queued_at": datetime.utcnow().isoformat(),
+        }
+        write_manifest(self.uploads_dir, name, manifest)
+        job = self.job_queue.enqueue(
+            self.JOB_TYPE,
+            {"uploads_dir": str(self.uploads_dir), "name": name},
+            priority=priority,
+            unique_key=f"{self.JOB_TYPE}:{name}",
+        )
+        return {**manifest, "job_id": job["id"]}
+
+    def _on_success(self, job: Dict[str, Any]) -> None:
+        if self.on_update:
+            self.on_update(job["payload"]["name"])
+
+    def _on_failure(self, job: Dict[str, Any]) -> None:
+        name = job["payload"]["name"]
+        write_manifest(self.uploads_dir, name, {
+            "name": name,
+            "status": "failed",
+            "job_id": job["id"],
+            "error": job["error"],
+            "variants": [],
+        })
+        if self.on_update:
+            self.on_update(name)
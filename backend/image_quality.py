@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Perceptual Quality Targeting for Phoenix Trailers
+Instead of one fixed quality setting for every image, binary-searches the
+lowest encoder quality whose output still reaches a target SSIM against the
+source. SSIM is computed with NumPy on the luma of downscaled previews,
+which tracks the visible difference well enough and keeps each probe cheap.
+Chosen qualities are cached by content hash, so an image is searched once.
+
+    python image_quality.py uploads/IMG_5178.jpg --format webp --target 0.98
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import image_variants
+
+try:
+    from PIL import Image
+except ImportError:  # required for the search only
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = Path(__file__).parent / "data" / "image_quality.json"
+
+DEFAULT_TARGET_SSIM = 0.98
+# Quality search range; the upper bound is the caller's fixed quality, so a
+# targeted encode is never larger than the fixed one
+MIN_QUALITY = 40
+PREVIEW_SIZE = 1024
+SSIM_WINDOW = 7
+# Stop once the bracket is this narrow; neighbouring qualities differ by ~1-2% in size
+QUALITY_STEP = 2
+
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def _box_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean over every window x window block ("valid" positions), via a summed-area table"""
+    table = np.zeros((values.shape[0] + 1, values.shape[1] + 1))
+    table[1:, 1:] = values.cumsum(axis=0).cumsum(axis=1)
+    sums = table[window:, window:] - table[:-window, window:] - table[window:, :-window] + table[:-window, :-window]
+    return sums / (window * window)
+
+
+def ssim(reference: np.ndarray, candidate: np.ndarray, window: int = SSIM_WINDOW) -> float:
+    """Mean SSIM of two same-sized 2-D luma arrays (0-255), with a uniform window"""
+    x = reference.astype(np.float64)
+    y = candidate.astype(np.float64)
+    if min(x.shape) < window:
+        window = max(1, min(x.shape))
+    mu_x, mu_y = _box_mean(x, window), _box_mean(y, window)
+    var_x = _box_mean(x * x, window) - mu_x * mu_x
+    var_y = _box_mean(y * y, window) - mu_y * mu_y
+    cov = _box_mean(x * y, window) - mu_x * mu_y
+    ssim_map = ((2 * mu_x * mu_y + _C1) * (2 * cov + _C2)) / ((mu_x * mu_x + mu_y * mu_y + _C1) * (var_x + var_y + _C2))
+    return float(ssim_map.mean())
+
+
+def preview_luma(img, size: int = PREVIEW_SIZE) -> np.ndarray:
+    """Luma of the image scaled to fit size x size, composited over white when transparent"""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        flattened = Image.new("RGB", img.size, (255, 255, 255))
+        flattened.paste(rgba, mask=rgba.split()[-1])
+        img = flattened
+    scale = min(1.0, size / max(img.size))
+    if scale < 1.0:
+        img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.Resampling.BILINEAR)
+    return np.asarray(img.convert("L"), dtype=np.uint8)
+
+
+def encoded_ssim(reference: np.ndarray, data: bytes) -> float:
+    with Image.open(io.BytesIO(data)) as decoded:
+        decoded.load()
+        return ssim(reference, preview_luma(decoded))
+
+
+def search_quality(img, fmt: str, target: float = DEFAULT_TARGET_SSIM, max_quality: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Lowest quality in [MIN_QUALITY, max_quality] whose encode reaches
+    `target` SSIM (or max_quality if none does). Returns the encoded bytes
+    with the quality, SSIM and number of trial encodes.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required for quality targeting")
+    default_quality = image_variants.VARIANT_FORMATS[fmt][2]
+    if default_quality is None:
+        # Lossless formats have nothing to search
+        return {"data": image_variants.encode_image(img, fmt), "quality": None, "ssim": 1.0, "trials": 1}
+    high = max_quality or default_quality
+    low = min(MIN_QUALITY, high)
+    reference = preview_luma(img)
+
+    trials = {}
+
+    def trial(quality: int) -> Tuple[bytes, float]:
+        if quality not in trials:
+            data = image_variants.encode_image(img, fmt, quality)
+            trials[quality] = (data, encoded_ssim(reference, data))
+        return trials[quality]
+
+    best = high
+    if trial(high)[1] >= target:
+        # Invariant: `best` passes; everything below `low` is known or assumed to fail
+        while best - low > QUALITY_STEP:
+            middle = (low + best) // 2
+            if trial(middle)[1] >= target:
+                best = middle
+            else:
+                low = middle + 1
+    data, score = trial(best)
+    return {"data": data, "quality": best, "ssim": round(score, 5), "trials": len(trials)}
+
+
+class QualityCache:
+    """
+    JSON map of "<content sha256>:<variant>" -> chosen quality. Saving merges
+    with what is on disk, so worker processes sharing the file only ever
+    lose entries they would have recomputed anyway.
+    """
+
+    def __init__(self, cache_file: Path = DEFAULT_CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self.entries: Dict[str, Dict[str, Any]] = self._read()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(content_hash: str, fmt: str, width: Optional[int], target: float, max_quality: Optional[int]) -> str:
+        return f"{content_hash}:{fmt}:{width or 'full'}:{target}:{max_quality}"
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            entry = self.entries.get(key)
+        return entry["quality"] if entry else None
+
+    def set(self, key: str, quality: Optional[int], score: float) -> None:
+        with self._lock:
+            self.entries[key] = {"quality": quality, "ssim": score}
+            self._dirty = True
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Error loading {self.cache_file}: {e}")
+            return {}
+
+    def save(self) -> None:
+        """Atomic write, merged with entries other processes saved meanwhile"""
+        with self._lock:
+            if not self._dirty:
+                return
+            merged = {**self._read(), **self.entries}
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.cache_file)
+            self.entries = merged
+            self._dirty = False
+
+
+def encode_to_target(
+    img,
+    fmt: str,
+    target: float = DEFAULT_TARGET_SSIM,
+    max_quality: Optional[int] = None,
+    cache: Optional[QualityCache] = None,
+    content_hash: Optional[str] = None,
+    width: Optional[int] = None,
+) -> Dict[str, Any]:
+    """search_quality(), or a single encode when the cache already knows the answer"""
+    key = QualityCache.make_key(content_hash, fmt, width, target, max_quality) if cache is not None and content_hash else None
+    known = cache.get(key) if key else None
+    if known is not None:
+        return {"data": image_variants.encode_image(img, fmt, known), "quality": known, "ssim": None, "trials": 1, "cached": True}
+    result = search_quality(img, fmt, target, max_quality)
+    if key:
+        cache.set(key, result["quality"], result["ssim"])
+    return {**result, "cached": False}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Find the lowest quality that keeps an image at a target SSIM")
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--format", choices=sorted(image_variants.VARIANT_FORMATS), default="webp")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET_SSIM)
+    parser.add_argument("--max-quality", type=int, default=None, help="Upper bound (default: the format's fixed quality)")
+    parser.add_argument("--output-dir", default=None, help="Write the encoded images here")
+    args = parser.parse_args(argv)
+
+    from PIL import ImageOps
+
+    for path in map(Path, args.images):
+        with Image.open(path) as opened:
+            img = ImageOps.exif_transpose(opened)
+            img.load()
+        fixed = image_variants.encode_image(img, args.format, args.max_quality)
+        result = search_quality(img, args.format, args.target, args.max_quality)
+        saved = 100 * (1 - len(result["data"]) / len(fixed))
+        print(
+            f"🎯 {path.name}: q={result['quality']} SSIM {result['ssim']} ({result['trials']} trials), "
+            f"{len(fixed) / 1024:.0f} KB -> {len(result['data']) / 1024:.0f} KB ({saved:.0f}% smaller than fixed quality)"
+        )
+        if args.output_dir:
+            output = Path(args.output_dir) / f"{path.stem}.{args.format}"
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_bytes(result["data"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Responsive Image Variants for Phoenix Trailers API
+Resizes/transcodes uploads on first request and keeps the results in a
+size-bounded LRU disk cache
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; the endpoint reports 503 without it
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Widths offered in srcset; requested widths snap up to the nearest one so the
+# cache cannot be flooded with one entry per pixel
+VARIANT_WIDTHS = (320, 480, 640, 960, 1280, 1920)
+
+# fmt query value -> (Pillow format, media type, default quality)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp", 80),
+    "avif": ("AVIF", "image/avif", 60),
+    "jpeg": ("JPEG", "image/jpeg", 82),
+    "png": ("PNG", "image/png", None),
+}
+FORMAT_ALIASES = {"jpg": "jpeg"}
+
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".avif", ".bmp", ".tif", ".tiff", ".gif"}
+
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+
+class UnreadableImage(ValueError):
+    """The upload is not an image Pillow can decode (corrupt, truncated or mislabelled)"""
+
+
+# What Pillow raises for undecodable files (UnidentifiedImageError is an OSError)
+DECODE_ERRORS = (OSError, ValueError, SyntaxError)
+
+
+def pillow_available() -> bool:
+    return Image is not None
+
+
+def supported_formats() -> List[str]:
+    """Formats Pillow can actually encode in this environment"""
+    if Image is None:
+        return []
+    Image.init()
+    return [name for name, (pil_format, _, _) in VARIANT_FORMATS.items() if pil_format in Image.SAVE]
+
+
+def normalize_format(fmt: Optional[str]) -> Optional[str]:
+    if fmt is None:
+        return None
+    fmt = fmt.lower()
+    return FORMAT_ALIASES.get(fmt, fmt)
+
+
+def negotiate_format(accept: str, source_suffix: str) -> str:
+    """Pick the best format the client accepts when no fmt is requested"""
+    available = supported_formats()
+    if "image/avif" in accept and "avif" in available:
+        return "avif"
+    if "image/webp" in accept and "webp" in available:
+        return "webp"
+    return "png" if source_suffix.lower() == ".png" else "jpeg"
+
+
+def snap_width(width: Optional[int], original_width: int) -> int:
+    """Snap a requested width to the variant ladder, never upscaling"""
+    if not width:
+        return original_width
+    for candidate in VARIANT_WIDTHS:
+        if candidate >= width:
+            return min(candidate, original_width)
+    return min(VARIANT_WIDTHS[-1], original_width)
+
+
+_dimension_cache: Dict[Tuple[str, int, int], Tuple[int, int]] = {}
+_dimension_lock = threading.Lock()
+
+
+def image_dimensions(path: Path) -> Tuple[int, int]:
+    """(width, height) after EXIF orientation; only the header is read"""
+    stat_result = path.stat()
+    key = (str(path), stat_result.st_mtime_ns, stat_result.st_size)
+    with _dimension_lock:
+        cached = _dimension_cache.get(key)
+    if cached:
+        return cached
+
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            orientation = img.getexif().get(0x0112, 1)
+    except DECODE_ERRORS as e:
+        raise UnreadableImage(f"{path.name}: {e}") from e
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+
+    with _dimension_lock:
+        if len(_dimension_cache) > 4096:
+            _dimension_cache.clear()
+        _dimension_cache[key] = (width, height)
+    return width, height
+
+
+def srcset_widths(original_width: int) -> List[int]:
+    """Ladder widths below the original plus the original itself"""
+    widths = [w for w in VARIANT_WIDTHS if w < original_width]
+    widths.append(min(original_width, VARIANT_WIDTHS[-1]))
+    return sorted(set(widths))
+
+
+def render_variant(source_path: Path, width: int, fmt: str, quality: Optional[int] = None) -> bytes:
+    """Resize and transcode one image, returning the encoded bytes"""
+    try:
+        with Image.open(source_path) as img:
+            img = ImageOps.exif_transpose(img)
+            resized = resize_to_width(img, width)
+            resized.load()
+    except DECODE_ERRORS as e:
+        raise UnreadableImage(f"{source_path.name}: {e}") from e
+    return encode_image(resized, fmt, quality)
+
+
+def resize_to_width(img, width: int):
+    """Downscale to the given width keeping aspect ratio (never upscales)"""
+    if img.width <= width:
+        return img
+    height = max(1, round(img.height * width / img.width))
+    return img.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def encode_image(img, fmt: str, quality: Optional[int] = None) -> bytes:
+    """Encode a Pillow image in one of VARIANT_FORMATS, flattening alpha for JPEG"""
+    pil_format, _, default_quality = VARIANT_FORMATS[fmt]
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if pil_format == "JPEG":
+        if has_alpha:
+            rgba = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.split()[-1])
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if has_alpha else "RGB")
+
+    save_kwargs = {}
+    if pil_format == "JPEG":
+        save_kwargs = {"quality": quality or default_quality, "optimize": True, "progressive": True}
+    elif pil_format == "WEBP":
+        save_kwargs = {"quality": quality or default_quality, "method": 4}
+    elif pil_format == "AVIF":
+        save_kwargs = {"quality": quality or default_quality}
+    elif pil_format == "PNG":
+        save_kwargs = {"optimize": True}
+
+    buffer = io.BytesIO()
+    img.save(buffer, pil_format, **save_kwargs)
+    return buffer.getvalue()
+
+
+class VariantCache:
+    """
+    LRU disk cache for rendered variants.
+
+    The index lives in memory (rebuilt from the directory on startup, oldest
+    access first) and the total size is kept under max_bytes. A per-key lock
+    makes concurrent misses for the same variant render only once.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._key_refs: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from the files already on disk"""
+        entries = []
+        for path in self.cache_dir.iterdir():
+            if path.is_file() and not path.name.endswith(".tmp"):
+                stat_result = path.stat()
+                entries.append((stat_result.st_atime, path.name, stat_result.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total_bytes += size
+        logger.info(f"Variant cache: {len(self._index)} entries, {self._total_bytes} bytes")
+        self._evict()
+
+    @staticmethod
+    def make_key(source_path: Path, width: int, fmt: str, quality: Optional[int] = None) -> str:
+        """Cache key covering the source identity (path, mtime, size) and variant options"""
+        stat_result = source_path.stat()
+        ident = f"{source_path}|{stat_result.st_mtime_ns}|{stat_result.st_size}|{width}|{fmt}|{quality}"
+        return f"{hashlib.sha1(ident.encode()).hexdigest()}.{fmt}"
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def get(self, key: str) -> Optional[Path]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self.path_for(key)
+        if not path.exists():
+            with self._lock:
+                self._total_bytes -= self._index.pop(key, 0)
+            return None
+        return path
+
+    def put(self, key: str, data: bytes) -> Path:
+        path = self.path_for(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+        self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits"""
+        victims = []
+        with self._lock:
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                key, size = self._index.popitem(last=False)
+                self._total_bytes -= size
+                victims.append(key)
+        for key in victims:
+            try:
+                self.path_for(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _acquire_key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.setdefault(key, threading.Lock())
+            self._key_refs[key] = self._key_refs.get(key, 0) + 1
+        lock.acquire()
+        return lock
+
+    def _release_key_lock(self, key: str, lock: threading.Lock) -> None:
+        lock.release()
+        with self._lock:
+            self._key_refs[key] -= 1
+            if self._key_refs[key] == 0:
+                del self._key_refs[key]
+                del self._key_locks[key]
+
+    def get_or_render(self, source_path: Path, width: int, fmt: str, quality: Optional[int] = None) -> Path:
+        """Return the cached variant path, rendering it once if missing (blocking)"""
+        key = self.make_key(source_path, width, fmt, quality)
+        cached = self.get(key)
+        if cached:
+            self.hits += 1
+            return cached
+
+        lock = self._acquire_key_lock(key)
+        try:
+            # Another thread may have rendered it while we waited
+            cached = self.get(key)
+            if cached:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            data = render_variant(source_path, width, fmt, quality)
+            return self.put(key, data)
+        finally:
+            self._release_key_lock(key, lock)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,353 @@
+"""
+Background Job Queue for Phoenix Trailers API
+Durable (JSON under data/), prioritized job queue executed on a process pool
+with retries and per-resource concurrency limits
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Jobs compete for these resources; each has its own concurrency limit so a
+# long ffmpeg encode cannot starve image work (override with JOB_LIMIT_<NAME>)
+DEFAULT_RESOURCE_LIMITS = {
+    "pillow": 2,
+    # each ffmpeg run is itself multi-threaded (video_ladder.FFMPEG_THREADS)
+    "ffmpeg": max(1, (os.cpu_count() or 1) // 4),
+    "gltf": 1,
+    "analysis": 2,
+}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Finished jobs kept in jobs.json for the status endpoint
+FINISHED_HISTORY = 500
+
+
+class JobType:
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Dict[str, Any]], Any],
+        resource: str,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        on_failure: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_success: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.name = name
+        self.handler = handler  # module-level function, runs in a worker process
+        self.resource = resource
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.on_failure = on_failure  # runs in the server process after the last attempt
+        self.on_success = on_success  # runs in the server process with the finished job
+
+
+class JobQueue:
+    """
+    Jobs are plain dicts persisted to data/jobs.json after every state change.
+    A dispatcher thread picks the highest-priority runnable job whose resource
+    has spare capacity and hands it to a spawn-based process pool. Jobs found
+    "running" on load (server died mid-job) are put back in the queue.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        resource_limits: Optional[Dict[str, int]] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.jobs_file = data_dir / "jobs.json"
+        self.resource_limits = dict(DEFAULT_RESOURCE_LIMITS)
+        for resource in self.resource_limits:
+            env_value = os.environ.get(f"JOB_LIMIT_{resource.upper()}")
+            if env_value:
+                self.resource_limits[resource] = max(1, int(env_value))
+        self.resource_limits.update(resource_limits or {})
+        self.max_workers = max_workers or max(1, min(os.cpu_count() or 1, sum(self.resource_limits.values())))
+
+        self.job_types: Dict[str, JobType] = {}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[str, int] = {resource: 0 for resource in self.resource_limits}
+        self._condition = threading.Condition()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = False
+        self._load_jobs()
+
+    # ---- Registration / enqueue ----
+    def register(
+        self,
+        name: str,
+        handler: Callable[[Dict[str, Any]], Any],
+        resource: str = "pillow",
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        on_failure: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_success: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        if resource not in self.resource_limits:
+            self.resource_limits[resource] = 1
+            self._running[resource] = 0
+        self.job_types[name] = JobType(
+            name, handler, resource, max_attempts, retry_delay, on_failure, on_success
+        )
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        unique_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Add a job (higher priority runs first). With unique_key, an already
+        queued or running job with the same key is returned instead.
+        """
+        if job_type not in self.job_types:
+            raise ValueError(f"Unknown job type: {job_type}")
+        with self._condition:
+            if unique_key:
+                for job in self.jobs.values():
+                    if job.get("unique_key") == unique_key and job["status"] in ACTIVE_STATUSES:
+                        return dict(job)
+            job = {
+                "id": str(uuid.uuid4()),
+                "type": job_type,
+                "payload": payload,
+                "priority": priority,
+                "unique_key": unique_key,
+                "status": QUEUED,
+                "attempts": 0,
+                "max_attempts": self.job_types[job_type].max_attempts,
+                "created_at": datetime.utcnow().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "run_after": 0.0,
+                "error": None,
+                "result": None,
+            }
+            self.jobs[job["id"]] = job
+            self._save_jobs()
+            self._condition.notify_all()
+            return dict(job)
+
+    def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Put a failed job back in the queue with a fresh attempt budget"""
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != FAILED:
+                return None
+            job.update({"status": QUEUED, "attempts": 0, "error": None, "run_after": 0.0, "finished_at": None})
+            self._save_jobs()
+            self._condition.notify_all()
+            return dict(job)
+
+    # ---- Queries ----
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._condition:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        with self._condition:
+            jobs = [
+                dict(job) for job in self.jobs.values()
+                if (status is None or job["status"] == status) and (job_type is None or job["type"] == job_type)
+            ]
+        jobs.sort(key=lambda job: job["created_at"], reverse=True)
+        return jobs[:limit]
+
+    def get_summary(self) -> Dict[str, Any]:
+        with self._condition:
+            counts: Dict[str, int] = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {
+                "counts": counts,
+                "running_by_resource": dict(self._running),
+                "resource_limits": dict(self.resource_limits),
+                "max_workers": self.max_workers,
+                "job_types": {name: jt.resource for name, jt in self.job_types.items()},
+                "started": self._dispatcher is not None,
+            }
+
+    # ---- Lifecycle ----
+    def start(self) -> None:
+        if self._dispatcher is not None:
+            return
+        self._stopping = False
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True)
+        self._dispatcher.start()
+        logger.info(f"Job queue started with {self.max_workers} workers, limits {self.resource_limits}")
+
+    def shutdown(self) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=5)
+            self._dispatcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ---- Dispatch ----
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the server process has live threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _next_runnable(self, now: float) -> Optional[Dict[str, Any]]:
+        """Highest priority, then oldest, queued job whose resource has capacity"""
+        if sum(self._running.values()) >= self.max_workers:
+            return None
+        candidates = []
+        for job in self.jobs.values():
+            if job["status"] != QUEUED or job["run_after"] > now:
+                continue
+            job_type = self.job_types.get(job["type"])
+            if job_type is None:
+                continue
+            if self._running[job_type.resource] >= self.resource_limits[job_type.resource]:
+                continue
+            candidates.append(job)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda job: (-job["priority"], job["created_at"]))
+
+    def _next_wakeup(self, now: float) -> Optional[float]:
+        delays = [job["run_after"] - now for job in self.jobs.values() if job["status"] == QUEUED and job["run_after"] > now]
+        return max(0.05, min(delays)) if delays else None
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._condition:
+                if self._stopping:
+                    return
+                now = time.time()
+                job = self._next_runnable(now)
+                if job is None:
+                    self._condition.wait(timeout=self._next_wakeup(now))
+                    continue
+                job_type = self.job_types[job["type"]]
+                job["status"] = RUNNING
+                job["attempts"] += 1
+                job["started_at"] = datetime.utcnow().isoformat()
+                self._running[job_type.resource] += 1
+                self._save_jobs()
+                job_id, payload = job["id"], dict(job["payload"])
+
+            try:
+                future = self._get_executor().submit(job_type.handler, payload)
+            except Exception as e:  # pool already broken or shutting down
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+
+    def _on_done(self, job_id: str, future: Future) -> None:
+        hook = None
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job_type = self.job_types[job["type"]]
+            self._running[job_type.resource] -= 1
+
+            error = future.exception() if not future.cancelled() else RuntimeError("cancelled")
+            if error is not None and self._stopping and (future.cancelled() or isinstance(error, BrokenProcessPool)):
+                # Interrupted by shutdown, not failed: give the attempt back so it resumes on the next start
+                job.update({"status": QUEUED, "run_after": 0.0, "started_at": None})
+                job["attempts"] -= 1
+                logger.info(f"Job {job['type']} {job_id} interrupted by shutdown, re-queued")
+            elif error is None:
+                job.update({"status": SUCCEEDED, "result": future.result(), "error": None})
+                job["finished_at"] = datetime.utcnow().isoformat()
+                hook = job_type.on_success
+                logger.info(f"Job {job['type']} {job_id} succeeded")
+            else:
+                if isinstance(error, BrokenProcessPool):
+                    # A crashed worker poisons the whole pool; start a fresh one
+                    self._executor = None
+                job["error"] = f"{type(error).__name__}: {error}"
+                if job["attempts"] < job["max_attempts"] and not self._stopping:
+                    job["status"] = QUEUED
+                    job["run_after"] = time.time() + job_type.retry_delay * (2 ** (job["attempts"] - 1))
+                    logger.warning(f"Job {job['type']} {job_id} failed (attempt {job['attempts']}), retrying: {error}")
+                else:
+                    job["status"] = FAILED
+                    job["finished_at"] = datetime.utcnow().isoformat()
+                    hook = job_type.on_failure
+                    logger.error(f"Job {job['type']} {job_id} failed permanently: {error}")
+
+            self._prune_finished()
+            self._save_jobs()
+            self._condition.notify_all()
+            job_snapshot = dict(job)
+
+        if hook is not None:
+            try:
+                hook(job_snapshot)
+            except Exception as e:
+                logger.error(f"Completion hook for {job_id} raised: {e}")
+
+    # ---- Persistence ----
+    def _prune_finished(self) -> None:
+        finished = [job for job in self.jobs.values() if job["status"] not in ACTIVE_STATUSES]
+        if len(finished) <= FINISHED_HISTORY:
+            return
+        finished.sort(key=lambda job: job["finished_at"] or job["created_at"])
+        for job in finished[:len(finished) - FINISHED_HISTORY]:
+            del self.jobs[job["id"]]
+
+    def _load_jobs(self) -> None:
+        try:
+            if self.jobs_file.exists():
+                with open(self.jobs_file, "r", encoding="utf-8") as f:
+                    self.jobs = {job["id"]: job for job in json.load(f)}
+        except Exception as e:
+            logger.error(f"Error loading {self.jobs_file}: {e}")
+            self.jobs = {}
+        requeued = 0
+        for job in self.jobs.values():
+            if job["status"] == RUNNING:
+                job["status"] = QUEUED
+                job["run_after"] = 0.0
+                requeued += 1
+        if requeued:
+            logger.info(f"Re-queued {requeued} jobs interrupted by a restart")
+
+    def _save_jobs(self) -> None:
+        """Atomic write; called with the condition held"""
+        try:
+            self.jobs_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.jobs_file.with_name(f"{self.jobs_file.name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self.jobs.values()), f, indent=2, default=str)
+            os.replace(tmp_path, self.jobs_file)
+        except Exception as e:
+            logger.error(f"Error saving {self.jobs_file}: {e}")
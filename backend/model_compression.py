@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+3D Model Compression Library for Phoenix Trailers
+Headless GLB compression used by the upload job workers, phoenix-assets and
+the compress_*.py scripts. Settings come from named presets plus declarative
+per-model profiles (model_profiles.json); gltf-transform is found on PATH,
+with trimesh decimation and the NumPy glb_quantize / glb_textures passes
+as fallbacks. Every call returns a JSON-serializable result.
+
+    python model_compression.py uploads/truckdeck3d.glb --json
+    python model_compression.py --all --output-dir uploads/compressed_3d_models
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import model_decoders
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_PROFILES_FILE = BACKEND_DIR / "model_profiles.json"
+
+# Ordered from least to most aggressive; a model over its target_bytes is
+# retried with the next preset down this list
+PRESET_ORDER = ("high", "medium", "low", "aggressive", "ultra")
+PRESETS: Dict[str, Dict[str, Any]] = {
+    "high": {"texture_size": 2048, "texture_format": "webp", "compress": "draco", "simplify_ratio": None, "simplify_error": 0.001, "trimesh_quality": "high"},
+    "medium": {"texture_size": 1024, "texture_format": "webp", "compress": "draco", "simplify_ratio": None, "simplify_error": 0.001, "trimesh_quality": "medium"},
+    "low": {"texture_size": 512, "texture_format": "webp", "compress": "draco", "simplify_ratio": 0.5, "simplify_error": 0.005, "trimesh_quality": "low"},
+    # formerly compress_aggressive.py
+    "aggressive": {"texture_size": 512, "texture_format": "webp", "compress": "draco", "simplify_ratio": 0.2, "simplify_error": 0.005, "trimesh_quality": "low"},
+    # formerly compress_ultra_aggressive.py / compress_truck_deck.py
+    "ultra": {"texture_size": 256, "texture_format": "webp", "compress": "draco", "simplify_ratio": 0.1, "simplify_error": 0.01, "trimesh_quality": "low"},
+}
+
+# Keys a model profile may set besides the preset settings. face_budget caps
+# the scene's total triangle count (only the trimesh path can enforce it);
+# quantize runs the glb_quantize pass on the trimesh / numpy output;
+# texture_fallback ("jpeg" / "png") keeps a non-WebP copy of each texture
+PROFILE_KEYS = {"preset", "target_bytes", "escalate", "face_budget", "quantize", "texture_fallback"}
+
+GLTF_TRANSFORM_TIMEOUT = 600
+
+
+def find_gltf_transform() -> Optional[str]:
+    """GLTF_TRANSFORM env var, else gltf-transform on PATH (finds the .cmd shim on Windows)"""
+    configured = os.environ.get("GLTF_TRANSFORM")
+    if configured:
+        return shutil.which(configured) or (configured if Path(configured).is_file() else None)
+    return shutil.which("gltf-transform")
+
+
+def trimesh_available() -> bool:
+    try:
+        import trimesh  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def available_methods() -> List[str]:
+    methods = []
+    if find_gltf_transform():
+        methods.append("gltf-transform")
+    if trimesh_available():
+        methods.append("trimesh")
+    if numpy_available():
+        methods.append("numpy")
+    return methods
+
+
+# ---- Profiles ----
+def load_profiles(path: Optional[Path] = None) -> Dict[str, Any]:
+    """{"defaults": {...}, "models": {"<file name or stem>": {...}}}; missing file means no overrides"""
+    path = path or DEFAULT_PROFILES_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profiles = json.load(f)
+    except FileNotFoundError:
+        return {"defaults": {}, "models": {}}
+    for name, profile in profiles.get("models", {}).items():
+        unknown = set(profile) - PROFILE_KEYS - set(PRESETS["medium"])
+        if unknown:
+            raise ValueError(f"Unknown keys in model profile {name}: {', '.join(sorted(unknown))}")
+        if profile.get("preset", "medium") not in PRESETS:
+            raise ValueError(f"Unknown preset in model profile {name}: {profile['preset']}")
+    return profiles
+
+
+def model_profile(name: str, profiles: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Profile for a model, looked up by file name, then by stem"""
+    models = (profiles or {}).get("models", {})
+    return dict(models.get(name) or models.get(Path(name).stem) or {})
+
+
+def resolve_settings(
+    name: str,
+    preset: Optional[str] = None,
+    profiles: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Effective settings for one model: preset < defaults < per-model profile.
+    The preset is `preset` if given, else the model's own, else the default;
+    a model's target_bytes and overrides apply whichever preset is used.
+    """
+    profiles = profiles if profiles is not None else load_profiles()
+    profile = model_profile(name, profiles)
+    chosen = preset or profile.get("preset") or profiles.get("defaults", {}).get("preset", "medium")
+    defaults = {k: v for k, v in profiles.get("defaults", {}).items() if k != "preset"}
+    settings = {**PRESETS[chosen], **defaults}
+    settings.update({k: v for k, v in profile.items() if k != "preset"})
+    settings["preset"] = chosen
+    # Preset settings the defaults / profile set explicitly; they survive escalation
+    settings["pinned"] = sorted(key for key in {**defaults, **profile} if key in PRESETS[chosen])
+    settings.setdefault("target_bytes", None)
+    settings.setdefault("escalate", True)
+    settings.setdefault("face_budget", None)
+    settings.setdefault("quantize", True)
+    settings.setdefault("texture_fallback", None)
+    return settings
+
+
+# ---- Compression ----
+def compress_with_gltf_transform(input_path: Path, output_path: Path, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    executable = find_gltf_transform()
+    if executable is None:
+        raise RuntimeError("gltf-transform not found on PATH (npm install -g @gltf-transform/cli)")
+    cmd = [
+        executable, "optimize", str(input_path), str(output_path),
+        "--compress", settings["compress"],
+        "--texture-compress", settings["texture_format"],
+        "--texture-size", str(settings["texture_size"]),
+    ]
+    if settings["simplify_ratio"]:
+        cmd += ["--simplify-ratio", str(settings["simplify_ratio"]), "--simplify-error", str(settings["simplify_error"])]
+    else:
+        cmd += ["--simplify", "false"]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=GLTF_TRANSFORM_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"gltf-transform exited with {result.returncode}: {result.stderr.strip()[-500:]}")
+    return None
+
+
+def compress_with_trimesh(input_path: Path, output_path: Path, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    import compress_3d_working
+
+    meshes = compress_3d_working.compress_scene(str(input_path), str(output_path), settings["trimesh_quality"], settings.get("face_budget"))
+    details = {
+        "meshes": meshes,
+        "faces_before": sum(mesh["faces_before"] for mesh in meshes),
+        "faces_after": sum(mesh["faces_after"] for mesh in meshes),
+    }
+    if numpy_available():
+        # trimesh writes float32 buffers and full-size PNG textures
+        details.update(_glb_passes(output_path, output_path, settings))
+    return details
+
+
+def _glb_passes(input_path: Path, output_path: Path, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """glb_quantize and glb_textures over one in-memory GLB, as the settings allow"""
+    import glb_io
+    import glb_quantize
+    import glb_textures
+
+    glb = glb_io.GLB.load(input_path)
+    details: Dict[str, Any] = {}
+    if settings.get("quantize", True):
+        report = glb_quantize.quantize(glb)
+        details["vertices_before"] = sum(primitive["vertices_before"] for primitive in report["primitives"])
+        details["vertices_after"] = sum(primitive["vertices_after"] for primitive in report["primitives"])
+        details["quantized"] = bool(report["primitives"])
+    if settings.get("texture_format") == "webp" and glb_textures.Image is not None and glb.document.get("images"):
+        report = glb_textures.transcode_textures(glb, settings["texture_size"], fallback=settings.get("texture_fallback"))
+        details["textures"] = report["images"]
+    glb.save(output_path)
+    return details
+
+
+def compress_with_numpy(input_path: Path, output_path: Path, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Quantize / weld / reorder geometry and downscale textures: no decimation, no Node toolchain"""
+    return _glb_passes(input_path, output_path, settings)
+
+
+METHODS = {"gltf-transform": compress_with_gltf_transform, "trimesh": compress_with_trimesh, "numpy": compress_with_numpy}
+
+
+def _compress_once(input_path: Path, output_path: Path, settings: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Try each available method; writes through a temporary file. Returns the
+    method used and its details (per-mesh face counts for trimesh).
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}.partial{output_path.suffix}")
+    methods = available_methods() or list(METHODS)
+    if settings.get("face_budget") is not None and "trimesh" in methods:
+        # Only the trimesh path can hold a scene-wide triangle budget
+        methods = ["trimesh"] + [method for method in methods if method != "trimesh"]
+    errors = []
+    for method in methods:
+        try:
+            details = METHODS[method](input_path, tmp_path, settings)
+            if tmp_path.exists():
+                os.replace(tmp_path, output_path)
+                return method, details or {}
+            errors.append(f"{method}: no output written")
+        except Exception as e:
+            errors.append(f"{method}: {e}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    raise RuntimeError("; ".join(errors) or "no compression method available")
+
+
+def compress_model(input_path: Path, output_path: Path, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compress one GLB. When the output exceeds settings["target_bytes"] and
+    escalation is allowed, the next more aggressive preset is tried. Never
+    raises; failures are reported in the result.
+    """
+    started = time.time()
+    input_path, output_path = Path(input_path), Path(output_path)
+    result: Dict[str, Any] = {
+        "input": str(input_path),
+        "output": str(output_path),
+        "ok": False,
+        "preset": settings.get("preset"),
+        "method": None,
+        "attempts": [],
+        "target_bytes": settings.get("target_bytes"),
+        "target_met": None,
+        "error": None,
+    }
+    try:
+        result["original_bytes"] = input_path.stat().st_size
+        presets = [settings.get("preset")]
+        if settings.get("target_bytes") and settings.get("escalate", True) and settings.get("preset") in PRESET_ORDER:
+            presets += list(PRESET_ORDER[PRESET_ORDER.index(settings["preset"]) + 1:])
+
+        pinned = {key: settings[key] for key in settings.get("pinned", ()) if key in settings}
+        for index, preset in enumerate(presets):
+            attempt_settings = settings if index == 0 else {**settings, **PRESETS[preset], **pinned, "preset": preset}
+            result["method"], details = _compress_once(input_path, output_path, attempt_settings)
+            result.update(details)
+            size = output_path.stat().st_size
+            result["attempts"].append({"preset": preset, "method": result["method"], "bytes": size})
+            result["preset"] = preset
+            if not settings.get("target_bytes") or size <= settings["target_bytes"]:
+                break
+
+        result["compressed_bytes"] = output_path.stat().st_size
+        # What the viewer must load before it can display the output (e.g. Draco)
+        result["decoders"] = model_decoders.glb_decoders(output_path)
+        result["savings_pct"] = round(100 * (1 - result["compressed_bytes"] / result["original_bytes"]), 1) if result["original_bytes"] else 0.0
+        if settings.get("target_bytes"):
+            result["target_met"] = result["compressed_bytes"] <= settings["target_bytes"]
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.time() - started, 3)
+    return result
+
+
+def output_path_for(input_path: Path, output_dir: Path, pattern: str = "{stem}_compressed.glb") -> Path:
+    return output_dir / pattern.format(stem=input_path.stem, name=input_path.name)
+
+
+def batch_compress(
+    inputs: Iterable[Path],
+    output_dir: Path,
+    preset: Optional[str] = None,
+    profiles: Optional[Dict[str, Any]] = None,
+    pattern: str = "{stem}_compressed.glb",
+    jobs: int = 1,
+    overrides: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compress several GLBs (in a process pool when jobs > 1); `overrides` win
+    over every profile. Results keep input order.
+    """
+    profiles = profiles if profiles is not None else load_profiles()
+    work = []
+    for input_path in inputs:
+        input_path = Path(input_path)
+        settings = {**resolve_settings(input_path.name, preset, profiles), **(overrides or {})}
+        work.append((input_path, output_path_for(input_path, output_dir, pattern), settings))
+    if jobs <= 1 or len(work) <= 1:
+        return [compress_model(*item) for item in work]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as executor:
+        return list(executor.map(compress_model, *zip(*work)))
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [result for result in results if result["ok"]]
+    original = sum(result["original_bytes"] for result in ok)
+    compressed = sum(result["compressed_bytes"] for result in ok)
+    return {
+        "total": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "targets_missed": sum(1 for result in ok if result["target_met"] is False),
+        "original_bytes": original,
+        "compressed_bytes": compressed,
+        "savings_pct": round(100 * (1 - compressed / original), 1) if original else 0.0,
+    }
+
+
+# ---- CLI ----
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compress GLB models (non-interactive)")
+    parser.add_argument("inputs", nargs="*", help="GLB files to compress")
+    parser.add_argument("--all", action="store_true", help="Every *.glb at the top of --uploads")
+    parser.add_argument("--uploads", default=str(BACKEND_DIR / "uploads"))
+    parser.add_argument("--output-dir", default=None, help="Default: <uploads>/compressed_3d_models")
+    parser.add_argument("--pattern", default="{stem}_compressed.glb", help="Output file name pattern")
+    parser.add_argument("--preset", choices=PRESET_ORDER, default=None, help="Overrides the per-model / default preset")
+    parser.add_argument("--profiles", default=str(DEFAULT_PROFILES_FILE), help="Per-model profile JSON")
+    parser.add_argument("--face-budget", type=int, default=None, help="Total triangle budget per model (overrides profiles)")
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    uploads_dir = Path(args.uploads)
+    inputs = [Path(path) for path in args.inputs]
+    if args.all:
+        inputs += sorted(uploads_dir.glob("*.glb"))
+    if not inputs:
+        parser.error("no inputs (pass GLB paths or --all)")
+    output_dir = Path(args.output_dir) if args.output_dir else uploads_dir / "compressed_3d_models"
+
+    overrides = {"face_budget": args.face_budget} if args.face_budget is not None else None
+    results = batch_compress(inputs, output_dir, args.preset, load_profiles(Path(args.profiles)), args.pattern, args.jobs, overrides)
+    summary = summarize(results)
+    if args.json:
+        print(json.dumps({"methods": available_methods(), "summary": summary, "results": results}, indent=2))
+    else:
+        for result in results:
+            if result["ok"]:
+                target = "" if result["target_met"] is None else (" ✅ target" if result["target_met"] else " ⚠️ over target")
+                if "faces_after" in result:
+                    target += f", {result['faces_before']} -> {result['faces_after']} faces"
+                print(
+                    f"✅ {Path(result['input']).name}: {result['original_bytes'] / 1024:.0f} KB -> "
+                    f"{result['compressed_bytes'] / 1024:.0f} KB ({result['savings_pct']}%, {result['preset']}, {result['method']}){target}"
+                )
+            else:
+                print(f"❌ {Path(result['input']).name}: {result['error']}")
+        print(f"🎯 {summary['succeeded']}/{summary['total']} compressed, {summary['savings_pct']}% saved")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Model Decoders for Phoenix Trailers API
+GLBs compressed with Draco (and friends) need a decoder in the browser. The
+viewer used to fetch the Draco decoder from gstatic on every first visit: a
+third-party connection on the critical path, with that origin's caching.
+
+`vendor` copies the decoder build shipped with three.js (or downloads the
+matching gstatic release when node_modules is absent) into
+static/<decoder>/<fingerprint>/, with brotli and gzip copies next to each
+file. The directory name changes whenever the files do, so the server can
+send them with one-year immutable caching (see PrecompressedStaticFiles).
+static/<decoder>/manifest.json records the current fingerprint; the asset
+manifest exposes it as "decoders" so the viewer loads from there. A copy
+under static/<decoder>/<version>/ is what the viewer uses until the asset
+manifest has loaded.
+
+    python model_decoders.py vendor            # from frontend/node_modules, else gstatic
+    python model_decoders.py scan uploads/     # which decoders each GLB needs
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import struct
+import sys
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).parent / "static"
+NODE_MODULES = Path(__file__).parent.parent / "frontend" / "node_modules"
+MANIFEST_NAME = "manifest.json"
+FINGERPRINT_LENGTH = 12
+
+# glTF extensions that need a decoder at load time -> decoder name
+DECODER_EXTENSIONS = {
+    "KHR_draco_mesh_compression": "draco",
+    "EXT_meshopt_compression": "meshopt",
+    "KHR_meshopt_compression": "meshopt",
+    "KHR_texture_basisu": "ktx2",
+}
+
+# Decoders served from static/: the files DRACOLoader fetches for its "wasm"
+# config (plus the asm.js build it falls back to), where three.js ships them,
+# and the gstatic release of the same version
+DECODERS: Dict[str, Dict[str, Any]] = {
+    "draco": {
+        "version": "1.5.6",
+        "type": "wasm",
+        "files": ["draco_wasm_wrapper.js", "draco_decoder.wasm", "draco_decoder.js"],
+        "node_path": "three/examples/jsm/libs/draco/gltf",
+        "url": "https://www.gstatic.com/draco/versioned/decoders/1.5.6/",
+    },
+}
+
+# Encodings written next to each vendored file, in server preference order
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def required_decoders(gltf: Dict[str, Any]) -> List[str]:
+    """Decoders a glTF document needs, from its extensionsRequired/extensionsUsed"""
+    extensions = set(gltf.get("extensionsRequired", [])) | set(gltf.get("extensionsUsed", []))
+    return sorted({DECODER_EXTENSIONS[name] for name in extensions if name in DECODER_EXTENSIONS})
+
+
+def read_gltf_json(path: Path) -> Optional[Dict[str, Any]]:
+    """The JSON chunk of a GLB, without reading the binary chunk; None if not a GLB"""
+    with open(path, "rb") as f:
+        header = f.read(20)
+        if len(header) < 20:
+            return None
+        magic, _, _, json_length, json_type = struct.unpack("<4sIIII", header)
+        if magic != b"glTF" or json_type != 0x4E4F534A:
+            return None
+        return json.loads(f.read(json_length).decode("utf-8"))
+
+
+def glb_decoders(path: Path) -> List[str]:
+    gltf = read_gltf_json(path)
+    return required_decoders(gltf) if gltf else []
+
+
+# ---- Vendoring ----
+def compress_variants(path: Path) -> Dict[str, int]:
+    """Write .br (when brotli is installed) and .gz copies of a file; returns their sizes"""
+    data = path.read_bytes()
+    sizes = {}
+    encoders: Dict[str, Callable[[bytes], bytes]] = {"gzip": lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoders["br"] = lambda raw: brotli.compress(raw, quality=11)
+    for encoding, suffix in PRECOMPRESSED:
+        encode = encoders.get(encoding)
+        if encode is None:
+            continue
+        encoded = encode(data)
+        # Not worth a second request path when it does not shrink the file
+        if len(encoded) >= len(data):
+            continue
+        path.with_name(path.name + suffix).write_bytes(encoded)
+        sizes[encoding] = len(encoded)
+    return sizes
+
+
+def fetch_sources(name: str, node_modules: Path = NODE_MODULES, download: bool = True) -> Dict[str, bytes]:
+    """Decoder files from node_modules (matches the bundled three.js) or the release URL"""
+    spec = DECODERS[name]
+    local_dir = node_modules / spec["node_path"]
+    if all((local_dir / filename).is_file() for filename in spec["files"]):
+        return {filename: (local_dir / filename).read_bytes() for filename in spec["files"]}
+    if not download:
+        raise FileNotFoundError(f"{name} decoder not found in {local_dir}")
+    files = {}
+    for filename in spec["files"]:
+        with urllib.request.urlopen(spec["url"] + filename, timeout=60) as response:
+            files[filename] = response.read()
+    return files
+
+
+def fingerprint(files: Dict[str, bytes]) -> str:
+    digest = hashlib.sha256()
+    for filename in sorted(files):
+        digest.update(filename.encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(files[filename]).digest())
+    return digest.hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def vendor(name: str, files: Dict[str, bytes], static_dir: Path = STATIC_DIR) -> Dict[str, Any]:
+    """
+    Install decoder files under static/<name>/<fingerprint>/ with precompressed
+    copies and point static/<name>/manifest.json at them. Older fingerprints
+    are removed; clients holding the previous manifest miss at most one load.
+    """
+    spec = DECODERS[name]
+    version_id = fingerprint(files)
+    decoder_dir = static_dir / name
+    target = decoder_dir / version_id
+    staging = decoder_dir / f".{version_id}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    entries = {}
+    for filename, data in files.items():
+        path = staging / filename
+        path.write_bytes(data)
+        entries[filename] = {"bytes": len(data), "encodings": compress_variants(path)}
+    if target.exists():
+        shutil.rmtree(staging)
+    else:
+        os.replace(staging, target)
+
+    # The same files under static/<name>/<version>/, a path the frontend knows
+    # at build time and can use before the asset manifest has loaded
+    stable = decoder_dir / spec["version"]
+    staging = decoder_dir / f".{spec['version']}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.copytree(target, staging)
+    shutil.rmtree(stable, ignore_errors=True)
+    os.replace(staging, stable)
+
+    manifest = {
+        "decoder": name,
+        "version": spec["version"],
+        "type": spec["type"],
+        "fingerprint": version_id,
+        "path": f"{name}/{version_id}/",
+        "stable_path": f"{name}/{spec['version']}/",
+        "files": entries,
+    }
+    manifest_path = decoder_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(f"{MANIFEST_NAME}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    for stale in decoder_dir.iterdir():
+        if stale.is_dir() and stale.name not in (version_id, spec["version"]) and not stale.name.startswith("."):
+            shutil.rmtree(stale, ignore_errors=True)
+    return manifest
+
+
+def load_decoders(static_dir: Path = STATIC_DIR, url_for: Callable[[str], str] = lambda path: f"/static/{path}") -> Dict[str, Dict[str, Any]]:
+    """{decoder: {"path", "type", "version", "files"}} for the vendored decoders"""
+    decoders = {}
+    for name in DECODERS:
+        try:
+            with open(static_dir / name / MANIFEST_NAME, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            logger.error(f"Error reading the {name} decoder manifest: {e}")
+            continue
+        if not (static_dir / manifest["path"]).is_dir():
+            logger.warning(f"{name} decoder manifest points at missing {manifest['path']}")
+            continue
+        decoders[name] = {
+            "path": url_for(manifest["path"]),
+            "type": manifest["type"],
+            "version": manifest["version"],
+            "files": sorted(manifest["files"]),
+        }
+    return decoders
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Vendor model decoders for self-hosting")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    vendor_parser = subparsers.add_parser("vendor", help="Copy decoders into static/ with precompressed copies")
+    vendor_parser.add_argument("--node-modules", type=Path, default=NODE_MODULES)
+    vendor_parser.add_argument("--static-dir", type=Path, default=STATIC_DIR)
+    vendor_parser.add_argument("--no-download", action="store_true", help="Fail instead of downloading when node_modules lacks the files")
+    scan_parser = subparsers.add_parser("scan", help="List the decoders each GLB needs")
+    scan_parser.add_argument("paths", nargs="+", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == "scan":
+        for root in args.paths:
+            for path in sorted(root.rglob("*.glb") if root.is_dir() else [root]):
+                print(f"{path}: {', '.join(glb_decoders(path)) or '-'}")
+        return 0
+
+    if brotli is None:
+        print("⚠️  brotli is not installed; only gzip copies will be written")
+    for name in DECODERS:
+        try:
+            files = fetch_sources(name, args.node_modules, download=not args.no_download)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            return 1
+        manifest = vendor(name, files, args.static_dir)
+        print(f"✅ {name} {manifest['version']} -> {args.static_dir / manifest['path']}")
+        for filename, entry in manifest["files"].items():
+            encodings = ", ".join(f"{encoding} {size / 1024:.0f} KB" for encoding, size in entry["encodings"].items())
+            print(f"   {filename}: {entry['bytes'] / 1024:.0f} KB ({encodings or 'uncompressed'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Model LOD Chain for Phoenix Trailers API
+Generates a chain of detail levels for every uploaded GLB, each with its own
+face and byte budget, plus a manifest, so phones can start from a coarse
+model and upgrade. Levels live under uploads/lod/<shard>/<upload name>/ and
+are served by the /uploads mount; /api/models/{name}?lod=auto picks one from
+client hints (Sec-CH-Viewport-Width, Sec-CH-DPR, Save-Data).
+
+    python model_lod.py uploads/truckdeck3d.glb
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import model_compression
+import upload_layout
+
+logger = logging.getLogger(__name__)
+
+LOD_DIRNAME = upload_layout.SHARDED_DIRS[1]
+MANIFEST_NAME = "manifest.json"
+
+# Level 0 is full detail. face_ratio/max_faces bound the triangle count,
+# max_bytes the file size (textures are halved until it fits), and
+# min_pixels is the rendered width in device pixels a level is meant for
+LOD_LEVELS = (
+    {"level": 0, "face_ratio": 1.0, "max_faces": None, "texture_size": 2048, "max_bytes": None, "min_pixels": 1600},
+    {"level": 1, "face_ratio": 0.5, "max_faces": 150_000, "texture_size": 1024, "max_bytes": 4 * 1024 * 1024, "min_pixels": 900},
+    {"level": 2, "face_ratio": 0.2, "max_faces": 40_000, "texture_size": 512, "max_bytes": 1024 * 1024, "min_pixels": 480},
+    {"level": 3, "face_ratio": 0.05, "max_faces": 8_000, "texture_size": 256, "max_bytes": 256 * 1024, "min_pixels": 0},
+)
+MIN_TEXTURE_SIZE = 128
+MIN_FACES = 64
+
+
+def lod_dir(uploads_dir: Path, name: str) -> Path:
+    return upload_layout.per_upload_dir(uploads_dir, LOD_DIRNAME, name)
+
+
+def lod_filename(level: int) -> str:
+    return f"lod{level}.glb"
+
+
+def read_manifest(uploads_dir: Path, name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(lod_dir(uploads_dir, name) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_manifest(uploads_dir: Path, name: str, manifest: Dict[str, Any]) -> None:
+    """Write the manifest atomically so readers never see a partial file"""
+    target_dir = lod_dir(uploads_dir, name)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = target_dir / f"{MANIFEST_NAME}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(tmp_path, target_dir / MANIFEST_NAME)
+
+
+def face_budget(level: Dict[str, Any], source_faces: int) -> Optional[int]:
+    if level["face_ratio"] >= 1.0 and level["max_faces"] is None:
+        return None
+    budget = math.ceil(source_faces * level["face_ratio"])
+    if level["max_faces"] is not None:
+        budget = min(budget, level["max_faces"])
+    return max(MIN_FACES, budget)
+
+
+def build_level(source: Path, output: Path, level: Dict[str, Any], source_faces: int, base_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """One level through model_compression; textures shrink until the byte budget holds"""
+    budget = face_budget(level, source_faces)
+    texture_size = level["texture_size"]
+    while True:
+        settings = {
+            **base_settings,
+            "texture_size": texture_size,
+            "face_budget": budget,
+            # the budget alone decides how far trimesh decimates
+            "trimesh_quality": "high",
+            # gltf-transform has no triangle budget, only a ratio
+            "simplify_ratio": min(1.0, budget / source_faces) if budget and source_faces else None,
+            "target_bytes": None,
+            "escalate": False,
+        }
+        result = model_compression.compress_model(source, output, settings)
+        if not result["ok"]:
+            raise RuntimeError(f"LOD {level['level']} failed: {result['error']}")
+        fits = level["max_bytes"] is None or result["compressed_bytes"] <= level["max_bytes"]
+        if fits or texture_size // 2 < MIN_TEXTURE_SIZE:
+            break
+        texture_size //= 2
+
+    from asset_index import glb_stats  # asset_index skips LOD_DIRNAME, so it imports this module
+
+    stats = glb_stats(output) or {}
+    return {
+        "level": level["level"],
+        "bytes": result["compressed_bytes"],
+        "faces": stats.get("faces"),
+        "face_budget": budget,
+        "byte_budget": level["max_bytes"],
+        "budget_met": fits and (budget is None or (stats.get("faces") or 0) <= budget),
+        "texture_size": texture_size,
+        "min_pixels": level["min_pixels"],
+        "method": result["method"],
+    }
+
+
+def generate_lods(uploads_dir: str, name: str, levels=LOD_LEVELS) -> Dict[str, Any]:
+    """
+    Build every level for one upload, coarsest first, rewriting the manifest
+    after each so the cheap preview is available while the rest is built
+    """
+    uploads_path = Path(uploads_dir)
+    source = upload_layout.resolve(uploads_path, name)
+    if source is None:
+        raise FileNotFoundError(f"Upload not found: {name}")
+    target_dir = lod_dir(uploads_path, name)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target_prefix = target_dir.relative_to(uploads_path).as_posix()
+    from asset_index import glb_stats
+
+    source_faces = (glb_stats(source) or {}).get("faces") or 0
+    base_settings = model_compression.resolve_settings(name)
+
+    manifest: Dict[str, Any] = {
+        "name": name,
+        "status": "processing",
+        "source_bytes": source.stat().st_size,
+        "source_faces": source_faces,
+        "levels": [],
+    }
+    for level in sorted(levels, key=lambda level: level["level"], reverse=True):
+        filename = lod_filename(level["level"])
+        entry = build_level(source, target_dir / filename, level, source_faces, base_settings)
+        entry["path"] = f"{target_prefix}/{filename}"
+        manifest["levels"] = sorted(manifest["levels"] + [entry], key=lambda item: item["level"])
+        write_manifest(uploads_path, name, manifest)
+
+    manifest["status"] = "ready"
+    manifest["generated_at"] = datetime.utcnow().isoformat()
+    write_manifest(uploads_path, name, manifest)
+    return manifest
+
+
+def manifest_files(uploads_dir: Path, name: str) -> List[str]:
+    """Uploads names of a model's LOD files and manifest"""
+    manifest = read_manifest(uploads_dir, name) or {}
+    manifest_path = lod_dir(uploads_dir, name) / MANIFEST_NAME
+    return [level["path"] for level in manifest.get("levels", [])] + [manifest_path.relative_to(uploads_dir).as_posix()]
+
+
+def select_level(
+    manifest: Dict[str, Any],
+    viewport_width: Optional[float] = None,
+    dpr: Optional[float] = None,
+    save_data: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    The finest level meant for viewport_width * dpr device pixels; the
+    coarsest one under Save-Data. Without hints a mid-range phone
+    (412 CSS px at 2x) is assumed, which errs on the small side.
+    """
+    levels = sorted(manifest.get("levels", []), key=lambda level: level["level"])
+    if not levels:
+        return None
+    if save_data:
+        return levels[-1]
+    pixels = (viewport_width or 412) * (dpr or 2.0)
+    for level in levels:
+        if pixels >= level.get("min_pixels", 0):
+            return level
+    return levels[-1]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate LOD chains for uploaded GLB models")
+    parser.add_argument("names", nargs="*", help="Uploads names (default: every top-level .glb)")
+    parser.add_argument("--uploads", default=str(Path(__file__).parent / "uploads"))
+    parser.add_argument("--json", action="store_true", help="Print the manifests as JSON")
+    args = parser.parse_args(argv)
+
+    uploads_dir = Path(args.uploads)
+    names = [Path(name).name for name in args.names] or sorted(
+        name for name, _ in upload_layout.iter_uploads(uploads_dir) if name.lower().endswith(".glb")
+    )
+    manifests, failed = [], 0
+    for name in names:
+        try:
+            manifest = generate_lods(str(uploads_dir), name)
+        except Exception as e:
+            failed += 1
+            manifests.append({"name": name, "status": "failed", "error": str(e)})
+            if not args.json:
+                print(f"❌ {name}: {e}")
+            continue
+        manifests.append(manifest)
+        if not args.json:
+            levels = ", ".join(f"lod{level['level']} {level['bytes'] / 1024:.0f} KB / {level['faces']} faces" for level in manifest["levels"])
+            print(f"✅ {name}: {levels}")
+    if args.json:
+        print(json.dumps(manifests, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
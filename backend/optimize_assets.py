@@ -29,36 +29,30 @@ def check_dependencies():
         return False
     return True
 
-def optimize_video(input_path, output_dir):
-    """Convert video to optimized WebM/MP4"""
+def optimize_video(input_path, output_dir, height=720, vp9_crf=30, h264_crf=23):
+    """Convert video to optimized WebM/MP4 (16:9 frame, `height` lines)"""
     try:
         filename = input_path.stem
         print(f"🎬 Processing video: {filename}")
         
-        # Convert to WebM (smaller, modern browsers)
+        # WebM (smaller, modern browsers) and faststart MP4 (universal
+        # compatibility) as two outputs of one run, so the source is decoded once
         webm_path = output_dir / f"{filename}.webm"
-        webm_cmd = [
-            'ffmpeg', '-i', str(input_path),
-            '-c:v', 'libvpx-vp9', '-crf', '30',  # Good quality, reasonable size
-            '-c:a', 'libopus', '-b:a', '128k',
-            '-vf', 'scale=1280:720',  # 720p max
-            '-y',  # Overwrite output files
-            str(webm_path)
-        ]
-        subprocess.run(webm_cmd, check=True, capture_output=True)
-        
-        # Convert to optimized MP4 (universal compatibility)
         mp4_path = output_dir / f"{filename}_optimized.mp4"
-        mp4_cmd = [
+        cmd = [
             'ffmpeg', '-i', str(input_path),
-            '-c:v', 'libx264', '-crf', '23',  # Good quality
+            '-filter_complex', f'[0:v]scale={height * 16 // 9}:{height},split=2[webm][mp4]',  # 720p max by default
+            '-map', '[webm]', '-map', '0:a:0?',
+            '-c:v', 'libvpx-vp9', '-crf', str(vp9_crf),  # Good quality, reasonable size
+            '-c:a', 'libopus', '-b:a', '128k',
+            '-y', str(webm_path),  # Overwrite output files
+            '-map', '[mp4]', '-map', '0:a:0?',
+            '-c:v', 'libx264', '-crf', str(h264_crf),  # Good quality
             '-c:a', 'aac', '-b:a', '128k',
-            '-vf', 'scale=1280:720',  # 720p max
             '-movflags', '+faststart',  # Web optimization
-            '-y',  # Overwrite output files
-            str(mp4_path)
+            '-y', str(mp4_path)
         ]
-        subprocess.run(mp4_cmd, check=True, capture_output=True)
+        subprocess.run(cmd, check=True, capture_output=True)
         
         # Get file sizes for comparison
         original_size = input_path.stat().st_size / (1024 * 1024)  # MB
@@ -0,0 +1,111 @@
+"""
+Product Records for Phoenix Trailers API
+Products are read on every page view and written a few times a day, so the
+in-memory catalogue is kept in the shape reads want: one slotted record per
+product with parsed datetimes and interned ids / image references (the same
+upload paths recur across products), instead of a JSON dict that is parsed
+into a Pydantic model and serialized back on each request.
+
+Each record renders its response JSON once and reuses it until the product
+is replaced; records are never mutated in place (an update stores a new
+one). list/get responses are assembled from those bytes directly. The
+Product model still validates writes and documents the schema.
+"""
+import logging
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, Union
+
+import fast_json
+
+logger = logging.getLogger(__name__)
+
+
+def parse_datetime(value: Union[str, datetime, None]) -> datetime:
+    """Datetimes as saved by any version of the data files (isoformat or str())"""
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return datetime.utcnow()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+def format_datetime(value: datetime) -> str:
+    """The JSON form Pydantic emits for a datetime field"""
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+@dataclass
+class ProductRecord:
+    __slots__ = ("id", "title", "description", "images", "created_at", "updated_at", "_json")
+
+    id: str
+    title: str
+    description: str
+    images: Tuple[str, ...]
+    created_at: datetime
+    updated_at: datetime
+
+    def __post_init__(self):
+        self._json: Optional[bytes] = None
+
+    @classmethod
+    def from_doc(cls, doc: Mapping[str, Any]) -> "ProductRecord":
+        """Record from a stored or validated product document"""
+        return cls(
+            id=sys.intern(str(doc["id"])),
+            title=doc["title"],
+            description=doc["description"],
+            images=tuple(sys.intern(image) for image in doc.get("images") or ()),
+            created_at=parse_datetime(doc.get("created_at")),
+            updated_at=parse_datetime(doc.get("updated_at")),
+        )
+
+    def to_doc(self) -> Dict[str, Any]:
+        """JSON-ready document for the data files"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "images": list(self.images),
+            "created_at": format_datetime(self.created_at),
+            "updated_at": format_datetime(self.updated_at),
+        }
+
+    def to_json(self) -> bytes:
+        """Response body for this product, rendered on first use"""
+        if self._json is None:
+            self._json = fast_json.dumps(self.to_doc())
+        return self._json
+
+
+def load_records(docs: Mapping[str, Any], rejected: Optional[Dict[str, Any]] = None) -> Dict[str, ProductRecord]:
+    """
+    {id: record} from the products file. Malformed entries are left out and,
+    when `rejected` is given, kept there as-is so a save can write them back
+    """
+    records = {}
+    for key, doc in docs.items():
+        try:
+            record = doc if isinstance(doc, ProductRecord) else ProductRecord.from_doc(doc)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Skipping malformed product {key}: {e}")
+            if rejected is not None:
+                rejected[key] = doc
+            continue
+        records[record.id] = record
+    return records
+
+
+def to_docs(products: Mapping[str, Any]) -> Dict[str, Any]:
+    """The products file content; plain documents pass through unchanged"""
+    return {key: value.to_doc() if isinstance(value, ProductRecord) else value for key, value in products.items()}
+
+
+def render_list(records: Iterable[ProductRecord]) -> bytes:
+    """JSON array of products from their cached bodies"""
+    return b"[" + b",".join(record.to_json() for record in records) + b"]"
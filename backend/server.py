@@ -1,7 +1,6 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.gzip import GZipMiddleware
 import os
 import logging
 from pathlib import Path
@@ -12,11 +11,72 @@ from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 import shutil
+import threading
+from urllib.parse import quote
+from fastapi.responses import RedirectResponse, Response
+from static_media import MediaStaticFiles, PrecompressedStaticFiles, MediaGZipMiddleware, MediaFileResponse, UPLOADS_CACHE_CONTROL, REDIRECT_CACHE_CONTROL
+import image_variants
+import image_pipeline
+import upload_layout
+import asset_jobs
+import asset_manifest
+import critical_assets
+import model_decoders
+import product_store
+from fast_json import FastJSONResponse
+from product_store import ProductRecord
+import model_lod
+import video_ladder
+from job_queue import JobQueue
+from asset_index import AssetIndex
+from upload_gc import ReferenceIndex, UploadGC
+import storage
 
 # Create uploads directory - use absolute path
 UPLOADS_DIR = Path(__file__).parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+# Fingerprinted build output served with immutable caching (vendored model decoders)
+STATIC_DIR = Path(os.environ.get("STATIC_DIR", model_decoders.STATIC_DIR))
+STATIC_DIR.mkdir(exist_ok=True)
+
+# Disk cache for resized/transcoded image variants (regenerable, not backed up)
+IMAGE_CACHE_DIR = Path(os.environ.get("IMAGE_CACHE_DIR", Path(__file__).parent / "cache" / "variants"))
+IMAGE_CACHE_MAX_MB = int(os.environ.get("IMAGE_CACHE_MAX_MB", "512"))
+variant_cache = image_variants.VariantCache(IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_MB * 1024 * 1024)
+
+
+def resolve_upload_path(name: str) -> Optional[Path]:
+    """Map a public uploads name to a file inside UPLOADS_DIR (flat or sharded), or None"""
+    return upload_layout.resolve(UPLOADS_DIR, name)
+
+
+# Durable home of uploaded media: local disk or an S3-compatible bucket (STORAGE_BACKEND)
+upload_storage = storage.storage_from_env(UPLOADS_DIR)
+
+
+def upload_url(name: str, backend_url: str) -> str:
+    """Public URL for an uploads name (the bucket/CDN URL when storage provides one)"""
+    return upload_storage.public_url(name) or f"{backend_url}/uploads/{quote(name)}"
+
+
+async def ensure_local_upload(name: str) -> Optional[Path]:
+    """Like resolve_upload_path, but pulls the file from remote storage when this node lacks it"""
+    path = resolve_upload_path(name)
+    if path is None and upload_storage.remote:
+        candidates = upload_layout.storage_candidates(name)
+        target = UPLOADS_DIR / candidates[0]
+        # Uploads are stored under their flat name, derived files under their sharded path
+        for key in [name] + [candidate for candidate in candidates if candidate != name]:
+            if await run_in_threadpool(upload_storage.download, key, target):
+                return resolve_upload_path(name)
+    return path
+
+
+def upload_name(path: Path) -> str:
+    """Public uploads name of a resolved upload path (shard prefix removed)"""
+    return upload_layout.logical_name(path.relative_to(UPLOADS_DIR.resolve()).as_posix())
+
 # Import the DataManager
 try:
     from data_manager import DataManager
@@ -49,6 +109,82 @@ DATA_DIR.mkdir(exist_ok=True)
 
 data_manager = DataManager(DATA_DIR)
 
+# Background job queue (persisted to data/jobs.json) for asset processing
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "0")) or None
+job_queue = JobQueue(DATA_DIR, max_workers=JOB_WORKERS)
+job_queue.register("video_optimize", asset_jobs.optimize_video_job, resource="ffmpeg", max_attempts=2)
+job_queue.register("video_stream", asset_jobs.video_stream_job, resource="ffmpeg", max_attempts=2)
+job_queue.register("model_compress", asset_jobs.compress_model_job, resource="gltf", max_attempts=2)
+job_queue.register("model_lod", asset_jobs.model_lod_job, resource="gltf", max_attempts=2)
+job_queue.register("model_analyze", asset_jobs.model_analysis_job, resource="analysis", max_attempts=1)
+job_queue.register("storage_publish", storage.publish_job, resource="storage", max_attempts=5, retry_delay=10.0)
+
+# Persistent inventory of uploads/ (data/assets.json), refreshed incrementally
+asset_index = AssetIndex(DATA_DIR, UPLOADS_DIR)
+
+# Orphaned upload collection (quarantine lives outside the served directory)
+QUARANTINE_DIR = Path(os.environ.get("GC_QUARANTINE_DIR", Path(__file__).parent / "quarantine"))
+# Scheduled live sweeps are opt-in; POST /api/gc/run works either way
+GC_INTERVAL_HOURS = float(os.environ.get("GC_INTERVAL_HOURS", "0"))
+
+# Which uploads each product points at (rebuilt from products_db once loaded)
+upload_references = ReferenceIndex()
+
+
+def list_indexed_uploads() -> List[str]:
+    asset_index.refresh()
+    return asset_index.names()
+
+
+upload_gc = UploadGC(
+    DATA_DIR,
+    UPLOADS_DIR,
+    QUARANTINE_DIR,
+    upload_references,
+    list_uploads=list_indexed_uploads,
+    on_removed=asset_index.remove,
+    on_restored=asset_index.add,
+    grace_seconds=float(os.environ.get("GC_GRACE_HOURS", "168")) * 3600,
+    retention_seconds=float(os.environ.get("GC_QUARANTINE_DAYS", "14")) * 86400,
+    references_error=lambda: getattr(data_manager, "load_errors", {}).get("products.json"),
+)
+
+
+def derivative_files(name: str) -> List[str]:
+    """Uploads names of an image's manifest and rendered variants"""
+    manifest = image_pipeline.read_manifest(UPLOADS_DIR, name) or {}
+    manifest_path = image_pipeline.derived_dir(UPLOADS_DIR, name) / image_pipeline.MANIFEST_NAME
+    files = [variant["path"] for variant in manifest.get("variants", [])]
+    if manifest.get("best"):
+        files.append(manifest["best"]["path"])
+    return files + [manifest_path.relative_to(UPLOADS_DIR).as_posix()]
+
+
+def on_derivatives_updated(name: str) -> None:
+    asset_index.update_variants(name)
+    asset_manifest_cache.invalidate()
+    if upload_storage.remote:
+        job_queue.enqueue("storage_publish", {"uploads_dir": str(UPLOADS_DIR), "names": derivative_files(name)})
+
+
+def build_asset_manifest() -> dict:
+    backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
+    _, records = asset_index.query(limit=len(asset_index.names()))
+    return asset_manifest.build_manifest(
+        records,
+        UPLOADS_DIR,
+        asset_manifest.load_aliases(),
+        url_for=lambda name: upload_url(name, backend_url),
+        decoders=model_decoders.load_decoders(STATIC_DIR, url_for=lambda path: f"{backend_url}/static/{path}"),
+    )
+
+
+# Versioned map of uploads and aliases to their best variants, for the frontend
+asset_manifest_cache = asset_manifest.ManifestCache(build_asset_manifest)
+
+# Eager derivative generation for uploaded images
+derivative_pipeline = image_pipeline.DerivativePipeline(UPLOADS_DIR, job_queue, on_update=on_derivatives_updated)
+
 # DataManager will handle data loading
 
 # DataManager will handle data saving
@@ -59,6 +195,9 @@ users_db = data_manager.users_db
 products_db = data_manager.products_db
 status_checks_db = data_manager.status_checks_db
 
+# Products that failed to parse still keep their uploads alive
+upload_references.rebuild({**data_manager.unparsed_products, **products_db})
+
 # Create default user if not exists
 default_user_email = "seanm@phoenixtrailers.ca"
 if default_user_email not in users_db:
@@ -75,8 +214,8 @@ if default_user_email not in users_db:
 else:
     print(f"Default user already exists: {default_user_email}")
 
-# Create the main app without a prefix
-app = FastAPI(title="Phoenix Trailers API")
+# Create the main app without a prefix (JSON rendered with orjson when installed)
+app = FastAPI(title="Phoenix Trailers API", default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -220,38 +359,47 @@ async def require_auth(authorization: Optional[str] = Header(None)):
 
 
 # ---- Products CRUD ----
+# Stored records are validated on write, so reads send their cached JSON
+# directly; response_model still documents the schema
+def product_response(record: ProductRecord) -> Response:
+    return Response(record.to_json(), media_type="application/json")
+
+
 @api_router.get("/products", response_model=List[Product])
 async def list_products():
-    return [Product(**doc) for doc in products_db.values()]
+    return Response(product_store.render_list(products_db.values()), media_type="application/json")
 
 
 @api_router.get("/products/{product_id}", response_model=Product)
 async def get_product(product_id: str):
-    doc = products_db.get(product_id)
-    if not doc:
+    record = products_db.get(product_id)
+    if record is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return Product(**doc)
+    return product_response(record)
 
 
 @api_router.post("/products", response_model=Product)
 async def create_product(product: ProductCreate, user=Depends(require_auth)):
     print(f"🆕 Creating product: {product.title} by user: {user.get('email', 'unknown')}")
-    prod = Product(**product.dict())
-    products_db[prod.id] = prod.dict()
+    record = ProductRecord.from_doc(Product(**product.dict()).dict())
+    products_db[record.id] = record
     data_manager.save_data()
-    print(f"✅ Product created successfully: {prod.id}")
-    return prod
+    upload_references.set_product(record.id, record.images)
+    print(f"✅ Product created successfully: {record.id}")
+    return product_response(record)
 
 
 @api_router.put("/products/{product_id}", response_model=Product)
 async def update_product(product_id: str, product: ProductCreate, user=Depends(require_auth)):
-    if product_id not in products_db:
+    existing = products_db.get(product_id)
+    if existing is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    now = datetime.utcnow()
-    update_doc = {**product.dict(), "id": product_id, "updated_at": now}
-    products_db[product_id] = update_doc
+    # A new record (keeping created_at), so the old one's cached JSON is never served
+    update = ProductRecord.from_doc({**product.dict(), "id": product_id, "created_at": existing.created_at, "updated_at": datetime.utcnow()})
+    products_db[product_id] = update
     data_manager.save_data()
-    return Product(**update_doc)
+    upload_references.set_product(product_id, update.images)
+    return product_response(update)
 
 
 @api_router.delete("/products/{product_id}")
@@ -260,6 +408,7 @@ async def delete_product(product_id: str, user=Depends(require_auth)):
         raise HTTPException(status_code=404, detail="Product not found")
     del products_db[product_id]
     data_manager.save_data()
+    upload_references.remove_product(product_id)
     return {"ok": True}
 
 
@@ -269,28 +418,465 @@ async def upload_file(file: UploadFile = File(...)):
     # Generate unique filename
     file_extension = Path(file.filename).suffix
     unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = UPLOADS_DIR / unique_filename
+    file_path = upload_layout.upload_path(UPLOADS_DIR, unique_filename)
     
     # Save file
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
-    
+    # The response promises a durable URL, so the object store must have it first
+    await run_in_threadpool(upload_storage.save_file, file_path, unique_filename, file.content_type)
+    return await finish_upload(file_path, unique_filename)
+
+
+async def finish_upload(file_path: Path, name: str) -> dict:
+    """Index a stored upload and queue its background processing"""
+    await run_in_threadpool(asset_index.add, file_path)
+    asset_manifest_cache.invalidate()
+
     # Return the full URL to access the file
     # Use environment variable for backend URL, fallback to localhost for development
     backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
-    return {"filename": unique_filename, "url": f"{backend_url}/uploads/{unique_filename}"}
+    result = {"filename": name, "url": upload_url(name, backend_url)}
+
+    # Images get their responsive variants rendered in the background
+    if image_variants.pillow_available() and image_pipeline.is_pipeline_image(name):
+        manifest = derivative_pipeline.submit(name)
+        result["derivatives"] = with_variant_urls(manifest, backend_url)
+        result["manifest_url"] = f"{backend_url}/api/upload/{name}/manifest"
+    else:
+        job = enqueue_asset_optimization(file_path)
+        if job:
+            result["job_id"] = job["id"]
+    return result
+
+
+class DirectUploadRequest(BaseModel):
+    filename: str
+    content_type: str = "application/octet-stream"
+
+
+# Presigned direct-to-storage upload: the browser PUTs the bytes to the bucket,
+# then calls /complete so this server indexes and processes the file
+@api_router.post("/upload/presign")
+async def presign_upload(request: DirectUploadRequest):
+    unique_filename = f"{uuid.uuid4()}{Path(request.filename).suffix}"
+    try:
+        upload = upload_storage.presign_upload(unique_filename, request.content_type)
+    except storage.StorageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
+    return {
+        "filename": unique_filename,
+        "upload": upload,
+        "complete_url": f"{backend_url}/api/upload/{unique_filename}/complete",
+    }
+
+
+@api_router.post("/upload/{name}/complete")
+async def complete_direct_upload(name: str):
+    if not upload_layout.is_shardable(name):
+        raise HTTPException(status_code=400, detail="Invalid upload name")
+    file_path = await ensure_local_upload(name)
+    if not file_path:
+        raise HTTPException(status_code=404, detail="Upload not found in storage")
+    return await finish_upload(file_path, name)
+
+
+def enqueue_asset_optimization(file_path: Path, priority: int = 0) -> Optional[dict]:
+    """Queue the matching optimization job for a video or model upload"""
+    suffix = file_path.suffix.lower()
+    if suffix in asset_jobs.MODEL_EXTENSIONS:
+        job_queue.enqueue("model_analyze", {"source": str(file_path)}, priority=priority, unique_key=f"model_analyze:{file_path.name}")
+    if suffix in asset_jobs.VIDEO_EXTENSIONS and asset_jobs.tool_available("ffmpeg"):
+        return enqueue_video_stream(upload_name(file_path), priority)
+    if suffix not in asset_jobs.MODEL_EXTENSIONS or not asset_jobs.model_compression_available():
+        return None
+    enqueue_model_lods(upload_name(file_path), priority)
+    return job_queue.enqueue(
+        "model_compress",
+        {"source": str(file_path), "output_dir": str(UPLOADS_DIR / "compressed_3d_models"), "uploads_dir": str(UPLOADS_DIR)},
+        priority=priority,
+        unique_key=f"model_compress:{file_path.name}",
+    )
+
+
+def enqueue_video_stream(name: str, priority: int = 0) -> dict:
+    return job_queue.enqueue(
+        "video_stream",
+        {"name": name, "uploads_dir": str(UPLOADS_DIR)},
+        priority=priority,
+        unique_key=f"video_stream:{name}",
+    )
+
+
+def enqueue_model_lods(name: str, priority: int = 0) -> dict:
+    return job_queue.enqueue(
+        "model_lod",
+        {"name": name, "uploads_dir": str(UPLOADS_DIR)},
+        priority=priority,
+        unique_key=f"model_lod:{name}",
+    )
+
+
+def with_variant_urls(manifest: dict, backend_url: str) -> dict:
+    """Copy of a derivative manifest with absolute URLs for each variant"""
+    variants = [
+        {**variant, "url": upload_url(variant["path"], backend_url)}
+        for variant in manifest.get("variants", [])
+    ]
+    return {**manifest, "variants": variants}
+
+
+@api_router.delete("/upload/{name:path}")
+async def delete_upload(name: str, user=Depends(require_auth)):
+    file_path = resolve_upload_path(name)
+    if not file_path:
+        raise HTTPException(status_code=404, detail="File not found")
+    relative_name = upload_name(file_path)
+    if upload_storage.remote:
+        generated = (
+            derivative_files(relative_name)
+            + model_lod.manifest_files(UPLOADS_DIR, relative_name)
+            + video_ladder.manifest_files(UPLOADS_DIR, relative_name)
+        )
+        await run_in_threadpool(upload_storage.delete, [relative_name] + generated)
+    file_path.unlink()
+    shutil.rmtree(image_pipeline.derived_dir(UPLOADS_DIR, relative_name), ignore_errors=True)
+    shutil.rmtree(model_lod.lod_dir(UPLOADS_DIR, relative_name), ignore_errors=True)
+    shutil.rmtree(video_ladder.stream_dir(UPLOADS_DIR, relative_name), ignore_errors=True)
+    asset_index.remove(relative_name)
+    asset_manifest_cache.invalidate()
+    return {"ok": True}
+
+
+# Derivative manifest (status, widths/formats, placeholder) for an uploaded image
+@api_router.get("/upload/{name:path}/manifest")
+async def get_upload_manifest(name: str):
+    manifest = await run_in_threadpool(image_pipeline.read_manifest, UPLOADS_DIR, name)
+    if manifest is None and upload_storage.remote:
+        # Rendered on another node: fetch its published manifest
+        manifest_name = f"{image_pipeline.DERIVED_DIRNAME}/{name}/{image_pipeline.MANIFEST_NAME}"
+        if await ensure_local_upload(manifest_name):
+            manifest = await run_in_threadpool(image_pipeline.read_manifest, UPLOADS_DIR, name)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="No derivatives for this upload")
+    backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
+    return with_variant_urls(manifest, backend_url)
+
+# Delivery format chosen per uploaded image (image_formats.py), read by the frontend
+# instead of rewriting image paths in its source
+@api_router.get("/images/formats")
+async def image_formats_manifest():
+    backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
+    _, records = asset_index.query(kind="image", sort="name", descending=False, limit=len(asset_index.names()))
+    images = {}
+    for record in records:
+        best = record.get("best")
+        # Where the chosen encode is not smaller, the original is already the best copy
+        if best and best["bytes"] < record["size"]:
+            images[record["name"]] = {
+                "url": upload_url(best["path"], backend_url),
+                "format": best["format"],
+                "type": best["type"],
+                "alpha": best["alpha"],
+                "bytes": best["bytes"],
+                "source_bytes": record["size"],
+            }
+    return {"images": images}
+
+async def source_dimensions(source: Path):
+    """(width, height) of an upload; a file Pillow cannot decode is a 415, not a 500"""
+    try:
+        return await run_in_threadpool(image_variants.image_dimensions, source)
+    except image_variants.UnreadableImage:
+        raise HTTPException(status_code=415, detail="Unreadable image")
+
+
+# Responsive image srcset for an uploaded image
+@api_router.get("/images/{name:path}/srcset")
+async def image_srcset(name: str, fmt: Optional[str] = None):
+    if not image_variants.pillow_available():
+        raise HTTPException(status_code=503, detail="Image resizing is not available")
+    source = await ensure_local_upload(name)
+    if not source or source.suffix.lower() not in image_variants.SOURCE_EXTENSIONS:
+        raise HTTPException(status_code=404, detail="Image not found")
+    fmt = image_variants.normalize_format(fmt)
+    if fmt is not None and fmt not in image_variants.supported_formats():
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+
+    width, height = await source_dimensions(source)
+    widths = image_variants.srcset_widths(width)
+    backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
+    relative_name = upload_name(source)
+    fmt_param = f"&fmt={fmt}" if fmt else ""
+    # srcset is whitespace/comma separated, so names like "IMG_5180 (1).jpg" must be escaped
+    url_name = quote(relative_name)
+    return {
+        "name": relative_name,
+        "width": width,
+        "height": height,
+        "widths": widths,
+        "srcset": ", ".join(f"{backend_url}/img/{url_name}?w={w}{fmt_param} {w}w" for w in widths),
+    }
+
+# ---- 3D models ----
+# Client hints arrive as headers on same-origin requests (after Accept-CH);
+# cross-origin viewers pass the same values as query parameters
+MODEL_CLIENT_HINTS = "Sec-CH-Viewport-Width, Sec-CH-DPR, Viewport-Width, DPR"
+
+
+def model_client_hints(request: Request, viewport: Optional[float], dpr: Optional[float]) -> dict:
+    def header_float(*names):
+        for header in names:
+            try:
+                return float(request.headers[header])
+            except (KeyError, ValueError):
+                continue
+        return None
+
+    return {
+        "viewport_width": viewport or header_float("sec-ch-viewport-width", "viewport-width"),
+        "dpr": dpr or header_float("sec-ch-dpr", "dpr"),
+        "save_data": request.headers.get("save-data", "").lower() == "on",
+    }
+
+
+async def load_model_lods(name: str) -> Optional[dict]:
+    """LOD manifest for a model upload (fetched from remote storage if built on another node)"""
+    manifest = await run_in_threadpool(model_lod.read_manifest, UPLOADS_DIR, name)
+    if manifest is None and upload_storage.remote:
+        manifest_path = model_lod.lod_dir(UPLOADS_DIR, name) / model_lod.MANIFEST_NAME
+        if await ensure_local_upload(manifest_path.relative_to(UPLOADS_DIR).as_posix()):
+            manifest = await run_in_threadpool(model_lod.read_manifest, UPLOADS_DIR, name)
+    return manifest
+
+
+async def resolve_model(name: str) -> Path:
+    source = await ensure_local_upload(name)
+    if not source or source.suffix.lower() not in asset_jobs.MODEL_EXTENSIONS:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return source
+
+
+# LOD manifest with URLs and the level these client hints would get
+@api_router.get("/models/{name:path}/lods")
+async def get_model_lods(name: str, request: Request, viewport: Optional[float] = Query(None, gt=0), dpr: Optional[float] = Query(None, gt=0)):
+    source = await resolve_model(name)
+    relative_name = upload_name(source)
+    manifest = await load_model_lods(relative_name)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="No LODs for this model yet")
+    backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
+    selected = model_lod.select_level(manifest, **model_client_hints(request, viewport, dpr))
+    levels = [{**level, "url": upload_url(level["path"], backend_url)} for level in manifest.get("levels", [])]
+    return {**manifest, "levels": levels, "recommended": selected["level"] if selected else None}
+
+
+# The model file at a detail level: ?lod=auto picks one from client hints,
+# ?lod=<n> asks for a specific level. Redirects to the (immutable) file URL.
+@api_router.get("/models/{name:path}")
+async def get_model(
+    name: str,
+    request: Request,
+    lod: str = Query("auto", pattern=r"^(auto|\d)$"),
+    viewport: Optional[float] = Query(None, gt=0),
+    dpr: Optional[float] = Query(None, gt=0),
+):
+    source = await resolve_model(name)
+    relative_name = upload_name(source)
+    backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
+    headers = {"Cache-Control": REDIRECT_CACHE_CONTROL, "Accept-CH": MODEL_CLIENT_HINTS}
+    manifest = await load_model_lods(relative_name)
+
+    if lod == "auto":
+        headers["Vary"] = f"{MODEL_CLIENT_HINTS}, Save-Data"
+        level = model_lod.select_level(manifest, **model_client_hints(request, viewport, dpr)) if manifest else None
+    else:
+        level = next((item for item in (manifest or {}).get("levels", []) if item["level"] == int(lod)), None)
+        if level is None and manifest is not None:
+            raise HTTPException(status_code=404, detail=f"LOD {lod} not available")
+
+    if level is None:
+        # Not built (yet): serve full detail. LODs are only queued at upload
+        # time or through the authenticated POST /api/jobs, never by a reader
+        headers["X-Model-LOD"] = "source"
+        return RedirectResponse(upload_url(relative_name, backend_url), status_code=307, headers=headers)
+    headers["X-Model-LOD"] = str(level["level"])
+    return RedirectResponse(upload_url(level["path"], backend_url), status_code=307, headers=headers)
+
+
+# ---- Videos ----
+# Adaptive stream of a video upload: HLS master playlist, MP4 fallback and
+# posters. 404 until the video_stream job queued at upload time has run.
+@api_router.get("/videos/{name:path}")
+async def get_video_stream(name: str):
+    source = await ensure_local_upload(name)
+    if not source or source.suffix.lower() not in asset_jobs.VIDEO_EXTENSIONS:
+        raise HTTPException(status_code=404, detail="Video not found")
+    relative_name = upload_name(source)
+    manifest = await run_in_threadpool(video_ladder.read_manifest, UPLOADS_DIR, relative_name)
+    if manifest is None and upload_storage.remote:
+        manifest_path = video_ladder.stream_dir(UPLOADS_DIR, relative_name) / video_ladder.MANIFEST_NAME
+        if await ensure_local_upload(manifest_path.relative_to(UPLOADS_DIR).as_posix()):
+            manifest = await run_in_threadpool(video_ladder.read_manifest, UPLOADS_DIR, relative_name)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="No stream for this video yet")
+    backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
+    urls = {key: upload_url(manifest[key], backend_url) for key in ("hls", "mp4", "poster", "poster_thumb")}
+    renditions = [{**rendition, "url": upload_url(rendition["playlist"], backend_url)} for rendition in manifest["renditions"]]
+    return {**manifest, "urls": urls, "renditions": renditions}
+
+
+# ---- Background jobs ----
+class JobCreate(BaseModel):
+    type: str
+    payload: dict = {}
+    priority: int = 0
+
+
+@api_router.get("/jobs")
+async def list_jobs(status: Optional[str] = None, type: Optional[str] = None, limit: int = Query(100, ge=1, le=500)):
+    return {"summary": job_queue.get_summary(), "jobs": job_queue.list_jobs(status=status, job_type=type, limit=limit)}
 
-# Debug endpoint to check uploads directory
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@api_router.post("/jobs")
+async def create_job(payload: JobCreate, user=Depends(require_auth)):
+    try:
+        return job_queue.enqueue(payload.type, payload.payload, priority=payload.priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@api_router.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str, user=Depends(require_auth)):
+    job = job_queue.retry(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No failed job with that id")
+    return job
+
+# ---- Asset inventory ----
+@api_router.get("/assets")
+async def list_assets(
+    kind: Optional[str] = None,
+    directory: Optional[str] = None,
+    q: Optional[str] = None,
+    mime_type: Optional[str] = None,
+    min_size: Optional[int] = Query(None, ge=0),
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
+    total, items = asset_index.query(
+        kind=kind,
+        directory=directory,
+        q=q,
+        mime_type=mime_type,
+        min_size=min_size,
+        sort=sort,
+        descending=order == "desc",
+        offset=offset,
+        limit=limit,
+    )
+    return {"total": total, "offset": offset, "limit": limit, "items": items}
+
+
+@api_router.post("/assets/rescan")
+async def rescan_assets(user=Depends(require_auth)):
+    stats = await run_in_threadpool(asset_index.refresh)
+    asset_manifest_cache.invalidate()
+    return stats
+
+
+@api_router.get("/assets/{name:path}")
+async def get_asset(name: str):
+    record = asset_index.get(name)
+    if not record:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return record
+
+# ---- Asset manifest ----
+# The current manifest revalidates cheaply (short max-age + ETag); a specific
+# version never changes, so it is cached for a year
+ASSET_MANIFEST_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=3600"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    tags = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    return "*" in tags or etag in tags
+
+
+@api_router.get("/asset-manifest.json")
+async def get_asset_manifest(request: Request):
+    manifest, body, etag = await run_in_threadpool(asset_manifest_cache.get)
+    headers = {"ETag": etag, "Cache-Control": ASSET_MANIFEST_CACHE_CONTROL, "X-Asset-Manifest-Version": manifest["version"]}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@api_router.get("/asset-manifest/{version}.json")
+async def get_asset_manifest_version(version: str, request: Request):
+    manifest, body, etag = await run_in_threadpool(asset_manifest_cache.get)
+    if version != manifest["version"]:
+        raise HTTPException(status_code=404, detail="Unknown or superseded manifest version")
+    headers = {"ETag": etag, "Cache-Control": UPLOADS_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+# ---- Orphaned upload collection ----
+@api_router.get("/gc")
+async def gc_status(user=Depends(require_auth)):
+    return upload_gc.get_status()
+
+
+@api_router.post("/gc/run")
+async def gc_run(dry_run: bool = True, user=Depends(require_auth)):
+    report = await run_in_threadpool(upload_gc.run, dry_run)
+    if "error" in report:
+        raise HTTPException(status_code=409, detail=report["error"])
+    return report
+
+
+@api_router.post("/gc/restore/{name:path}")
+async def gc_restore(name: str, user=Depends(require_auth)):
+    restored = await run_in_threadpool(upload_gc.restore, name)
+    if not restored:
+        raise HTTPException(status_code=404, detail="Not in quarantine")
+    return {"ok": True}
+
+# Debug endpoint to check uploads directory (served from the asset index, no disk walk)
 @api_router.get("/debug/uploads")
 async def debug_uploads():
-    files = list(UPLOADS_DIR.glob("*"))
+    summary = asset_index.get_summary()
+    _, top_level = asset_index.query(directory="", sort="name", descending=False, limit=10000)
     return {
         "uploads_dir": str(UPLOADS_DIR.absolute()),
         "exists": UPLOADS_DIR.exists(),
-        "files": [f.name for f in files if f.is_file()],
-        "directories": [f.name for f in files if f.is_dir()]
+        "files": [record["name"] for record in top_level],
+        "directories": summary["directories"],
+        "index": summary,
     }
 
+# Debug endpoint to check the image variant cache
+@api_router.get("/debug/image-cache")
+async def debug_image_cache():
+    return variant_cache.get_stats()
+
+# Debug endpoint to check the upload storage backend
+@api_router.get("/debug/storage")
+async def debug_storage():
+    return upload_storage.get_stats()
+
 # Debug endpoint to check data storage
 @api_router.get("/debug/data")
 async def debug_data():
@@ -300,12 +886,85 @@ async def debug_data():
 # Include the router in the main app
 app.include_router(api_router)
 
-# Serve uploaded files
+
+# Resized/transcoded image variants, rendered on first request and then served from disk
+@app.get("/img/{name:path}")
+async def image_variant(
+    name: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4096),
+    fmt: Optional[str] = None,
+    q: Optional[int] = Query(None, ge=30, le=95),
+):
+    if not image_variants.pillow_available():
+        raise HTTPException(status_code=503, detail="Image resizing is not available")
+    source = await ensure_local_upload(name)
+    if not source or source.suffix.lower() not in image_variants.SOURCE_EXTENSIONS:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    fmt = image_variants.normalize_format(fmt)
+    negotiated = fmt is None
+    if negotiated:
+        fmt = image_variants.negotiate_format(request.headers.get("accept", ""), source.suffix)
+    elif fmt not in image_variants.supported_formats():
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+
+    original_width, _ = await source_dimensions(source)
+    width = image_variants.snap_width(w, original_width)
+
+    # Prefer the copy rendered at upload time; fall back to the on-demand cache
+    variant_path = None
+    if q is None:
+        relative_name = upload_name(source)
+        variant_path = image_pipeline.find_derivative(UPLOADS_DIR, relative_name, width, fmt)
+    if variant_path is None:
+        try:
+            variant_path = await run_in_threadpool(variant_cache.get_or_render, source, width, fmt, q)
+        except image_variants.UnreadableImage:
+            raise HTTPException(status_code=415, detail="Unreadable image")
+
+    headers = {"Cache-Control": UPLOADS_CACHE_CONTROL}
+    if negotiated:
+        headers["Vary"] = "Accept"
+    return MediaFileResponse(variant_path, media_type=image_variants.VARIANT_FORMATS[fmt][1], headers=headers)
+
+# Serve uploaded files (byte ranges, ETag/Last-Modified conditionals and
+# one-year immutable caching are handled by MediaStaticFiles). Files may sit
+# flat or under their hash-prefix shard; URLs always use the flat name. With
+# remote storage, files this node does not have are redirected to the bucket.
 print(f"Mounting static files from: {UPLOADS_DIR.absolute()}")
-app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR.absolute())), name="uploads")
+app.mount(
+    "/uploads",
+    MediaStaticFiles(
+        directory=str(UPLOADS_DIR.absolute()),
+        path_candidates=upload_layout.storage_candidates,
+        fallback_url=upload_storage.redirect_url if upload_storage.remote else None,
+    ),
+    name="uploads",
+)
+
+# Vendored decoders under fingerprinted paths (`python model_decoders.py vendor`),
+# sent as their prebuilt .br/.gz copies
+app.mount("/static", PrecompressedStaticFiles(directory=str(STATIC_DIR.absolute())), name="static")
 
-# Enable compression for faster transfers
-app.add_middleware(GZipMiddleware, minimum_size=500)
+# Enable compression for faster transfers (skips Range requests and binary media)
+app.add_middleware(MediaGZipMiddleware, minimum_size=500)
+
+# Preload hints for the landing page's critical assets, resolved through the
+# asset manifest and re-resolved whenever its version changes
+critical_config = critical_assets.load_config()
+critical_links_cache = {"version": None, "links": []}
+
+
+async def critical_links() -> List[str]:
+    manifest, _, _ = await run_in_threadpool(asset_manifest_cache.get)
+    if critical_links_cache["version"] != manifest["version"]:
+        critical_links_cache["links"] = critical_assets.resolve_links(critical_config, manifest)
+        critical_links_cache["version"] = manifest["version"]
+    return critical_links_cache["links"]
+
+
+app.add_middleware(critical_assets.EarlyHintsMiddleware, paths=critical_config.get("routes", []), get_links=critical_links)
 
 # CORS
 cors_origins = os.environ.get('CORS_ORIGINS', '*')
@@ -322,20 +981,10 @@ app.add_middleware(
     allow_origins=cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The frontend applies the critical-asset Link header from its first API call
+    expose_headers=["Link"],
 )
 
-# Add long-lived caching for uploaded static assets (images/videos/models)
-@app.middleware("http")
-async def add_uploads_cache_headers(request, call_next):
-    response = await call_next(request)
-    path = request.url.path
-    if path.startswith("/uploads/") and response.status_code == 200:
-        # One year immutable cache for versioned assets
-        response.headers.setdefault(
-            "Cache-Control", "public, max-age=31536000, immutable"
-        )
-    return response
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -360,6 +1009,7 @@ async def startup_event():
         users_db = data_manager.users_db
         products_db = data_manager.products_db
         status_checks_db = data_manager.status_checks_db
+        upload_references.rebuild({**data_manager.unparsed_products, **products_db})
         
         print(f"Loaded {len(users_db)} users")
         print(f"Loaded {len(products_db)} products")
@@ -373,6 +1023,12 @@ async def startup_event():
             data_manager.save_data()
             print("Default user password hash updated")
         
+        job_queue.start()
+
+        # Catch up with files added/removed while the server was down
+        threading.Thread(target=asset_index.refresh, name="asset-index-refresh", daemon=True).start()
+        upload_gc.start(GC_INTERVAL_HOURS * 3600)
+
         print("=== Startup complete ===")
         
     except Exception as e:
@@ -382,4 +1038,11 @@ async def startup_event():
         # Don't crash the app, continue with empty data
         users_db = {}
         products_db = {}
-        status_checks_db = []
\ No newline at end of file
+        status_checks_db = []
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    upload_gc.shutdown()
+    job_queue.shutdown()
@@ -0,0 +1,386 @@
+"""
+Static Media Serving for Phoenix Trailers API
+Range requests, conditional requests and zero-copy sends for /uploads
+"""
+import mimetypes
+import os
+import uuid
+from email.utils import parsedate
+from typing import Callable, List, Optional, Tuple
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.responses import FileResponse, RedirectResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Message, Receive, Scope, Send
+
+# Types the stdlib table does not know about (GLB would otherwise be text/plain)
+mimetypes.add_type("model/gltf-binary", ".glb")
+mimetypes.add_type("model/gltf+json", ".gltf")
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("application/wasm", ".wasm")
+# HLS (the stdlib maps .ts to Qt translation files)
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+
+UPLOADS_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Redirects to remote storage may carry expiring presigned URLs
+REDIRECT_CACHE_CONTROL = "private, max-age=300"
+
+# More ranges than this in one request is treated as abuse and answered with 200
+MAX_RANGES = 16
+
+# Media that is already compressed - gzipping it only burns CPU
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/")
+INCOMPRESSIBLE_TYPES = {"application/zip", "application/gzip", "font/woff2"}
+
+# Build-time compressed siblings (<file>.br, <file>.gz), in preference order
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+PATHSEND_EXTENSION = "http.response.pathsend"
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a `Range: bytes=...` header into inclusive (start, end) pairs.
+
+    Returns None when the header should be ignored (bad syntax, other units,
+    too many ranges) and an empty list when no range is satisfiable.
+    Overlapping or adjacent ranges are coalesced.
+    """
+    units, _, spec = range_header.partition("=")
+    if units.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges: List[Tuple[int, int]] = []
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    if not parts or len(parts) > MAX_RANGES:
+        return None
+
+    for part in parts:
+        first, sep, last = part.partition("-")
+        if not sep:
+            return None
+        first, last = first.strip(), last.strip()
+        try:
+            if first == "":
+                # Suffix range: last N bytes
+                suffix = int(last)
+                if suffix < 0:
+                    return None
+                if suffix == 0 or file_size == 0:
+                    continue
+                ranges.append((max(file_size - suffix, 0), file_size - 1))
+                continue
+            start = int(first)
+            end = int(last) if last else file_size - 1
+        except ValueError:
+            return None
+        if start < 0 or (last and end < start):
+            return None
+        if start >= file_size:
+            continue
+        ranges.append((start, min(end, file_size - 1)))
+
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class MediaFileResponse(FileResponse):
+    """FileResponse that answers Range requests with 206/416 and uses zero-copy sends"""
+
+    def __init__(self, *args, ranges: Optional[List[Tuple[int, int]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ranges = ranges
+        self.boundary = uuid.uuid4().hex
+        self.headers.setdefault("accept-ranges", "bytes")
+        if ranges is None:
+            return
+
+        file_size = self.stat_result.st_size
+        if not ranges:
+            self.status_code = 416
+            if "cache-control" in self.headers:
+                del self.headers["cache-control"]
+            self.headers["content-range"] = f"bytes */{file_size}"
+            self.headers["content-length"] = "0"
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{file_size}"
+            self.headers["content-length"] = str(end - start + 1)
+        else:
+            self.status_code = 206
+            self.parts = [
+                (self._part_header(start, end, file_size), start, end)
+                for start, end in ranges
+            ]
+            content_length = sum(len(header) + end - start + 1 for header, start, end in self.parts)
+            content_length += len(self._closing_boundary())
+            self.headers["content-type"] = f"multipart/byteranges; boundary={self.boundary}"
+            self.headers["content-length"] = str(content_length)
+
+    def _part_header(self, start: int, end: int, file_size: int) -> bytes:
+        return (
+            f"\r\n--{self.boundary}\r\n"
+            f"Content-Type: {self.media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+        ).encode("latin-1")
+
+    def _closing_boundary(self) -> bytes:
+        return f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        if self.ranges is None and ZEROCOPY_EXTENSION not in extensions:
+            # Whole file without zero-copy support: Starlette already does this well
+            await super().__call__(scope, receive, send)
+            return
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or self.status_code == 416:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif self.ranges is None:
+            await self._send_range(send, extensions, 0, self.stat_result.st_size - 1, more_body=False)
+        elif len(self.ranges) == 1:
+            start, end = self.ranges[0]
+            await self._send_range(send, extensions, start, end, more_body=False)
+        else:
+            for header, start, end in self.parts:
+                await send({"type": "http.response.body", "body": header, "more_body": True})
+                await self._send_range(send, extensions, start, end, more_body=True)
+            await send({"type": "http.response.body", "body": self._closing_boundary(), "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_range(self, send: Send, extensions: dict, start: int, end: int, more_body: bool) -> None:
+        """Send bytes [start, end] of the file, via sendfile when the server supports it"""
+        count = end - start + 1
+        if ZEROCOPY_EXTENSION in extensions:
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file,
+                    "offset": start,
+                    "count": count,
+                    "more_body": more_body,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": more_body or remaining > 0,
+                })
+        if count == 0 and not more_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class MediaStaticFiles(StaticFiles):
+    """StaticFiles with byte ranges, RFC 7232 conditionals and long-lived caching"""
+
+    def __init__(
+        self,
+        *args,
+        cache_control: str = UPLOADS_CACHE_CONTROL,
+        path_candidates: Optional[Callable[[str], List[str]]] = None,
+        fallback_url: Optional[Callable[[str], Optional[str]]] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+        # Maps a request path to the storage paths to try, in order (e.g. sharded, then flat)
+        self.path_candidates = path_candidates
+        # Where to redirect when the file is not on this node (e.g. the object store)
+        self.fallback_url = fallback_url
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404 or self.fallback_url is None:
+                raise
+            url = self.fallback_url(path.replace(os.sep, "/"))
+            if not url:
+                raise
+            return RedirectResponse(url, status_code=307, headers={"cache-control": REDIRECT_CACHE_CONTROL})
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        if self.path_candidates is None:
+            return super().lookup_path(path)
+        for candidate in self.path_candidates(path.replace(os.sep, "/")):
+            full_path, stat_result = super().lookup_path(candidate.replace("/", os.sep))
+            if stat_result is not None:
+                return full_path, stat_result
+        return "", None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        headers = {"cache-control": self.cache_control} if status_code == 200 else None
+
+        response = MediaFileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if status_code != 200:
+            return response
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(response.headers, request_headers):
+            ranges = parse_range_header(range_header, stat_result.st_size)
+            if ranges is not None:
+                response = MediaFileResponse(
+                    full_path,
+                    stat_result=stat_result,
+                    headers=headers,
+                    ranges=ranges,
+                )
+        return response
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        """
+        RFC 7232 evaluation: If-None-Match (weak comparison, `*` allowed) wins
+        over If-Modified-Since, which is only consulted when no ETag is sent.
+        """
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            etag = _strip_weak(response_headers.get("etag", ""))
+            tags = [_strip_weak(tag.strip()) for tag in if_none_match.split(",")]
+            return "*" in tags or (bool(etag) and etag in tags)
+
+        if_modified_since = request_headers.get("if-modified-since")
+        last_modified = response_headers.get("last-modified")
+        if if_modified_since and last_modified:
+            since = parsedate(if_modified_since)
+            modified = parsedate(last_modified)
+            return since is not None and modified is not None and since >= modified
+        return False
+
+    @staticmethod
+    def _if_range_matches(response_headers: Headers, request_headers: Headers) -> bool:
+        """If-Range needs a strong ETag or exact Last-Modified match, otherwise send the full file"""
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            return not if_range.startswith("W/") and if_range == response_headers.get("etag")
+        return if_range == response_headers.get("last-modified")
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Content codings the client accepts (q > 0), from an Accept-Encoding header"""
+    accepted = []
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.append(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(MediaStaticFiles):
+    """
+    MediaStaticFiles for fingerprinted build output (e.g. vendored decoders):
+    when a brotli or gzip copy sits next to the file and the client accepts
+    it, that copy is sent with Content-Encoding and the original's type, so
+    nothing is compressed per request. Range requests get the identity file.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        if status_code == 200 and "range" not in request_headers:
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                if encoding not in accepted:
+                    continue
+                encoded_path = f"{full_path}{suffix}"
+                try:
+                    encoded_stat = os.stat(encoded_path)
+                except OSError:
+                    continue
+                media_type = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+                headers = {
+                    "cache-control": self.cache_control,
+                    "content-encoding": encoding,
+                    "vary": "Accept-Encoding",
+                    "accept-ranges": "none",
+                }
+                response = MediaFileResponse(encoded_path, stat_result=encoded_stat, media_type=media_type, headers=headers)
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if status_code == 200:
+            response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+class MediaGZipResponder(GZipResponder):
+    """GZipResponder that passes through partial content and already-compressed media"""
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            await super().send_with_gzip(message)
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            if (
+                message["status"] in (206, 416)
+                or "content-range" in headers
+                or content_type.startswith(INCOMPRESSIBLE_PREFIXES)
+                or content_type in INCOMPRESSIBLE_TYPES
+            ):
+                # Reuse the "already encoded" pass-through path
+                self.content_encoding_set = True
+            return
+        if message["type"] in (ZEROCOPY_EXTENSION, PATHSEND_EXTENSION):
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+        await super().send_with_gzip(message)
+
+
+class MediaGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that never compresses Range requests or binary media"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if "gzip" in headers.get("Accept-Encoding", "") and "range" not in headers:
+                responder = MediaGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
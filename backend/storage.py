@@ -0,0 +1,280 @@
+"""
+Upload Storage Backends for Phoenix Trailers API
+Where uploaded media is kept durably: the local uploads/ directory (default)
+or any S3-compatible object store (AWS S3, MinIO, Cloudflare R2). With S3,
+uploads/ is only a per-node working copy used for image/model processing;
+every node can refill it from the bucket, so instances can be scaled out
+and redeploys lose nothing.
+
+Configured from the environment:
+    STORAGE_BACKEND=local|s3
+    S3_BUCKET, S3_PREFIX (default "uploads/"), S3_REGION, S3_ENDPOINT_URL (MinIO),
+    S3_PUBLIC_URL (CDN / public bucket URL; presigned GETs are used without it)
+"""
+import logging
+import mimetypes
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import upload_layout
+from static_media import UPLOADS_CACHE_CONTROL
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+    BOTO3_AVAILABLE = True
+except ImportError:  # only needed for STORAGE_BACKEND=s3
+    BOTO3_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_S3_PREFIX = "uploads/"
+PRESIGN_EXPIRES_SECONDS = 3600
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+MULTIPART_CONCURRENCY = 8
+MAX_POOL_CONNECTIONS = 32
+DELETE_BATCH_SIZE = 1000
+
+
+class StorageError(Exception):
+    pass
+
+
+class StorageBackend:
+    """
+    Objects are addressed by their public uploads name - the path that
+    follows /uploads/ in a URL ("<uuid>.jpg", "derived/<uuid>.jpg/w320.webp").
+    """
+
+    name = "base"
+    remote = False
+
+    def save_file(self, path: Path, name: str, content_type: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def download(self, name: str, path: Path) -> bool:
+        raise NotImplementedError
+
+    def exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, names: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def public_url(self, name: str) -> Optional[str]:
+        """Absolute URL clients should use instead of /uploads/<name>, if any"""
+        return None
+
+    def redirect_url(self, name: str) -> Optional[str]:
+        """Where /uploads/<name> sends clients when this node has no local copy"""
+        return None
+
+    def presign_upload(self, name: str, content_type: str, expires: int = PRESIGN_EXPIRES_SECONDS) -> Dict[str, Any]:
+        raise StorageError(f"Direct uploads are not supported by the {self.name} storage backend")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "remote": self.remote}
+
+
+class LocalStorage(StorageBackend):
+    """uploads/ on the local disk is the storage itself"""
+
+    name = "local"
+
+    def __init__(self, uploads_dir: Path):
+        self.uploads_dir = uploads_dir
+
+    def save_file(self, path: Path, name: str, content_type: Optional[str] = None) -> None:
+        existing = upload_layout.resolve(self.uploads_dir, name)
+        if existing is not None and existing == path.resolve():
+            return
+        target = upload_layout.upload_path(self.uploads_dir, name) if upload_layout.is_shardable(name) else self.uploads_dir / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, target)
+
+    def download(self, name: str, path: Path) -> bool:
+        source = upload_layout.resolve(self.uploads_dir, name)
+        if source is None:
+            return False
+        if source != path.resolve():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, path)
+        return True
+
+    def exists(self, name: str) -> bool:
+        return upload_layout.resolve(self.uploads_dir, name) is not None
+
+    def delete(self, names: Iterable[str]) -> None:
+        for name in names:
+            path = upload_layout.resolve(self.uploads_dir, name)
+            if path is not None:
+                path.unlink()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**super().get_stats(), "uploads_dir": str(self.uploads_dir)}
+
+
+class S3Storage(StorageBackend):
+    """
+    S3 API backend. One client per process (botocore clients are thread-safe
+    and keep a pool of keep-alive connections); large files go up as
+    parallel multipart uploads through the transfer manager.
+    """
+
+    name = "s3"
+    remote = True
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = DEFAULT_S3_PREFIX,
+        region: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        public_url: Optional[str] = None,
+        max_pool_connections: int = MAX_POOL_CONNECTIONS,
+        multipart_threshold: int = MULTIPART_THRESHOLD,
+        multipart_chunksize: int = MULTIPART_CHUNKSIZE,
+        multipart_concurrency: int = MULTIPART_CONCURRENCY,
+        client=None,
+    ):
+        if not BOTO3_AVAILABLE and client is None:
+            raise StorageError("boto3 is required for the s3 storage backend")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.public_base = public_url.rstrip("/") if public_url else None
+        self.client = client or boto3.session.Session().client(
+            "s3",
+            region_name=region,
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+                # MinIO and most self-hosted stand-ins only do path-style addressing
+                s3={"addressing_style": "path" if endpoint_url else "auto"},
+            ),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=multipart_concurrency,
+            use_threads=True,
+        )
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}{name.lstrip('/')}"
+
+    def save_file(self, path: Path, name: str, content_type: Optional[str] = None) -> None:
+        content_type = content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.client.upload_file(
+            str(path),
+            self.bucket,
+            self.key(name),
+            ExtraArgs={"ContentType": content_type, "CacheControl": UPLOADS_CACHE_CONTROL},
+            Config=self.transfer_config,
+        )
+
+    def download(self, name: str, path: Path) -> bool:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.client.download_file(self.bucket, self.key(name), str(tmp_path), Config=self.transfer_config)
+        except ClientError as e:
+            if _is_not_found(e):
+                return False
+            raise
+        os.replace(tmp_path, path)
+        return True
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(name))
+            return True
+        except ClientError as e:
+            if _is_not_found(e):
+                return False
+            raise
+
+    def delete(self, names: Iterable[str]) -> None:
+        keys = [{"Key": self.key(name)} for name in names]
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": keys[start:start + DELETE_BATCH_SIZE], "Quiet": True})
+
+    def list_names(self, prefix: str = "") -> List[str]:
+        names = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.key(prefix)):
+            names.extend(item["Key"][len(self.prefix):] for item in page.get("Contents", []))
+        return names
+
+    def public_url(self, name: str) -> Optional[str]:
+        return f"{self.public_base}/{quote(self.key(name))}" if self.public_base else None
+
+    def redirect_url(self, name: str) -> Optional[str]:
+        return self.public_url(name) or self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.key(name)},
+            ExpiresIn=PRESIGN_EXPIRES_SECONDS,
+        )
+
+    def presign_upload(self, name: str, content_type: str, expires: int = PRESIGN_EXPIRES_SECONDS) -> Dict[str, Any]:
+        """Presigned PUT so the browser sends the bytes straight to the bucket"""
+        headers = {"Content-Type": content_type, "Cache-Control": UPLOADS_CACHE_CONTROL}
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": self.key(name), "ContentType": content_type, "CacheControl": UPLOADS_CACHE_CONTROL},
+            ExpiresIn=expires,
+        )
+        return {"method": "PUT", "url": url, "headers": headers, "expires_in": expires}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            "bucket": self.bucket,
+            "prefix": self.prefix,
+            "endpoint_url": self.endpoint_url,
+            "public_url": self.public_base,
+        }
+
+
+def _is_not_found(error: "ClientError") -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+def storage_from_env(uploads_dir: Path) -> StorageBackend:
+    """Backend selected by STORAGE_BACKEND (worker processes call this too)"""
+    backend = os.environ.get("STORAGE_BACKEND", "local").lower()
+    if backend == "local":
+        return LocalStorage(uploads_dir)
+    if backend == "s3":
+        bucket = os.environ.get("S3_BUCKET")
+        if not bucket:
+            raise StorageError("S3_BUCKET must be set when STORAGE_BACKEND=s3")
+        return S3Storage(
+            bucket,
+            prefix=os.environ.get("S3_PREFIX", DEFAULT_S3_PREFIX),
+            region=os.environ.get("S3_REGION") or os.environ.get("AWS_REGION"),
+            endpoint_url=os.environ.get("S3_ENDPOINT_URL") or None,
+            public_url=os.environ.get("S3_PUBLIC_URL") or None,
+        )
+    raise StorageError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+def publish_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job-queue handler: copy local files under uploads/ to the configured storage"""
+    uploads_dir = Path(payload["uploads_dir"])
+    storage = storage_from_env(uploads_dir)
+    published = []
+    for name in payload["names"]:
+        path = upload_layout.resolve(uploads_dir, name)
+        if path is None:
+            raise StorageError(f"Nothing to publish for {name}")
+        storage.save_file(path, name)
+        published.append(name)
+    return {"backend": storage.name, "published": published}
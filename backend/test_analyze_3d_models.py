@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the memory-mapped GLB analyzer
+"""
+import csv
+import io
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+import analyze_3d_models
+import glb_io
+from glb_io import GLB
+from test_glb_quantize import make_grid_glb
+from test_glb_textures import make_textured_glb
+
+
+def test_breakdown_and_opportunities():
+    """Test that byte accounting adds up and float attributes are flagged for quantization"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "grid.glb"
+        make_grid_glb().save(path)
+        report = analyze_3d_models.analyze_glb_structure(path)
+
+        assert report["vertices"] == 40 * 40 * 6 and report["faces"] == 40 * 40 * 2
+        assert report["bytes"] == path.stat().st_size
+        assert [chunk["type"] for chunk in report["chunks"]] == ["JSON", "BIN"]
+        assert sum(size for usage, size in report["breakdown"].items() if usage != "json") == report["bin_bytes"]
+        positions = next(row for row in report["accessors"] if row["usage"] == "positions")
+        assert positions["bytes"] == 40 * 40 * 6 * 12 and positions["component_type"] == "float32"
+        kinds = {(item["kind"], item["detail"].split()[0]) for item in report["opportunities"]}
+        assert {("quantize", "POSITION"), ("quantize", "NORMAL"), ("quantize", "TEXCOORD_0"), ("weld", "unindexed")} <= kinds
+        assert 0 < report["estimated_bytes"] < report["bytes"]
+        print(f"   {report['bytes']} bytes, estimated {report['estimated_bytes']} ({report['estimated_savings_pct']}% saved)")
+
+
+def test_image_sizes():
+    """Test that texture dimensions come from the image headers"""
+    glb = make_textured_glb()
+    for fmt in ("JPEG", "WEBP"):
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 200), (10, 20, 30)).save(buffer, fmt)
+        glb.document["images"].append({"bufferView": glb.add_view(buffer.getvalue()), "mimeType": f"image/{fmt.lower()}"})
+    glb.pack()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "textured.glb"
+        glb.save(path)
+        report = analyze_3d_models.analyze_glb_structure(path)
+
+    sizes = [(image["width"], image["height"]) for image in report["images"]]
+    assert sizes == [(2048, 1024), (256, 256), (300, 200), (300, 200)], sizes
+    assert report["images"][1]["role"] == "normal"
+    assert report["breakdown"]["image"] == sum(image["bytes"] for image in report["images"])
+    assert any(item["kind"] == "texture" and item["target"] == "image 0" for item in report["opportunities"])
+    print("   ✅ PNG, JPEG and WebP dimensions read")
+
+
+def test_directory_reports():
+    """Test parallel analysis, error rows and the CSV output"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_grid_glb(8).save(Path(tmp) / "a.glb")
+        (Path(tmp) / "nested").mkdir()
+        make_grid_glb(4).save(Path(tmp) / "nested" / "b.glb")
+        (Path(tmp) / "broken.glb").write_bytes(b"not a glb at all")
+        reports = analyze_3d_models.analyze_paths(analyze_3d_models.find_models([tmp]), jobs=2)
+
+    assert len(reports) == 3
+    errors = [report for report in reports if "error" in report]
+    assert len(errors) == 1 and errors[0]["file"].endswith("broken.glb") and glb_io.GLBError.__name__ in errors[0]["error"]
+    out = io.StringIO()
+    analyze_3d_models.write_csv(reports, out)
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert {row["section"] for row in rows} >= {"file", "accessor", "bufferView", "opportunity", "error"}
+    print(f"   ✅ {len(rows)} CSV rows for {len(reports)} files")
+
+
+if __name__ == "__main__":
+    print("=== Testing GLB Analyzer ===")
+    test_breakdown_and_opportunities()
+    test_image_sizes()
+    test_directory_reports()
+    print("=== Test Complete ===")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script to verify asset size budgets and the offender report
+"""
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+import asset_budgets
+from test_glb_quantize import make_grid_glb
+
+BUDGETS = {
+    "ignore": ["backups/*"],
+    "classes": {
+        "hero_image": {"kind": "image", "match": ["[0-9].*"], "max_bytes": 10_000_000, "max_dimension": 2560},
+        "product_photo": {"kind": "image", "match": ["*"], "max_dimension": 800},
+        "trailer_model": {"kind": "model", "match": ["*"], "max_faces": 1000},
+    },
+}
+
+
+def test_classify():
+    """Test that the first matching class of the right kind wins"""
+    assert asset_budgets.classify("1.jpg", BUDGETS)[0] == "hero_image"
+    assert asset_budgets.classify("optimized/photo.webp", BUDGETS)[0] == "product_photo"
+    assert asset_budgets.classify("compressed_3d_models/deck.glb", BUDGETS)[0] == "trailer_model"
+    assert asset_budgets.classify("backups/1.jpg", BUDGETS) is None
+    assert asset_budgets.classify("clip.mp4", BUDGETS) is None
+    print("   ✅ Assets classified")
+
+
+def test_check_budgets():
+    """Test that oversize files are reported, worst first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        Image.new("RGB", (2000, 1000)).save(uploads / "1.jpg")
+        Image.new("RGB", (1600, 1200)).save(uploads / "photo.jpg")
+        (uploads / "optimized").mkdir()
+        Image.new("RGB", (800, 600)).save(uploads / "optimized" / "photo.webp")
+        make_grid_glb(40).save(uploads / "deck.glb")
+        (uploads / "broken.png").write_bytes(b"not an image")
+
+        report = asset_budgets.check_budgets(uploads, BUDGETS, jobs=2)
+        assert report["checked"] == 5 and report["over_budget"] == 2
+        assert [result["name"] for result in report["offenders"]] == ["deck.glb", "photo.jpg"]
+        assert report["offenders"][0]["violations"] == [{"metric": "faces", "value": 3200, "limit": 1000, "over_pct": 220.0}]
+        assert [error["name"] for error in report["errors"]] == ["broken.png"]
+        assert report["classes"]["product_photo"]["files"] == 3
+
+        # Limiting the check to pipeline outputs
+        assert asset_budgets.check_budgets(uploads, BUDGETS, ["optimized"])["checked"] == 1
+    print("   ✅ Offenders reported")
+
+
+if __name__ == "__main__":
+    print("=== Testing Asset Budgets ===")
+    test_classify()
+    test_check_budgets()
+    print("=== Test Complete ===")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the persistent uploads inventory
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+from asset_index import AssetIndex
+
+
+def make_tree(uploads: Path) -> None:
+    Image.new("RGB", (400, 300), (10, 20, 30)).save(uploads / "hero.jpg")
+    (uploads / "docs").mkdir()
+    (uploads / "docs" / "spec.pdf").write_bytes(b"%PDF-1.4" + bytes(5000))
+    (uploads / "clip.mp4").write_bytes(bytes(2000))
+
+
+def test_incremental_refresh():
+    """Test that refresh detects added, changed and removed files by stat"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads, data = Path(tmp) / "uploads", Path(tmp) / "data"
+        uploads.mkdir()
+        make_tree(uploads)
+        index = AssetIndex(data, uploads)
+
+        assert index.refresh() == {"added": 3, "updated": 0, "removed": 0, "total": 3}
+        hero = index.get("hero.jpg")
+        assert (hero["kind"], hero["width"], hero["height"]) == ("image", 400, 300)
+        assert index.get("docs/spec.pdf")["directory"] == "docs"
+
+        # Untouched files are not re-read
+        assert index.refresh() == {"added": 0, "updated": 0, "removed": 0, "total": 3}
+
+        Image.new("RGB", (800, 200), (10, 20, 30)).save(uploads / "hero.jpg")
+        stat_result = (uploads / "hero.jpg").stat()
+        os.utime(uploads / "hero.jpg", ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+        (uploads / "clip.mp4").unlink()
+        (uploads / "new.png").write_bytes((uploads / "hero.jpg").read_bytes())
+        assert index.refresh() == {"added": 1, "updated": 1, "removed": 1, "total": 3}
+        changed = index.get("hero.jpg")
+        assert changed["width"] == 800 and changed["sha256"] != hero["sha256"]
+        assert changed["created_at"] == hero["created_at"]
+        assert index.get("clip.mp4") is None
+
+        # The index persists between instances
+        assert sorted(AssetIndex(data, uploads).names()) == ["docs/spec.pdf", "hero.jpg", "new.png"]
+    print("   ✅ Refresh picked up adds, changes and removals")
+
+
+def test_query_and_remove():
+    """Test filtering, sorting, paging and remove"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp) / "uploads"
+        uploads.mkdir()
+        make_tree(uploads)
+        index = AssetIndex(Path(tmp) / "data", uploads)
+        index.refresh()
+
+        total, records = index.query(kind="image")
+        assert total == 1 and records[0]["name"] == "hero.jpg"
+        assert index.query(directory="/docs/")[0] == 1
+        assert index.query(q="SPEC")[1][0]["name"] == "docs/spec.pdf"
+        assert index.query(min_size=3000)[0] == 1
+
+        _, by_size = index.query(sort="size", descending=False)
+        assert [record["size"] for record in by_size] == sorted(record["size"] for record in by_size)
+        total, page = index.query(sort="name", descending=False, offset=1, limit=1)
+        assert total == 3 and [record["name"] for record in page] == ["docs/spec.pdf"]
+        # Unknown sort fields fall back to created_at instead of failing
+        assert index.query(sort="password")[0] == 3
+
+        # Records handed out are copies
+        records[0]["size"] = -1
+        assert index.get("hero.jpg")["size"] > 0
+
+        assert index.remove("clip.mp4") and not index.remove("clip.mp4")
+        assert index.query()[0] == 2
+    print("   ✅ Queries filtered, sorted and paged")
+
+
+def test_generated_files_not_indexed():
+    """Test that files generated for another upload are not listed as uploads"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp) / "uploads"
+        uploads.mkdir()
+        make_tree(uploads)
+        generated = {
+            "derived": ("hero.jpg", "w320.webp"),
+            "lod": ("deck.glb", "lod1.glb"),
+            "stream": ("clip.mp4", "720p/seg_000.ts"),
+        }
+        for dirname, (owner, filename) in generated.items():
+            path = uploads / dirname / owner / filename
+            path.parent.mkdir(parents=True)
+            path.write_bytes(bytes(100))
+        index = AssetIndex(Path(tmp) / "data", uploads)
+        index.refresh()
+        indexed = index.names()
+        assert sorted(indexed) == ["clip.mp4", "docs/spec.pdf", "hero.jpg"], indexed
+    print("   ✅ Generated files stayed out of the index")
+
+
+if __name__ == "__main__":
+    print("=== Testing Asset Index ===")
+    test_incremental_refresh()
+    test_query_and_remove()
+    test_generated_files_not_indexed()
+    print("=== Test Complete ===")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the versioned asset manifest
+"""
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+import asset_manifest
+import image_pipeline
+from asset_index import AssetIndex
+
+
+def make_uploads(uploads: Path) -> AssetIndex:
+    Image.new("RGBA", (300, 200), (200, 40, 40, 255)).save(uploads / "logo.png")
+    Image.new("RGB", (640, 480), (20, 90, 160)).save(uploads / "hero.jpg")
+    image_pipeline.generate_derivatives(str(uploads), "hero.jpg", widths=(320, 640), formats=("webp", "jpeg"))
+    index = AssetIndex(uploads.parent / "data", uploads)
+    index.refresh()
+    return index
+
+
+def test_build_manifest():
+    """Test that assets carry variants and aliases resolve to existing uploads"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp) / "uploads"
+        uploads.mkdir()
+        index = make_uploads(uploads)
+        _, records = index.query(limit=10)
+        aliases = {"hero": "hero.jpg", "gone": "missing.jpg"}
+
+        manifest = asset_manifest.build_manifest(records, uploads, aliases)
+        assert manifest["aliases"] == {"hero": "hero.jpg"}
+        hero = manifest["assets"]["hero.jpg"]
+        assert hero["url"] == "/uploads/hero.jpg" and (hero["width"], hero["height"]) == (640, 480)
+        assert [variant["width"] for variant in hero["variants"]["webp"]] == [320, 640]
+        assert hero["placeholder"].startswith("data:image/")
+        assert "variants" not in manifest["assets"]["logo.png"]
+
+        # The version only moves when the content does
+        assert asset_manifest.build_manifest(records, uploads, aliases)["version"] == manifest["version"]
+        assert asset_manifest.build_manifest(records, uploads, {})["version"] != manifest["version"]
+    print("   ✅ Manifest built and versioned")
+
+
+def test_manifest_cache():
+    """Test that the rendered manifest is reused until invalidated"""
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"version": f"v{len(builds)}", "assets": {}, "aliases": {}}
+
+    cache = asset_manifest.ManifestCache(build, max_age=3600)
+    manifest, body, etag = cache.get()
+    assert cache.get()[2] == etag == '"v1"' and len(builds) == 1
+    assert body == b'{"version":"v1","assets":{},"aliases":{}}'
+    cache.invalidate()
+    assert cache.get()[2] == '"v2"'
+    print("   ✅ Manifest cached with an ETag")
+
+
+if __name__ == "__main__":
+    print("=== Testing Asset Manifest ===")
+    test_build_manifest()
+    test_manifest_cache()
+    print("=== Test Complete ===")
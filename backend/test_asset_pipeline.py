@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the phoenix-assets build cache
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+import asset_pipeline
+
+
+def test_output_names():
+    """Test that outputs carry the profile and the source extension"""
+    assert asset_pipeline.output_names_for("medium", "image", "a.jpg") == ["optimized/medium/a.jpg.webp"]
+    assert asset_pipeline.output_names_for("low", "image", "a.png") == ["optimized/low/a.png.webp"]
+    assert asset_pipeline.output_names_for("ultra", "video", "clip.mov") == ["optimized/ultra/clip.mov.webm", "optimized/ultra/clip.mov.mp4"]
+    assert asset_pipeline.output_names_for("medium", "model", "truck.glb") == ["compressed_3d_models/truck_compressed.glb"]
+    print("   ✅ Output paths are per profile and per upload")
+
+
+def test_build_cache_skips_unchanged_inputs():
+    """Test that a re-run only rebuilds new or changed inputs"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp) / "uploads"
+        uploads.mkdir()
+        for name, color in (("a.jpg", "red"), ("b.png", "blue")):
+            Image.new("RGB", (2400, 1200), color).save(uploads / name)
+        cache_file = Path(tmp) / "cache.json"
+
+        first = asset_pipeline.run_build(uploads, "medium", asset_pipeline.BuildCache(cache_file), kinds=["image"], jobs=2)
+        assert first["built"] == 2 and first["failed"] == 0, first
+        with Image.open(uploads / "optimized" / "medium" / "a.jpg.webp") as built:
+            assert built.width == 1920
+
+        second = asset_pipeline.run_build(uploads, "medium", asset_pipeline.BuildCache(cache_file), kinds=["image"])
+        assert second["built"] == 0 and second["cached"] == 2
+
+        Image.new("RGB", (800, 600), "green").save(uploads / "c.jpg")
+        Image.new("RGB", (800, 600), "yellow").save(uploads / "a.jpg")
+        third = asset_pipeline.run_build(uploads, "medium", asset_pipeline.BuildCache(cache_file), kinds=["image"])
+        assert sorted(result["name"] for result in third["results"]) == ["a.jpg", "c.jpg"]
+
+        # A different profile writes its own outputs, so everything is built once for it
+        low = asset_pipeline.run_build(uploads, "low", asset_pipeline.BuildCache(cache_file), kinds=["image"])
+        assert low["built"] == 3
+        os.remove(uploads / "optimized" / "low" / "b.png.webp")
+        again = asset_pipeline.run_build(uploads, "low", asset_pipeline.BuildCache(cache_file), kinds=["image"])
+        assert [result["name"] for result in again["results"]] == ["b.png"]
+
+        # Alternating profiles no longer overwrite each other: both stay cached
+        for profile in ("medium", "low"):
+            report = asset_pipeline.run_build(uploads, profile, asset_pipeline.BuildCache(cache_file), kinds=["image"])
+            assert report["built"] == 0 and report["cached"] == 3, report
+        print(f"   First build {first['seconds']}s, cached re-run {second['seconds']}s")
+
+
+if __name__ == "__main__":
+    print("=== Testing Asset Pipeline ===")
+    test_output_names()
+    test_build_cache_skips_unchanged_inputs()
+    print("=== Test Complete ===")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script to verify critical-asset preload hints
+"""
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import critical_assets
+
+CONFIG = {
+    "routes": ["/api/"],
+    "preconnect": ["https://cdn.example.com"],
+    "assets": [
+        {"asset": "hero", "as": "image", "fetchpriority": "high"},
+        {"asset": "missing.jpg", "as": "image"},
+        {"url": "https://cdn.example.com/draco/draco_decoder.js", "as": "fetch", "crossorigin": "anonymous"},
+        {"decoder": "draco", "file": "draco_decoder.wasm", "as": "fetch", "crossorigin": "anonymous"},
+        {"decoder": "ktx2", "file": "basis_transcoder.wasm", "as": "fetch"},
+    ],
+}
+MANIFEST = {
+    "aliases": {"hero": "migrated/hero.jpg"},
+    "assets": {"migrated/hero.jpg": {"url": "/uploads/migrated/hero.jpg", "type": "image/jpeg"}},
+    "decoders": {"draco": {"path": "/static/draco/0123abcd/", "type": "wasm"}},
+}
+
+
+def test_resolve_links():
+    """Test that aliases and decoders resolve through the manifest and missing entries are skipped"""
+    links = critical_assets.resolve_links(CONFIG, MANIFEST)
+    assert links == [
+        "<https://cdn.example.com>; rel=preconnect; crossorigin=anonymous",
+        '</uploads/migrated/hero.jpg>; rel=preload; as=image; type="image/jpeg"; fetchpriority=high',
+        "<https://cdn.example.com/draco/draco_decoder.js>; rel=preload; as=fetch; crossorigin=anonymous",
+        "</static/draco/0123abcd/draco_decoder.wasm>; rel=preload; as=fetch; crossorigin=anonymous",
+    ]
+    print("   ✅ Critical assets resolved")
+
+
+def test_middleware():
+    """Test that only the configured GET routes carry the Link header"""
+    links = critical_assets.resolve_links(CONFIG, MANIFEST)
+
+    async def get_links():
+        return links
+
+    app = Starlette(routes=[Route("/api/", lambda request: PlainTextResponse("ok")), Route("/other", lambda request: PlainTextResponse("ok"))])
+    app.add_middleware(critical_assets.EarlyHintsMiddleware, paths=CONFIG["routes"], get_links=get_links)
+    client = TestClient(app)
+    assert client.get("/api/").headers["link"] == ", ".join(links)
+    assert "link" not in client.get("/other").headers
+    print("   ✅ Link header sent on landing-page routes")
+
+
+if __name__ == "__main__":
+    print("=== Testing Critical Assets ===")
+    test_resolve_links()
+    test_middleware()
+    print("=== Test Complete ===")
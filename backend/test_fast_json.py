@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the JSON backend for snapshots and responses
+"""
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import fast_json
+from data_manager import DataManager
+
+DATA = {
+    "user@example.com": {"id": "u1", "email": "user@example.com", "created_at": datetime(2024, 5, 1, 12, 0, 0, 250000)},
+    "note": "Drop deck — 53 ft",
+    "path": Path("uploads/a.jpg"),
+}
+
+
+def test_backends_agree():
+    """Test that orjson (when installed) and the stdlib fallback write the same JSON"""
+    fast = fast_json.dumps(DATA)
+    saved = fast_json.orjson
+    fast_json.orjson = None
+    try:
+        stdlib = fast_json.dumps(DATA)
+        assert fast_json.loads(stdlib) == fast_json.loads(fast)
+    finally:
+        fast_json.orjson = saved
+    decoded = json.loads(fast)
+    assert decoded["user@example.com"]["created_at"] == "2024-05-01T12:00:00.250000"
+    assert decoded["path"] == "uploads/a.jpg"
+    assert b"\n" not in fast and "—".encode("utf-8") in fast
+    print(f"   ✅ Backends agree ({fast_json.BACKEND})")
+
+
+def test_response_class():
+    """Test that FastJSONResponse renders compact UTF-8 JSON"""
+    response = fast_json.FastJSONResponse({"ok": True, "items": [1, 2]})
+    assert response.body == b'{"ok":true,"items":[1,2]}'
+    assert response.headers["content-type"] == "application/json"
+    print("   ✅ Response rendered")
+
+
+def test_data_manager_snapshots():
+    """Test compact snapshots that older indented files still load alongside"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        # A file written by the previous indent=2 / default=str code
+        (data_dir / "users.json").write_text(json.dumps({"a@b.c": {"created_at": str(datetime(2024, 1, 1))}}, indent=2))
+        manager = DataManager(data_dir)
+        manager.load_data()
+        assert manager.users_db["a@b.c"]["created_at"] == "2024-01-01 00:00:00"
+
+        manager.users_db["new@b.c"] = {"created_at": datetime(2024, 2, 1)}
+        manager.save_data()
+        raw = (data_dir / "users.json").read_bytes()
+        assert b"\n" not in raw
+        assert json.loads(raw)["new@b.c"]["created_at"] == "2024-02-01T00:00:00"
+        assert not list(data_dir.glob("*.tmp"))
+    print("   ✅ Snapshots written compact")
+
+
+if __name__ == "__main__":
+    print("=== Testing Fast JSON ===")
+    test_backends_agree()
+    test_response_class()
+    test_data_manager_snapshots()
+    print("=== Test Complete ===")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the NumPy GLB quantization pass
+"""
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+import glb_io
+import glb_quantize
+from glb_io import ARRAY_BUFFER, GLB
+
+
+def make_grid_glb(size: int = 40) -> GLB:
+    """An unindexed size x size quad grid: every shared corner is duplicated"""
+    xs, ys = np.meshgrid(np.arange(size + 1, dtype=np.float32), np.arange(size + 1, dtype=np.float32))
+    grid = np.stack([xs, ys, np.sin(xs / 5) * 2], axis=-1) * 0.25 + np.float32(10)
+    quads = []
+    for y in range(size):
+        for x in range(size):
+            a, b, c, d = grid[y, x], grid[y, x + 1], grid[y + 1, x + 1], grid[y + 1, x]
+            quads += [a, b, c, a, c, d]
+    positions = np.array(quads, dtype=np.float32)
+    normals = np.tile(np.array([[0, 0, 1]], dtype=np.float32), (len(positions), 1))
+    uvs = (positions[:, :2] - positions[:, :2].min(axis=0)) / np.ptp(positions[:, :2], axis=0)
+
+    glb = GLB({"asset": {"version": "2.0"}, "scenes": [{"nodes": [0]}], "nodes": [{"name": "deck", "mesh": 0, "translation": [1, 2, 3]}]})
+    attributes = {
+        "POSITION": glb_io.add_accessor(glb, positions, "VEC3", target=ARRAY_BUFFER),
+        "NORMAL": glb_io.add_accessor(glb, normals, "VEC3", target=ARRAY_BUFFER),
+        "TEXCOORD_0": glb_io.add_accessor(glb, uvs.astype(np.float32), "VEC2", target=ARRAY_BUFFER),
+    }
+    glb.document["meshes"] = [{"name": "deck", "primitives": [{"attributes": attributes}]}]
+    glb.pack()
+    return glb
+
+
+def world_positions(glb: GLB) -> np.ndarray:
+    """Dequantized positions in the space of the original mesh node"""
+    document = glb.document
+    primitive = document["meshes"][0]["primitives"][0]
+    positions = glb.read_accessor(primitive["attributes"]["POSITION"]).astype(np.float64)
+    indices = glb.read_accessor(primitive["indices"]).reshape(-1)
+    child = document["nodes"][document["nodes"][0]["children"][0]]
+    return positions[indices] * child["scale"][0] + child["translation"]
+
+
+def test_quantize_round_trip():
+    """Test that welding, quantization and uint16 indices keep the geometry"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = Path(tmp) / "grid.glb", Path(tmp) / "grid_q.glb"
+        original = make_grid_glb()
+        original.save(source)
+        triangles = GLB.load(source).read_accessor(0).reshape(-1, 3, 3)
+
+        report = glb_quantize.quantize_file(source, target)
+        stats = report["primitives"][0]
+        assert stats["vertices_before"] == 40 * 40 * 6 and stats["vertices_after"] == 41 * 41, stats
+        assert stats["triangles_after"] == 40 * 40 * 2 and stats["index_type"] == "uint16"
+        assert stats["quantized"] == ["NORMAL", "POSITION", "TEXCOORD_0"]
+        assert report["optimized_bytes"] < report["original_bytes"] / 4, report
+
+        result = GLB.load(target)
+        document = result.document
+        assert "KHR_mesh_quantization" in document["extensionsRequired"]
+        assert document["nodes"][0]["translation"] == [1, 2, 3] and "mesh" not in document["nodes"][0]
+        assert all(view.get("byteStride", 4) % 4 == 0 for view in document["bufferViews"])
+
+        # Same set of triangles, within the int16 quantization step
+        step = document["nodes"][1]["scale"][0]
+        restored = world_positions(result).reshape(-1, 3, 3).mean(axis=1)
+        centroids = triangles.mean(axis=1)
+        distances = np.linalg.norm(restored[:, None, :] - centroids[None, :, :], axis=-1)
+        assert distances.min(axis=1).max() <= step and distances.min(axis=0).max() <= step
+        print(f"   {report['original_bytes']} -> {report['optimized_bytes']} bytes ({report['savings_pct']}% saved)")
+
+
+if __name__ == "__main__":
+    print("=== Testing GLB Quantization ===")
+    test_quantize_round_trip()
+    print("=== Test Complete ===")
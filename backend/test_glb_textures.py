@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the GLB texture pass
+"""
+import io
+
+from PIL import Image
+
+import glb_textures
+from glb_io import GLB
+
+
+def make_textured_glb() -> GLB:
+    """A GLB whose only content is one 2048x1024 base color PNG and one 256x256 normal map"""
+    glb = GLB({"asset": {"version": "2.0"}})
+    images = []
+    for size, color in (((2048, 1024), (200, 40, 40)), ((256, 256), (128, 128, 255))):
+        buffer = io.BytesIO()
+        Image.effect_noise(size, 64).convert("RGB").save(buffer, "PNG")
+        images.append({"bufferView": glb.add_view(buffer.getvalue()), "mimeType": "image/png"})
+    glb.document.update(
+        images=images,
+        textures=[{"source": 0}, {"source": 1}],
+        materials=[{"pbrMetallicRoughness": {"baseColorTexture": {"index": 0}}, "normalTexture": {"index": 1}}],
+    )
+    glb.pack()
+    return GLB.from_bytes(glb.to_bytes())
+
+
+def test_webp_only():
+    """Test that textures are downscaled and require EXT_texture_webp without a fallback"""
+    glb = make_textured_glb()
+    before = len(glb.binary)
+    report = glb_textures.transcode_textures(glb, max_size=512)
+    document = GLB.from_bytes(glb.to_bytes()).document
+    assert document["extensionsRequired"] == ["EXT_texture_webp"]
+    assert document["textures"][0] == {"extensions": {"EXT_texture_webp": {"source": 0}}}
+    assert [image["mimeType"] for image in document["images"]] == ["image/webp", "image/webp"]
+    assert report["images"][0]["size"] == [512, 256] and report["images"][1]["role"] == "normal"
+    with Image.open(io.BytesIO(bytes(glb.view_bytes(document["images"][0]["bufferView"])))) as webp:
+        assert webp.format == "WEBP" and webp.size == (512, 256)
+    assert all(view.get("byteOffset", 0) % 4 == 0 for view in document["bufferViews"])
+    print(f"   {before} -> {len(glb.binary)} bytes")
+
+
+def test_jpeg_fallback():
+    """Test that a fallback keeps a JPEG in the original slot beside the WebP"""
+    glb = make_textured_glb()
+    glb_textures.transcode_textures(glb, max_size=512, fallback="jpeg")
+    document = glb.document
+    assert "extensionsRequired" not in document and document["extensionsUsed"] == ["EXT_texture_webp"]
+    texture = document["textures"][0]
+    assert texture["source"] == 0 and document["images"][0]["mimeType"] == "image/jpeg"
+    assert document["images"][texture["extensions"]["EXT_texture_webp"]["source"]]["mimeType"] == "image/webp"
+    assert len(document["images"]) == 4
+
+
+if __name__ == "__main__":
+    print("=== Testing GLB Texture Pass ===")
+    test_webp_only()
+    test_jpeg_fallback()
+    print("=== Test Complete ===")
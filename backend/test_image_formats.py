@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script to verify alpha-aware format selection and its derivative output
+"""
+import io
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import image_formats
+import image_pipeline
+
+
+def make_logo() -> Image.Image:
+    """Two-colour shape on a transparent background"""
+    img = Image.new("RGBA", (200, 100), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((10, 10, 90, 90), fill=(220, 60, 20, 255))
+    draw.ellipse((110, 10, 190, 90), fill=(20, 20, 20, 255))
+    return img
+
+
+def make_photo(alpha: bool = False) -> Image.Image:
+    rng = np.random.default_rng(3)
+    pixels = rng.integers(0, 256, (120, 160, 4), dtype=np.uint8)
+    if alpha:
+        pixels[..., 3] = np.linspace(0, 255, 160, dtype=np.uint8)
+        return Image.fromarray(pixels, "RGBA")
+    return Image.fromarray(pixels[..., :3], "RGB")
+
+
+def test_choose_format():
+    """Test that alpha and colour count drive the choice"""
+    logo = image_formats.analyze(make_logo())
+    assert logo["alpha"] == "binary" and logo["colors"] == 3
+    assert image_formats.choose_format(logo)["format"] == "png8"
+
+    # Banded, half-transparent gradient: 1250 colours, too many for a palette
+    y, x = np.mgrid[0:200, 0:400] // 8
+    gradient = np.stack([x * 5, y * 10, x, np.full_like(x, 128)], axis=-1).astype(np.uint8)
+    graphic = image_formats.analyze(Image.fromarray(gradient, "RGBA"))
+    assert graphic["alpha"] == "partial" and graphic["graphic"]
+    assert image_formats.choose_format(graphic, ["webp", "png"])["format"] == "webp-lossless"
+    assert image_formats.choose_format(graphic, ["png"])["format"] == "png"
+
+    assert image_formats.choose_format(image_formats.analyze(make_photo()))["format"] == "jpeg"
+    assert image_formats.choose_format(image_formats.analyze(make_photo(alpha=True)), ["webp"])["format"] == "webp"
+    print("   ✅ Formats chosen by alpha and palette size")
+
+
+def test_png8_is_exact():
+    """Test that the palette PNG keeps every pixel, transparency included"""
+    logo = make_logo()
+    data = image_formats.encode_png8(logo)
+    with Image.open(io.BytesIO(data)) as decoded:
+        assert decoded.mode == "P"
+        assert np.array_equal(np.asarray(decoded.convert("RGBA")), np.asarray(logo))
+    print("   ✅ PNG-8 is lossless")
+
+
+def test_derivatives_keep_alpha():
+    """Test that transparent uploads get a best copy and PNG instead of JPEG derivatives"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        make_logo().save(uploads / "logo.png")
+        manifest = image_pipeline.generate_derivatives(str(uploads), "logo.png", widths=(100,), formats=("webp", "jpeg"))
+        assert manifest["best"]["format"] == "png8" and (uploads / manifest["best"]["path"]).is_file()
+        assert "data" not in manifest["best"]
+        assert sorted(variant["format"] for variant in manifest["variants"]) == ["png", "webp"]
+    print("   ✅ Transparency survives the derivative pipeline")
+
+
+if __name__ == "__main__":
+    print("=== Testing Image Formats ===")
+    test_choose_format()
+    test_png8_is_exact()
+    test_derivatives_keep_alpha()
+    print("=== Test Complete ===")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script to verify upload-time image derivatives and their manifest
+"""
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+import image_pipeline
+
+
+class RecordingQueue:
+    """Just enough of JobQueue to see what the pipeline registers and queues"""
+
+    def __init__(self):
+        self.handlers = {}
+        self.jobs = []
+
+    def register(self, name, handler, **options):
+        self.handlers[name] = (handler, options)
+
+    def enqueue(self, name, payload, priority=10, unique_key=None):
+        job = {"id": f"job-{len(self.jobs) + 1}", "type": name, "payload": payload, "unique_key": unique_key}
+        self.jobs.append(job)
+        return job
+
+
+def make_upload(uploads: Path, name: str = "photo.jpg", size=(700, 400)) -> None:
+    Image.new("RGB", size, (180, 60, 30)).save(uploads / name)
+
+
+def test_variant_ladder():
+    """Test that widths stop at the original (no upscaling) and every format is written"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        make_upload(uploads)
+        manifest = image_pipeline.generate_derivatives(str(uploads), "photo.jpg", formats=("webp", "jpeg"))
+
+        widths = sorted({variant["width"] for variant in manifest["variants"]})
+        assert widths == [320, 480, 640, 700], widths
+        assert {variant["format"] for variant in manifest["variants"]} == {"webp", "jpeg"}
+        for variant in manifest["variants"]:
+            path = uploads / variant["path"]
+            with Image.open(path) as img:
+                assert img.size == (variant["width"], variant["height"])
+            assert path.stat().st_size == variant["bytes"]
+        assert image_pipeline.find_derivative(uploads, "photo.jpg", 480, "webp") is not None
+        assert image_pipeline.find_derivative(uploads, "photo.jpg", 960, "webp") is None
+    print("   ✅ Variant ladder rendered without upscaling")
+
+
+def test_manifest_contents():
+    """Test the manifest on disk: status, dimensions, placeholder and best copy"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        make_upload(uploads)
+        image_pipeline.generate_derivatives(str(uploads), "photo.jpg", widths=(320,), formats=("jpeg",))
+
+        manifest = image_pipeline.read_manifest(uploads, "photo.jpg")
+        assert manifest["status"] == "ready"
+        assert (manifest["width"], manifest["height"]) == (700, 400)
+        assert manifest["source_bytes"] == (uploads / "photo.jpg").stat().st_size
+        assert manifest["placeholder"].startswith("data:image/") and len(manifest["placeholder"]) < 2000
+        assert (uploads / manifest["best"]["path"]).is_file()
+        assert image_pipeline.read_manifest(uploads, "other.jpg") is None
+    print("   ✅ Manifest written")
+
+
+def test_rerun_replaces_outputs():
+    """Test that a re-run after the upload changes rewrites the variants and manifest"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        make_upload(uploads)
+        first = image_pipeline.generate_derivatives(str(uploads), "photo.jpg", formats=("jpeg",))
+        make_upload(uploads, size=(500, 300))
+        second = image_pipeline.generate_derivatives(str(uploads), "photo.jpg", formats=("jpeg",))
+
+        assert first["width"] == 700 and second["width"] == 500
+        assert [variant["width"] for variant in second["variants"]] == [320, 480, 500]
+        assert image_pipeline.read_manifest(uploads, "photo.jpg")["width"] == 500
+        assert not list(image_pipeline.derived_dir(uploads, "photo.jpg").glob("*.tmp"))
+    print("   ✅ Re-run replaced the outputs")
+
+
+def test_pipeline_submit():
+    """Test that submit queues one deduplicated job and records a pending manifest"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        updates = []
+        queue = RecordingQueue()
+        pipeline = image_pipeline.DerivativePipeline(uploads, queue, on_update=updates.append)
+        assert image_pipeline.DerivativePipeline.JOB_TYPE in queue.handlers
+
+        manifest = pipeline.submit("photo.jpg")
+        job = queue.jobs[0]
+        assert job["payload"] == {"uploads_dir": str(uploads), "name": "photo.jpg"}
+        assert job["unique_key"] == "image_derivatives:photo.jpg"
+        assert manifest["status"] == "pending" and manifest["job_id"] == job["id"]
+        assert image_pipeline.read_manifest(uploads, "photo.jpg")["status"] == "pending"
+
+        pipeline._on_failure({**job, "error": "boom"})
+        assert image_pipeline.read_manifest(uploads, "photo.jpg")["status"] == "failed"
+        assert updates == ["photo.jpg"]
+    print("   ✅ Render queued with a pending manifest")
+
+
+def test_fast_job_keeps_ready_manifest():
+    """Test that a render finishing before submit returns is not hidden by the pending manifest"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        make_upload(uploads)
+
+        class InstantQueue(RecordingQueue):
+            def enqueue(self, name, payload, priority=10, unique_key=None):
+                job = super().enqueue(name, payload, priority, unique_key)
+                image_pipeline.run_derivatives_job(payload)
+                return job
+
+        pipeline = image_pipeline.DerivativePipeline(uploads, InstantQueue())
+        assert pipeline.submit("photo.jpg")["status"] == "pending"
+        assert image_pipeline.read_manifest(uploads, "photo.jpg")["status"] == "ready"
+    print("   ✅ Ready manifest survived a fast render")
+
+
+if __name__ == "__main__":
+    print("=== Testing Image Pipeline ===")
+    test_variant_ladder()
+    test_manifest_contents()
+    test_rerun_replaces_outputs()
+    test_pipeline_submit()
+    test_fast_job_keeps_ready_manifest()
+    print("=== Test Complete ===")
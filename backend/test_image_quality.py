@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script to verify SSIM-targeted quality search and its cache
+"""
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import image_quality
+import image_variants
+
+
+def make_photo(size: int = 256) -> Image.Image:
+    """Smooth gradients with a sinusoidal texture, roughly like a photo"""
+    y, x = np.mgrid[0:size, 0:size]
+    texture = 40 * np.sin(x / 3.0) * np.cos(y / 5.0)
+    base = np.stack([x, y, (x + y) // 2], axis=-1) * (200 / size) + texture[..., None] + 20
+    return Image.fromarray(np.clip(base, 0, 255).astype(np.uint8), "RGB")
+
+
+def test_ssim():
+    """Test that SSIM is 1 for identical images and drops with distortion"""
+    luma = image_quality.preview_luma(make_photo())
+    assert image_quality.ssim(luma, luma) == 1.0
+    noisy = np.clip(luma + np.random.default_rng(1).normal(0, 20, luma.shape), 0, 255)
+    assert image_quality.ssim(luma, noisy) < 0.9
+    print("   ✅ SSIM behaves")
+
+
+def test_search_quality():
+    """Test that the search goes below the fixed quality but keeps the target"""
+    img = make_photo()
+    fixed = image_variants.encode_image(img, "webp", 90)
+    result = image_quality.search_quality(img, "webp", target=0.98, max_quality=90)
+    assert image_quality.MIN_QUALITY <= result["quality"] < 90
+    assert result["ssim"] >= 0.98 and len(result["data"]) < len(fixed)
+
+    # Unreachable target: falls back to the ceiling
+    strict = image_quality.search_quality(img, "webp", target=1.01, max_quality=90)
+    assert strict["quality"] == 90 and strict["trials"] == 1
+    print("   ✅ Lowest passing quality chosen")
+
+
+def test_cache():
+    """Test that a cached quality is reused with a single encode"""
+    img = make_photo()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = image_quality.QualityCache(Path(tmp) / "quality.json")
+        first = image_quality.encode_to_target(img, "webp", 0.98, 90, cache, "abc", 256)
+        assert not first["cached"] and first["trials"] > 1
+        cache.save()
+
+        reloaded = image_quality.QualityCache(Path(tmp) / "quality.json")
+        second = image_quality.encode_to_target(img, "webp", 0.98, 90, reloaded, "abc", 256)
+        assert second["cached"] and second["trials"] == 1 and second["quality"] == first["quality"]
+        # A different target is a different entry
+        assert not image_quality.encode_to_target(img, "webp", 0.97, 90, reloaded, "abc", 256)["cached"]
+    print("   ✅ Chosen quality cached per content hash")
+
+
+if __name__ == "__main__":
+    print("=== Testing Image Quality ===")
+    test_ssim()
+    test_search_quality()
+    test_cache()
+    print("=== Test Complete ===")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script to verify on-demand image variants and their LRU disk cache
+"""
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image
+
+import image_variants
+from image_variants import VariantCache
+
+
+def make_image(path: Path, width: int = 800, height: int = 600) -> Path:
+    Image.new("RGB", (width, height), (30, 120, 200)).save(path)
+    return path
+
+
+def test_snap_width():
+    """Test that requested widths snap up to the ladder without upscaling"""
+    assert image_variants.snap_width(None, 1000) == 1000
+    assert image_variants.snap_width(300, 1000) == 320
+    assert image_variants.snap_width(700, 1000) == 960
+    assert image_variants.snap_width(1100, 1000) == 1000
+    assert image_variants.snap_width(5000, 4000) == 1920
+    assert image_variants.srcset_widths(700) == [320, 480, 640, 700]
+    assert image_variants.srcset_widths(3000) == [320, 480, 640, 960, 1280, 1920]
+    print("   ✅ Widths snapped")
+
+
+def test_negotiate_format():
+    """Test Accept-based format selection and the source-type fallback"""
+    available = image_variants.supported_formats()
+    if "webp" in available:
+        assert image_variants.negotiate_format("image/webp,*/*", ".jpg") == "webp"
+    if "avif" in available:
+        assert image_variants.negotiate_format("image/avif,image/webp", ".jpg") == "avif"
+    assert image_variants.negotiate_format("*/*", ".png") == "png"
+    assert image_variants.negotiate_format("", ".JPG") == "jpeg"
+    print("   ✅ Formats negotiated")
+
+
+def test_cache_lru_eviction():
+    """Test that the cache stays under max_bytes, evicting least recently used first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = VariantCache(Path(tmp) / "cache", max_bytes=250)
+        cache.put("a.jpeg", b"a" * 100)
+        cache.put("b.jpeg", b"b" * 100)
+        assert cache.get("a.jpeg") is not None  # a is now the most recent
+        cache.put("c.jpeg", b"c" * 100)
+        assert cache.get("b.jpeg") is None
+        assert cache.get("a.jpeg") is not None and cache.get("c.jpeg") is not None
+        assert not (Path(tmp) / "cache" / "b.jpeg").exists()
+        assert cache.get_stats()["total_bytes"] == 200
+
+        # The index is rebuilt from disk on restart
+        reopened = VariantCache(Path(tmp) / "cache", max_bytes=250)
+        assert reopened.get_stats()["entries"] == 2
+    print("   ✅ LRU eviction keeps the cache bounded")
+
+
+def test_concurrent_misses_render_once():
+    """Test that the per-key lock renders a variant once for concurrent requests"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = make_image(Path(tmp) / "photo.jpg")
+        cache = VariantCache(Path(tmp) / "cache")
+        renders = []
+        original = image_variants.render_variant
+
+        def slow_render(*args, **kwargs):
+            renders.append(1)
+            time.sleep(0.1)
+            return original(*args, **kwargs)
+
+        image_variants.render_variant = slow_render
+        try:
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(cache.get_or_render(source, 320, "jpeg"))) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            image_variants.render_variant = original
+        assert len(renders) == 1 and len(set(results)) == 1
+        with Image.open(results[0]) as img:
+            assert img.width == 320
+        stats = cache.get_stats()
+        assert (stats["misses"], stats["hits"]) == (1, 3)
+        assert not cache._key_locks
+    print("   ✅ Concurrent misses rendered once")
+
+
+def test_unreadable_image():
+    """Test that corrupt uploads raise UnreadableImage and the endpoints answer 415"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corrupt = Path(tmp) / "broken.jpg"
+        corrupt.write_bytes(b"not really a jpeg")
+        for call in (lambda: image_variants.image_dimensions(corrupt), lambda: image_variants.render_variant(corrupt, 320, "jpeg")):
+            try:
+                call()
+            except image_variants.UnreadableImage:
+                pass
+            else:
+                raise AssertionError("corrupt image was decoded")
+
+    from fastapi.testclient import TestClient
+
+    import server
+
+    corrupt = server.UPLOADS_DIR / "test-corrupt-upload.jpg"
+    corrupt.write_bytes(b"not really a jpeg")
+    try:
+        client = TestClient(server.app)
+        assert client.get("/img/test-corrupt-upload.jpg?w=320").status_code == 415
+        assert client.get("/api/images/test-corrupt-upload.jpg/srcset").status_code == 415
+        assert client.get("/img/missing-upload.jpg").status_code == 404
+    finally:
+        corrupt.unlink()
+    print("   ✅ Corrupt uploads answered with 415")
+
+
+if __name__ == "__main__":
+    print("=== Testing Image Variants ===")
+    test_snap_width()
+    test_negotiate_format()
+    test_cache_lru_eviction()
+    test_concurrent_misses_render_once()
+    test_unreadable_image()
+    print("=== Test Complete ===")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the background job queue
+"""
+import json
+import tempfile
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from job_queue import JobQueue, FAILED, QUEUED, SUCCEEDED
+
+
+def double_job(payload):
+    return {"value": payload["value"] * 2}
+
+
+def broken_job(payload):
+    raise ValueError("always fails")
+
+
+def wait_for(queue, job_id, statuses, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get_job(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"Job {job_id} did not reach {statuses}")
+
+
+def test_job_queue_runs_and_retries():
+    """Test success, retry with backoff, permanent failure hook and persistence"""
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = []
+        queue = JobQueue(Path(tmp), max_workers=2)
+        queue.register("double", double_job, resource="pillow")
+        queue.register("broken", broken_job, resource="ffmpeg", max_attempts=2, retry_delay=0.1, on_failure=failures.append)
+        queue.start()
+        try:
+            ok = queue.enqueue("double", {"value": 21})
+            bad = queue.enqueue("broken", {})
+            again = queue.enqueue("double", {"value": 21}, unique_key="same")
+            assert queue.enqueue("double", {"value": 1}, unique_key="same")["id"] == again["id"]
+
+            ok = wait_for(queue, ok["id"], (SUCCEEDED,))
+            print(f"   Result: {ok['result']}")
+            assert ok["result"] == {"value": 42}
+
+            bad = wait_for(queue, bad["id"], (FAILED,))
+            print(f"   Failed job: attempts={bad['attempts']} error={bad['error']}")
+            assert bad["attempts"] == 2
+            assert "always fails" in bad["error"]
+            assert failures and failures[0]["id"] == bad["id"]
+        finally:
+            queue.shutdown()
+
+        # A job left "running" by a crash is queued again on reload
+        jobs = json.loads((Path(tmp) / "jobs.json").read_text())
+        jobs[0]["status"] = "running"
+        (Path(tmp) / "jobs.json").write_text(json.dumps(jobs))
+        reloaded = JobQueue(Path(tmp))
+        assert reloaded.get_job(jobs[0]["id"])["status"] == QUEUED
+
+
+def test_shutdown_requeues_cancelled_jobs():
+    """Test that work cancelled by shutdown is queued again without using up an attempt"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(Path(tmp))
+        queue.register("double", double_job, max_attempts=1)
+        job = queue.enqueue("double", {"value": 1})
+        with queue._condition:
+            queue.jobs[job["id"]].update({"status": "running", "attempts": 1})
+            queue._running[queue.job_types["double"].resource] += 1
+        queue._stopping = True
+
+        cancelled = Future()
+        cancelled.cancel()
+        queue._on_done(job["id"], cancelled)
+        requeued = queue.get_job(job["id"])
+        assert requeued["status"] == QUEUED and requeued["attempts"] == 0
+
+        reloaded = JobQueue(Path(tmp))
+        assert reloaded.get_job(job["id"])["status"] == QUEUED
+    print("   ✅ Cancelled jobs resume after a restart")
+
+
+if __name__ == "__main__":
+    print("=== Testing Job Queue ===")
+    test_job_queue_runs_and_retries()
+    test_shutdown_requeues_cancelled_jobs()
+    print("=== Test Complete ===")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script to verify headless model compression
+"""
+import json
+import os
+import stat
+import sys
+import tempfile
+from pathlib import Path
+
+import compress_3d_working
+import model_compression
+
+FAKE_GLTF_TRANSFORM = """#!{python}
+import shutil, sys
+args = sys.argv[1:]
+assert args[0] == "optimize" and "--compress" in args
+shutil.copyfile(args[1], args[2])
+"""
+
+
+def test_profile_resolution():
+    """Test preset precedence and per-model overrides"""
+    profiles = {
+        "defaults": {"preset": "medium"},
+        "models": {"truckdeck3d": {"preset": "aggressive", "target_bytes": 1000, "texture_size": 128}},
+    }
+    truck = model_compression.resolve_settings("truckdeck3d.glb", profiles=profiles)
+    assert truck["preset"] == "aggressive" and truck["simplify_ratio"] == 0.2
+    assert truck["texture_size"] == 128 and truck["target_bytes"] == 1000
+    forced = model_compression.resolve_settings("truckdeck3d.glb", "ultra", profiles)
+    assert forced["preset"] == "ultra" and forced["texture_size"] == 128
+    other = model_compression.resolve_settings("flatbed3d.glb", profiles=profiles)
+    assert other["preset"] == "medium" and other["target_bytes"] is None
+
+    shipped = model_compression.load_profiles()
+    assert model_compression.resolve_settings("flatbed3d.glb", profiles=shipped)["target_bytes"]
+    print("   Profiles resolve as expected")
+
+
+def test_batch_reports_json():
+    """Test batch results with a stand-in gltf-transform, including target escalation"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        tool = tmp / "gltf-transform"
+        tool.write_text(FAKE_GLTF_TRANSFORM.format(python=sys.executable))
+        tool.chmod(tool.stat().st_mode | stat.S_IEXEC)
+        (tmp / "truckdeck3d.glb").write_bytes(b"glTF" + b"\0" * 2000)
+        profiles = tmp / "profiles.json"
+        profiles.write_text(json.dumps({"models": {"truckdeck3d": {"preset": "low", "target_bytes": 100}}}))
+
+        os.environ["GLTF_TRANSFORM"] = str(tool)
+        try:
+            results = model_compression.batch_compress(
+                [tmp / "truckdeck3d.glb", tmp / "missing.glb"], tmp / "out", profiles=model_compression.load_profiles(profiles)
+            )
+        finally:
+            del os.environ["GLTF_TRANSFORM"]
+        truck, missing = results
+        assert truck["ok"] and truck["method"] == "gltf-transform"
+        # A copy never meets the target, so every more aggressive preset was tried
+        assert [attempt["preset"] for attempt in truck["attempts"]] == ["low", "aggressive", "ultra"]
+        assert truck["target_met"] is False
+        assert (tmp / "out" / "truckdeck3d_compressed.glb").exists()
+        assert not missing["ok"] and missing["error"]
+        assert model_compression.summarize(results)["failed"] == 1
+        json.dumps(results)
+        print(f"   {truck['attempts']}")
+
+
+def test_escalation_keeps_profile_overrides():
+    """Test that escalated attempts keep the settings a model profile pins"""
+    profiles = {"models": {"truckdeck3d": {"preset": "low", "target_bytes": 100, "texture_size": 1024}}}
+    settings = model_compression.resolve_settings("truckdeck3d.glb", profiles=profiles)
+    assert settings["pinned"] == ["texture_size"]
+    attempts = []
+    original = model_compression._compress_once
+
+    def record_once(input_path, output_path, attempt_settings):
+        attempts.append(attempt_settings)
+        Path(output_path).write_bytes(b"glTF" + b"\0" * 2000)
+        return "numpy", {}
+
+    model_compression._compress_once = record_once
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "truckdeck3d.glb"
+            source.write_bytes(b"glTF" + b"\0" * 2000)
+            result = model_compression.compress_model(source, Path(tmp) / "out.glb", settings)
+    finally:
+        model_compression._compress_once = original
+    assert [attempt["preset"] for attempt in attempts] == ["low", "aggressive", "ultra"]
+    assert all(attempt["texture_size"] == 1024 for attempt in attempts)
+    # Everything the profile left alone still escalates
+    assert [attempt["simplify_ratio"] for attempt in attempts] == [0.5, 0.2, 0.1]
+    assert result["ok"] and result["target_met"] is False
+    print("   Escalation kept texture_size")
+
+
+def test_face_budget_allocation():
+    """Test that a scene-wide face budget follows importance and mesh size"""
+    counts = {"chassis": 4000, "wheel": 1000, "badge": 50}
+    importance = {"chassis": 1.0, "wheel": 1.0, "badge": 10.0}
+    targets = compress_3d_working.allocate_face_budget(counts, importance, 2000)
+    # The badge can't use its share, so the leftover is split between the others
+    assert targets == {"badge": 50, "chassis": 975, "wheel": 975}, targets
+    assert compress_3d_working.allocate_face_budget(counts, importance, 10000) == counts
+    tiny = compress_3d_working.allocate_face_budget(counts, importance, 0)
+    assert all(target == min(count, compress_3d_working.MIN_FACES) for target, count in zip(tiny.values(), counts.values()))
+    print(f"   {targets}")
+
+
+def test_decimate_scene_writes_back():
+    """Test that decimated meshes replace the originals in a multi-mesh scene and its export"""
+    try:
+        import trimesh
+    except ImportError:
+        print("   trimesh not installed, skipped")
+        return
+    scene = trimesh.Scene()
+    scene.add_geometry(trimesh.creation.icosphere(subdivisions=3), geom_name="body")
+    scene.add_geometry(trimesh.creation.icosphere(subdivisions=2).apply_translation([3, 0, 0]), geom_name="wheel")
+    report = compress_3d_working.decimate_scene(scene, ratio=0.5)
+
+    counts = {name: len(geom.faces) for name, geom in scene.geometry.items()}
+    assert counts == {mesh["mesh"]: mesh["faces_after"] for mesh in report}
+    assert all(mesh["faces_after"] < mesh["faces_before"] for mesh in report), report
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "scene.glb"
+        scene.export(path, file_type="glb")
+        exported = trimesh.load(path, force="scene")
+        assert sum(len(geom.faces) for geom in exported.geometry.values()) == sum(counts.values())
+
+    budgeted = trimesh.Scene()
+    budgeted.add_geometry(trimesh.creation.icosphere(subdivisions=3), geom_name="body")
+    budgeted.add_geometry(trimesh.creation.icosphere(subdivisions=3).apply_translation([3, 0, 0]), geom_name="wheel")
+    compress_3d_working.decimate_scene(budgeted, face_budget=1000)
+    assert sum(len(geom.faces) for geom in budgeted.geometry.values()) <= 1000
+    print(f"   {report}")
+
+
+if __name__ == "__main__":
+    print("=== Testing Model Compression ===")
+    test_profile_resolution()
+    test_batch_reports_json()
+    test_escalation_keeps_profile_overrides()
+    test_face_budget_allocation()
+    test_decimate_scene_writes_back()
+    print("=== Test Complete ===")
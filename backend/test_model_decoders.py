@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script to verify self-hosted model decoders and precompressed static serving
+"""
+import json
+import struct
+import tempfile
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import asset_manifest
+import model_decoders
+from static_media import MediaGZipMiddleware, PrecompressedStaticFiles, accepted_encodings
+
+DECODER_FILES = {
+    "draco_wasm_wrapper.js": b"var DracoDecoderModule = function() {};\n" * 200,
+    "draco_decoder.wasm": b"\0asm\1\0\0\0" + bytes(4000),
+    "draco_decoder.js": b"var DracoDecoderModule = {};\n" * 200,
+}
+
+
+def write_glb(path: Path, document: dict) -> None:
+    data = json.dumps(document).encode("utf-8")
+    data += b" " * (-len(data) % 4)
+    path.write_bytes(struct.pack("<4sII", b"glTF", 2, 20 + len(data)) + struct.pack("<II", len(data), 0x4E4F534A) + data)
+
+
+def test_required_decoders():
+    """Test that GLB extensions map to the decoders the viewer must load"""
+    with tempfile.TemporaryDirectory() as tmp:
+        draco = Path(tmp) / "draco.glb"
+        write_glb(draco, {"asset": {"version": "2.0"}, "extensionsUsed": ["KHR_draco_mesh_compression", "KHR_materials_unlit"],
+                          "extensionsRequired": ["KHR_draco_mesh_compression"]})
+        plain = Path(tmp) / "plain.glb"
+        write_glb(plain, {"asset": {"version": "2.0"}})
+        assert model_decoders.glb_decoders(draco) == ["draco"]
+        assert model_decoders.glb_decoders(plain) == []
+        assert model_decoders.required_decoders({"extensionsUsed": ["EXT_meshopt_compression", "KHR_texture_basisu"]}) == ["ktx2", "meshopt"]
+    print("   ✅ Decoders detected from glTF extensions")
+
+
+def test_vendor_and_manifest():
+    """Test fingerprinted vendoring, precompressed copies and the manifest section"""
+    with tempfile.TemporaryDirectory() as tmp:
+        static_dir = Path(tmp) / "static"
+        node_modules = Path(tmp) / "node_modules"
+        source_dir = node_modules / model_decoders.DECODERS["draco"]["node_path"]
+        source_dir.mkdir(parents=True)
+        for filename, data in DECODER_FILES.items():
+            (source_dir / filename).write_bytes(data)
+
+        files = model_decoders.fetch_sources("draco", node_modules, download=False)
+        manifest = model_decoders.vendor("draco", files, static_dir)
+        target = static_dir / manifest["path"]
+        assert (target / "draco_decoder.wasm").read_bytes() == DECODER_FILES["draco_decoder.wasm"]
+        assert (target / "draco_decoder.wasm.gz").exists()
+        assert manifest["files"]["draco_decoder.wasm"]["encodings"]["gzip"] < len(DECODER_FILES["draco_decoder.wasm"])
+
+        # Same files, same directory; changed files move to a new one and the old is removed
+        assert model_decoders.vendor("draco", files, static_dir)["path"] == manifest["path"]
+        changed = model_decoders.vendor("draco", {**files, "draco_decoder.js": b"// patched\n"}, static_dir)
+        assert changed["path"] != manifest["path"] and not target.exists()
+        stable = static_dir / changed["stable_path"]
+        assert changed["stable_path"] == f"draco/{model_decoders.DECODERS['draco']['version']}/"
+        assert (stable / "draco_decoder.js").read_bytes() == b"// patched\n"
+        assert (stable / "draco_decoder.wasm.gz").exists()
+
+        decoders = model_decoders.load_decoders(static_dir, url_for=lambda path: f"https://api.example.com/static/{path}")
+        assert decoders["draco"]["path"] == f"https://api.example.com/static/{changed['path']}"
+        assert decoders["draco"]["type"] == "wasm"
+        built = asset_manifest.build_manifest([], Path(tmp), decoders=decoders)
+        assert built["decoders"] == decoders
+        assert built["version"] != asset_manifest.build_manifest([], Path(tmp))["version"]
+    print("   ✅ Decoder vendored under a fingerprinted path")
+
+
+def test_precompressed_static_files():
+    """Test that .br/.gz siblings are served with Content-Encoding and the original type"""
+    assert accepted_encodings("gzip, deflate, br;q=0") == ["gzip", "deflate"]
+    with tempfile.TemporaryDirectory() as tmp:
+        static_dir = Path(tmp)
+        wasm = static_dir / "draco_decoder.wasm"
+        wasm.write_bytes(DECODER_FILES["draco_decoder.wasm"])
+        model_decoders.compress_variants(wasm)
+        Path(f"{wasm}.br").write_bytes(b"brotli-bytes")
+
+        app = FastAPI()
+        app.mount("/static", PrecompressedStaticFiles(directory=str(static_dir)), name="static")
+        app.add_middleware(MediaGZipMiddleware, minimum_size=10)
+        client = TestClient(app)
+
+        with client.stream("GET", "/static/draco_decoder.wasm", headers={"Accept-Encoding": "br, gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+        assert response.headers["content-encoding"] == "br" and raw == b"brotli-bytes"
+        assert response.headers["content-type"] == "application/wasm"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["vary"] == "Accept-Encoding"
+
+        gzipped = client.get("/static/draco_decoder.wasm", headers={"Accept-Encoding": "gzip"})
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert gzipped.content == DECODER_FILES["draco_decoder.wasm"]
+        assert client.get("/static/draco_decoder.wasm", headers={"If-None-Match": gzipped.headers["etag"], "Accept-Encoding": "gzip"}).status_code == 304
+
+        identity = client.get("/static/draco_decoder.wasm", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert identity.content == DECODER_FILES["draco_decoder.wasm"]
+        assert identity.headers["etag"] != gzipped.headers["etag"]
+    print("   ✅ Precompressed copies served")
+
+
+if __name__ == "__main__":
+    print("=== Testing Model Decoders ===")
+    test_required_decoders()
+    test_vendor_and_manifest()
+    test_precompressed_static_files()
+    print("=== Test Complete ===")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script to verify model LOD chain generation and level selection
+"""
+import tempfile
+from pathlib import Path
+
+import model_lod
+from test_glb_quantize import make_grid_glb
+
+
+def test_select_level():
+    """Test that client hints map to the expected detail level"""
+    manifest = {"levels": [{"level": level["level"], "min_pixels": level["min_pixels"]} for level in model_lod.LOD_LEVELS]}
+    assert model_lod.select_level(manifest, 1920, 1.0)["level"] == 0
+    assert model_lod.select_level(manifest, 412, 2.625)["level"] == 1
+    assert model_lod.select_level(manifest, 360, 2.0)["level"] == 2
+    assert model_lod.select_level(manifest, 320, 1.0)["level"] == 3
+    assert model_lod.select_level(manifest, 1920, 2.0, save_data=True)["level"] == 3
+    # No hints: a mid-range phone
+    assert model_lod.select_level(manifest)["level"] == 2
+    assert model_lod.select_level({"levels": []}) is None
+    print("   ✅ Viewport, DPR and Save-Data pick the right level")
+
+
+def test_generate_lods():
+    """Test that every level is written, listed in the manifest and within its byte budget"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        make_grid_glb().save(uploads / "deck.glb")
+        manifest = model_lod.generate_lods(str(uploads), "deck.glb")
+
+        assert manifest["status"] == "ready" and manifest["source_faces"] == 40 * 40 * 2
+        assert [level["level"] for level in manifest["levels"]] == [0, 1, 2, 3]
+        assert model_lod.read_manifest(uploads, "deck.glb") == manifest
+        for level in manifest["levels"]:
+            path = uploads / level["path"]
+            assert path.exists() and path.stat().st_size == level["bytes"], level
+            assert level["byte_budget"] is None or level["bytes"] <= level["byte_budget"], level
+            print(f"   lod{level['level']}: {level['bytes']} bytes, {level['faces']} faces via {level['method']}")
+        assert [level["face_budget"] for level in manifest["levels"]] == [None, 1600, 640, 160]
+
+        files = model_lod.manifest_files(uploads, "deck.glb")
+        assert len(files) == 5 and files[-1].endswith(model_lod.MANIFEST_NAME)
+    print("   ✅ LOD chain and manifest generated")
+
+
+def test_anonymous_get_does_not_queue():
+    """Test that GET /api/models serves the source without queueing an LOD build"""
+    from fastapi.testclient import TestClient
+
+    import server
+
+    name = "test-unbuilt-model.glb"
+    make_grid_glb(4).save(server.UPLOADS_DIR / name)
+    queued = lambda: [job["id"] for job in server.job_queue.list_jobs(job_type="model_lod") if job["payload"].get("name") == name]
+    before = queued()
+    try:
+        client = TestClient(server.app)
+        for _ in range(2):
+            response = client.get(f"/api/models/{name}", follow_redirects=False)
+            assert response.status_code == 307 and response.headers["X-Model-LOD"] == "source"
+        assert queued() == before
+    finally:
+        (server.UPLOADS_DIR / name).unlink()
+    print("   ✅ Readers never queue LOD builds")
+
+
+if __name__ == "__main__":
+    print("=== Testing Model LODs ===")
+    test_select_level()
+    test_generate_lods()
+    test_anonymous_get_does_not_queue()
+    print("=== Test Complete ===")
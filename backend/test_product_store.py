@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script to verify compact product records and their direct JSON rendering
+"""
+import json
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import product_store
+from data_manager import DataManager
+from product_store import ProductRecord
+
+DOC = {
+    "id": "p-001",
+    "title": "Premium Flatbed",
+    "description": "Heavy-duty flatbed — 53 ft",
+    "images": ["/uploads/migrated/flatbed_1.jpg", "/uploads/migrated/flatbed_2.jpg"],
+    "created_at": "2024-01-01 08:30:00.250000",
+    "updated_at": "2024-02-01T09:00:00Z",
+}
+
+
+def test_record_from_doc():
+    """Test datetime parsing, interning and the stored document"""
+    record = ProductRecord.from_doc(DOC)
+    assert record.created_at == datetime(2024, 1, 1, 8, 30, 0, 250000)
+    assert record.updated_at.utcoffset().total_seconds() == 0
+    assert record.images[0] is sys.intern("/uploads/migrated/flatbed_1.jpg")
+    assert not hasattr(record, "__dict__")
+
+    doc = record.to_doc()
+    assert doc["created_at"] == "2024-01-01T08:30:00.250000"
+    assert doc["updated_at"] == "2024-02-01T09:00:00Z"
+    assert ProductRecord.from_doc(doc) == record
+    print("   ✅ Record parsed and round-tripped")
+
+
+def test_json_matches_model():
+    """Test that the cached JSON equals what the Product model would send"""
+    from server import Product
+
+    record = ProductRecord.from_doc(DOC)
+    expected = json.loads(Product(**DOC).model_dump_json())
+    assert json.loads(record.to_json()) == expected
+    assert record.to_json() is record.to_json()
+
+    other = ProductRecord.from_doc({**DOC, "id": "p-002", "images": []})
+    assert json.loads(product_store.render_list([record, other])) == [expected, {**expected, "id": "p-002", "images": []}]
+    assert product_store.render_list([]) == b"[]"
+    print("   ✅ Responses match the Product model")
+
+
+def test_data_manager_records():
+    """Test that DataManager loads records and saves plain documents"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        (data_dir / "products.json").write_text(json.dumps({"p-001": DOC, "broken": {"title": "no id"}}))
+        manager = DataManager(data_dir)
+        manager.load_data()
+        assert list(manager.products_db) == ["p-001"]
+        assert isinstance(manager.products_db["p-001"], ProductRecord)
+
+        manager.products_db["p-003"] = {**DOC, "id": "p-003"}
+        manager.save_data()
+        saved = json.loads((data_dir / "products.json").read_text())
+        assert saved["p-001"]["created_at"] == "2024-01-01T08:30:00.250000"
+        assert saved["p-003"]["title"] == DOC["title"]
+        # The malformed entry is not served but survives the save untouched
+        assert saved["broken"] == {"title": "no id"}
+        assert manager.unparsed_products == {"broken": {"title": "no id"}}
+    print("   ✅ DataManager keeps records in memory")
+
+
+if __name__ == "__main__":
+    print("=== Testing Product Store ===")
+    test_record_from_doc()
+    test_json_matches_model()
+    test_data_manager_records()
+    print("=== Test Complete ===")
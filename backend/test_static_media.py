@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script to verify Range and conditional request handling for /uploads
+"""
+import tempfile
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from static_media import MediaStaticFiles, MediaGZipMiddleware, parse_range_header
+
+
+def make_client(directory: Path) -> TestClient:
+    app = FastAPI()
+    app.mount("/uploads", MediaStaticFiles(directory=str(directory)), name="uploads")
+    app.add_middleware(MediaGZipMiddleware, minimum_size=10)
+    return TestClient(app)
+
+
+def test_parse_range_header():
+    """Test range parsing, suffix ranges and coalescing"""
+    assert parse_range_header("bytes=0-99", 1000) == [(0, 99)]
+    assert parse_range_header("bytes=-100", 1000) == [(900, 999)]
+    assert parse_range_header("bytes=900-", 1000) == [(900, 999)]
+    assert parse_range_header("bytes=0-10,5-20,50-60", 1000) == [(0, 20), (50, 60)]
+    assert parse_range_header("bytes=2000-3000", 1000) == []
+    assert parse_range_header("items=0-1", 1000) is None
+    assert parse_range_header("bytes=abc", 1000) is None
+
+
+def test_range_and_conditional_requests():
+    """Test 206, multipart 206, 416, 304 and gzip bypass"""
+    with tempfile.TemporaryDirectory() as tmp:
+        payload = bytes(range(256)) * 40
+        (Path(tmp) / "model.glb").write_bytes(payload)
+        client = make_client(Path(tmp))
+
+        full = client.get("/uploads/model.glb", headers={"Accept-Encoding": "identity"})
+        print(f"   Full: {full.status_code} {full.headers.get('content-type')}")
+        assert full.status_code == 200
+        assert full.headers["accept-ranges"] == "bytes"
+        assert full.headers["content-type"] == "model/gltf-binary"
+        assert "immutable" in full.headers["cache-control"]
+        etag = full.headers["etag"]
+
+        single = client.get("/uploads/model.glb", headers={"Range": "bytes=10-19", "Accept-Encoding": "gzip"})
+        assert single.status_code == 206
+        assert single.content == payload[10:20]
+        assert single.headers["content-range"] == f"bytes 10-19/{len(payload)}"
+        assert "content-encoding" not in single.headers
+
+        multi = client.get("/uploads/model.glb", headers={"Range": "bytes=0-3,100-103"})
+        assert multi.status_code == 206
+        assert multi.headers["content-type"].startswith("multipart/byteranges")
+        assert int(multi.headers["content-length"]) == len(multi.content)
+        assert payload[100:104] in multi.content
+
+        unsatisfiable = client.get("/uploads/model.glb", headers={"Range": "bytes=99999-"})
+        assert unsatisfiable.status_code == 416
+        assert unsatisfiable.headers["content-range"] == f"bytes */{len(payload)}"
+
+        stale = client.get("/uploads/model.glb", headers={"Range": "bytes=0-3", "If-Range": '"stale"'})
+        assert stale.status_code == 200
+
+        not_modified = client.get("/uploads/model.glb", headers={"If-None-Match": f"W/{etag}"})
+        assert not_modified.status_code == 304
+        assert "immutable" in not_modified.headers["cache-control"]
+
+
+if __name__ == "__main__":
+    print("=== Testing Static Media ===")
+    test_parse_range_header()
+    test_range_and_conditional_requests()
+    print("=== Test Complete ===")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the upload storage backends (S3 against a moto stand-in)
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import storage
+import upload_layout
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+
+def test_local_storage():
+    """Test that local storage resolves, copies and deletes in the sharded layout"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp) / "uploads"
+        uploads.mkdir()
+        source = Path(tmp) / "incoming.jpg"
+        source.write_bytes(b"image")
+        backend = storage.LocalStorage(uploads)
+
+        backend.save_file(source, "a.jpg")
+        assert (uploads / upload_layout.sharded_name("a.jpg")).read_bytes() == b"image"
+        assert backend.exists("a.jpg") and backend.public_url("a.jpg") is None
+        assert backend.download("a.jpg", Path(tmp) / "copy.jpg")
+        backend.delete(["a.jpg"])
+        assert not backend.exists("a.jpg")
+        try:
+            backend.presign_upload("b.jpg", "image/jpeg")
+            raise AssertionError("local storage cannot presign")
+        except storage.StorageError:
+            pass
+
+
+def test_s3_storage():
+    """Test upload (incl. multipart), download, presigning and delete against moto"""
+    if mock_aws is None:
+        print("   boto3/moto not installed, skipping")
+        return
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws(), tempfile.TemporaryDirectory() as tmp:
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="media")
+        backend = storage.S3Storage("media", region="us-east-1", multipart_threshold=5 * 1024 * 1024, multipart_chunksize=5 * 1024 * 1024)
+
+        small = Path(tmp) / "small.jpg"
+        small.write_bytes(b"x" * 1024)
+        large = Path(tmp) / "large.mp4"
+        large.write_bytes(os.urandom(11 * 1024 * 1024))
+        backend.save_file(small, "small.jpg")
+        backend.save_file(large, "large.mp4")
+
+        head = backend.client.head_object(Bucket="media", Key="uploads/small.jpg")
+        assert head["ContentType"] == "image/jpeg" and "immutable" in head["CacheControl"]
+        assert "-" in backend.client.head_object(Bucket="media", Key="uploads/large.mp4")["ETag"], "expected a multipart upload"
+
+        target = Path(tmp) / "out" / "large.mp4"
+        assert backend.download("large.mp4", target) and target.read_bytes() == large.read_bytes()
+        assert not backend.download("missing.jpg", Path(tmp) / "missing.jpg")
+        assert backend.exists("small.jpg") and not backend.exists("missing.jpg")
+        assert sorted(backend.list_names()) == ["large.mp4", "small.jpg"]
+
+        presigned = backend.presign_upload("direct.png", "image/png")
+        assert presigned["method"] == "PUT" and "uploads/direct.png" in presigned["url"]
+        assert "uploads/small.jpg" in backend.redirect_url("small.jpg")
+
+        backend.delete(["small.jpg", "large.mp4"])
+        assert backend.list_names() == []
+        print("   S3 backend OK (multipart, presign, delete)")
+
+
+if __name__ == "__main__":
+    print("=== Testing Upload Storage ===")
+    test_local_storage()
+    test_s3_storage()
+    print("=== Test Complete ===")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script to verify orphaned upload collection
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from upload_gc import ReferenceIndex, UploadGC
+
+
+def test_upload_gc_quarantine_and_restore():
+    """Test references, pins, grace period, dry run, quarantine and restore"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        uploads, data = root / "uploads", root / "data"
+        uploads.mkdir()
+        data.mkdir()
+
+        orphan = "11111111-2222-4333-8444-555555555555.jpg"
+        used = "aaaaaaaa-bbbb-4ccc-8ddd-eeeeeeeeeeee.png"
+        pinned = "99999999-8888-4777-8666-555555555555.webp"
+        fresh = "12345678-1234-4234-8234-123456789abc.jpg"
+        for name in (orphan, used, pinned, fresh, "hero.jpg"):
+            (uploads / name).write_bytes(b"x" * 10)
+        (uploads / "derived" / orphan).mkdir(parents=True)
+        (uploads / "derived" / orphan / "w320.webp").write_bytes(b"y" * 5)
+        old = time.time() - 3600
+        for name in (orphan, used, pinned, "hero.jpg"):
+            os.utime(uploads / name, (old, old))
+        (data / "gc_pins.json").write_text(json.dumps(["99999999-*"]))
+
+        references = ReferenceIndex()
+        references.rebuild({"p1": {"images": [f"https://example.com/uploads/{used}"]}})
+        removed = []
+        gc = UploadGC(
+            data, uploads, root / "quarantine", references,
+            list_uploads=lambda: [p.name for p in uploads.iterdir() if p.is_file()],
+            on_removed=removed.append,
+            grace_seconds=60,
+        )
+
+        report = gc.run(dry_run=True)
+        assert [entry["name"] for entry in report["quarantined"]] == [orphan]
+        assert report["reclaimable_bytes"] == 15
+        assert report["in_grace_period"] == 1 and report["live"] == 2
+        assert (uploads / orphan).exists(), "dry run must not move files"
+
+        gc.run(dry_run=False)
+        assert not (uploads / orphan).exists() and not (uploads / "derived" / orphan).exists()
+        assert (uploads / used).exists() and (uploads / "hero.jpg").exists()
+        assert removed == [orphan]
+
+        assert gc.restore(orphan)
+        assert (uploads / orphan).exists()
+        assert (uploads / "derived" / orphan / "w320.webp").exists()
+
+        references.set_product("p1", [])
+        report = gc.run(dry_run=True)
+        assert sorted(entry["name"] for entry in report["quarantined"]) == sorted([orphan, used])
+        print("✅ Upload GC quarantines, restores and honours references/pins")
+
+
+def test_live_sweep_refused_without_references():
+    """Test that a live sweep never runs on an empty or untrusted reference set"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        uploads, data = root / "uploads", root / "data"
+        uploads.mkdir()
+        data.mkdir()
+        orphan = "11111111-2222-4333-8444-555555555555.jpg"
+        (uploads / orphan).write_bytes(b"x" * 10)
+        old = time.time() - 3600
+        os.utime(uploads / orphan, (old, old))
+
+        load_errors = {}
+        references = ReferenceIndex()
+        gc = UploadGC(
+            data, uploads, root / "quarantine", references,
+            list_uploads=lambda: [orphan],
+            grace_seconds=60,
+            references_error=lambda: load_errors.get("products.json"),
+        )
+
+        # Nothing referenced (e.g. products.json came back empty): dry runs report, live runs refuse
+        assert [entry["name"] for entry in gc.run(dry_run=True)["quarantined"]] == [orphan]
+        assert "error" in gc.run(dry_run=False)
+        assert (uploads / orphan).exists()
+
+        references.set_product("p1", ["/uploads/aaaaaaaa-bbbb-4ccc-8ddd-eeeeeeeeeeee.png"])
+        load_errors["products.json"] = "JSONDecodeError: Expecting value"
+        assert "not trustworthy" in gc.run(dry_run=False)["error"] and (uploads / orphan).exists()
+
+        del load_errors["products.json"]
+        assert [entry["name"] for entry in gc.run(dry_run=False)["quarantined"]] == [orphan]
+        assert not (uploads / orphan).exists()
+    print("✅ Live sweeps refused without trustworthy references")
+
+
+if __name__ == "__main__":
+    print("=== Testing Upload GC ===")
+    test_upload_gc_quarantine_and_restore()
+    test_live_sweep_refused_without_references()
+    print("=== Test Complete ===")
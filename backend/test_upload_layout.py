@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the sharded uploads layout and its migration
+"""
+import json
+import tempfile
+from pathlib import Path
+
+import upload_layout
+
+
+def test_sharded_names():
+    """Test shard prefixes, logical names and lookup candidates"""
+    name = "0a3e7b6a-2c8b-4817-b35b-d5b62f9e4095.png"
+    sharded = upload_layout.sharded_name(name)
+    assert sharded.count("/") == 2 and sharded.endswith(f"/{name}")
+    assert upload_layout.logical_name(sharded) == name
+    assert upload_layout.logical_name(f"derived/{sharded}/w320.webp") == f"derived/{name}/w320.webp"
+    assert upload_layout.logical_name("ab/cd/not-in-this-shard.jpg") == "ab/cd/not-in-this-shard.jpg"
+    assert upload_layout.storage_candidates(name) == [sharded, name]
+    assert upload_layout.storage_candidates("migrated/a.jpg") == ["migrated/a.jpg"]
+    print(f"   {name} -> {sharded}")
+
+
+def test_migrate_keeps_names_resolvable():
+    """Test that migration moves flat files/derived dirs and both layouts resolve"""
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = Path(tmp)
+        name = "11111111-2222-4333-8444-555555555555.jpg"
+        (uploads / name).write_bytes(b"image")
+        (uploads / "migrated").mkdir()
+        (uploads / "migrated" / "keep.jpg").write_bytes(b"x")
+        derived = uploads / "derived" / name
+        derived.mkdir(parents=True)
+        (derived / "w320.webp").write_bytes(b"v")
+        (derived / "manifest.json").write_text(json.dumps({"variants": [{"path": f"derived/{name}/w320.webp"}]}))
+
+        assert upload_layout.resolve(uploads, name) == (uploads / name).resolve()
+        assert upload_layout.per_upload_dir(uploads, "derived", name) == derived
+
+        dry = upload_layout.migrate(uploads, dry_run=True)
+        assert dry["moved"] == 1 and dry["directories_moved"] == 1 and (uploads / name).exists()
+
+        report = upload_layout.migrate(uploads)
+        assert report["moved"] == 1 and report["directories_moved"] == 1 and not report["errors"]
+        sharded = uploads / upload_layout.sharded_name(name)
+        assert sharded.read_bytes() == b"image" and not (uploads / name).exists()
+        assert upload_layout.resolve(uploads, name) == sharded.resolve()
+        assert upload_layout.resolve(uploads, f"derived/{name}/w320.webp") is not None
+        assert (uploads / "migrated" / "keep.jpg").exists()
+
+        new_derived = upload_layout.per_upload_dir(uploads, "derived", name)
+        manifest = json.loads((new_derived / "manifest.json").read_text())
+        assert manifest["variants"][0]["path"] == f"derived/{upload_layout.sharded_name(name)}/w320.webp"
+
+        again = upload_layout.migrate(uploads)
+        assert again["moved"] == 0 and again["directories_moved"] == 0
+        assert upload_layout.resolve(uploads, "../etc/passwd") is None
+        print(f"   Migrated: {report}")
+
+
+if __name__ == "__main__":
+    print("=== Testing Upload Layout ===")
+    test_sharded_names()
+    test_migrate_keeps_names_resolvable()
+    print("=== Test Complete ===")
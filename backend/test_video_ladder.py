@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the adaptive video stage's ladder and ffmpeg command
+"""
+from pathlib import Path
+
+import video_ladder
+
+
+def test_select_rungs():
+    """Test that no rung is taller than the source"""
+    assert [rung["name"] for rung in video_ladder.select_rungs(1080)] == ["360p", "720p", "1080p"]
+    assert [rung["name"] for rung in video_ladder.select_rungs(800)] == ["360p", "720p"]
+    small = video_ladder.select_rungs(241)
+    assert len(small) == 1 and small[0]["height"] == 240 and small[0]["name"] == "240p"
+    print("   ✅ Ladder capped at the source height")
+
+
+def test_single_run_command():
+    """Test that every output comes from one ffmpeg invocation with one input"""
+    info = {"width": 1920, "height": 1080, "duration": 3.0, "has_audio": True}
+    rungs = video_ladder.select_rungs(info["height"])
+    cmd = video_ladder.ladder_command(Path("in.mp4"), Path("out"), info, rungs, threads=2)
+
+    assert cmd[0] == "ffmpeg" and cmd.count("-i") == 1
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]split=5") and "gte(t,1.50)" in graph
+    assert cmd[cmd.index("-var_stream_map") + 1] == "v:0,a:0,name:360p v:1,a:1,name:720p v:2,a:2,name:1080p"
+    assert cmd[cmd.index("-force_key_frames") + 1] == f"expr:gte(t,n_forced*{video_ladder.SEGMENT_SECONDS})"
+    outputs = [arg for arg in cmd if arg.startswith("out")]
+    assert outputs == [str(Path("out/%v/seg_%03d.ts")), str(Path("out/%v/index.m3u8")), str(Path("out/fallback.mp4")), str(Path("out/poster.jpg")), str(Path("out/poster_thumb.jpg"))]
+    assert cmd[cmd.index("-movflags") + 1] == "+faststart"
+
+    silent = video_ladder.ladder_command(Path("in.mp4"), Path("out"), {**info, "has_audio": False}, rungs[:1])
+    assert "0:a:0" not in silent and silent[silent.index("-var_stream_map") + 1] == "v:0,name:360p"
+    print("   ✅ One decode feeds the ladder, MP4 fallback and posters")
+
+
+def test_anonymous_get_does_not_queue():
+    """Test that GET /api/videos answers 404 without queueing a ladder build"""
+    from fastapi.testclient import TestClient
+
+    import server
+
+    name = "test-unbuilt-video.mp4"
+    (server.UPLOADS_DIR / name).write_bytes(bytes(1000))
+    queued = lambda: [job["id"] for job in server.job_queue.list_jobs(job_type="video_stream") if job["payload"].get("name") == name]
+    before = queued()
+    try:
+        client = TestClient(server.app)
+        for _ in range(2):
+            assert client.get(f"/api/videos/{name}").status_code == 404
+        assert queued() == before
+    finally:
+        (server.UPLOADS_DIR / name).unlink()
+    print("   ✅ Readers never queue ffmpeg work")
+
+
+if __name__ == "__main__":
+    print("=== Testing Video Ladder ===")
+    test_select_rungs()
+    test_single_run_command()
+    test_anonymous_get_does_not_queue()
+    print("=== Test Complete ===")
@@ -0,0 +1,372 @@
+"""
+Upload Garbage Collector for Phoenix Trailers API
+Tracks which uploads are referenced by products and reclaims the rest with
+a mark-and-sweep pass (grace period, quarantine, dry-run)
+"""
+import fnmatch
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set
+from urllib.parse import unquote, urlparse
+
+import asset_pipeline
+import image_pipeline
+import model_lod
+import upload_layout
+import video_ladder
+
+logger = logging.getLogger(__name__)
+
+# Only files created by POST /api/upload (uuid4 names at the top level) are
+# collectable; hand-placed site assets (migrated/, optimized/, IMG_*.webp ...)
+# are referenced from the frontend bundle, which the backend cannot see
+CANDIDATE_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.[A-Za-z0-9]+$")
+
+DEFAULT_GRACE_SECONDS = 7 * 24 * 3600
+DEFAULT_QUARANTINE_RETENTION_SECONDS = 14 * 24 * 3600
+SWEEP_BATCH_SIZE = 50
+SWEEP_BATCH_PAUSE = 0.05
+
+
+def upload_name_from_reference(reference: str) -> Optional[str]:
+    """
+    Uploads-relative name for a product image reference, or None for external
+    URLs. Products store either full ".../uploads/<name>" URLs or bare names.
+    """
+    if not reference:
+        return None
+    parsed = urlparse(reference)
+    path = unquote(parsed.path)
+    if "/uploads/" in path:
+        return path.split("/uploads/", 1)[1]
+    if parsed.scheme or parsed.netloc:
+        return None
+    return path.lstrip("/") or None
+
+
+def generated_paths(uploads_dir: Path, name: str) -> List[Path]:
+    """Files the pipelines derive from an upload; they share its fate"""
+    stem = Path(name).stem
+    paths = [
+        image_pipeline.derived_dir(uploads_dir, name),
+        model_lod.lod_dir(uploads_dir, name),
+        video_ladder.stream_dir(uploads_dir, name),
+        uploads_dir / "compressed_3d_models" / f"{stem}_compressed.glb",
+        uploads_dir / "optimized" / f"{stem}.webm",
+        uploads_dir / "optimized" / f"{stem}_optimized.mp4",
+    ]
+    kind = asset_pipeline.input_kind(Path(name))
+    if kind is not None:
+        for profile_name in asset_pipeline.PROFILES:
+            paths += [uploads_dir / output for output in asset_pipeline.output_names_for(profile_name, kind, name)]
+    return list(dict.fromkeys(paths))
+
+
+class ReferenceIndex:
+    """In-memory upload name -> product ids map, derived from products_db"""
+
+    def __init__(self):
+        self._refs: Dict[str, Set[str]] = {}
+        self._by_product: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self, products: Mapping[str, Any]) -> None:
+        """From {product id: product document or ProductRecord}"""
+        with self._lock:
+            self._refs.clear()
+            self._by_product.clear()
+        for product_id, doc in products.items():
+            images = doc.get("images") if isinstance(doc, dict) else getattr(doc, "images", None)
+            self.set_product(product_id, images if isinstance(images, (list, tuple)) else [])
+
+    def set_product(self, product_id: str, images: Iterable[str]) -> None:
+        names = {name for name in (upload_name_from_reference(image) for image in images) if name}
+        with self._lock:
+            for name in self._by_product.pop(product_id, set()):
+                owners = self._refs.get(name)
+                if owners:
+                    owners.discard(product_id)
+                    if not owners:
+                        del self._refs[name]
+            for name in names:
+                self._refs.setdefault(name, set()).add(product_id)
+            self._by_product[product_id] = names
+
+    def remove_product(self, product_id: str) -> None:
+        self.set_product(product_id, [])
+
+    def is_referenced(self, name: str) -> bool:
+        with self._lock:
+            return name in self._refs
+
+    def referenced_by(self, name: str) -> List[str]:
+        with self._lock:
+            return sorted(self._refs.get(name, set()))
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._refs)
+
+
+class UploadGC:
+    """
+    Mark: product references plus pinned patterns (data/gc_pins.json).
+    Sweep: unreferenced candidate uploads older than the grace period move to
+    quarantine/ (outside the served directory) together with their generated
+    files; quarantined files older than the retention period are deleted.
+    The sweep works in small batches so it never holds locks for long.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        uploads_dir: Path,
+        quarantine_dir: Path,
+        references: ReferenceIndex,
+        list_uploads: Callable[[], List[str]],
+        on_removed: Optional[Callable[[str], None]] = None,
+        on_restored: Optional[Callable[[Path], None]] = None,
+        grace_seconds: float = DEFAULT_GRACE_SECONDS,
+        retention_seconds: float = DEFAULT_QUARANTINE_RETENTION_SECONDS,
+        references_error: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self.state_file = data_dir / "gc_state.json"
+        self.pins_file = data_dir / "gc_pins.json"
+        self.uploads_dir = uploads_dir
+        self.quarantine_dir = quarantine_dir
+        self.references = references
+        self.list_uploads = list_uploads
+        self.on_removed = on_removed
+        self.on_restored = on_restored
+        self.grace_seconds = grace_seconds
+        self.retention_seconds = retention_seconds
+        # Why the references cannot be trusted (e.g. products failed to load), or None
+        self.references_error = references_error
+
+        self.quarantined: Dict[str, Dict[str, Any]] = {}
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._timer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._load_state()
+
+    # ---- Mark ----
+    def load_pins(self) -> List[str]:
+        try:
+            with open(self.pins_file, "r", encoding="utf-8") as f:
+                return list(json.load(f))
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"Error loading {self.pins_file}: {e}")
+            return []
+
+    def is_live(self, name: str, pins: List[str]) -> bool:
+        return self.references.is_referenced(name) or any(fnmatch.fnmatch(name, pattern) for pattern in pins)
+
+    def live_sweep_blocker(self) -> Optional[str]:
+        """
+        Why a live sweep must not run now. Liveness comes only from the
+        product references, so an empty or untrusted set would quarantine
+        every candidate upload.
+        """
+        reason = self.references_error() if self.references_error else None
+        if reason:
+            return f"Product references are not trustworthy ({reason})"
+        if self.references.count() == 0:
+            return "No upload is referenced by any product"
+        return None
+
+    # ---- Sweep ----
+    def run(self, dry_run: bool = True) -> Dict[str, Any]:
+        """One full mark-and-sweep pass; returns a report"""
+        if not dry_run:
+            blocker = self.live_sweep_blocker()
+            if blocker:
+                logger.warning(f"Refusing live upload GC: {blocker}")
+                return {"error": f"Refusing live collection: {blocker}"}
+        if not self._run_lock.acquire(blocking=False):
+            return {"error": "A collection is already running"}
+        try:
+            return self._run(dry_run)
+        finally:
+            self._run_lock.release()
+
+    def _run(self, dry_run: bool) -> Dict[str, Any]:
+        started = time.time()
+        pins = self.load_pins()
+        report: Dict[str, Any] = {
+            "dry_run": dry_run,
+            "started_at": datetime.utcnow().isoformat(),
+            "quarantined": [],
+            "purged": [],
+            "in_grace_period": 0,
+            "live": 0,
+            "reclaimable_bytes": 0,
+        }
+
+        candidates = [name for name in self.list_uploads() if "/" not in name and CANDIDATE_PATTERN.match(name)]
+        for start in range(0, len(candidates), SWEEP_BATCH_SIZE):
+            for name in candidates[start:start + SWEEP_BATCH_SIZE]:
+                if self.is_live(name, pins):
+                    report["live"] += 1
+                    continue
+                path = upload_layout.resolve(self.uploads_dir, name)
+                if path is None:
+                    continue
+                age = started - path.stat().st_mtime
+                if age < self.grace_seconds:
+                    report["in_grace_period"] += 1
+                    continue
+                size = self._tree_size([path] + generated_paths(self.uploads_dir, name))
+                report["reclaimable_bytes"] += size
+                report["quarantined"].append({"name": name, "bytes": size})
+                if not dry_run:
+                    self._quarantine(name, size, pins)
+            time.sleep(SWEEP_BATCH_PAUSE)
+
+        with self._lock:
+            expired = [
+                entry for entry in self.quarantined.values()
+                if started - entry["quarantined_ts"] >= self.retention_seconds
+            ]
+        for entry in expired:
+            report["purged"].append({"name": entry["name"], "bytes": entry["bytes"]})
+            if not dry_run:
+                self._purge(entry["name"])
+
+        report["duration_seconds"] = round(time.time() - started, 3)
+        with self._lock:
+            self.last_report = report
+            self._save_state()
+        logger.info(
+            f"Upload GC ({'dry run' if dry_run else 'live'}): {len(report['quarantined'])} quarantined, "
+            f"{len(report['purged'])} purged, {report['reclaimable_bytes']} bytes"
+        )
+        return report
+
+    def _quarantine(self, name: str, size: int, pins: List[str]) -> None:
+        # A product may have started referencing the file while we were scanning
+        if self.is_live(name, pins):
+            return
+        target = self.quarantine_dir / name
+        target.mkdir(parents=True, exist_ok=True)
+        moved = []
+        source = upload_layout.resolve(self.uploads_dir, name)
+        for path in [source] + generated_paths(self.uploads_dir, name):
+            if path is not None and path.exists():
+                relative = path.resolve().relative_to(self.uploads_dir.resolve()).as_posix()
+                destination = target / relative.replace("/", "__")
+                shutil.move(str(path), str(destination))
+                moved.append({"from": relative, "to": destination.name})
+        with self._lock:
+            self.quarantined[name] = {
+                "name": name,
+                "bytes": size,
+                "files": moved,
+                "quarantined_at": datetime.utcnow().isoformat(),
+                "quarantined_ts": time.time(),
+            }
+            self._save_state()
+        if self.on_removed:
+            self.on_removed(name)
+
+    def _purge(self, name: str) -> None:
+        shutil.rmtree(self.quarantine_dir / name, ignore_errors=True)
+        with self._lock:
+            self.quarantined.pop(name, None)
+            self._save_state()
+
+    def restore(self, name: str) -> bool:
+        """Move a quarantined upload (and its generated files) back"""
+        with self._lock:
+            entry = self.quarantined.get(name)
+        if entry is None:
+            return False
+        source_dir = self.quarantine_dir / name
+        for moved in entry["files"]:
+            destination = self.uploads_dir / moved["from"]
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            source = source_dir / moved["to"]
+            if source.exists():
+                shutil.move(str(source), str(destination))
+        shutil.rmtree(source_dir, ignore_errors=True)
+        with self._lock:
+            self.quarantined.pop(name, None)
+            self._save_state()
+        if self.on_restored:
+            restored = upload_layout.resolve(self.uploads_dir, name)
+            if restored is not None:
+                self.on_restored(restored)
+        return True
+
+    @staticmethod
+    def _tree_size(paths: List[Path]) -> int:
+        total = 0
+        for path in paths:
+            if path.is_file():
+                total += path.stat().st_size
+            elif path.is_dir():
+                total += sum(child.stat().st_size for child in path.rglob("*") if child.is_file())
+        return total
+
+    # ---- Background schedule ----
+    def start(self, interval_seconds: float) -> None:
+        """Run a live collection every interval in a daemon thread (0 disables the schedule)"""
+        if self._timer is not None or interval_seconds <= 0:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.run(dry_run=False)
+                except Exception as e:
+                    logger.error(f"Upload GC failed: {e}")
+
+        self._timer = threading.Thread(target=loop, name="upload-gc", daemon=True)
+        self._timer.start()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._timer = None
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "referenced_uploads": self.references.count(),
+                "pins": self.load_pins(),
+                "grace_seconds": self.grace_seconds,
+                "retention_seconds": self.retention_seconds,
+                "quarantined": sorted(self.quarantined.values(), key=lambda entry: entry["quarantined_ts"]),
+                "last_report": self.last_report,
+            }
+
+    # ---- Persistence ----
+    def _load_state(self) -> None:
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.quarantined = data.get("quarantined", {})
+                self.last_report = data.get("last_report")
+        except Exception as e:
+            logger.error(f"Error loading {self.state_file}: {e}")
+
+    def _save_state(self) -> None:
+        """Atomic write; called with the lock held"""
+        try:
+            tmp_path = self.state_file.with_name(f"{self.state_file.name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"quarantined": self.quarantined, "last_report": self.last_report}, f, indent=2, default=str)
+            os.replace(tmp_path, self.state_file)
+        except Exception as e:
+            logger.error(f"Error saving {self.state_file}: {e}")
@@ -0,0 +1,235 @@
+"""
+Sharded Uploads Layout for Phoenix Trailers API
+Top-level uploads are stored under a two-level hash prefix
+(uploads/3f/a2/<name>) so no directory grows past a few hundred entries.
+Public URLs keep the flat form (/uploads/<name>); the resolver here maps
+them to whichever location the file currently has, so old flat files and
+migrated files are served side by side.
+
+Run `python upload_layout.py migrate [--dry-run]` to move an existing
+flat directory into the sharded layout while the server is running.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+# Directories holding one sub-directory per upload (derived images, model
+# LOD chains, video streams); these per-upload directories are sharded the
+# same way as the uploads themselves
+SHARDED_DIRS = ("derived", "lod", "stream")
+
+SHARDED_PATTERN = re.compile(r"^((?:[0-9a-f]{%d}/){%d})([^/]+)$" % (SHARD_WIDTH, SHARD_LEVELS))
+
+MIGRATION_BATCH_SIZE = 200
+MIGRATION_BATCH_PAUSE = 0.05
+
+
+def shard_prefix(name: str) -> str:
+    """'3f/a2' for a file name: stable, evenly spread over 65536 directories"""
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return "/".join(digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS))
+
+
+def is_shardable(name: str) -> bool:
+    """Only top-level names are sharded; subdirectories keep their own layout"""
+    return bool(name) and "/" not in name and not name.startswith(".")
+
+
+def sharded_name(name: str) -> str:
+    return f"{shard_prefix(name)}/{name}" if is_shardable(name) else name
+
+
+def logical_name(relative: str) -> str:
+    """Public (flat) name for an uploads-relative storage path"""
+    match = SHARDED_PATTERN.match(relative)
+    if match and match.group(1).rstrip("/") == shard_prefix(match.group(2)):
+        return match.group(2)
+    for dirname in SHARDED_DIRS:
+        parts = relative.split("/")
+        if len(parts) > SHARD_LEVELS + 1 and parts[0] == dirname:
+            inner = "/".join(parts[1:SHARD_LEVELS + 2])
+            inner_match = SHARDED_PATTERN.match(inner)
+            if inner_match and inner_match.group(1).rstrip("/") == shard_prefix(inner_match.group(2)):
+                return "/".join([dirname, inner_match.group(2)] + parts[SHARD_LEVELS + 2:])
+    return relative
+
+
+def storage_candidates(name: str) -> List[str]:
+    """Uploads-relative paths that may hold `name`, sharded location first"""
+    name = name.lstrip("/")
+    if is_shardable(name):
+        return [sharded_name(name), name]
+    parts = name.split("/")
+    if len(parts) >= 2 and parts[0] in SHARDED_DIRS and is_shardable(parts[1]):
+        return ["/".join([parts[0], sharded_name(parts[1])] + parts[2:]), name]
+    return [name]
+
+
+def resolve(uploads_dir: Path, name: str) -> Optional[Path]:
+    """File for a public uploads name in either layout, or None (never escapes uploads_dir)"""
+    uploads_root = uploads_dir.resolve()
+    for relative in storage_candidates(name):
+        candidate = (uploads_root / relative).resolve()
+        if uploads_root in candidate.parents and candidate.is_file():
+            return candidate
+    return None
+
+
+def iter_uploads(uploads_dir: Path) -> Iterator[Tuple[str, Path]]:
+    """(public name, path) for every top-level upload in either layout"""
+    with os.scandir(uploads_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and is_shardable(entry.name) and not entry.name.endswith(".tmp"):
+                yield entry.name, Path(entry.path)
+            elif entry.is_dir() and re.fullmatch(r"[0-9a-f]{%d}" % SHARD_WIDTH, entry.name):
+                for path in Path(entry.path).glob("/".join(["*"] * SHARD_LEVELS)):
+                    relative = path.relative_to(uploads_dir).as_posix()
+                    name = logical_name(relative)
+                    if name != relative and path.is_file() and not name.endswith(".tmp"):
+                        yield name, path
+
+
+def upload_path(uploads_dir: Path, name: str) -> Path:
+    """Where a new upload is written (its shard directory is created)"""
+    path = uploads_dir / sharded_name(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def per_upload_dir(uploads_dir: Path, dirname: str, name: str) -> Path:
+    """
+    uploads/<dirname>/<shard>/<name>, unless an unmigrated flat
+    uploads/<dirname>/<name> is still there
+    """
+    sharded = uploads_dir / dirname / sharded_name(name)
+    if is_shardable(name) and not sharded.exists():
+        legacy = uploads_dir / dirname / name
+        if legacy.exists():
+            return legacy
+    return sharded
+
+
+def _move_file(source: Path, target: Path) -> None:
+    """
+    Hard-link into place, then drop the old name, so the file is reachable
+    under at least one of its two paths at every moment
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        os.replace(source, target)
+        return
+    os.unlink(source)
+
+
+def _rewrite_manifest(directory: Path, old_prefix: str, new_prefix: str) -> None:
+    manifest_path = directory / "manifest.json"
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return
+    for variant in manifest.get("variants", []):
+        if variant.get("path", "").startswith(old_prefix):
+            variant["path"] = new_prefix + variant["path"][len(old_prefix):]
+    tmp_path = directory / "manifest.json.migrate.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(tmp_path, manifest_path)
+
+
+def migrate(
+    uploads_dir: Path,
+    dry_run: bool = False,
+    limit: Optional[int] = None,
+    on_moved: Optional[Callable[[str, str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Move flat top-level uploads (and flat per-upload directories such as
+    derived/<name>) into the sharded layout. Safe to run against a live
+    server and safe to re-run: already-sharded entries are skipped and a
+    name that exists in both places is reported as a conflict, not touched.
+    """
+    report: Dict[str, Any] = {"dry_run": dry_run, "moved": 0, "directories_moved": 0, "conflicts": [], "errors": []}
+    moves = []
+    with os.scandir(uploads_dir) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and is_shardable(entry.name) and not entry.name.endswith(".tmp"):
+                moves.append((entry.name, False))
+    for dirname in SHARDED_DIRS:
+        parent = uploads_dir / dirname
+        if not parent.is_dir():
+            continue
+        with os.scandir(parent) as entries:
+            for entry in entries:
+                # Shard directories are exactly SHARD_WIDTH hex characters; everything else is a flat per-upload dir
+                if entry.is_dir(follow_symlinks=False) and is_shardable(entry.name) and not re.fullmatch(r"[0-9a-f]{%d}" % SHARD_WIDTH, entry.name):
+                    moves.append((f"{dirname}/{entry.name}", True))
+    if limit is not None:
+        moves = moves[:limit]
+
+    for start in range(0, len(moves), MIGRATION_BATCH_SIZE):
+        for relative, is_dir in moves[start:start + MIGRATION_BATCH_SIZE]:
+            if is_dir:
+                dirname, name = relative.split("/", 1)
+                target_relative = f"{dirname}/{sharded_name(name)}"
+            else:
+                target_relative = sharded_name(relative)
+            source, target = uploads_dir / relative, uploads_dir / target_relative
+            if target.exists():
+                report["conflicts"].append(relative)
+                continue
+            if dry_run:
+                report["directories_moved" if is_dir else "moved"] += 1
+                continue
+            try:
+                if is_dir:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.rename(source, target)
+                    _rewrite_manifest(target, f"{relative}/", f"{target_relative}/")
+                    report["directories_moved"] += 1
+                else:
+                    _move_file(source, target)
+                    report["moved"] += 1
+                if on_moved:
+                    on_moved(relative, target_relative)
+            except OSError as e:
+                logger.error(f"Could not migrate {relative}: {e}")
+                report["errors"].append(f"{relative}: {e}")
+        time.sleep(MIGRATION_BATCH_PAUSE)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the sharded uploads layout")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subcommands.add_parser("migrate", help="Move flat uploads into hash-prefix shards")
+    migrate_parser.add_argument("--uploads", default=str(Path(__file__).parent / "uploads"), help="Uploads directory")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Only report what would move")
+    migrate_parser.add_argument("--limit", type=int, default=None, help="Move at most this many entries")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    uploads_dir = Path(args.uploads)
+    if not uploads_dir.is_dir():
+        parser.error(f"{uploads_dir} is not a directory")
+    report = migrate(uploads_dir, dry_run=args.dry_run, limit=args.limit)
+    print(json.dumps(report, indent=2))
+    if report["errors"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
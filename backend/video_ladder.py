@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Adaptive Video Stage for Phoenix Trailers
+Turns one uploaded video into an HLS bitrate ladder (360p/720p/1080p, capped
+at the source height), a faststart MP4 fallback and poster frames with a
+single ffmpeg run: the source is decoded once and split through a
+filter graph into every output. Results live under
+uploads/stream/<shard>/<upload name>/ with a manifest.json, and are served by
+the /uploads mount.
+
+    python video_ladder.py Video_Editing_and_Enhancement_Request.mp4 -j 2
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import upload_layout
+
+logger = logging.getLogger(__name__)
+
+STREAM_DIRNAME = upload_layout.SHARDED_DIRS[2]
+MANIFEST_NAME = "manifest.json"
+
+# Bitrates follow the usual H.264 ladders for 16:9 content at 30 fps
+LADDER = (
+    {"name": "360p", "height": 360, "video_kbps": 800, "audio_kbps": 96},
+    {"name": "720p", "height": 720, "video_kbps": 2800, "audio_kbps": 128},
+    {"name": "1080p", "height": 1080, "video_kbps": 5000, "audio_kbps": 128},
+)
+SEGMENT_SECONDS = 4
+FALLBACK_HEIGHT = 720
+FALLBACK_CRF = 23
+POSTER_HEIGHT = 720
+THUMB_WIDTH = 320
+POSTER_AT = 2.0
+X264_PRESET = "veryfast"
+# Threads per ffmpeg process; the pool runs cpu_count // this many at once
+FFMPEG_THREADS = 4
+FFMPEG_TIMEOUT = 3600
+
+
+def stream_dir(uploads_dir: Path, name: str) -> Path:
+    return upload_layout.per_upload_dir(uploads_dir, STREAM_DIRNAME, name)
+
+
+def read_manifest(uploads_dir: Path, name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(stream_dir(uploads_dir, name) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def manifest_files(uploads_dir: Path, name: str) -> List[str]:
+    """Uploads names of every file of a video's stream directory"""
+    directory = stream_dir(uploads_dir, name)
+    if not directory.is_dir():
+        return []
+    return sorted(path.relative_to(uploads_dir).as_posix() for path in directory.rglob("*") if path.is_file())
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) // FFMPEG_THREADS)
+
+
+def probe(path: Path) -> Dict[str, Any]:
+    """Video dimensions, duration, bitrate and whether there is an audio track (ffprobe)"""
+    if shutil.which("ffprobe") is None:
+        raise RuntimeError("ffprobe not found on PATH")
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "stream=codec_type,width,height:format=duration,bit_rate", "-of", "json", str(path),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or "ffprobe failed")
+    info = json.loads(result.stdout)
+    streams = info.get("streams", [])
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    if video is None:
+        raise RuntimeError(f"{path.name} has no video stream")
+    media_format = info.get("format", {})
+    return {
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "duration": float(media_format["duration"]) if media_format.get("duration") else None,
+        "bitrate_kbps": round(int(media_format["bit_rate"]) / 1000) if media_format.get("bit_rate") else None,
+        "has_audio": any(stream.get("codec_type") == "audio" for stream in streams),
+    }
+
+
+def select_rungs(source_height: Optional[int], ladder=LADDER) -> List[Dict[str, Any]]:
+    """Rungs no taller than the source; a short source still gets the lowest rung at its own height"""
+    if not source_height:
+        return list(ladder)
+    rungs = [rung for rung in ladder if rung["height"] <= source_height]
+    if not rungs:
+        rungs = [{**ladder[0], "name": f"{source_height - source_height % 2}p", "height": source_height - source_height % 2}]
+    return rungs
+
+
+def ladder_command(source: Path, output_dir: Path, info: Dict[str, Any], rungs: List[Dict[str, Any]], threads: int = FFMPEG_THREADS) -> List[str]:
+    """
+    One ffmpeg invocation: the decoded video is split into every HLS rung,
+    the MP4 fallback and the poster frames. Keyframes are forced on segment
+    boundaries so all rungs switch cleanly.
+    """
+    fallback_height = min(FALLBACK_HEIGHT, info.get("height") or FALLBACK_HEIGHT)
+    poster_at = POSTER_AT if not info.get("duration") else min(POSTER_AT, info["duration"] / 2)
+    branches = len(rungs) + 2
+    graph = [f"[0:v]split={branches}" + "".join(f"[s{i}]" for i in range(branches))]
+    graph += [f"[s{i}]scale=-2:{rung['height']}[v{i}]" for i, rung in enumerate(rungs)]
+    graph.append(f"[s{len(rungs)}]scale=-2:{fallback_height - fallback_height % 2}[vmp4]")
+    graph.append(f"[s{len(rungs) + 1}]select='gte(t,{poster_at:.2f})',trim=end_frame=1,split=2[p0][p1]")
+    graph.append(f"[p0]scale=-2:{min(POSTER_HEIGHT, info.get('height') or POSTER_HEIGHT)}[poster]")
+    graph.append(f"[p1]scale={THUMB_WIDTH}:-2[thumb]")
+
+    cmd = ["ffmpeg", "-hide_banner", "-y", "-i", str(source), "-filter_complex", ";".join(graph)]
+    keyframes = f"expr:gte(t,n_forced*{SEGMENT_SECONDS})"
+
+    stream_map = []
+    for i, rung in enumerate(rungs):
+        cmd += ["-map", f"[v{i}]"]
+        if info.get("has_audio"):
+            cmd += ["-map", "0:a:0"]
+        cmd += [
+            f"-c:v:{i}", "libx264", f"-b:v:{i}", f"{rung['video_kbps']}k",
+            f"-maxrate:v:{i}", f"{int(rung['video_kbps'] * 1.07)}k", f"-bufsize:v:{i}", f"{int(rung['video_kbps'] * 1.5)}k",
+        ]
+        if info.get("has_audio"):
+            cmd += [f"-c:a:{i}", "aac", f"-b:a:{i}", f"{rung['audio_kbps']}k"]
+        stream_map.append(f"v:{i},a:{i},name:{rung['name']}" if info.get("has_audio") else f"v:{i},name:{rung['name']}")
+    cmd += [
+        "-preset", X264_PRESET, "-threads", str(threads), "-force_key_frames", keyframes, "-sc_threshold", "0",
+        "-f", "hls", "-hls_time", str(SEGMENT_SECONDS), "-hls_playlist_type", "vod", "-hls_flags", "independent_segments",
+        "-var_stream_map", " ".join(stream_map), "-master_pl_name", "master.m3u8",
+        "-hls_segment_filename", str(output_dir / "%v" / "seg_%03d.ts"), str(output_dir / "%v" / "index.m3u8"),
+    ]
+
+    cmd += ["-map", "[vmp4]"] + (["-map", "0:a:0"] if info.get("has_audio") else [])
+    cmd += ["-c:v", "libx264", "-crf", str(FALLBACK_CRF), "-preset", X264_PRESET, "-threads", str(threads)]
+    cmd += ["-c:a", "aac", "-b:a", "128k"] if info.get("has_audio") else []
+    cmd += ["-movflags", "+faststart", str(output_dir / "fallback.mp4")]
+
+    cmd += ["-map", "[poster]", "-frames:v", "1", "-q:v", "3", str(output_dir / "poster.jpg")]
+    cmd += ["-map", "[thumb]", "-frames:v", "1", "-q:v", "4", str(output_dir / "poster_thumb.jpg")]
+    return cmd
+
+
+def build_stream(uploads_dir: str, name: str, threads: int = FFMPEG_THREADS) -> Dict[str, Any]:
+    """Build the ladder for one upload into a scratch directory, then swap it in"""
+    uploads_path = Path(uploads_dir)
+    source = upload_layout.resolve(uploads_path, name)
+    if source is None:
+        raise FileNotFoundError(f"Upload not found: {name}")
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found on PATH")
+    info = probe(source)
+    rungs = select_rungs(info["height"])
+
+    target_dir = stream_dir(uploads_path, name)
+    scratch = target_dir.with_name(f"{target_dir.name}.partial")
+    shutil.rmtree(scratch, ignore_errors=True)
+    for rung in rungs:
+        (scratch / rung["name"]).mkdir(parents=True, exist_ok=True)
+    started = datetime.utcnow()
+    result = subprocess.run(ladder_command(source, scratch, info, rungs, threads), capture_output=True, text=True, timeout=FFMPEG_TIMEOUT)
+    if result.returncode != 0:
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise RuntimeError(f"ffmpeg failed for {name}: {result.stderr.strip()[-500:]}")
+
+    prefix = target_dir.relative_to(uploads_path).as_posix()
+    manifest = {
+        "name": name,
+        "status": "ready",
+        "source": {"bytes": source.stat().st_size, **info},
+        "hls": f"{prefix}/master.m3u8",
+        "mp4": f"{prefix}/fallback.mp4",
+        "poster": f"{prefix}/poster.jpg",
+        "poster_thumb": f"{prefix}/poster_thumb.jpg",
+        "renditions": [
+            {
+                **rung,
+                "playlist": f"{prefix}/{rung['name']}/index.m3u8",
+                "bytes": sum(path.stat().st_size for path in (scratch / rung["name"]).iterdir()),
+            }
+            for rung in rungs
+        ],
+        "mp4_bytes": (scratch / "fallback.mp4").stat().st_size,
+        "seconds": round((datetime.utcnow() - started).total_seconds(), 1),
+        "generated_at": datetime.utcnow().isoformat(),
+    }
+    with open(scratch / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(target_dir, ignore_errors=True)
+    os.replace(scratch, target_dir)
+    return manifest
+
+
+def build_streams(uploads_dir: str, names: List[str], jobs: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Several videos at once, FFMPEG_THREADS threads each; failures come back as {"name", "error"}"""
+    workers = max(1, min(jobs or default_workers(), len(names) or 1))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    def work(name):
+        try:
+            return build_stream(uploads_dir, name, threads)
+        except Exception as e:
+            logger.warning(f"Video stream build failed for {name}: {e}")
+            return {"name": name, "status": "failed", "error": str(e)}
+
+    # ffmpeg does the work in its own processes, so threads are enough here
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(work, names))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build HLS ladders, MP4 fallbacks and posters for uploaded videos")
+    parser.add_argument("names", nargs="*", help="Uploads names (default: every top-level video)")
+    parser.add_argument("--uploads", default=str(Path(__file__).parent / "uploads"))
+    parser.add_argument("-j", "--jobs", type=int, default=None, help=f"Parallel encodes (default: CPU count / {FFMPEG_THREADS})")
+    parser.add_argument("--json", action="store_true", help="Print the manifests as JSON")
+    args = parser.parse_args(argv)
+
+    uploads_dir = Path(args.uploads)
+    names = [Path(name).name for name in args.names] or sorted(
+        name for name, _ in upload_layout.iter_uploads(uploads_dir) if Path(name).suffix.lower() in (".mp4", ".mov", ".m4v", ".webm")
+    )
+    manifests = build_streams(str(uploads_dir), names, args.jobs)
+    if args.json:
+        print(json.dumps(manifests, indent=2))
+    else:
+        for manifest in manifests:
+            if manifest["status"] == "failed":
+                print(f"❌ {manifest['name']}: {manifest['error']}")
+                continue
+            rungs = ", ".join(f"{rung['name']} {rung['bytes'] / (1024 * 1024):.1f} MB" for rung in manifest["renditions"])
+            print(f"✅ {manifest['name']} ({manifest['seconds']}s): {rungs}; MP4 {manifest['mp4_bytes'] / (1024 * 1024):.1f} MB")
+    return 1 if any(manifest["status"] == "failed" for manifest in manifests) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,8 @@ import { ShieldCheck, Wrench, Factory, Truck, Sparkles, MapPin, Phone, Mail, Arr
 import { Trailer3DViewer } from "./components/3DModelViewer.jsx";
 import { Footer } from "./components/Footer.jsx";
 import { OptimizedImage, OptimizedVideo } from "./components/OptimizedImage.jsx";
+import { assetUrl, useAsset } from "./lib/assetManifest";
+import { applyLinkHeader } from "./lib/preloadHints";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || "http://localhost:8000"; // Use environment variable or fallback to localhost
 const API = `${BACKEND_URL}/api`;
@@ -71,6 +73,8 @@ function useScrollAnimations() {
 
 // -------------- Layout --------------
 function Shell({ children }){
+  // Logical asset from the backend's asset manifest; LOGO until it loads
+  const logo = assetUrl(useAsset('logo', BACKEND_URL)) || LOGO;
   useScrollAnimations();
   const [mobileOpen, setMobileOpen] = useState(false);
   return (
@@ -79,7 +83,7 @@ function Shell({ children }){
         <div className="nav-inner">
           <div className="logo">
             <Link to="/">
-              <img className="logo-img" src={LOGO} alt="Phoenix Trailers" />
+              <img className="logo-img" src={logo} alt="Phoenix Trailers" />
             </Link>
           </div>
 
@@ -107,7 +111,7 @@ function Shell({ children }){
           <div className="mobile-head">
             <div className="logo" style={{gap:8}}>
               <Link to="/" onClick={()=>setMobileOpen(false)}>
-                <img className="logo-img" style={{height:28}} src={LOGO} alt="Phoenix Trailers" />
+                <img className="logo-img" style={{height:28}} src={logo} alt="Phoenix Trailers" />
               </Link>
             </div>
             <button className="btn secondary small" onClick={()=>setMobileOpen(false)} aria-label="Close"><X size={18}/></button>
@@ -248,7 +252,7 @@ function Home(){
   ];
   
   // Fallback to original image if carousel fails
-  const fallbackImage = HERO_BG;
+  const fallbackImage = assetUrl(useAsset('hero', BACKEND_URL)) || HERO_BG;
   
   useEffect(() => {
     let raf;
@@ -1366,8 +1370,8 @@ function Dealers(){
 }
 
 function App(){
-  // warm the API connection for nice first impression
-  useEffect(()=>{ api.get("/").catch(()=>{}); },[]);
+  // warm the API connection for nice first impression; its Link header preloads the critical assets
+  useEffect(()=>{ api.get("/").then((response)=>applyLinkHeader(response.headers.link)).catch(()=>{}); },[]);
   return (
     <BrowserRouter>
       <Routes>
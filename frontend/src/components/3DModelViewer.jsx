@@ -4,8 +4,15 @@ import { GLTFLoader } from 'three/examples/jsm/loaders/GLTFLoader.js';
 import { DRACOLoader } from 'three/examples/jsm/loaders/DRACOLoader.js';
 import { FBXLoader } from 'three/examples/jsm/loaders/FBXLoader.js';
 import { OrbitControls } from 'three/examples/jsm/controls/OrbitControls.js';
+import { fetchAssetManifest } from '../lib/assetManifest';
 
-export function Trailer3DViewer({ modelPath, width = 400, height = 300, zoom = 1 }) {
+const DEFAULT_BACKEND_URL = process.env.REACT_APP_BACKEND_URL || "http://localhost:8000";
+// Must match DECODERS["draco"]["version"] in backend/model_decoders.py, which
+// vendors the decoder under static/draco/<version>/ as well as its fingerprinted path
+const DRACO_VERSION = '1.5.6';
+const DRACO_FALLBACK_PATH = `https://www.gstatic.com/draco/versioned/decoders/${DRACO_VERSION}/`;
+
+export function Trailer3DViewer({ modelPath, width = 400, height = 300, zoom = 1, backendUrl = DEFAULT_BACKEND_URL }) {
   const mountRef = useRef(null);
   const rendererRef = useRef(null);
   const sceneRef = useRef(null);
@@ -21,6 +28,7 @@ export function Trailer3DViewer({ modelPath, width = 400, height = 300, zoom = 1
     if (!mountRef.current) return;
 
     const container = mountRef.current;
+    let disposed = false;
     
     // Clear any existing content
     while (container.firstChild) {
@@ -191,11 +199,22 @@ export function Trailer3DViewer({ modelPath, width = 400, height = 300, zoom = 1
       
       // Configure DRACO loader for compressed models
       const dracoLoader = new DRACOLoader();
-      dracoLoader.setDecoderPath('https://www.gstatic.com/draco/versioned/decoders/1.5.6/');
-      dracoLoader.setDecoderConfig({ type: 'js' });
       gltfLoader.setDRACOLoader(dracoLoader);
       dracoLoaderRef.current = dracoLoader;
       
+      // Self-hosted decoder: the versioned copy until the asset manifest
+      // names the fingerprinted one, gstatic only when the manifest reports
+      // nothing vendored. DRACOLoader reads the path when it first decodes,
+      // so the model download starts right away
+      dracoLoader.setDecoderPath(`${backendUrl}/static/draco/${DRACO_VERSION}/`);
+      dracoLoader.setDecoderConfig({ type: 'wasm' });
+      fetchAssetManifest(backendUrl).then((manifest) => {
+        if (disposed || !manifest) return;
+        const draco = manifest.decoders && manifest.decoders.draco;
+        dracoLoader.setDecoderPath(draco ? draco.path : DRACO_FALLBACK_PATH);
+        dracoLoader.setDecoderConfig({ type: draco ? draco.type : 'js' });
+      });
+      
       gltfLoader.load(
         modelPath,
         (gltf) => {
@@ -296,6 +315,7 @@ export function Trailer3DViewer({ modelPath, width = 400, height = 300, zoom = 1
 
     // Cleanup
     return () => {
+      disposed = true;
       // Stop animation loop
       if (animationIdRef.current) {
         cancelAnimationFrame(animationIdRef.current);
@@ -331,7 +351,7 @@ export function Trailer3DViewer({ modelPath, width = 400, height = 300, zoom = 1
         dracoLoaderRef.current = null;
       }
     };
-  }, [modelPath, width, height, zoom]);
+  }, [modelPath, width, height, zoom, backendUrl]);
 
   return (
     <div style={{ position: 'relative', width, height }}>
@@ -1,8 +1,45 @@
 import React from 'react';
+import { DEFAULT_BACKEND_URL, assetUrl, peekAsset, useAsset } from '../lib/assetManifest';
+
+// Must match VARIANT_WIDTHS in backend/image_variants.py
+const VARIANT_WIDTHS = [320, 480, 640, 960, 1280, 1920];
+const RESIZABLE = /\.(jpe?g|png|webp|avif)$/i;
+
+/**
+ * [requested width, descriptor] pairs for the srcset. Until the original
+ * width is known, the whole ladder: /img never upscales, so an oversized
+ * request just returns the original. Once it is known, widths above the
+ * original are trimmed down to the first one, which serves the original
+ * and is described with its real width (srcset_widths in image_variants.py).
+ * The URLs stay a subset of the full ladder, so an image the browser is
+ * already fetching is not fetched again when the manifest arrives.
+ */
+function srcsetWidths(originalWidth) {
+  if (!originalWidth) return VARIANT_WIDTHS.map((w) => [w, w]);
+  const widths = VARIANT_WIDTHS.filter((w) => w < originalWidth).map((w) => [w, w]);
+  const cap = VARIANT_WIDTHS.find((w) => w >= originalWidth) || VARIANT_WIDTHS[VARIANT_WIDTHS.length - 1];
+  widths.push([cap, Math.min(originalWidth, cap)]);
+  return widths;
+}
+
+/**
+ * Build a srcset that points at the backend /img resize endpoint for
+ * images served from /uploads; the ladder is trimmed to the original width
+ * once the asset manifest supplies it. Returns undefined for anything else
+ * (external URLs, SVGs), so the browser just uses src.
+ */
+function buildSrcSet(src, originalWidth) {
+  if (!src || !src.includes('/uploads/')) return undefined;
+  const [base, name] = src.split('/uploads/');
+  if (!RESIZABLE.test(name)) return undefined;
+  // Some callers pass already-escaped names (e.g. "IMG_5180%20(1).jpg"), others raw ones
+  const decode = (part) => { try { return decodeURIComponent(part); } catch (e) { return part; } };
+  const encoded = name.split('/').map((part) => encodeURIComponent(decode(part))).join('/');
+  return srcsetWidths(originalWidth).map(([w, described]) => `${base}/img/${encoded}?w=${w} ${described}w`).join(', ');
+}
 
 /**
- * OptimizedImage component that automatically uses optimized versions when available
- * Falls back to original images if optimized versions don't exist
+ * OptimizedImage component that serves responsive variants for uploaded images.
  */
 export function OptimizedImage({ 
   src, 
@@ -10,15 +47,40 @@ export function OptimizedImage({
   className = "", 
   style = {}, 
   loading = "lazy",
+  sizes = "100vw",
   onError,
   ...props 
 }) {
-  // For now, just use the original image until we have optimized versions
-  // TODO: Re-enable optimization logic once we have optimized files
-  
+  // Load the upload's best-format copy from the asset manifest. Other srcs
+  // (e.g. pre-migration URLs) resolve through the manifest aliases
+  const isUpload = Boolean(src && src.includes('/uploads/'));
+  const backendUrl = isUpload ? src.split('/uploads/')[0] : DEFAULT_BACKEND_URL;
+  const asset = useAsset(src, backendUrl);
+  const imgRef = React.useRef(null);
+
+  // The manifest entry only replaces src when it is known before the browser
+  // starts fetching: on the first render when the manifest has already
+  // loaded, or later for a lazy image that has not started loading yet.
+  // Swapping after that would download the image twice
+  const [chosen, setChosen] = React.useState(() => ({ src, entry: peekAsset(src, backendUrl) }));
+  const entry = chosen.src === src ? chosen.entry : peekAsset(src, backendUrl);
+  React.useEffect(() => {
+    const img = imgRef.current;
+    const notStarted = loading === 'lazy' && img && !img.currentSrc;
+    const next = entry || (notStarted ? asset : null);
+    if (chosen.src !== src || chosen.entry !== next) setChosen({ src, entry: next });
+  }, [src, entry, asset, loading, chosen]);
+
+  const bestSrc = assetUrl(entry) || src;
+  // /img URLs stay the same once the width is known, so the ladder can be trimmed at any time
+  const srcSet = buildSrcSet(isUpload ? src : entry && entry.url, asset && asset.width);
+
   return (
     <img
-      src={src}
+      ref={imgRef}
+      src={bestSrc}
+      srcSet={srcSet}
+      sizes={srcSet ? sizes : undefined}
       alt={alt}
       className={className}
       style={style}
@@ -29,8 +91,28 @@ export function OptimizedImage({
   );
 }
 
+// Stream manifests (/api/videos/<name>) by upload URL, shared by all players
+const streamCache = new Map();
+
+function fetchStream(src) {
+  if (!src || !src.includes('/uploads/')) return Promise.resolve(null);
+  if (!streamCache.has(src)) {
+    const [base, name] = src.split('/uploads/');
+    streamCache.set(
+      src,
+      fetch(`${base}/api/videos/${name}`)
+        .then((response) => (response.ok ? response.json() : null))
+        .catch(() => null)
+    );
+  }
+  return streamCache.get(src);
+}
+
 /**
- * OptimizedVideo component with performance optimizations
+ * OptimizedVideo component. Once the backend has built the adaptive stream
+ * for an uploaded video, browsers with native HLS (Safari, iOS, Android)
+ * get the bitrate ladder and can start on a slow link right away; everyone
+ * else falls back to the faststart MP4 (or the original src before then).
  */
 export function OptimizedVideo({ 
   src, 
@@ -40,17 +122,26 @@ export function OptimizedVideo({
   preload = "metadata",
   ...props 
 }) {
-  // For now, just use the original video until we have optimized versions
-  // TODO: Re-enable optimization logic once we have optimized files
-  
+  const [stream, setStream] = React.useState(null);
+
+  React.useEffect(() => {
+    let active = true;
+    fetchStream(src).then((manifest) => { if (active) setStream(manifest); });
+    return () => { active = false; };
+  }, [src]);
+
+  const urls = stream && stream.urls;
   return (
     <video
+      key={urls ? 'stream' : 'source'}
       className={className}
       style={style}
       preload={preload}
+      poster={poster || (urls ? urls.poster : undefined)}
       {...props}
     >
-      <source src={src} type="video/mp4" />
+      {urls && <source src={urls.hls} type="application/vnd.apple.mpegurl" />}
+      <source src={urls ? urls.mp4 : src} type="video/mp4" />
       Your browser does not support the video tag.
     </video>
   );
@@ -0,0 +1,75 @@
+import { useEffect, useState } from "react";
+
+// Versioned map of uploads (and aliases such as "hero" or a pre-migration URL)
+// to their best variants; see backend/asset_manifest.py. Fetched once per
+// backend; the server answers repeat visits with a 304 via its ETag.
+const manifestCache = new Map();
+// Manifests that have arrived, so components mounting later resolve on their first render
+const loadedManifests = new Map();
+
+// The backend whose manifest resolves references that are not /uploads/ URLs
+// (e.g. external URLs aliased by migrate_images.py)
+export const DEFAULT_BACKEND_URL = process.env.REACT_APP_BACKEND_URL || "http://localhost:8000";
+
+export function fetchAssetManifest(backendUrl) {
+  if (!manifestCache.has(backendUrl)) {
+    manifestCache.set(
+      backendUrl,
+      fetch(`${backendUrl}/api/asset-manifest.json`)
+        .then((response) => (response.ok ? response.json() : null))
+        .catch(() => null)
+        .then((manifest) => {
+          loadedManifests.set(backendUrl, manifest);
+          return manifest;
+        })
+    );
+  }
+  return manifestCache.get(backendUrl);
+}
+
+function uploadName(src) {
+  const name = src.split('/uploads/')[1];
+  try { return decodeURIComponent(name); } catch (e) { return name; }
+}
+
+/**
+ * Manifest entry for an alias, an uploads name, or an /uploads/ URL.
+ * Returns null when the manifest does not know the reference.
+ */
+export function resolveAsset(manifest, ref) {
+  if (!manifest || !ref) return null;
+  let name = manifest.aliases[ref] || ref;
+  if (!manifest.assets[name] && name.includes('/uploads/')) name = uploadName(name);
+  return manifest.assets[name] || null;
+}
+
+/** URL to load for a reference: the best-format copy when there is one */
+export function assetUrl(entry) {
+  return entry ? (entry.best ? entry.best.url : entry.url) : null;
+}
+
+/** Manifest entry for `ref` if that backend's manifest has already loaded, else null */
+export function peekAsset(ref, backendUrl) {
+  if (!ref || !backendUrl) return null;
+  return resolveAsset(loadedManifests.get(backendUrl), ref);
+}
+
+/**
+ * Manifest entry for `ref` on the given backend, once the manifest has
+ * loaded (on the first render when it already has). Until then, and for
+ * unknown references, the result is null and callers use their fallback.
+ */
+export function useAsset(ref, backendUrl) {
+  const [resolved, setResolved] = useState(() => ({ ref, entry: peekAsset(ref, backendUrl) }));
+
+  useEffect(() => {
+    if (!ref || !backendUrl) return undefined;
+    let active = true;
+    fetchAssetManifest(backendUrl).then((manifest) => {
+      if (active) setResolved({ ref, entry: resolveAsset(manifest, ref) });
+    });
+    return () => { active = false; };
+  }, [ref, backendUrl]);
+
+  return resolved.ref === ref ? resolved.entry : null;
+}
@@ -0,0 +1,34 @@
+// Applies the backend's critical-asset Link header (see backend/critical_assets.py)
+// as <link> elements, so the hero, logo, first model and Draco decoder start
+// downloading before the components that use them mount.
+const LINK_ENTRY = /<([^>]+)>((?:\s*;\s*[a-z]+(?:=(?:"[^"]*"|[^;,]*))?)*)/gi;
+const LINK_PARAM = /;\s*([a-z]+)(?:=(?:"([^"]*)"|([^;,]*)))?/gi;
+const applied = new Set();
+
+export function parseLinkHeader(header) {
+  const links = [];
+  for (const [, href, params] of header.matchAll(LINK_ENTRY)) {
+    const attributes = { href };
+    for (const [, key, quoted, bare] of params.matchAll(LINK_PARAM)) {
+      attributes[key.toLowerCase()] = quoted !== undefined ? quoted : (bare || '').trim();
+    }
+    links.push(attributes);
+  }
+  return links;
+}
+
+export function applyLinkHeader(header) {
+  if (!header || typeof document === 'undefined') return;
+  for (const { href, rel, ...attributes } of parseLinkHeader(header)) {
+    if (!rel || applied.has(`${rel} ${href}`)) continue;
+    applied.add(`${rel} ${href}`);
+    const link = document.createElement('link');
+    link.rel = rel;
+    link.href = href;
+    if (attributes.as) link.as = attributes.as;
+    if (attributes.type) link.type = attributes.type;
+    if (attributes.crossorigin !== undefined) link.crossOrigin = attributes.crossorigin || 'anonymous';
+    if (attributes.fetchpriority) link.setAttribute('fetchpriority', attributes.fetchpriority);
+    document.head.appendChild(link);
+  }
+}
@@ -1,71 +1,227 @@
 #!/usr/bin/env python3
 """
 Image Migration Script for Phoenix Trailers Website
-Downloads all external images and updates frontend to use local paths
+Downloads all external images and aliases their URLs to the local copies
+in the asset manifest (backend/asset_aliases.json)
+
+Downloads run concurrently over one pooled HTTP session and stream straight
+to disk. Failed requests are retried with exponential backoff. Progress is
+kept in a state file (URL -> filename, ETag, Last-Modified, size), so an
+interrupted run resumes where it stopped. Files already migrated are
+revalidated with a conditional request and skipped when unchanged.
+
+    python migrate_images.py                          # URLs found in App.js
+    python migrate_images.py --urls-file media.txt -j 16
 """
 
+import argparse
+import hashlib
+import json
 import os
-import requests
+import random
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import urlparse
-import hashlib
+
+import requests
+from requests.adapters import HTTPAdapter
 
 # Configuration
 FRONTEND_FILE = "frontend/src/App.js"
 UPLOADS_DIR = Path("backend/uploads")
 MIGRATED_DIR = UPLOADS_DIR / "migrated"
+STATE_FILE = Path("backend/data/migration_state.json")
+ALIASES_FILE = Path("backend/asset_aliases.json")
+
+DEFAULT_WORKERS = 8
+TIMEOUT = (10, 60)  # connect, read (seconds)
+CHUNK_SIZE = 256 * 1024
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # seconds; doubled per attempt, plus jitter
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+SAVE_EVERY = 20  # completed downloads between state-file saves
+
+
+class RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def make_session(workers):
+    """One session for every download, with a connection pool per host sized to the workers"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "phoenix-trailers-migration/1.0"
+    return session
+
 
-def download_image(url, filename):
-    """Download an image from URL and save it locally"""
+class MigrationState:
+    """
+    JSON map of URL -> {"filename", "etag", "last_modified", "bytes"} for
+    finished downloads. Written atomically, so a killed run loses at most
+    the downloads since the last save (they are revalidated next time).
+    """
+
+    def __init__(self, state_file):
+        self.state_file = Path(state_file)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def record(self, url, entry):
+        with self._lock:
+            self.entries[url] = entry
+            self._unsaved += 1
+            due = self._unsaved >= SAVE_EVERY
+        if due:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_file.with_name(f"{self.state_file.name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.state_file)
+            self._unsaved = 0
+
+
+def retry_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        return retry_after
+    return BACKOFF_BASE * (2 ** attempt) * (1 + random.random() / 2)
+
+
+def parse_retry_after(value):
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        # Create directory if it doesn't exist
-        MIGRATED_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Save the image
-        filepath = MIGRATED_DIR / filename
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
-        
-        print(f"✅ Downloaded: {filename}")
-        return f"/uploads/migrated/{filename}"
-    except Exception as e:
-        print(f"❌ Failed to download {url}: {e}")
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
         return None
 
+
+def fetch(session, url, filepath, known=None):
+    """
+    One download attempt. Returns "not_modified" or "downloaded" with the
+    validators to remember; raises RetryableError for transient failures.
+    """
+    headers = {}
+    if known and filepath.exists() and filepath.stat().st_size == known.get("bytes"):
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+    try:
+        with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+            if response.status_code == 304:
+                return "not_modified", known
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableError(f"HTTP {response.status_code}", parse_retry_after(response.headers.get("Retry-After")))
+            response.raise_for_status()
+
+            # Stream to a sibling file and rename, so a partial download never looks finished
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = filepath.with_name(f"{filepath.name}.part")
+            size = 0
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            expected = response.headers.get("Content-Length")
+            if expected is not None and "Content-Encoding" not in response.headers and int(expected) != size:
+                tmp_path.unlink(missing_ok=True)
+                raise RetryableError(f"Truncated download ({size} of {expected} bytes)")
+            os.replace(tmp_path, filepath)
+            return "downloaded", {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "bytes": size,
+            }
+    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+        raise RetryableError(f"{type(e).__name__}: {e}")
+
+
+def download_image(session, url, filename, state, dest_dir=MIGRATED_DIR):
+    """Download (or revalidate) one image with retries; returns a result dict, never raises"""
+    filepath = Path(dest_dir) / filename
+    known = state.get(url)
+    result = {"url": url, "filename": filename}
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            status, validators = fetch(session, url, filepath, known)
+        except RetryableError as e:
+            if attempt == MAX_RETRIES:
+                return {**result, "status": "failed", "error": str(e), "attempts": attempt + 1}
+            time.sleep(retry_delay(attempt, e.retry_after))
+            continue
+        except Exception as e:
+            return {**result, "status": "failed", "error": f"{type(e).__name__}: {e}", "attempts": attempt + 1}
+        if status == "downloaded":
+            state.record(url, {"filename": filename, **validators})
+        return {**result, "status": status, "bytes": validators["bytes"], "attempts": attempt + 1}
+
+
+def migrate(urls, dest_dir=MIGRATED_DIR, state_file=STATE_FILE, workers=DEFAULT_WORKERS, on_result=None):
+    """Download every URL concurrently; returns counts and the URL -> uploads name mapping"""
+    state = MigrationState(state_file)
+    summary = {"downloaded": 0, "not_modified": 0, "failed": 0, "bytes": 0, "mapping": {}, "errors": {}}
+    session = make_session(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(download_image, session, url, generate_filename(url), state, dest_dir) for url in urls]
+            for future in as_completed(futures):
+                result = future.result()
+                summary[result["status"]] += 1
+                if result["status"] == "failed":
+                    summary["errors"][result["url"]] = result["error"]
+                else:
+                    summary["bytes"] += result["bytes"] if result["status"] == "downloaded" else 0
+                    summary["mapping"][result["url"]] = f"{Path(dest_dir).name}/{result['filename']}"
+                if on_result:
+                    on_result(result)
+    finally:
+        session.close()
+        state.save()
+    return summary
+
 def extract_image_urls_from_js(file_path):
     """Extract all image URLs from the JavaScript file"""
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
-    
+
     # Find all image URLs (both http and https)
     url_pattern = r'https?://[^\s"\'`]+\.(?:jpg|jpeg|png|gif|svg|webp)'
     urls = re.findall(url_pattern, content)
-    
+
     # Remove duplicates while preserving order
-    unique_urls = []
-    seen = set()
-    for url in urls:
-        if url not in seen:
-            unique_urls.append(url)
-            seen.add(url)
-    
-    return unique_urls
+    return list(dict.fromkeys(urls))
 
 def generate_filename(url):
     """Generate a unique filename for the image"""
     parsed = urlparse(url)
     original_name = os.path.basename(parsed.path)
-    
+
     # Create a hash of the URL to ensure uniqueness
     url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-    
+
     # Get file extension
     ext = os.path.splitext(original_name)[1] or '.jpg'
-    
+
     # Create descriptive filename
     if 'hero' in url.lower():
         base_name = 'hero_background'
@@ -85,74 +241,78 @@ def generate_filename(url):
         base_name = 'towable_screen'
     else:
         base_name = 'image'
-    
+
     return f"{base_name}_{url_hash}{ext}"
 
-def update_frontend_code(file_path, url_mapping):
-    """Update the frontend code to use local image paths"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Replace each external URL with local path
-    for external_url, local_path in url_mapping.items():
-        if local_path:  # Only replace if download was successful
-            content = content.replace(external_url, local_path)
-            print(f"🔄 Replaced: {external_url} → {local_path}")
-    
-    # Write updated content back to file
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
-    print(f"📝 Updated frontend code: {file_path}")
-
-def main():
+def record_aliases(url_mapping, aliases_file=ALIASES_FILE):
+    """
+    Alias each original URL to its migrated upload in the asset manifest;
+    OptimizedImage looks srcs that are not /uploads/ URLs up in the manifest
+    aliases, so old URLs load the local copies without editing App.js
+    """
+    aliases_file = Path(aliases_file)
+    try:
+        with open(aliases_file, 'r', encoding='utf-8') as f:
+            aliases = json.load(f).get("aliases", {})
+    except FileNotFoundError:
+        aliases = {}
+    aliases.update(url_mapping)
+    tmp_path = aliases_file.with_name(f"{aliases_file.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"aliases": dict(sorted(aliases.items()))}, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, aliases_file)
+    print(f"📝 Recorded {len(url_mapping)} aliases in {aliases_file}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download external images into uploads/migrated")
+    parser.add_argument("--urls-file", help="Text file with one image URL per line (default: URLs found in App.js)")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_WORKERS, help="Concurrent downloads")
+    parser.add_argument("--state", default=str(STATE_FILE), help="Resume state file")
+    parser.add_argument("--no-aliases", action="store_true", help="Do not record URL aliases for the asset manifest")
+    args = parser.parse_args(argv)
+
     print("🚀 Starting Image Migration for Phoenix Trailers Website")
     print("=" * 60)
-    
-    # Extract all image URLs from frontend
-    print("🔍 Extracting image URLs from frontend code...")
-    image_urls = extract_image_urls_from_js(FRONTEND_FILE)
-    
+
+    if args.urls_file:
+        with open(args.urls_file, 'r', encoding='utf-8') as f:
+            image_urls = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+    else:
+        print("🔍 Extracting image URLs from frontend code...")
+        image_urls = extract_image_urls_from_js(FRONTEND_FILE)
+
     if not image_urls:
-        print("❌ No image URLs found in frontend code")
+        print("❌ No image URLs found")
         return
-    
-    print(f"📸 Found {len(image_urls)} unique image URLs")
+
+    print(f"📸 Found {len(image_urls)} unique image URLs ({args.jobs} concurrent downloads)")
     print()
-    
-    # Download each image
-    url_mapping = {}
-    successful_downloads = 0
-    
-    for i, url in enumerate(image_urls, 1):
-        print(f"[{i}/{len(image_urls)}] Processing: {url}")
-        
-        filename = generate_filename(url)
-        local_path = download_image(url, filename)
-        
-        if local_path:
-            url_mapping[url] = local_path
-            successful_downloads += 1
-        
-        print()
-    
-    # Update frontend code
-    if successful_downloads > 0:
-        print("🔄 Updating frontend code to use local images...")
-        update_frontend_code(FRONTEND_FILE, url_mapping)
-        
-        print()
-        print("🎉 Migration Complete!")
-        print(f"✅ Successfully downloaded: {successful_downloads}/{len(image_urls)} images")
-        print(f"📁 Images saved to: {MIGRATED_DIR}")
-        print(f"🔄 Frontend updated: {FRONTEND_FILE}")
-        print()
-        print("💡 Next steps:")
-        print("   1. Restart your backend server")
-        print("   2. Refresh your frontend")
-        print("   3. All images should now load from your local server!")
-    else:
-        print("❌ No images were successfully downloaded")
+
+    done = 0
+
+    def report(result):
+        nonlocal done
+        done += 1
+        if result["status"] == "failed":
+            print(f"[{done}/{len(image_urls)}] ❌ {result['url']}: {result['error']}")
+        elif result["status"] == "not_modified":
+            print(f"[{done}/{len(image_urls)}] ⏭️  Unchanged: {result['filename']}")
+        else:
+            print(f"[{done}/{len(image_urls)}] ✅ Downloaded: {result['filename']} ({result['bytes'] / 1024:.0f} KB)")
+
+    started = time.time()
+    summary = migrate(image_urls, MIGRATED_DIR, args.state, args.jobs, on_result=report)
+    print()
+    print(f"🎉 Migration finished in {time.time() - started:.1f}s")
+    print(f"✅ Downloaded: {summary['downloaded']} ({summary['bytes'] / (1024 * 1024):.1f} MB), "
+          f"unchanged: {summary['not_modified']}, failed: {summary['failed']}")
+    print(f"📁 Images saved to: {MIGRATED_DIR}")
+
+    if summary["mapping"] and not args.no_aliases:
+        record_aliases(summary["mapping"])
+    if summary["failed"]:
+        print("💡 Re-run to retry the failed downloads; finished ones are kept")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script to verify concurrent image migration against a local HTTP stand-in
+"""
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import migrate_images
+
+FILES = {f"/media/photo_{i}.jpg": bytes([i]) * (50_000 + i) for i in range(12)}
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    """Serves FILES with ETags; /media/flaky.jpg fails twice before succeeding"""
+
+    requests_seen = []
+    flaky_failures = 0
+
+    def do_GET(self):
+        type(self).requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/media/flaky.jpg":
+            if type(self).flaky_failures < 2:
+                type(self).flaky_failures += 1
+                self.send_response(503)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = b"flaky"
+        elif self.path in FILES:
+            body = FILES[self.path]
+        else:
+            self.send_error(404)
+            return
+        etag = f'"{len(body)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_migrate():
+    """Test concurrent download, retries, ETag revalidation and resume"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MediaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [base + path for path in FILES] + [base + "/media/flaky.jpg", base + "/media/missing.jpg"]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest, state_file = Path(tmp) / "migrated", Path(tmp) / "state.json"
+
+            first = migrate_images.migrate(urls, dest, state_file, workers=4)
+            assert first["downloaded"] == 13 and first["failed"] == 1
+            assert list(first["errors"]) == [base + "/media/missing.jpg"]
+            for path, body in FILES.items():
+                assert (dest / migrate_images.generate_filename(base + path)).read_bytes() == body
+            assert not list(dest.glob("*.part"))
+
+            # Second run: everything revalidated with If-None-Match, nothing re-downloaded
+            MediaHandler.requests_seen.clear()
+            second = migrate_images.migrate(urls, dest, state_file, workers=4)
+            assert second["not_modified"] == 13 and second["downloaded"] == 0
+            assert all(etag for path, etag in MediaHandler.requests_seen if path != "/media/missing.jpg")
+
+            # A file lost from disk is fetched again
+            (dest / migrate_images.generate_filename(urls[0])).unlink()
+            assert migrate_images.migrate(urls[:1], dest, state_file)["downloaded"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("   ✅ Migrated concurrently with retries and resume")
+
+
+if __name__ == "__main__":
+    print("=== Testing Image Migration ===")
+    test_migrate()
+    print("=== Test Complete ===")